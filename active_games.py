@@ -0,0 +1,268 @@
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Set, Tuple
+
+from bounded_store import BoundedStore
+
+
+class ActiveGameRegistry:
+    """Index of live games by participant: user_id -> {game_key: game_type}.
+
+    Every session store registers its participants here on start and releases
+    them on finish, so "is this user busy?" and "clear this user's games" are
+    dict lookups instead of scans over every session and pending challenge.
+    """
+
+    def __init__(self):
+        self._by_user: Dict[int, Dict[str, str]] = {}
+        self._by_key: Dict[str, Set[int]] = {}
+        self._timeouts_by_user: Dict[int, Set[str]] = {}
+        self._timeout_users: Dict[str, Set[int]] = {}
+
+    def register(self, game_key: str, game_type: str, user_ids: Iterable[Optional[int]]):
+        """Register (or re-register) the participants of a game."""
+        self.release(game_key)
+        users = {uid for uid in user_ids if uid}
+        if not users:
+            return
+        self._by_key[game_key] = users
+        for uid in users:
+            self._by_user.setdefault(uid, {})[game_key] = game_type
+
+    def release(self, game_key: str):
+        """Drop a finished game from every participant's entry."""
+        for uid in self._by_key.pop(game_key, ()):
+            games = self._by_user.get(uid)
+            if games is None:
+                continue
+            games.pop(game_key, None)
+            if not games:
+                del self._by_user[uid]
+
+    def get(self, user_id: int) -> Optional[Tuple[str, str]]:
+        """Return (game_type, game_key) of the user's active game, if any."""
+        games = self._by_user.get(user_id)
+        if not games:
+            return None
+        game_key, game_type = next(iter(games.items()))
+        return game_type, game_key
+
+    def games_for(self, user_id: int) -> Dict[str, str]:
+        """Return a copy of {game_key: game_type} for every game the user is in."""
+        return dict(self._by_user.get(user_id, {}))
+
+    def __contains__(self, user_id: int) -> bool:
+        return user_id in self._by_user
+
+    def __len__(self) -> int:
+        return len(self._by_user)
+
+    # --- Timeout keys, tracked per user so a reset cancels exactly that user's timers ---
+
+    def track_timeout(self, timeout_key: str, user_ids: Iterable[Optional[int]]):
+        self.untrack_timeout(timeout_key)
+        users = {uid for uid in user_ids if uid}
+        if not users:
+            return
+        self._timeout_users[timeout_key] = users
+        for uid in users:
+            self._timeouts_by_user.setdefault(uid, set()).add(timeout_key)
+
+    def untrack_timeout(self, timeout_key: str):
+        for uid in self._timeout_users.pop(timeout_key, ()):
+            keys = self._timeouts_by_user.get(uid)
+            if keys is None:
+                continue
+            keys.discard(timeout_key)
+            if not keys:
+                del self._timeouts_by_user[uid]
+
+    def timeout_keys_for(self, user_id: int) -> Set[str]:
+        return set(self._timeouts_by_user.get(user_id, ()))
+
+
+def single_player(key: Any, value: Any) -> Tuple[int]:
+    """Participants of a session stored under the player's user_id."""
+    return (key,)
+
+
+def connect4_players(key: Any, game: Any) -> Tuple[int, int]:
+    return (game.player1_id, game.player2_id)
+
+
+def challenge_participants(key: Any, challenge: Dict[str, Any]) -> Tuple[Optional[int], ...]:
+    return (challenge.get('challenger'), challenge.get('opponent'), challenge.get('player'))
+
+
+class TrackedSessionDict(BoundedStore):
+    """A session dict that keeps an ActiveGameRegistry in sync with its contents.
+
+    Assigning a session registers its participants; deleting or popping it
+    releases them. Re-assigning the same key (e.g. after an opponent accepts a
+    challenge) refreshes the participant list. With a ttl, sessions nobody
+    touched for that long (orphans whose timeout never fired) are dropped and
+    released the same way.
+    """
+
+    def __init__(self, registry: ActiveGameRegistry, game_type: str,
+                 participants: Callable[[Any, Any], Iterable[Optional[int]]] = single_player,
+                 ttl: Optional[float] = None, maxsize: Optional[int] = None,
+                 on_evict: Optional[Callable[[Hashable, Any, str], None]] = None):
+        super().__init__(f"{game_type}_sessions", maxsize=maxsize, ttl=ttl, on_evict=on_evict)
+        self._registry = registry
+        self._game_type = game_type
+        self._participants = participants
+
+    def _registry_key(self, key: Any) -> str:
+        return f"{self._game_type}:{key}"
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self._registry.register(self._registry_key(key), self._game_type, self._participants(key, value))
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._registry.release(self._registry_key(key))
+
+    def pop(self, key, *default):
+        if key in self:
+            self._registry.release(self._registry_key(key))
+        return super().pop(key, *default)
+
+    def clear(self):
+        for key in list(self):
+            self._registry.release(self._registry_key(key))
+        super().clear()
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def reset(self, items: Dict[Any, Any]):
+        """Replace the whole contents (e.g. after reloading from storage)."""
+        self.clear()
+        self.update(items)
+
+    def refresh(self, key: Any):
+        """Re-read participants after the stored value was mutated in place."""
+        if key in self:
+            self._registry.register(self._registry_key(key), self._game_type, self._participants(key, self[key]))
+
+
+def awaited_emoji_user(challenge: Dict[str, Any]) -> Optional[int]:
+    """Return the user whose dice emoji a challenge is currently waiting for."""
+    if challenge.get('waiting_for_challenger_emoji'):
+        return challenge.get('challenger')
+    if challenge.get('waiting_for_emoji'):
+        return challenge.get('opponent') or challenge.get('player')
+    return None
+
+
+class PendingChallengeDict(TrackedSessionDict):
+    """pending_pvp store that also indexes challenges awaiting a dice emoji.
+
+    The index is keyed by (chat_id, emoji, awaited_user_id), so an incoming
+    dice message is matched (or rejected) with one dict lookup. Challenges are
+    re-indexed whenever they are assigned, which every state transition does.
+    """
+
+    def __init__(self, registry: ActiveGameRegistry, game_type: str = "pvp",
+                 participants: Callable[[Any, Any], Iterable[Optional[int]]] = challenge_participants,
+                 save: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+                 delete: Optional[Callable[[str], None]] = None,
+                 on_set: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+                 on_remove: Optional[Callable[[str], None]] = None):
+        super().__init__(registry, game_type, participants)
+        self._emoji_index: Dict[Tuple[Any, str, int], Dict[str, None]] = {}
+        self._emoji_key_by_challenge: Dict[str, Tuple[Any, str, int]] = {}
+        self._save = save
+        self._delete = delete
+        self._on_set = on_set
+        self._on_remove = on_remove
+        self._loading = False
+
+    def _unindex(self, challenge_id: str):
+        index_key = self._emoji_key_by_challenge.pop(challenge_id, None)
+        if index_key is None:
+            return
+        waiting = self._emoji_index.get(index_key)
+        if waiting is not None:
+            waiting.pop(challenge_id, None)
+            if not waiting:
+                del self._emoji_index[index_key]
+
+    def _index(self, challenge_id: str, challenge: Dict[str, Any]):
+        self._unindex(challenge_id)
+        user_id = awaited_emoji_user(challenge)
+        emoji = challenge.get('emoji')
+        if not user_id or not emoji:
+            return
+        index_key = (challenge.get('chat_id'), emoji, user_id)
+        self._emoji_index.setdefault(index_key, {})[challenge_id] = None
+        self._emoji_key_by_challenge[challenge_id] = index_key
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self._index(key, value)
+        if self._save and not self._loading:
+            self._save(key, value)
+        if self._on_set:
+            self._on_set(key, value)
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._removed(key)
+
+    def pop(self, key, *default):
+        present = key in self
+        value = super().pop(key, *default)
+        if present:
+            self._removed(key)
+        return value
+
+    def _removed(self, key):
+        self._unindex(key)
+        if self._delete:
+            self._delete(key)
+        if self._on_remove:
+            self._on_remove(key)
+
+    def clear(self):
+        if self._on_remove:
+            for key in list(self):
+                self._on_remove(key)
+        self._emoji_index.clear()
+        self._emoji_key_by_challenge.clear()
+        super().clear()
+
+    def load(self, items: Dict[str, Dict[str, Any]]):
+        """Populate from storage without writing the records back."""
+        self._loading = True
+        try:
+            self.update(items)
+        finally:
+            self._loading = False
+
+    def persist(self, key: str):
+        """Write a challenge that was mutated in place without being re-assigned."""
+        if key in self:
+            self[key] = self[key]
+
+    def refresh(self, key: Any):
+        super().refresh(key)
+        if key in self:
+            self._index(key, self[key])
+
+    def find_awaiting_emoji(self, chat_id: Any, emoji: str, user_id: int) -> Optional[str]:
+        """Return the id of a challenge waiting for this user's emoji in this chat."""
+        waiting = self._emoji_index.get((chat_id, emoji, user_id))
+        if not waiting:
+            return None
+        return next(iter(waiting))
+
+    @property
+    def awaiting_emoji_count(self) -> int:
+        return len(self._emoji_key_by_challenge)
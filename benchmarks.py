@@ -0,0 +1,197 @@
+"""Micro-benchmarks for the bot's hot paths.
+
+Usage: python benchmarks.py [name ...]
+
+With no arguments every benchmark runs. Database benchmarks use a throwaway
+SQLite file unless DATABASE_URL is already set.
+"""
+import os
+import sys
+import tempfile
+import timeit
+
+if not os.getenv("DATABASE_URL"):
+    _bench_dir = tempfile.mkdtemp(prefix="casino_bench_")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_bench_dir, 'bench.db')}"
+
+
+def _report(label: str, seconds: float, calls: int):
+    print(f"  {label:<40} {seconds / calls * 1e6:10.1f} us/call")
+
+
+def bench_queries(calls: int = 2000):
+    """ORM query construction vs the pre-built Core statements for the hot lookups."""
+    import sql_database
+    from sql_database import SQLDatabaseManager, User, HouseConfig, Game
+
+    db = SQLDatabaseManager()
+    user_id = 900000001
+    db.get_user(user_id)
+    game_id = db.record_game(user_id, "dice", 1.0, 1.0, True)
+
+    def orm_get_user():
+        session = db.get_session()
+        try:
+            session.query(User).filter_by(user_id=user_id).first()
+        finally:
+            session.close()
+
+    def orm_get_config():
+        session = db.get_session()
+        try:
+            session.query(HouseConfig).filter_by(key="house_balance").first()
+        finally:
+            session.close()
+
+    def orm_get_game():
+        session = db.get_session()
+        try:
+            session.query(Game).filter_by(id=game_id).first()
+        finally:
+            session.close()
+
+    def orm_latest_games():
+        session = db.get_session()
+        try:
+            session.query(Game).order_by(Game.id.desc()).limit(20).all()
+        finally:
+            session.close()
+
+    print(f"queries ({calls} calls each)")
+    pairs = [
+        ("user by id", orm_get_user, lambda: db.get_user(user_id)),
+        ("house_config by key", orm_get_config, db.get_house_balance),
+        ("game by id", orm_get_game, lambda: db.get_bet_details(game_id)),
+        ("latest 20 games", orm_latest_games, lambda: db.get_live_bets(20)),
+    ]
+    for label, before, after in pairs:
+        _report(f"{label} [orm]", timeit.timeit(before, number=calls), calls)
+        _report(f"{label} [core]", timeit.timeit(after, number=calls), calls)
+    print(f"  compiled cache: {sql_database.get_statement_cache_stats()}")
+
+
+def bench_router(calls: int = 200000):
+    """Callback routing: linear startswith walk over every route vs CallbackRouter.resolve."""
+    from main import GranTeseroCasinoBot
+
+    router = GranTeseroCasinoBot("0:bench").callback_router
+    # Old chain order: exact values and prefixes tested one after another
+    chain = [(route.key, route.exact) for route in router.routes()]
+
+    def linear(data):
+        for key, exact in chain:
+            if (data == key) if exact else data.startswith(key):
+                return key
+        return None
+
+    print(f"router ({len(router)} routes, {calls} calls each)")
+    for data in ("dice_bot_5.00", "back_to_menu", "connect4_drop_abc123_4", "hilo_cashout_12345", "unknown_button"):
+        _report(f"{data} [linear]", timeit.timeit(lambda: linear(data), number=calls), calls)
+        _report(f"{data} [router]", timeit.timeit(lambda: router.resolve(data), number=calls), calls)
+
+
+def bench_keyboards(calls: int = 5000):
+    """Grid keyboards rebuilt from scratch on every tap vs KeyboardRenderer reusing unchanged tiles."""
+    from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+    from main import GranTeseroCasinoBot
+    from mines import MinesGame
+    from keno import KenoGame
+    from connect4 import Connect4Game
+
+    bot = GranTeseroCasinoBot("0:bench")
+    user_id = 900000002
+
+    # The builders as they were before the renderer: every button and callback string made anew
+    def scratch_mines(game):
+        grid = game.get_grid_display(reveal_all=game.game_over)
+        keyboard = []
+        for row in range(5):
+            row_buttons = []
+            for col in range(5):
+                pos = row * 5 + col
+                if game.game_over or pos in game.revealed_tiles:
+                    row_buttons.append(InlineKeyboardButton(grid[row][col], callback_data="mines_noop"))
+                else:
+                    row_buttons.append(InlineKeyboardButton(grid[row][col], callback_data=f"mines_reveal_{game.user_id}_{pos}"))
+            keyboard.append(row_buttons)
+        return InlineKeyboardMarkup(keyboard)
+
+    def scratch_keno(game):
+        keyboard = []
+        for row in range(5):
+            row_buttons = []
+            for col in range(8):
+                num = row * 8 + col + 1
+                label = f"⭐{num}" if num in game.picked_numbers else "\u3164"
+                row_buttons.append(InlineKeyboardButton(label, callback_data=f"keno_pick_{game.user_id}_{num}"))
+            keyboard.append(row_buttons)
+        return InlineKeyboardMarkup(keyboard)
+
+    def scratch_connect4(game, game_id):
+        valid_cols = game.get_valid_columns()
+        keyboard = []
+        for row in range(6):
+            row_buttons = []
+            for col in range(7):
+                cell = game.board[row][col]
+                if cell == game.EMPTY:
+                    data = f"connect4_drop_{game_id}_{col}" if col in valid_cols else "connect4_noop"
+                    row_buttons.append(InlineKeyboardButton("\u3164", callback_data=data))
+                else:
+                    row_buttons.append(InlineKeyboardButton("🔴" if cell == game.PLAYER1 else "🟡", callback_data="connect4_noop"))
+            keyboard.append(row_buttons)
+        return InlineKeyboardMarkup(keyboard)
+
+    # Each "tap" changes one tile, like a real game; toggling keeps the board from filling up
+    mines = MinesGame(user_id, 1.0, 3)
+    safe = [pos for pos in range(25) if pos not in mines.mine_positions][:6]
+    mines.revealed_tiles = safe[:5]
+
+    def mines_tap():
+        if safe[5] in mines.revealed_tiles:
+            mines.revealed_tiles.remove(safe[5])
+        else:
+            mines.revealed_tiles.append(safe[5])
+
+    keno = KenoGame(user_id, 1.0)
+    keno.picked_numbers = {3, 11, 27}
+
+    def keno_tap():
+        keno.picked_numbers ^= {19}
+
+    connect4 = Connect4Game(user_id, user_id + 1, 1.0)
+    for col in (3, 3, 4, 2):
+        connect4.drop_piece(col, connect4.PLAYER1 if col != 4 else connect4.PLAYER2)
+
+    def connect4_tap():
+        connect4.board[0][6] = connect4.PLAYER2 if connect4.board[0][6] == connect4.EMPTY else connect4.EMPTY
+
+    print(f"keyboards ({calls} taps each)")
+    cases = [
+        ("mines 5x5", mines_tap, lambda: scratch_mines(mines), lambda: bot._build_mines_grid_keyboard(mines)),
+        ("keno 5x8", keno_tap, lambda: scratch_keno(keno), lambda: bot._build_keno_grid_keyboard(keno)),
+        ("connect4 6x7", connect4_tap, lambda: scratch_connect4(connect4, "bench"),
+         lambda: bot._build_connect4_keyboard(connect4, "bench")),
+    ]
+    for label, tap, before, after in cases:
+        if before().inline_keyboard != after().inline_keyboard[:len(before().inline_keyboard)]:
+            print(f"  {label}: cached keyboard differs from the scratch build!")
+        _report(f"{label} [scratch]", timeit.timeit(lambda: (tap(), before()), number=calls), calls)
+        _report(f"{label} [cached]", timeit.timeit(lambda: (tap(), after()), number=calls), calls)
+    print(f"  renderer: {bot.keyboards.stats()}")
+
+
+BENCHMARKS = {
+    "queries": bench_queries,
+    "router": bench_router,
+    "keyboards": bench_keyboards,
+}
+
+
+if __name__ == "__main__":
+    names = sys.argv[1:] or list(BENCHMARKS)
+    for name in names:
+        if name not in BENCHMARKS:
+            print(f"Unknown benchmark: {name} (available: {', '.join(BENCHMARKS)})")
+            continue
+        BENCHMARKS[name]()
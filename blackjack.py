@@ -22,6 +22,14 @@ class Card:
         """Returns a human-readable and attractive card representation."""
         return f"[{self.rank}{CARD_FACES.get(self.suit, '')}]"
 
+    def to_code(self) -> str:
+        """Two-letter code (e.g. 'TH') used when a game is serialized."""
+        return f"{self.rank}{self.suit}"
+
+    @classmethod
+    def from_code(cls, code: str) -> 'Card':
+        return cls(code[0], code[1])
+
 class Deck:
     """Represents the shoe of cards, typically 6-8 decks, shuffled."""
     def __init__(self, num_decks: int = 6):
@@ -97,6 +105,13 @@ class Hand:
             # Hide the second card
             return f"{str(self.cards[0])} [??]"
 
+    def to_dict(self) -> Dict[str, Any]:
+        return {'cards': [card.to_code() for card in self.cards], 'is_split': self.is_split}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Hand':
+        return cls([Card.from_code(code) for code in data['cards']], data['is_split'])
+
 # --- 3. Game Logic ---
 
 class BlackjackGame:
@@ -430,6 +445,34 @@ class BlackjackGame:
             'current_hand_index': self.current_hand_index,
         }
 
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize game state for storage."""
+        return {
+            'deck': [card.to_code() for card in self.deck.cards],
+            'player_hands': [{**state, 'hand': state['hand'].to_dict()} for state in self.player_hands],
+            'dealer_hand': self.dealer_hand.to_dict(),
+            'current_hand_index': self.current_hand_index,
+            'is_insurance_available': self.is_insurance_available,
+            'insurance_bet': self.insurance_bet,
+            'insurance_payout': self.insurance_payout,
+            'initial_bet': self.initial_bet,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'BlackjackGame':
+        """Deserialize game state from storage."""
+        game = cls.__new__(cls)
+        game.deck = Deck.__new__(Deck)
+        game.deck.cards = [Card.from_code(code) for code in data['deck']]
+        game.player_hands = [{**state, 'hand': Hand.from_dict(state['hand'])} for state in data['player_hands']]
+        game.dealer_hand = Hand.from_dict(data['dealer_hand'])
+        game.current_hand_index = data['current_hand_index']
+        game.is_insurance_available = data['is_insurance_available']
+        game.insurance_bet = data['insurance_bet']
+        game.insurance_payout = data['insurance_payout']
+        game.initial_bet = data['initial_bet']
+        return game
+
 # --- 4. Bot Integration Example ---
 # This section demonstrates how a Telegram bot would use the class.
 
@@ -0,0 +1,175 @@
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class BoundedStore(OrderedDict):
+    """Dict with an idle TTL and an LRU size cap.
+
+    Every write or read of a key refreshes it: it moves to the end of the
+    order and gets a fresh deadline. Because the TTL is measured from that
+    same touch, entries are always ordered by deadline too. Expiry therefore
+    pops from the front until it reaches a live entry, and the LRU cap pops
+    from the front as well. Both cost O(evicted).
+
+    Evictions go through self.pop(), so subclasses that hook pop/__delitem__
+    (like TrackedSessionDict releasing the ActiveGameRegistry) stay
+    consistent. ttl=None or maxsize=None disables that limit.
+
+    The store also works as a set: add()/discard() store a True marker.
+
+    on_change, if set, is called as on_change(key, event) after every write
+    ("set"), read ("get") and removal ("del"), eviction included; session
+    snapshots use it to find what to save.
+    """
+
+    def __init__(self, name: str, maxsize: Optional[int] = None, ttl: Optional[float] = None,
+                 on_evict: Optional[Callable[[Hashable, Any, str], None]] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        super().__init__()
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._on_evict = on_evict
+        self._clock = clock
+        self._deadlines: Dict[Hashable, float] = {}
+        self.evictions = 0      # dropped to stay under maxsize
+        self.expirations = 0    # dropped after ttl seconds without use
+        self.on_change: Optional[Callable[[Hashable, str], None]] = None
+
+    def _touch(self, key):
+        self.move_to_end(key)
+        if self.ttl is not None:
+            self._deadlines[key] = self._clock() + self.ttl
+
+    def _expired(self, key) -> bool:
+        deadline = self._deadlines.get(key)
+        return deadline is not None and deadline <= self._clock()
+
+    def _evict(self, key, reason: str):
+        # Forget the deadline first so the subclass pop() sees a live key
+        self._deadlines.pop(key, None)
+        value = self.pop(key, None)
+        if reason == "expired":
+            self.expirations += 1
+        else:
+            self.evictions += 1
+        if self._on_evict:
+            try:
+                self._on_evict(key, value, reason)
+            except Exception as e:
+                logger.error(f"[STORE] {self.name} eviction hook failed for {key}: {e}")
+
+    def expire(self) -> int:
+        """Drop every entry whose ttl has run out. Returns how many were dropped."""
+        if self.ttl is None:
+            return 0
+        dropped = 0
+        now = self._clock()
+        while self:
+            key = next(iter(self))
+            deadline = self._deadlines.get(key)
+            if deadline is None or deadline > now:
+                break
+            self._evict(key, "expired")
+            dropped += 1
+        return dropped
+
+    def _enforce(self):
+        self.expire()
+        if self.maxsize is not None:
+            while len(self) > self.maxsize:
+                self._evict(next(iter(self)), "lru")
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self._touch(key)
+        if self.on_change:
+            self.on_change(key, "set")
+        self._enforce()
+
+    def __getitem__(self, key):
+        value = super().__getitem__(key)
+        if self._expired(key):
+            self._evict(key, "expired")
+            raise KeyError(key)
+        self._touch(key)
+        if self.on_change:
+            self.on_change(key, "get")
+        return value
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key) -> bool:
+        if not super().__contains__(key):
+            return False
+        if self._expired(key):
+            self._evict(key, "expired")
+            return False
+        return True
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._deadlines.pop(key, None)
+        if self.on_change:
+            self.on_change(key, "del")
+
+    def pop(self, key, default=_MISSING):
+        self._deadlines.pop(key, None)
+        if self.on_change and super().__contains__(key):
+            value = super().pop(key)
+            self.on_change(key, "del")
+            return value
+        if default is _MISSING:
+            return super().pop(key)
+        return super().pop(key, default)
+
+    def popitem(self, last: bool = True):
+        key, value = super().popitem(last)
+        self._deadlines.pop(key, None)
+        if self.on_change:
+            self.on_change(key, "del")
+        return key, value
+
+    def clear(self):
+        keys = list(super().keys()) if self.on_change else ()
+        super().clear()
+        self._deadlines.clear()
+        for key in keys:
+            self.on_change(key, "del")
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    # --- Set-style use (one-shot markers, pending flags) ---
+
+    def add(self, key):
+        self[key] = True
+
+    def discard(self, key):
+        self.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "size": len(self),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
@@ -0,0 +1,126 @@
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+# Who may press a routed button
+PUBLIC = "public"        # anyone (challenge accepts, leaderboards, games that check the user id in the data)
+OWNER = "owner"          # only the user the message was sent to (button_ownership)
+APPROVER = "approver"    # withdrawal approvers only
+
+POLICIES = (PUBLIC, OWNER, APPROVER)
+
+
+def _first_token(data: str) -> str:
+    return data.split("_", 1)[0]
+
+
+def fields(*types: Callable[[str], Any]) -> Callable[[str], Tuple]:
+    """Parser for '_'-separated positional fields after the prefix.
+
+    Extra trailing fields are ignored; a missing field raises, like the
+    split('_')[n] indexing it replaces.
+    """
+    def parse(rest: str) -> Tuple:
+        parts = rest.split("_")
+        return tuple(convert(parts[i]) for i, convert in enumerate(types))
+    return parse
+
+
+def optional_fields(*types: Callable[[str], Any]) -> Callable[[str], Tuple]:
+    """Like fields(), but missing trailing fields become None."""
+    def parse(rest: str) -> Tuple:
+        parts = rest.split("_")
+        return tuple(convert(parts[i]) if i < len(parts) else None for i, convert in enumerate(types))
+    return parse
+
+
+def last_field(head: Callable[[str], Any], tail: Callable[[str], Any]) -> Callable[[str], Tuple]:
+    """Parser for '<head>_<tail>' where the head itself may contain '_' (e.g. game ids)."""
+    def parse(rest: str) -> Tuple:
+        value, _, last = rest.rpartition("_")
+        return (head(value), tail(last))
+    return parse
+
+
+def remainder(convert: Callable[[str], Any] = str) -> Callable[[str], Tuple]:
+    """Parser passing everything after the prefix as a single argument."""
+    def parse(rest: str) -> Tuple:
+        return (convert(rest),)
+    return parse
+
+
+class Route:
+    __slots__ = ("key", "exact", "handler", "policy", "one_shot", "parser")
+
+    def __init__(self, key: str, exact: bool, handler: Callable[..., Awaitable[Any]],
+                 policy: str, one_shot: bool, parser: Optional[Callable[[str], Tuple]]):
+        self.key = key
+        self.exact = exact
+        self.handler = handler
+        self.policy = policy
+        self.one_shot = one_shot
+        self.parser = parser
+
+    def parse(self, data: str) -> Tuple:
+        """Return the positional arguments the handler receives after (update, context)."""
+        if self.parser is None:
+            return ()
+        return self.parser(data[len(self.key):])
+
+    def __repr__(self) -> str:
+        kind = "exact" if self.exact else "prefix"
+        return f"Route({kind} {self.key!r}, policy={self.policy}, one_shot={self.one_shot})"
+
+
+class CallbackRouter:
+    """Callback-data router for inline buttons.
+
+    Exact callback values live in one dict. Prefix routes are bucketed by
+    their first '_'-separated token and kept longest-first, so resolving a
+    press is one split plus a startswith over the handful of routes sharing
+    that token, instead of a walk over every branch of the old if/elif chain.
+    """
+
+    def __init__(self):
+        self._exact: Dict[str, Route] = {}
+        self._prefixes: Dict[str, List[Route]] = {}
+
+    def exact(self, value: str, handler: Callable[..., Awaitable[Any]], policy: str = OWNER,
+              one_shot: bool = False):
+        self._check_policy(policy)
+        if value in self._exact:
+            raise ValueError(f"Duplicate callback route: {value}")
+        self._exact[value] = Route(value, True, handler, policy, one_shot, None)
+
+    def prefix(self, prefix: str, handler: Callable[..., Awaitable[Any]], policy: str = OWNER,
+               one_shot: bool = False, parser: Optional[Callable[[str], Tuple]] = None):
+        self._check_policy(policy)
+        if "_" not in prefix:
+            raise ValueError(f"Prefix route must contain a '_' token separator: {prefix}")
+        bucket = self._prefixes.setdefault(_first_token(prefix), [])
+        if any(route.key == prefix for route in bucket):
+            raise ValueError(f"Duplicate callback route: {prefix}")
+        bucket.append(Route(prefix, False, handler, policy, one_shot, parser))
+        bucket.sort(key=lambda route: len(route.key), reverse=True)
+
+    @staticmethod
+    def _check_policy(policy: str):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown button policy: {policy}")
+
+    def resolve(self, data: str) -> Optional[Route]:
+        """Return the route for a callback value, or None if nothing matches."""
+        route = self._exact.get(data)
+        if route is not None:
+            return route
+        for route in self._prefixes.get(_first_token(data), ()):
+            if data.startswith(route.key):
+                return route
+        return None
+
+    def routes(self) -> List[Route]:
+        routes = list(self._exact.values())
+        for bucket in self._prefixes.values():
+            routes.extend(bucket)
+        return routes
+
+    def __len__(self) -> int:
+        return len(self._exact) + sum(len(bucket) for bucket in self._prefixes.values())
@@ -0,0 +1,121 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class DepositAddressPool:
+    """Pre-generated deposit invoices per currency, handed out on demand.
+
+    A background worker keeps at least `low_water` unassigned invoices per
+    currency, so opening the deposit screen is a dict lookup instead of a
+    Plisio round trip. Invoices older than `max_age` are dropped before they
+    could be shown to a user with little time left on them, and replaced.
+    `take` never waits; an empty pool returns None and the caller falls back
+    to creating an invoice directly.
+    """
+
+    def __init__(self, create: Callable[[str], Awaitable[Optional[Dict[str, Any]]]], currencies: Iterable[str],
+                 low_water: int = 3, max_age: float = 45 * 60, interval: float = 30.0):
+        self.create = create
+        self.currencies = list(currencies)
+        self.low_water = low_water
+        self.max_age = max_age
+        self.interval = interval
+        self._pools: Dict[str, Deque[Tuple[float, Dict[str, Any]]]] = {c: deque() for c in self.currencies}
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.created = 0
+        self.assigned = 0
+        self.misses = 0
+        self.recycled = 0
+
+    def _recycle(self, currency: str, now: float):
+        pool = self._pools[currency]
+        # Oldest invoices sit at the left; they expire first
+        while pool and now - pool[0][0] > self.max_age:
+            pool.popleft()
+            self.recycled += 1
+
+    def ready(self, currency: str) -> bool:
+        """Whether take(currency) would return an invoice right now."""
+        if currency not in self._pools:
+            return False
+        self._recycle(currency, time.monotonic())
+        return bool(self._pools[currency])
+
+    def take(self, currency: str) -> Optional[Dict[str, Any]]:
+        """Hand out the newest unexpired invoice for currency, or None if the pool is empty."""
+        pool = self._pools.get(currency)
+        if pool is None:
+            return None
+        self._recycle(currency, time.monotonic())
+        if not pool:
+            self.misses += 1
+            self._wake.set()
+            return None
+        _, invoice = pool.pop()
+        self.assigned += 1
+        if len(pool) < self.low_water:
+            self._wake.set()
+        return invoice
+
+    async def _top_up(self, currency: str):
+        pool = self._pools[currency]
+        while len(pool) < self.low_water:
+            try:
+                invoice = await self.create(currency)
+            except Exception as e:
+                logger.error(f"[DEPOSIT POOL] Creating {currency} invoice failed: {e}")
+                return
+            if not invoice or not invoice.get('address'):
+                return  # Plisio refused or is down; try again next round
+            pool.append((time.monotonic(), invoice))
+            self.created += 1
+
+    async def fill(self):
+        """Recycle expired invoices and top every currency back up to low_water."""
+        now = time.monotonic()
+        for currency in self.currencies:
+            self._recycle(currency, now)
+        await asyncio.gather(*(self._top_up(c) for c in self.currencies))
+
+    async def _run(self):
+        while True:
+            self._wake.clear()
+            try:
+                await self.fill()
+            except Exception as e:
+                logger.error(f"[DEPOSIT POOL] Refill failed: {e}")
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self):
+        """Start the refill worker on the running loop (idempotent)."""
+        if self.low_water <= 0:
+            return
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "available": {c: len(p) for c, p in self._pools.items()},
+            "created": self.created,
+            "assigned": self.assigned,
+            "misses": self.misses,
+            "recycled": self.recycled,
+        }
@@ -0,0 +1,108 @@
+import logging
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from telegram.error import BadRequest
+
+from bounded_store import BoundedStore
+
+logger = logging.getLogger(__name__)
+
+
+class _EditState:
+    __slots__ = ("sent_hash", "sent_at", "pending")
+
+    def __init__(self):
+        self.sent_hash: Optional[int] = None
+        self.sent_at = 0.0
+        self.pending: Optional[Tuple[str, Dict[str, Any]]] = None
+
+
+class EditCoalescer:
+    """Debounces edits of one message while a player taps quickly.
+
+    Keyed by (chat_id, message_id). An edit goes out right away unless the
+    message was edited less than `interval` seconds ago; then it is parked
+    and a later edit replaces it, so a burst of taps ends in one edit of the
+    newest render when the interval is over. An edit whose text and markup
+    hash the same as the last one sent is dropped instead of earning a
+    "message is not modified" error. Pass flush=True for the render that must
+    be on screen before the next message (e.g. the final board ahead of the
+    result line): it replaces anything parked and is sent immediately.
+
+    Deferred edits fire from the bot's TimerWheel.
+    """
+
+    def __init__(self, bot, timers, interval: float = 1.0, maxsize: int = 10000, ttl: float = 600):
+        self.bot = bot
+        self.timers = timers
+        self.interval = interval
+        self.store = BoundedStore("message_edits", maxsize=maxsize, ttl=ttl)
+        self.sent = 0
+        self.deferred = 0
+        self.superseded = 0
+        self.unchanged = 0
+
+    @staticmethod
+    def _fingerprint(text: str, kwargs: Dict[str, Any]) -> int:
+        return hash((text, kwargs.get("parse_mode"), kwargs.get("reply_markup")))
+
+    @staticmethod
+    def _timer_key(key: Tuple[int, int]) -> str:
+        return f"edit:{key[0]}:{key[1]}"
+
+    async def edit(self, chat_id: int, message_id: int, text: str, flush: bool = False, **kwargs) -> bool:
+        """Edit the message now or soon; returns True if an edit was sent or parked."""
+        key = (chat_id, message_id)
+        state = self.store.get(key)
+        if state is None:
+            state = self.store[key] = _EditState()
+
+        if state.pending is not None:
+            self.superseded += 1
+            state.pending = None
+            self.timers.cancel(self._timer_key(key))
+        if self._fingerprint(text, kwargs) == state.sent_hash:
+            self.unchanged += 1
+            return False
+
+        wait = state.sent_at + self.interval - time.monotonic()
+        if flush or wait <= 0:
+            await self._send(key, state, text, kwargs)
+            return True
+        state.pending = (text, kwargs)
+        self.deferred += 1
+        self.timers.schedule(self._timer_key(key), wait, self._flush, key)
+        return True
+
+    async def _flush(self, key: Tuple[int, int]):
+        state = self.store.get(key)
+        if state is None or state.pending is None:
+            return
+        text, kwargs = state.pending
+        state.pending = None
+        await self._send(key, state, text, kwargs)
+
+    async def _send(self, key: Tuple[int, int], state: _EditState, text: str, kwargs: Dict[str, Any]):
+        # Mark it sent first, so a render that arrives during the request is debounced against it
+        state.sent_hash = self._fingerprint(text, kwargs)
+        state.sent_at = time.monotonic()
+        try:
+            await self.bot.edit_message_text(text, chat_id=key[0], message_id=key[1], **kwargs)
+            self.sent += 1
+        except BadRequest as e:
+            if "not modified" in str(e).lower():
+                return
+            state.sent_hash = None
+            logger.warning(f"[EDITS] Edit of {key} failed: {e}")
+        except Exception as e:
+            state.sent_hash = None
+            logger.error(f"[EDITS] Edit of {key} failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "sent": self.sent,
+            "deferred": self.deferred,
+            "superseded": self.superseded,
+            "unchanged": self.unchanged,
+        }
@@ -0,0 +1,233 @@
+import importlib
+import logging
+import os
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Union
+
+from telegram.ext import CommandHandler
+
+from active_games import TrackedSessionDict, single_player
+
+logger = logging.getLogger(__name__)
+
+# A handler is the name of a bot method, or a factory called with the bot that returns the handler
+HandlerRef = Union[str, Callable[[Any], Callable]]
+
+
+class RouteSpec:
+    __slots__ = ("key", "exact", "handler", "options")
+
+    def __init__(self, key: str, exact: bool, handler: HandlerRef, options: Dict[str, Any]):
+        self.key = key
+        self.exact = exact
+        self.handler = handler
+        self.options = options
+
+
+def prefix(key: str, handler: HandlerRef, **options) -> RouteSpec:
+    """A prefix callback route; options are passed to CallbackRouter.prefix."""
+    return RouteSpec(key, False, handler, options)
+
+
+def exact(key: str, handler: HandlerRef, **options) -> RouteSpec:
+    """An exact callback route; options are passed to CallbackRouter.exact."""
+    return RouteSpec(key, True, handler, options)
+
+
+class GamePlugin:
+    """Everything the bot needs to know to host one game.
+
+    - module / game_class: where the game logic lives. The module is only
+      imported when the first game of this kind is created.
+    - commands: command name -> handler.
+    - routes: inline-button routes (see prefix() and exact()).
+    - sessions: whether the game keeps live sessions; they are stored in a
+      TrackedSessionDict exposed on the bot as `<name>_sessions`, with
+      `participants` naming the players of a session (single player by default).
+    - on_timeout: handler that settles an abandoned session when its move
+      timer fires; called as (user_id, chat_id, game_id, bot, user_data, username).
+    - renderer: handler that builds the game's keyboard from a session.
+
+    Handlers are named by bot method (or given as factories taking the bot),
+    so plugins can be declared before the bot exists.
+    """
+
+    def __init__(self, name: str, title: str, module: str, game_class: str,
+                 commands: Optional[Dict[str, HandlerRef]] = None, routes: Sequence[RouteSpec] = (),
+                 sessions: bool = True, participants: Callable = single_player,
+                 on_timeout: Optional[str] = None, renderer: Optional[str] = None):
+        self.name = name
+        self.title = title
+        self.module = module
+        self.game_class = game_class
+        self.commands = commands or {}
+        self.routes = tuple(routes)
+        self.sessions = sessions
+        self.participants = participants
+        self.on_timeout = on_timeout
+        self.renderer = renderer
+
+    def __repr__(self) -> str:
+        return f"GamePlugin({self.name!r})"
+
+
+class GameRegistry:
+    """The games the bot hosts, which of them are enabled, and what each costs.
+
+    Game modules are imported lazily on first use. A disabled game keeps its
+    callback routes (pointed at a "disabled" handler, so old buttons answer
+    sensibly). Slash commands are only registered for games named in
+    `commands` (GAMES_ENABLED), so no game gains a command just by existing. Every command and button handler of
+    a game is timed, so one game can be profiled or load-tested on its own.
+    """
+
+    def __init__(self, plugins: Iterable[GamePlugin], enabled: Optional[Iterable[str]] = None,
+                 disabled: Iterable[str] = (), commands: Iterable[str] = ()):
+        self.plugins: Dict[str, GamePlugin] = {}
+        for plugin in plugins:
+            if plugin.name in self.plugins:
+                raise ValueError(f"Duplicate game plugin: {plugin.name}")
+            self.plugins[plugin.name] = plugin
+        unknown = (set(enabled or ()) | set(disabled)) - set(self.plugins)
+        if unknown:
+            logger.warning(f"[GAMES] Unknown games in configuration: {', '.join(sorted(unknown))}")
+        self._enabled = {
+            name for name in self.plugins
+            if (enabled is None or name in enabled) and name not in disabled
+        }
+        self._commands = {name for name in commands if name in self._enabled}
+        self._modules: Dict[str, Any] = {}
+        self._stats: Dict[str, Dict[str, Any]] = {
+            name: {"calls": 0, "errors": 0, "seconds": 0.0, "max": 0.0, "games": 0, "load_ms": None}
+            for name in self.plugins
+        }
+
+    @classmethod
+    def from_env(cls, plugins: Iterable[GamePlugin]) -> "GameRegistry":
+        """Build a registry honouring GAMES_ENABLED (allow list) and GAMES_DISABLED (deny list).
+
+        Only games listed in GAMES_ENABLED get their slash commands; unset, no game command is registered.
+        """
+        def names(var: str) -> List[str]:
+            return [n.strip().lower() for n in os.getenv(var, "").split(",") if n.strip()]
+        enabled = names("GAMES_ENABLED")
+        return cls(plugins, enabled=enabled or None, disabled=names("GAMES_DISABLED"), commands=enabled)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.plugins
+
+    def get(self, name: str) -> Optional[GamePlugin]:
+        return self.plugins.get(name)
+
+    def is_enabled(self, name: str) -> bool:
+        return name in self._enabled
+
+    def command_enabled(self, command: str) -> bool:
+        """False for a command that belongs to a disabled game, True otherwise."""
+        for plugin in self.plugins.values():
+            if command in plugin.commands:
+                return self.is_enabled(plugin.name)
+        return True
+
+    def load(self, name: str):
+        """The game's logic module, imported on first call."""
+        module = self._modules.get(name)
+        if module is None:
+            plugin = self.plugins[name]
+            start = time.perf_counter()
+            module = importlib.import_module(plugin.module)
+            self._modules[name] = module
+            self._stats[name]["load_ms"] = (time.perf_counter() - start) * 1000
+            logger.info(f"[GAMES] Loaded {name} ({plugin.module}) in {self._stats[name]['load_ms']:.1f}ms")
+        return module
+
+    def new(self, name: str, *args, **kwargs):
+        """Create a game object of the plugin's game class."""
+        game = getattr(self.load(name), self.plugins[name].game_class)(*args, **kwargs)
+        self._stats[name]["games"] += 1
+        return game
+
+    def restore(self, name: str, data: Dict[str, Any]):
+        """Rebuild a game object from the output of its to_dict()."""
+        return getattr(self.load(name), self.plugins[name].game_class).from_dict(data)
+
+    def create_sessions(self, bot, active_games, **limits) -> List[TrackedSessionDict]:
+        """Give the bot a `<name>_sessions` store for every game that keeps sessions."""
+        stores = []
+        for plugin in self.plugins.values():
+            if plugin.sessions:
+                store = TrackedSessionDict(active_games, plugin.name, plugin.participants, **limits)
+                setattr(bot, f"{plugin.name}_sessions", store)
+                stores.append(store)
+        return stores
+
+    def _resolve(self, bot, handler: HandlerRef) -> Callable:
+        return getattr(bot, handler) if isinstance(handler, str) else handler(bot)
+
+    def _timed(self, name: str, handler: Callable) -> Callable:
+        stats = self._stats[name]
+
+        async def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await handler(*args, **kwargs)
+            except Exception:
+                stats["errors"] += 1
+                raise
+            finally:
+                elapsed = time.perf_counter() - start
+                stats["calls"] += 1
+                stats["seconds"] += elapsed
+                if elapsed > stats["max"]:
+                    stats["max"] = elapsed
+        return timed
+
+    def register_commands(self, app, bot):
+        """Register the commands of the games explicitly enabled for commands."""
+        for plugin in self.plugins.values():
+            if plugin.name not in self._commands:
+                continue
+            for command, handler in plugin.commands.items():
+                app.add_handler(CommandHandler(command, self._timed(plugin.name, self._resolve(bot, handler))))
+
+    def register_routes(self, router, bot, disabled_handler: Callable[..., Any]):
+        """Add every game's button routes to router; a disabled game's routes go to disabled_handler(update, context, title)."""
+        for plugin in self.plugins.values():
+            if self.is_enabled(plugin.name):
+                def resolve(handler, plugin=plugin):
+                    return self._timed(plugin.name, self._resolve(bot, handler))
+            else:
+                def resolve(handler, plugin=plugin):
+                    return lambda update, context, *args: disabled_handler(update, context, plugin.title)
+            for spec in plugin.routes:
+                if spec.exact:
+                    router.exact(spec.key, resolve(spec.handler), **spec.options)
+                else:
+                    router.prefix(spec.key, resolve(spec.handler), **spec.options)
+
+    def timeout_handler(self, bot, name: str) -> Optional[Callable]:
+        plugin = self.plugins.get(name)
+        if plugin is None or plugin.on_timeout is None:
+            return None
+        return self._resolve(bot, plugin.on_timeout)
+
+    def renderer(self, bot, name: str) -> Optional[Callable]:
+        plugin = self.plugins.get(name)
+        if plugin is None or plugin.renderer is None:
+            return None
+        return self._resolve(bot, plugin.renderer)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        result = {}
+        for name, s in self._stats.items():
+            result[name] = {
+                "enabled": self.is_enabled(name),
+                "loaded": name in self._modules,
+                "load_ms": s["load_ms"],
+                "games": s["games"],
+                "calls": s["calls"],
+                "errors": s["errors"],
+                "avg_ms": (s["seconds"] / s["calls"] * 1000) if s["calls"] else 0.0,
+                "max_ms": s["max"] * 1000,
+            }
+        return result
@@ -37,7 +37,13 @@ class KenoGame:
         self.total_rounds = 1
         self.current_round = 0
         self.is_auto_playing = False
-        self.round_results: List[Dict] = []
+        # The first round's wager is taken when the game is created
+        self.prepaid_rounds = 1
+        # Auto-play totals are kept as running counters, not a list of every round
+        self.rounds_played = 0
+        self.wins = 0
+        self.best_multiplier = 0.0
+        self.hit_counts: Dict[int, int] = {}
         self.total_wagered = 0.0
         self.total_payout = 0.0
         self.selecting_rounds = False
@@ -102,11 +108,10 @@ class KenoGame:
         self.current_round += 1
         new_seed = hashlib.sha256(f"{self.seed}{self.current_round}{random.random()}".encode()).hexdigest()[:16]
         
-        random.seed(new_seed)
+        # A private generator per round: same draw as seeding the global one, without disturbing it
         all_numbers = list(range(1, self.TOTAL_NUMBERS + 1))
-        random.shuffle(all_numbers)
+        random.Random(new_seed).shuffle(all_numbers)
         self.drawn_numbers = set(all_numbers[:self.DRAW_COUNT])
-        random.seed()
         
         self.hits = len(self.picked_numbers & self.drawn_numbers)
         self.payout = 0.0
@@ -119,7 +124,11 @@ class KenoGame:
             'payout': self.payout,
             'multiplier': self.get_multiplier()
         }
-        self.round_results.append(result)
+        self.rounds_played += 1
+        if self.payout > 0:
+            self.wins += 1
+        self.best_multiplier = max(self.best_multiplier, result['multiplier'])
+        self.hit_counts[self.hits] = self.hit_counts.get(self.hits, 0) + 1
         self.total_wagered += self.wager
         self.total_payout += self.payout
         
@@ -130,17 +139,31 @@ class KenoGame:
         
         return result
 
+    def run_draws(self, count: int) -> List[Dict]:
+        """Run up to count auto-play rounds in one pass (fewer if the round limit is reached first)."""
+        results = []
+        while len(results) < count and not self.game_over and self.should_continue_auto_play():
+            results.append(self.run_single_draw())
+        return results
+
+    def remaining_rounds(self) -> Optional[int]:
+        """Rounds left in this auto-play run (None when infinite)."""
+        if self.total_rounds == -1:
+            return None
+        return max(self.total_rounds - self.current_round, 0)
+
     def should_continue_auto_play(self) -> bool:
         if self.total_rounds == -1:
             return True
         return self.current_round < self.total_rounds
 
     def get_auto_play_summary(self) -> Dict:
-        wins = sum(1 for r in self.round_results if r['payout'] > 0)
         return {
-            'total_rounds': len(self.round_results),
-            'wins': wins,
-            'losses': len(self.round_results) - wins,
+            'total_rounds': self.rounds_played,
+            'wins': self.wins,
+            'losses': self.rounds_played - self.wins,
+            'best_multiplier': self.best_multiplier,
+            'hit_counts': dict(sorted(self.hit_counts.items())),
             'total_wagered': self.total_wagered,
             'total_payout': self.total_payout,
             'net_profit': self.total_payout - self.total_wagered
@@ -203,7 +226,18 @@ class KenoGame:
             'hits': self.hits,
             'payout': self.payout,
             'seed': self.seed,
-            'created_at': self.created_at.isoformat()
+            'created_at': self.created_at.isoformat(),
+            'total_rounds': self.total_rounds,
+            'current_round': self.current_round,
+            'is_auto_playing': self.is_auto_playing,
+            'prepaid_rounds': self.prepaid_rounds,
+            'rounds_played': self.rounds_played,
+            'wins': self.wins,
+            'best_multiplier': self.best_multiplier,
+            'hit_counts': self.hit_counts,
+            'total_wagered': self.total_wagered,
+            'total_payout': self.total_payout,
+            'selecting_rounds': self.selecting_rounds
         }
     
     @classmethod
@@ -219,4 +253,16 @@ class KenoGame:
         game.payout = data['payout']
         game.seed = data['seed']
         game.created_at = datetime.fromisoformat(data['created_at'])
+        game.total_rounds = data.get('total_rounds', 1)
+        game.current_round = data.get('current_round', 0)
+        game.is_auto_playing = data.get('is_auto_playing', False)
+        game.prepaid_rounds = data.get('prepaid_rounds', 0 if game.game_started else 1)
+        game.rounds_played = data.get('rounds_played', 0)
+        game.wins = data.get('wins', 0)
+        game.best_multiplier = data.get('best_multiplier', 0.0)
+        # JSON turns the int keys into strings
+        game.hit_counts = {int(hits): n for hits, n in data.get('hit_counts', {}).items()}
+        game.total_wagered = data.get('total_wagered', 0.0)
+        game.total_payout = data.get('total_payout', 0.0)
+        game.selecting_rounds = data.get('selecting_rounds', False)
         return game
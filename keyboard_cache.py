@@ -0,0 +1,71 @@
+from typing import Any, Callable, Dict, Hashable, List, Sequence, Tuple
+
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+
+from bounded_store import BoundedStore
+
+ButtonRow = Tuple[InlineKeyboardButton, ...]
+
+
+class KeyboardRenderer:
+    """Caches rendered inline keyboards and rebuilds only what changed.
+
+    Grid games describe their board as rows of small hashable cell states
+    (e.g. "hidden", "gem"). The renderer remembers the states and buttons of
+    the last render under a key such as ("mines", user_id); on the next render
+    a row whose states are unchanged is reused as-is, and in a changed row only
+    the cells whose state differs get a new button. PTB buttons are immutable,
+    so sharing them between renders is safe. Small keyboards whose whole
+    content follows from one state tuple can be memoised with memo().
+
+    Entries live in a BoundedStore, so they idle out with the game sessions.
+    """
+
+    def __init__(self, name: str = "keyboards", maxsize: int = 4096, ttl: float = 1800):
+        self.store = BoundedStore(name, maxsize=maxsize, ttl=ttl)
+        self.built = 0      # buttons (or memoised keyboards) constructed
+        self.reused = 0     # buttons (or memoised keyboards) served from the cache
+
+    def grid(self, key: Hashable, states: Sequence[Tuple[Hashable, ...]],
+             make_button: Callable[[int, int, Hashable], InlineKeyboardButton]) -> List[ButtonRow]:
+        """Button rows for a grid of cell states; make_button(row, col, state) builds a changed cell."""
+        entry = self.store.get(key)
+        old_states, old_rows = entry if entry is not None else ((), ())
+        rows = []
+        for r, row_states in enumerate(states):
+            if r < len(old_states):
+                prev_states, prev_row = old_states[r], old_rows[r]
+                if prev_states == row_states:
+                    rows.append(prev_row)
+                    self.reused += len(prev_row)
+                    continue
+            else:
+                prev_states, prev_row = (), ()
+            row = []
+            for c, state in enumerate(row_states):
+                if c < len(prev_states) and prev_states[c] == state:
+                    row.append(prev_row[c])
+                    self.reused += 1
+                else:
+                    row.append(make_button(r, c, state))
+                    self.built += 1
+            rows.append(tuple(row))
+        self.store[key] = (tuple(states), tuple(rows))
+        return rows
+
+    def memo(self, key: Hashable, state: Hashable, build: Callable[[], InlineKeyboardMarkup]) -> InlineKeyboardMarkup:
+        """The keyboard last built for key if state is unchanged, otherwise build() it."""
+        entry = self.store.get(key)
+        if entry is not None and entry[0] == state:
+            self.reused += 1
+            return entry[1]
+        markup = build()
+        self.built += 1
+        self.store[key] = (state, markup)
+        return markup
+
+    def forget(self, key: Hashable):
+        self.store.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self.store.stats(), "built": self.built, "reused": self.reused}
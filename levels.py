@@ -0,0 +1,156 @@
+"""Level system shared by the bot and the web app.
+
+The flat LEVELS list and its threshold array are built once at import;
+lookups bisect the thresholds instead of scanning the list.
+"""
+from bisect import bisect_right
+from typing import Dict, Iterable, List, Optional
+
+LEVEL_TIERS = [
+    {"name": "Bronze", "emoji": "🥉", "levels": [
+        {"id": "bronze_i", "name": "Bronze I", "threshold": 100, "bonus": 1},
+        {"id": "bronze_ii", "name": "Bronze II", "threshold": 500, "bonus": 2},
+        {"id": "bronze_iii", "name": "Bronze III", "threshold": 1000, "bonus": 2.50},
+        {"id": "bronze_iv", "name": "Bronze IV", "threshold": 2500, "bonus": 7.50},
+        {"id": "bronze_v", "name": "Bronze V", "threshold": 5000, "bonus": 12.50},
+    ]},
+    {"name": "Silver", "emoji": "🥈", "levels": [
+        {"id": "silver_i", "name": "Silver I", "threshold": 10000, "bonus": 25},
+        {"id": "silver_ii", "name": "Silver II", "threshold": 15200, "bonus": 26},
+        {"id": "silver_iii", "name": "Silver III", "threshold": 20500, "bonus": 26.50},
+        {"id": "silver_iv", "name": "Silver IV", "threshold": 26000, "bonus": 27.50},
+        {"id": "silver_v", "name": "Silver V", "threshold": 32000, "bonus": 30},
+    ]},
+    {"name": "Gold", "emoji": "🏆", "levels": [
+        {"id": "gold_i", "name": "Gold I", "threshold": 39000, "bonus": 35},
+        {"id": "gold_ii", "name": "Gold II", "threshold": 48000, "bonus": 45},
+        {"id": "gold_iii", "name": "Gold III", "threshold": 58000, "bonus": 50},
+        {"id": "gold_iv", "name": "Gold IV", "threshold": 69000, "bonus": 55},
+        {"id": "gold_v", "name": "Gold V", "threshold": 81000, "bonus": 60},
+    ]},
+    {"name": "Platinum", "emoji": "💎", "levels": [
+        {"id": "platinum_i", "name": "Platinum I", "threshold": 94000, "bonus": 65},
+        {"id": "platinum_ii", "name": "Platinum II", "threshold": 107500, "bonus": 67.50},
+        {"id": "platinum_iii", "name": "Platinum III", "threshold": 122000, "bonus": 72.50},
+        {"id": "platinum_iv", "name": "Platinum IV", "threshold": 138000, "bonus": 80},
+        {"id": "platinum_v", "name": "Platinum V", "threshold": 155000, "bonus": 85},
+    ]},
+    {"name": "Diamond", "emoji": "💠", "levels": [
+        {"id": "diamond_i", "name": "Diamond I", "threshold": 173000, "bonus": 90},
+        {"id": "diamond_ii", "name": "Diamond II", "threshold": 192000, "bonus": 95},
+        {"id": "diamond_iii", "name": "Diamond III", "threshold": 211500, "bonus": 97.50},
+        {"id": "diamond_iv", "name": "Diamond IV", "threshold": 232000, "bonus": 102},
+        {"id": "diamond_v", "name": "Diamond V", "threshold": 253000, "bonus": 105},
+    ]},
+    {"name": "Emerald", "emoji": "💚", "levels": [
+        {"id": "emerald_i", "name": "Emerald I", "threshold": 275000, "bonus": 110},
+        {"id": "emerald_ii", "name": "Emerald II", "threshold": 298000, "bonus": 115},
+        {"id": "emerald_iii", "name": "Emerald III", "threshold": 322000, "bonus": 120},
+        {"id": "emerald_iv", "name": "Emerald IV", "threshold": 347000, "bonus": 125},
+        {"id": "emerald_v", "name": "Emerald V", "threshold": 373000, "bonus": 130},
+    ]},
+    {"name": "Ruby", "emoji": "❤️", "levels": [
+        {"id": "ruby_i", "name": "Ruby I", "threshold": 400000, "bonus": 135},
+        {"id": "ruby_ii", "name": "Ruby II", "threshold": 428000, "bonus": 140},
+        {"id": "ruby_iii", "name": "Ruby III", "threshold": 457000, "bonus": 145},
+        {"id": "ruby_iv", "name": "Ruby IV", "threshold": 487000, "bonus": 150},
+        {"id": "ruby_v", "name": "Ruby V", "threshold": 518000, "bonus": 155},
+    ]},
+    {"name": "Sapphire", "emoji": "💙", "levels": [
+        {"id": "sapphire_i", "name": "Sapphire I", "threshold": 550000, "bonus": 160},
+        {"id": "sapphire_ii", "name": "Sapphire II", "threshold": 583000, "bonus": 165},
+        {"id": "sapphire_iii", "name": "Sapphire III", "threshold": 617000, "bonus": 170},
+        {"id": "sapphire_iv", "name": "Sapphire IV", "threshold": 652000, "bonus": 175},
+        {"id": "sapphire_v", "name": "Sapphire V", "threshold": 688000, "bonus": 180},
+    ]},
+    {"name": "Amethyst", "emoji": "💜", "levels": [
+        {"id": "amethyst_i", "name": "Amethyst I", "threshold": 725000, "bonus": 185},
+        {"id": "amethyst_ii", "name": "Amethyst II", "threshold": 763000, "bonus": 190},
+        {"id": "amethyst_iii", "name": "Amethyst III", "threshold": 802000, "bonus": 195},
+        {"id": "amethyst_iv", "name": "Amethyst IV", "threshold": 842000, "bonus": 200},
+        {"id": "amethyst_v", "name": "Amethyst V", "threshold": 883000, "bonus": 205},
+    ]},
+    {"name": "Obsidian", "emoji": "🖤", "levels": [
+        {"id": "obsidian_i", "name": "Obsidian I", "threshold": 925000, "bonus": 210},
+        {"id": "obsidian_ii", "name": "Obsidian II", "threshold": 968000, "bonus": 215},
+        {"id": "obsidian_iii", "name": "Obsidian III", "threshold": 1012000, "bonus": 220},
+        {"id": "obsidian_iv", "name": "Obsidian IV", "threshold": 1058000, "bonus": 230},
+        {"id": "obsidian_v", "name": "Obsidian V", "threshold": 1107000, "bonus": 245},
+    ]},
+    {"name": "Mythic", "emoji": "🔮", "levels": [
+        {"id": "mythic_i", "name": "Mythic I", "threshold": 1159000, "bonus": 260},
+        {"id": "mythic_ii", "name": "Mythic II", "threshold": 1213000, "bonus": 270},
+        {"id": "mythic_iii", "name": "Mythic III", "threshold": 1270000, "bonus": 285},
+        {"id": "mythic_iv", "name": "Mythic IV", "threshold": 1330000, "bonus": 300},
+        {"id": "mythic_v", "name": "Mythic V", "threshold": 1393000, "bonus": 315},
+    ]},
+    {"name": "Legendary", "emoji": "👑", "levels": [
+        {"id": "legendary_i", "name": "Legendary I", "threshold": 1458000, "bonus": 325},
+        {"id": "legendary_ii", "name": "Legendary II", "threshold": 1525000, "bonus": 335},
+        {"id": "legendary_iii", "name": "Legendary III", "threshold": 1595000, "bonus": 350},
+        {"id": "legendary_iv", "name": "Legendary IV", "threshold": 1668000, "bonus": 365},
+        {"id": "legendary_v", "name": "Legendary V", "threshold": 1743000, "bonus": 375},
+    ]},
+    {"name": "Ethereal", "emoji": "✨", "levels": [
+        {"id": "ethereal_i", "name": "Ethereal I", "threshold": 1850000, "bonus": 535},
+        {"id": "ethereal_ii", "name": "Ethereal II", "threshold": 2000000, "bonus": 750},
+        {"id": "ethereal_iii", "name": "Ethereal III", "threshold": 2175000, "bonus": 875},
+        {"id": "ethereal_iv", "name": "Ethereal IV", "threshold": 2400000, "bonus": 1125},
+        {"id": "ethereal_v", "name": "Ethereal V", "threshold": 2650000, "bonus": 1250},
+    ]},
+]
+
+LEVELS = [{"id": "unranked", "name": "Unranked", "emoji": "⚪", "threshold": 0, "bonus": 0, "tier_name": "Unranked"}]
+for tier in LEVEL_TIERS:
+    for level in tier["levels"]:
+        LEVELS.append({
+            "id": level["id"],
+            "name": level["name"],
+            "emoji": tier["emoji"],
+            "threshold": level["threshold"],
+            "bonus": level["bonus"],
+            "tier_name": tier["name"]
+        })
+
+# Ascending, so bisect_right(THRESHOLDS, wagered) - 1 is the index of the level reached
+THRESHOLDS = [level["threshold"] for level in LEVELS]
+LEVEL_INDEX: Dict[str, int] = {level["id"]: i for i, level in enumerate(LEVELS)}
+TIER_INDEX: Dict[str, int] = {tier["name"]: i for i, tier in enumerate(LEVEL_TIERS)}
+
+
+def get_level_index(total_wagered: float) -> int:
+    """Index in LEVELS of the highest level reached."""
+    return max(0, bisect_right(THRESHOLDS, total_wagered or 0) - 1)
+
+
+def get_user_level(total_wagered: float, user_id: Optional[int] = None, db=None) -> dict:
+    """Returns the current level data based on total wagered amount."""
+    return LEVELS[get_level_index(total_wagered)]
+
+
+def get_next_level(total_wagered: float) -> Optional[dict]:
+    """Returns the next level data or None if at max level."""
+    index = get_level_index(total_wagered) + 1
+    return LEVELS[index] if index < len(LEVELS) else None
+
+
+def get_level_by_id(level_id: str) -> Optional[dict]:
+    index = LEVEL_INDEX.get(level_id)
+    return LEVELS[index] if index is not None else None
+
+
+def is_level_reached(level_id: str, total_wagered: float) -> bool:
+    index = LEVEL_INDEX.get(level_id)
+    return index is not None and index <= get_level_index(total_wagered)
+
+
+def get_claimable_levels(total_wagered: float, claimed_ids: Iterable[str]) -> List[dict]:
+    """Levels reached whose bonus has not been claimed yet, lowest first."""
+    claimed = set(claimed_ids or ())
+    return [level for level in LEVELS[1:get_level_index(total_wagered) + 1]
+            if level["bonus"] > 0 and level["id"] not in claimed]
+
+
+def get_tier_index(tier_name: str) -> int:
+    """Get the index of a tier by name."""
+    return TIER_INDEX.get(tier_name, 0)
@@ -1,12 +1,14 @@
 import os
+import sys
+import signal
+import copy
 import asyncio
 import random
 import hashlib
 import json
 import logging
-import aiohttp
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any, List
+from typing import TYPE_CHECKING, Optional, Dict, Any, List, Tuple
 
 try:
     from dotenv import load_dotenv
@@ -16,24 +18,33 @@ except ImportError:
 
 from sql_database import SQLDatabaseManager, migrate_json_to_sql
 
-# Import Blackjack game logic
-from blackjack import BlackjackGame
-
-# Import Mines game logic
-from mines import MinesGame
-
-# Import Baccarat game logic
-from baccarat import BaccaratGame
-
-# Import Keno game logic
-from keno import KenoGame
-
-# Import Limbo game logic
-from limbo import LimboGame, get_preset_multipliers
-
-# Import Hi-Lo game logic
-from hilo import HiLoGame
-from connect4 import Connect4Game
+# Game logic modules are imported on first use through the game registry (see GAME_PLUGINS)
+if TYPE_CHECKING:
+    from mines import MinesGame
+    from keno import KenoGame
+    from hilo import HiLoGame
+    from connect4 import Connect4Game
+
+from active_games import ActiveGameRegistry, PendingChallengeDict, connect4_players
+from game_plugins import GamePlugin, GameRegistry, prefix as game_prefix, exact as game_exact
+from timer_wheel import TimerWheel
+from bounded_store import BoundedStore
+from wallet import Wallet
+from update_processor import OrderedUpdateProcessor
+from outbound import OutboundDispatcher, NOTICE
+from plisio_client import PlisioClient, PlisioOutcomeUnknown
+from price_feed import PriceFeed
+from treasury import TreasuryCache
+from deposit_pool import DepositAddressPool
+from keyboard_cache import KeyboardRenderer
+from edit_coalescer import EditCoalescer
+from startup_timer import StartupTimer
+from session_store import SQLSessionStore, create_session_store
+from session_snapshots import SessionSnapshots
+from worker_router import WorkerRouter
+from levels import (LEVEL_TIERS, get_user_level, get_next_level, get_tier_index, get_level_by_id,
+                    is_level_reached, get_claimable_levels)
+from callback_router import CallbackRouter, PUBLIC, OWNER, APPROVER, fields, optional_fields, last_field, remainder
 
 # External dependencies (assuming they are installed via pip install python-telegram-bot)
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, BotCommand, WebAppInfo
@@ -53,115 +64,6 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# --- Level System Configuration ---
-LEVEL_TIERS = [
-    {"name": "Bronze", "emoji": "🥉", "levels": [
-        {"id": "bronze_i", "name": "Bronze I", "threshold": 100, "bonus": 1},
-        {"id": "bronze_ii", "name": "Bronze II", "threshold": 500, "bonus": 2},
-        {"id": "bronze_iii", "name": "Bronze III", "threshold": 1000, "bonus": 2.50},
-        {"id": "bronze_iv", "name": "Bronze IV", "threshold": 2500, "bonus": 7.50},
-        {"id": "bronze_v", "name": "Bronze V", "threshold": 5000, "bonus": 12.50},
-    ]},
-    {"name": "Silver", "emoji": "🥈", "levels": [
-        {"id": "silver_i", "name": "Silver I", "threshold": 10000, "bonus": 25},
-        {"id": "silver_ii", "name": "Silver II", "threshold": 15200, "bonus": 26},
-        {"id": "silver_iii", "name": "Silver III", "threshold": 20500, "bonus": 26.50},
-        {"id": "silver_iv", "name": "Silver IV", "threshold": 26000, "bonus": 27.50},
-        {"id": "silver_v", "name": "Silver V", "threshold": 32000, "bonus": 30},
-    ]},
-    {"name": "Gold", "emoji": "🏆", "levels": [
-        {"id": "gold_i", "name": "Gold I", "threshold": 39000, "bonus": 35},
-        {"id": "gold_ii", "name": "Gold II", "threshold": 48000, "bonus": 45},
-        {"id": "gold_iii", "name": "Gold III", "threshold": 58000, "bonus": 50},
-        {"id": "gold_iv", "name": "Gold IV", "threshold": 69000, "bonus": 55},
-        {"id": "gold_v", "name": "Gold V", "threshold": 81000, "bonus": 60},
-    ]},
-    {"name": "Platinum", "emoji": "💎", "levels": [
-        {"id": "platinum_i", "name": "Platinum I", "threshold": 94000, "bonus": 65},
-        {"id": "platinum_ii", "name": "Platinum II", "threshold": 107500, "bonus": 67.50},
-        {"id": "platinum_iii", "name": "Platinum III", "threshold": 122000, "bonus": 72.50},
-        {"id": "platinum_iv", "name": "Platinum IV", "threshold": 138000, "bonus": 80},
-        {"id": "platinum_v", "name": "Platinum V", "threshold": 155000, "bonus": 85},
-    ]},
-    {"name": "Diamond", "emoji": "💠", "levels": [
-        {"id": "diamond_i", "name": "Diamond I", "threshold": 173000, "bonus": 90},
-        {"id": "diamond_ii", "name": "Diamond II", "threshold": 192000, "bonus": 95},
-        {"id": "diamond_iii", "name": "Diamond III", "threshold": 211500, "bonus": 97.50},
-        {"id": "diamond_iv", "name": "Diamond IV", "threshold": 232000, "bonus": 102},
-        {"id": "diamond_v", "name": "Diamond V", "threshold": 253000, "bonus": 105},
-    ]},
-    {"name": "Emerald", "emoji": "💚", "levels": [
-        {"id": "emerald_i", "name": "Emerald I", "threshold": 275000, "bonus": 110},
-        {"id": "emerald_ii", "name": "Emerald II", "threshold": 298000, "bonus": 115},
-        {"id": "emerald_iii", "name": "Emerald III", "threshold": 322000, "bonus": 120},
-        {"id": "emerald_iv", "name": "Emerald IV", "threshold": 347000, "bonus": 125},
-        {"id": "emerald_v", "name": "Emerald V", "threshold": 373000, "bonus": 130},
-    ]},
-    {"name": "Ruby", "emoji": "❤️", "levels": [
-        {"id": "ruby_i", "name": "Ruby I", "threshold": 400000, "bonus": 135},
-        {"id": "ruby_ii", "name": "Ruby II", "threshold": 428000, "bonus": 140},
-        {"id": "ruby_iii", "name": "Ruby III", "threshold": 457000, "bonus": 145},
-        {"id": "ruby_iv", "name": "Ruby IV", "threshold": 487000, "bonus": 150},
-        {"id": "ruby_v", "name": "Ruby V", "threshold": 518000, "bonus": 155},
-    ]},
-    {"name": "Sapphire", "emoji": "💙", "levels": [
-        {"id": "sapphire_i", "name": "Sapphire I", "threshold": 550000, "bonus": 160},
-        {"id": "sapphire_ii", "name": "Sapphire II", "threshold": 583000, "bonus": 165},
-        {"id": "sapphire_iii", "name": "Sapphire III", "threshold": 617000, "bonus": 170},
-        {"id": "sapphire_iv", "name": "Sapphire IV", "threshold": 652000, "bonus": 175},
-        {"id": "sapphire_v", "name": "Sapphire V", "threshold": 688000, "bonus": 180},
-    ]},
-    {"name": "Amethyst", "emoji": "💜", "levels": [
-        {"id": "amethyst_i", "name": "Amethyst I", "threshold": 725000, "bonus": 185},
-        {"id": "amethyst_ii", "name": "Amethyst II", "threshold": 763000, "bonus": 190},
-        {"id": "amethyst_iii", "name": "Amethyst III", "threshold": 802000, "bonus": 195},
-        {"id": "amethyst_iv", "name": "Amethyst IV", "threshold": 842000, "bonus": 200},
-        {"id": "amethyst_v", "name": "Amethyst V", "threshold": 883000, "bonus": 205},
-    ]},
-    {"name": "Obsidian", "emoji": "🖤", "levels": [
-        {"id": "obsidian_i", "name": "Obsidian I", "threshold": 925000, "bonus": 210},
-        {"id": "obsidian_ii", "name": "Obsidian II", "threshold": 968000, "bonus": 215},
-        {"id": "obsidian_iii", "name": "Obsidian III", "threshold": 1012000, "bonus": 220},
-        {"id": "obsidian_iv", "name": "Obsidian IV", "threshold": 1058000, "bonus": 230},
-        {"id": "obsidian_v", "name": "Obsidian V", "threshold": 1107000, "bonus": 245},
-    ]},
-    {"name": "Mythic", "emoji": "🔮", "levels": [
-        {"id": "mythic_i", "name": "Mythic I", "threshold": 1159000, "bonus": 260},
-        {"id": "mythic_ii", "name": "Mythic II", "threshold": 1213000, "bonus": 270},
-        {"id": "mythic_iii", "name": "Mythic III", "threshold": 1270000, "bonus": 285},
-        {"id": "mythic_iv", "name": "Mythic IV", "threshold": 1330000, "bonus": 300},
-        {"id": "mythic_v", "name": "Mythic V", "threshold": 1393000, "bonus": 315},
-    ]},
-    {"name": "Legendary", "emoji": "👑", "levels": [
-        {"id": "legendary_i", "name": "Legendary I", "threshold": 1458000, "bonus": 325},
-        {"id": "legendary_ii", "name": "Legendary II", "threshold": 1525000, "bonus": 335},
-        {"id": "legendary_iii", "name": "Legendary III", "threshold": 1595000, "bonus": 350},
-        {"id": "legendary_iv", "name": "Legendary IV", "threshold": 1668000, "bonus": 365},
-        {"id": "legendary_v", "name": "Legendary V", "threshold": 1743000, "bonus": 375},
-    ]},
-    {"name": "Ethereal", "emoji": "✨", "levels": [
-        {"id": "ethereal_i", "name": "Ethereal I", "threshold": 1850000, "bonus": 535},
-        {"id": "ethereal_ii", "name": "Ethereal II", "threshold": 2000000, "bonus": 750},
-        {"id": "ethereal_iii", "name": "Ethereal III", "threshold": 2175000, "bonus": 875},
-        {"id": "ethereal_iv", "name": "Ethereal IV", "threshold": 2400000, "bonus": 1125},
-        {"id": "ethereal_v", "name": "Ethereal V", "threshold": 2650000, "bonus": 1250},
-    ]},
-]
-
-LEVELS = []
-for tier in LEVEL_TIERS:
-    for level in tier["levels"]:
-        LEVELS.append({
-            "id": level["id"],
-            "name": level["name"],
-            "emoji": tier["emoji"],
-            "threshold": level["threshold"],
-            "bonus": level["bonus"],
-            "tier_name": tier["name"]
-        })
-
-LEVELS.insert(0, {"id": "unranked", "name": "Unranked", "emoji": "⚪", "threshold": 0, "bonus": 0, "tier_name": "Unranked"})
-
 # --- Supported Crypto Currencies for Deposits & Withdrawals (Plisio) ---
 # Each crypto has its own fee percentage to account for different network fees
 # Higher fees for expensive networks (BTC, ETH), lower fees for cheap networks (TRX, SOL)
@@ -186,31 +88,6 @@ def get_crypto_min_withdraw(currency: str) -> float:
     crypto_info = SUPPORTED_CRYPTOS.get(currency, {})
     return crypto_info.get('min_withdraw', 1.00)
 
-def get_user_level(total_wagered: float, user_id: Optional[int] = None, db = None) -> dict:
-    """Returns the current level data based on total wagered amount."""
-    current_level = LEVELS[0]
-    for level in LEVELS:
-        if total_wagered >= level["threshold"]:
-            current_level = level
-        else:
-            break
-    
-    return current_level
-
-def get_next_level(total_wagered: float) -> Optional[dict]:
-    """Returns the next level data or None if at max level."""
-    for i, level in enumerate(LEVELS):
-        if total_wagered < level["threshold"]:
-            return level
-    return None
-
-def get_tier_index(tier_name: str) -> int:
-    """Get the index of a tier by name."""
-    for i, tier in enumerate(LEVEL_TIERS):
-        if tier["name"] == tier_name:
-            return i
-    return 0
-
 def get_blockchain_explorer_url(currency: str, tx_id: str) -> str:
     """Get the blockchain explorer URL for a transaction."""
     explorers = {
@@ -229,12 +106,114 @@ def get_blockchain_explorer_url(currency: str, tx_id: str) -> str:
 # --- 1. Database Manager (SQL-backed storage) ---
 # Use SQL database for persistent storage shared between bot and webapp
 DatabaseManager = SQLDatabaseManager
+# Importing a legacy casino_data.json is an explicit step: `python main.py migrate`
+
+# Sticker file ids used until /saveroulette stores a set in house_config
+DEFAULT_STICKERS = {
+    "roulette": {
+        "00": "CAACAgQAAxkBAAEPnjFo-TLLYpgTZExC4IIOG6PIXwsviAAC1BgAAkmhgFG_0u82E59m3DYE",
+        "0": "CAACAgQAAxkBAAEPnjNo-TMFaqDdWCkRDNlus4jcuamAAwACOh0AAtQAAYBRlMLfm2ulRSM2BA",
+        "1": "CAACAgQAAxkBAAEPnjRo-TMFH5o5R9ztNtTFBJmQVK_t3wACqBYAAvTrgVE4WCoxbBzVCDYE",
+        "2": "CAACAgQAAxkBAAEPnjdo-TMvGdoX-f6IAuR7kpYO-hh9fwAC1RYAAob0eVF1zbcG00UjMzYE",
+        "3": "CAACAgQAAxkBAAEPnjho-TMwui0CFuGEK5iwS7xMRDiPfgACSRgAAs74gVEyHQtTsRykGjYE",
+        "4": "CAACAgQAAxkBAAEPnj1o-TNGYNdmhy4n5Uyp3pzWmukTgAACfBgAAg3IgFGEjdLKewti5zYE",
+        "5": "CAACAgQAAxkBAAEPnj5o-TNHTKLFF2NpdxfLhHnsnFGTXgACyhYAAltygVECKXn73kUyCjYE",
+        "6": "CAACAgQAAxkBAAEPnkFo-TNPGqrsJJwZNwUe_I6k4W86cwACyxoAAgutgVGyiCe4lNK2-DYE",
+        "7": "CAACAgQAAxkBAAEPnkJo-TNPksXPcYnpXDWYQC68AAGlqzQAAtUYAAKU_IFRJTHChQd2yfw2BA",
+        "8": "CAACAgQAAxkBAAEPnkdo-TQOIBN5WtoKKnvcthXdcy0LLgACgBQAAmlWgVFImh6M5RcAAdI2BA",
+        "9": "CAACAgQAAxkBAAEPnkho-TQO92px4jOuq80nT2uWjURzSAAC4BcAAvPKeVFBx-TZycAWDzYE",
+        "10": "CAACAgQAAxkBAAEPnkto-TZ8-6moW-biByRYl8J2QEPnTwAC8hgAArnAgFGen1zgHwABLPc2BA",
+        "11": "CAACAgQAAxkBAAEPnkxo-TZ8ncZZ7FYYyFMJHXRv2rB0TwAC2RMAAmzdgVEao0YAAdIy41g2BA",
+        "12": "CAACAgQAAxkBAAEPnk1o-TZ9z6xAxxIeccUPXoQQ9VaikQACVRgAAovngVFUjR-qYgq8LDYE",
+        "13": "CAACAgQAAxkBAAEPnlFo-TbUs79Rm549dK3JK2L3P83q-QACTR0AAmc0gFHXnJ509OdiOjYE",
+        "14": "CAACAgQAAxkBAAEPnlJo-TbUCpjrhSxP-x84jkBerEYB8AACQxkAAqXDeVEQ5uCH3dK9OjYE",
+        "15": "CAACAgQAAxkBAAEPnlNo-TbUZokc7ubz-neSYtK9kxQ0DAACrRYAAlBWgVH9BqGde-NivjYE",
+        "16": "CAACAgQAAxkBAAEPnlRo-TbUiOcqxKI6HNExFR8yT3qyvAACrxsAAkcfeVG9im0F0tuZPzYE",
+        "17": "CAACAgQAAxkBAAEPnllo-TdIFRtpAW3PeDbxD2QxTgjk2QACLhgAAiuXgVHaPo1woXZEYTYE",
+        "18": "CAACAgQAAxkBAAEPnlpo-TdI9Gdz2Nv3icxluy8jC3keBwACYxkAAnx7eFGsZP2AXXBKwzYE",
+        "19": "CAACAgQAAxkBAAEPnlto-TdIUktLbTIhkihQz3ymy4lUIwACKRkAArDwgFH0iKqIPPiHYDYE",
+        "20": "CAACAgQAAxkBAAEPnlxo-TdJVrOSPiCRuD8Jc0XGvF3B8AACcxoAAr7OeFGSuSoHyKxf5TYE",
+        "21": "CAACAgQAAxkBAAEPnl1o-TdJ1jlMSjGQPO0zkaS_rOv5JQACxhcAAv1dgFF3khtGYFneYzYE",
+        "22": "CAACAgQAAxkBAAEPnmNo-Te2OhfAwfprG1HfmY-UNtkEAgADGQACE8KAUSJTKzPQQQ9INgQ",
+        "23": "CAACAgQAAxkBAAEPnmRo-Te3rAHmt7_CRgFp55KSNVYdKwACTBgAAundgVF6unXyM34ZYzYE",
+        "24": "CAACAgQAAxkBAAEPnmVo-Te3LcVARwsUx3Akt75bruvNXAAC4RoAAnkvgFHRL4l2927wnDYE",
+        "25": "CAACAgQAAxkBAAEPnmZo-Te3lY0O1JxF8tTLYJJhN1QcnAAC5hcAAiPegFFsMkNzpqfR0zYE",
+        "26": "CAACAgQAAxkBAAEPnmto-TgIsR6UdO8EukNYajboFnX3mgACzSAAAn15gVG-oQ4oaJLYrzYE",
+        "27": "CAACAgQAAxkBAAEPnmxo-TgIVFkyEf19Je-9awnfcm0HNAACoBcAAjK0gVFqoRMWJ0V2AjYE",
+        "28": "CAACAgQAAxkBAAEPnm1o-TgIEaTKLI1hP_FD5NoPNMoRrQAC8xUAAjTtgVFbDjOI7hjkyDYE",
+        "29": "CAACAgQAAxkBAAEPnm5o-TgIrfmuYVnfQps2DUcaDPJtYAACehcAAgL2eFFyvPJETxqlljYE",
+        "30": "CAACAgQAAxkBAAEPnm9o-TgIumJ40cFAJ7xQVVJu8yioGQACrBUAAqMsgVEiKujpQgVfJDYE",
+        "31": "CAACAgQAAxkBAAEPnndo-ThreZX7kJJpPO5idNcOeIWZpQACDhsAArW6gFENcv6I97q9xDYE",
+        "32": "CAACAgQAAxkBAAEPni9o-Ssij-qcC2-pLlmtFrUQr5AUgQACWxcAAsmneVGFqOYh9w81_TYE",
+        "33": "CAACAgQAAxkBAAEPnnto-Thsmi6zNRuaeXnBFpXJ-w2JnQACjBkAAo3JeFEYXOtgIzFLjTYE",
+        "34": "CAACAgQAAxkBAAEPnnlo-ThrHvyKnt3O8UiLblKzGgWqzQACWBYAAvn3gVElI6JyUvoRYzYE",
+        "35": "CAACAgQAAxkBAAEPnn9o-Tij1sCB1_UVenRU6QvBnfFKagACkhYAAsKTgFHHcm9rj3PDyDYE",
+        "36": "CAACAgQAAxkBAAEPnoBo-Tik1zRaZMCVCaOi9J1FtVvEiAACrBcAAtbQgVFt8Uw1gyn4MDYE"
+    }
+}
 
-# Run migration from JSON to SQL on startup (only migrates if SQL is empty)
-try:
-    migrate_json_to_sql()
-except Exception as e:
-    logger.warning(f"Migration check: {e}")
+def _hilo_guess_route(action: str):
+    return game_prefix(f"hilo_{action}_",
+                       lambda bot: lambda update, context, game_user_id: bot._button_hilo_guess(update, context, action, game_user_id),
+                       parser=fields(int))
+
+# Session games: logic module, commands, button routes, timeout settlement and keyboard renderer
+GAME_PLUGINS = [
+    GamePlugin("blackjack", "Blackjack", "blackjack", "BlackjackGame",
+               commands={"blackjack": "blackjack_command"},
+               routes=[game_prefix("bj_", "_button_bj", policy=PUBLIC)],
+               on_timeout="_blackjack_timeout"),
+    GamePlugin("mines", "Mines", "mines", "MinesGame",
+               commands={"mines": "mines_command"},
+               routes=[
+                   game_prefix("mines_start_", "_button_mines_start", policy=PUBLIC),
+                   game_prefix("mines_reveal_", "_button_mines_reveal", policy=PUBLIC, parser=fields(int, int)),
+                   game_prefix("mines_cashout_", "_button_mines_cashout", policy=PUBLIC, parser=fields(int)),
+                   game_prefix("mines_again_", "_button_mines_again", policy=PUBLIC, parser=fields(int, float, int)),
+                   game_prefix("mines_change_", "_button_mines_change", policy=PUBLIC, parser=fields(int, float)),
+                   game_exact("mines_noop", "_button_mines_noop", policy=PUBLIC),
+               ],
+               on_timeout="_mines_timeout", renderer="_build_mines_grid_keyboard"),
+    GamePlugin("baccarat", "Baccarat", "baccarat", "BaccaratGame",
+               commands={"baccarat": "baccarat_command"},
+               routes=[game_prefix("bacc_", "_button_bacc", policy=PUBLIC, parser=fields(int, float, str))],
+               sessions=False),
+    GamePlugin("keno", "Keno", "keno", "KenoGame",
+               commands={"keno": "keno_command"},
+               routes=[
+                   game_prefix("keno_pick_", "_button_keno_pick", policy=PUBLIC, parser=fields(int, int)),
+                   game_prefix("keno_draw_", "_button_keno_draw", policy=PUBLIC, parser=fields(int)),
+                   game_prefix("keno_clear_", "_button_keno_clear", policy=PUBLIC, parser=fields(int)),
+                   game_prefix("keno_again_", "_button_keno_again", policy=PUBLIC, parser=fields(int, float)),
+                   game_prefix("keno_select_rounds_", "_button_keno_select_rounds", policy=PUBLIC, parser=fields(int)),
+                   game_prefix("keno_back_", "_button_keno_back", policy=PUBLIC, parser=fields(int)),
+                   game_prefix("keno_rounds_", "_button_keno_rounds", policy=PUBLIC, parser=fields(int, int)),
+                   game_prefix("keno_stop_", "_button_keno_stop", policy=PUBLIC, parser=fields(int)),
+                   game_exact("keno_noop", "_button_keno_noop", policy=PUBLIC),
+               ],
+               on_timeout="_keno_timeout", renderer="_build_keno_grid_keyboard"),
+    GamePlugin("limbo", "Limbo", "limbo", "LimboGame",
+               commands={"limbo": "limbo_command"},
+               routes=[game_prefix("limbo_again_", "_button_limbo_again", parser=fields(int, float, float))]),
+    GamePlugin("hilo", "Hi-Lo", "hilo", "HiLoGame",
+               commands={"hilo": "hilo_command"},
+               routes=[
+                   game_prefix("hilo_skip_", "_button_hilo_skip", parser=fields(int)),
+                   game_prefix("hilo_cashout_", "_button_hilo_cashout", parser=fields(int)),
+                   game_prefix("hilo_again_", "_button_hilo_again", parser=fields(int, float)),
+                   *(_hilo_guess_route(action) for action in ("higher", "lower", "tie")),
+               ],
+               on_timeout="_hilo_timeout", renderer="_build_hilo_keyboard"),
+    GamePlugin("connect4", "Connect 4", "connect4", "Connect4Game",
+               commands={"connect": "connect_command"},
+               routes=[
+                   game_prefix("connect4_accept_", "_accept_connect4_challenge", policy=PUBLIC, parser=remainder()),
+                   game_prefix("connect4_roll_", "_button_connect4_roll", policy=PUBLIC, parser=last_field(str, int)),
+                   game_prefix("connect4_drop_", "_button_connect4_drop", policy=PUBLIC, parser=last_field(str, int)),
+                   game_exact("connect4_noop", "_button_connect4_noop", policy=PUBLIC),
+               ],
+               participants=connect4_players, on_timeout="_connect4_timeout", renderer="_build_connect4_keyboard"),
+]
 
 # --- 2. Gran Tesero Casino Bot Class ---
 class GranTeseroCasinoBot:
@@ -242,6 +221,8 @@ class GranTeseroCasinoBot:
         self.token = token
         # Initialize the internal database manager
         self.db = DatabaseManager()
+        # All balance changes (bot and deposit webhook) are serialized per user through this
+        self.wallet = Wallet(self.db)
         
         # Admin user IDs from environment variable (permanent admins)
         admin_ids_str = os.getenv("ADMIN_IDS", "")
@@ -253,203 +234,255 @@ class GranTeseroCasinoBot:
             except ValueError:
                 logger.error("Invalid ADMIN_IDS format. Use comma-separated numbers.")
         
-        # Load dynamic admins from database
-        self.dynamic_admin_ids = set(self.db.get_dynamic_admins())
-        if self.dynamic_admin_ids:
-            logger.info(f"Loaded {len(self.dynamic_admin_ids)} dynamic admin(s) from database")
-        
-        # Load withdrawal approvers from database (can only approve/deny withdrawals)
-        approvers_str = self.db.get_config('withdrawal_approvers', '[]')
-        try:
-            self.withdrawal_approvers = set(json.loads(approvers_str))
-        except:
-            self.withdrawal_approvers = set()
-        if self.withdrawal_approvers:
-            logger.info(f"Loaded {len(self.withdrawal_approvers)} withdrawal approver(s) from database")
-        
-        # Initialize bot application
-        self.app = Application.builder().token(token).build()
+        # Dynamic admins and withdrawal approvers are read from the database by load_state()
+        self.dynamic_admin_ids = set()
+        self.withdrawal_approvers = set()
+        
+        # Games hosted by this bot; game modules load on first use, GAMES_ENABLED / GAMES_DISABLED pick the set
+        self.games = GameRegistry.from_env(GAME_PLUGINS)
+        
+        # Initialize bot application. Updates run concurrently across users but in order per user.
+        self.update_processor = OrderedUpdateProcessor(int(os.getenv("MAX_CONCURRENT_UPDATES", "64")))
+        # Every Bot API call is paced per chat and globally, with game results ahead of notices
+        self.outbound = OutboundDispatcher()
+        # One pooled HTTP client for every Plisio call (retries read-only calls, fails fast while Plisio is down)
+        self.plisio = PlisioClient()
+        # Crypto prices refreshed in the background; handlers read them from memory
+        self.prices = PriceFeed(self.plisio, refresh_seconds=float(os.getenv("PRICE_REFRESH_SECONDS", "60")))
+        # Wallet balances for /walletbal, fetched concurrently and cached briefly
+        self.treasury = TreasuryCache(self.get_plisio_wallet_balance, SUPPORTED_DEPOSIT_CRYPTOS.keys())
+        # State shared between bot workers (SESSION_STORE: memory, sql or a redis:// URL) and the
+        # router that sends each webhook update to the worker that owns its chat
+        self.session_store = create_session_store(os.getenv("SESSION_STORE"), self.db)
+        self.worker_router = WorkerRouter.from_env(self.session_store)
+        # Deposit invoices created ahead of time so the deposit screen never waits on Plisio
+        self.deposit_pool = DepositAddressPool(self.create_pool_invoice, SUPPORTED_DEPOSIT_CRYPTOS.keys(),
+                                               low_water=int(os.getenv("DEPOSIT_POOL_LOW_WATER", "2")))
+        self.app = (Application.builder().token(token)
+                    .concurrent_updates(self.update_processor)
+                    .rate_limiter(self.outbound)
+                    .build())
         self.setup_handlers()
-        
-        # Dictionary to store ongoing PvP challenges (in-memory, not persisted)
-        self.pending_pvp: Dict[str, Any] = {}
+        self.callback_router = CallbackRouter()
+        self.setup_callback_routes()
+        
+        # Index of live games by participant, kept in sync by the session dicts below
+        self.active_games = ActiveGameRegistry()
+        
+        # Single scheduler for game timeouts, challenge deadlines and delayed result reveals (started with the bot)
+        self.timers = TimerWheel()
+        self._reveal_seq = 0
+        self._pool_invoice_seq = 0
+        # Rapid taps on a grid game collapse into one edit per message per interval
+        self.edits = EditCoalescer(self.app.bot, self.timers)
+        
+        # Ongoing PvP challenges, kept in memory and persisted per challenge:
+        # each challenge is written to its own pending_challenges row on assignment and
+        # deleted on removal, so a state transition only writes its own record.
+        self.pending_pvp: Dict[str, Any] = PendingChallengeDict(
+            self.active_games,
+            save=self.db.save_pending_challenge,
+            delete=self.db.delete_pending_challenge,
+            on_set=self._schedule_challenge_deadline,
+            on_remove=self._cancel_challenge_deadline,
+        )
+        # Challenges persisted by a previous run are restored by load_state()
         
         # Track button ownership: (chat_id, message_id) -> user_id mapping
-        self.button_ownership: Dict[tuple, int] = {}
+        self.button_ownership: Dict[tuple, int] = BoundedStore(
+            "button_ownership", maxsize=self.BUTTON_STORE_MAXSIZE, ttl=self.BUTTON_STORE_TTL)
         # Track clicked buttons to prevent re-use: (chat_id, message_id, callback_data)
-        self.clicked_buttons: set = set()
+        # Kept at least as long as ownership, so an old bet button is blocked by one or the other
+        self.clicked_buttons = BoundedStore(
+            "clicked_buttons", maxsize=2 * self.BUTTON_STORE_MAXSIZE, ttl=self.BUTTON_STORE_TTL)
         # Track users with pending opponent selection (shown "Choose your opponent" but haven't clicked yet)
-        self.pending_opponent_selection: set = set()
-        
-        # Sticker configuration - Load from database or initialize with defaults
-        stickers_config = self.db.get_config('stickers', None)
-        if not stickers_config:
-            default_stickers = {
-                "roulette": {
-                    "00": "CAACAgQAAxkBAAEPnjFo-TLLYpgTZExC4IIOG6PIXwsviAAC1BgAAkmhgFG_0u82E59m3DYE",
-                    "0": "CAACAgQAAxkBAAEPnjNo-TMFaqDdWCkRDNlus4jcuamAAwACOh0AAtQAAYBRlMLfm2ulRSM2BA",
-                    "1": "CAACAgQAAxkBAAEPnjRo-TMFH5o5R9ztNtTFBJmQVK_t3wACqBYAAvTrgVE4WCoxbBzVCDYE",
-                    "2": "CAACAgQAAxkBAAEPnjdo-TMvGdoX-f6IAuR7kpYO-hh9fwAC1RYAAob0eVF1zbcG00UjMzYE",
-                    "3": "CAACAgQAAxkBAAEPnjho-TMwui0CFuGEK5iwS7xMRDiPfgACSRgAAs74gVEyHQtTsRykGjYE",
-                    "4": "CAACAgQAAxkBAAEPnj1o-TNGYNdmhy4n5Uyp3pzWmukTgAACfBgAAg3IgFGEjdLKewti5zYE",
-                    "5": "CAACAgQAAxkBAAEPnj5o-TNHTKLFF2NpdxfLhHnsnFGTXgACyhYAAltygVECKXn73kUyCjYE",
-                    "6": "CAACAgQAAxkBAAEPnkFo-TNPGqrsJJwZNwUe_I6k4W86cwACyxoAAgutgVGyiCe4lNK2-DYE",
-                    "7": "CAACAgQAAxkBAAEPnkJo-TNPksXPcYnpXDWYQC68AAGlqzQAAtUYAAKU_IFRJTHChQd2yfw2BA",
-                    "8": "CAACAgQAAxkBAAEPnkdo-TQOIBN5WtoKKnvcthXdcy0LLgACgBQAAmlWgVFImh6M5RcAAdI2BA",
-                    "9": "CAACAgQAAxkBAAEPnkho-TQO92px4jOuq80nT2uWjURzSAAC4BcAAvPKeVFBx-TZycAWDzYE",
-                    "10": "CAACAgQAAxkBAAEPnkto-TZ8-6moW-biByRYl8J2QEPnTwAC8hgAArnAgFGen1zgHwABLPc2BA",
-                    "11": "CAACAgQAAxkBAAEPnkxo-TZ8ncZZ7FYYyFMJHXRv2rB0TwAC2RMAAmzdgVEao0YAAdIy41g2BA",
-                    "12": "CAACAgQAAxkBAAEPnk1o-TZ9z6xAxxIeccUPXoQQ9VaikQACVRgAAovngVFUjR-qYgq8LDYE",
-                    "13": "CAACAgQAAxkBAAEPnlFo-TbUs79Rm549dK3JK2L3P83q-QACTR0AAmc0gFHXnJ509OdiOjYE",
-                    "14": "CAACAgQAAxkBAAEPnlJo-TbUCpjrhSxP-x84jkBerEYB8AACQxkAAqXDeVEQ5uCH3dK9OjYE",
-                    "15": "CAACAgQAAxkBAAEPnlNo-TbUZokc7ubz-neSYtK9kxQ0DAACrRYAAlBWgVH9BqGde-NivjYE",
-                    "16": "CAACAgQAAxkBAAEPnlRo-TbUiOcqxKI6HNExFR8yT3qyvAACrxsAAkcfeVG9im0F0tuZPzYE",
-                    "17": "CAACAgQAAxkBAAEPnllo-TdIFRtpAW3PeDbxD2QxTgjk2QACLhgAAiuXgVHaPo1woXZEYTYE",
-                    "18": "CAACAgQAAxkBAAEPnlpo-TdI9Gdz2Nv3icxluy8jC3keBwACYxkAAnx7eFGsZP2AXXBKwzYE",
-                    "19": "CAACAgQAAxkBAAEPnlto-TdIUktLbTIhkihQz3ymy4lUIwACKRkAArDwgFH0iKqIPPiHYDYE",
-                    "20": "CAACAgQAAxkBAAEPnlxo-TdJVrOSPiCRuD8Jc0XGvF3B8AACcxoAAr7OeFGSuSoHyKxf5TYE",
-                    "21": "CAACAgQAAxkBAAEPnl1o-TdJ1jlMSjGQPO0zkaS_rOv5JQACxhcAAv1dgFF3khtGYFneYzYE",
-                    "22": "CAACAgQAAxkBAAEPnmNo-Te2OhfAwfprG1HfmY-UNtkEAgADGQACE8KAUSJTKzPQQQ9INgQ",
-                    "23": "CAACAgQAAxkBAAEPnmRo-Te3rAHmt7_CRgFp55KSNVYdKwACTBgAAundgVF6unXyM34ZYzYE",
-                    "24": "CAACAgQAAxkBAAEPnmVo-Te3LcVARwsUx3Akt75bruvNXAAC4RoAAnkvgFHRL4l2927wnDYE",
-                    "25": "CAACAgQAAxkBAAEPnmZo-Te3lY0O1JxF8tTLYJJhN1QcnAAC5hcAAiPegFFsMkNzpqfR0zYE",
-                    "26": "CAACAgQAAxkBAAEPnmto-TgIsR6UdO8EukNYajboFnX3mgACzSAAAn15gVG-oQ4oaJLYrzYE",
-                    "27": "CAACAgQAAxkBAAEPnmxo-TgIVFkyEf19Je-9awnfcm0HNAACoBcAAjK0gVFqoRMWJ0V2AjYE",
-                    "28": "CAACAgQAAxkBAAEPnm1o-TgIEaTKLI1hP_FD5NoPNMoRrQAC8xUAAjTtgVFbDjOI7hjkyDYE",
-                    "29": "CAACAgQAAxkBAAEPnm5o-TgIrfmuYVnfQps2DUcaDPJtYAACehcAAgL2eFFyvPJETxqlljYE",
-                    "30": "CAACAgQAAxkBAAEPnm9o-TgIumJ40cFAJ7xQVVJu8yioGQACrBUAAqMsgVEiKujpQgVfJDYE",
-                    "31": "CAACAgQAAxkBAAEPnndo-ThreZX7kJJpPO5idNcOeIWZpQACDhsAArW6gFENcv6I97q9xDYE",
-                    "32": "CAACAgQAAxkBAAEPni9o-Ssij-qcC2-pLlmtFrUQr5AUgQACWxcAAsmneVGFqOYh9w81_TYE",
-                    "33": "CAACAgQAAxkBAAEPnnto-Thsmi6zNRuaeXnBFpXJ-w2JnQACjBkAAo3JeFEYXOtgIzFLjTYE",
-                    "34": "CAACAgQAAxkBAAEPnnlo-ThrHvyKnt3O8UiLblKzGgWqzQACWBYAAvn3gVElI6JyUvoRYzYE",
-                    "35": "CAACAgQAAxkBAAEPnn9o-Tij1sCB1_UVenRU6QvBnfFKagACkhYAAsKTgFHHcm9rj3PDyDYE",
-                    "36": "CAACAgQAAxkBAAEPnoBo-Tik1zRaZMCVCaOi9J1FtVvEiAACrBcAAtbQgVFt8Uw1gyn4MDYE"
-                }
-            }
-            self.db.set_config('stickers', json.dumps(default_stickers))
-            self.stickers = default_stickers
-        else:
-            self.stickers = json.loads(stickers_config)
-        
-        # Dictionary to store active Blackjack games: user_id -> BlackjackGame instance
-        self.blackjack_sessions: Dict[int, BlackjackGame] = {}
-        
-        # Dictionary to store active Mines games: user_id -> MinesGame instance
-        self.mines_sessions: Dict[int, MinesGame] = {}
-        
-        # Dictionary to store active Keno games: user_id -> KenoGame instance
-        self.keno_sessions: Dict[int, KenoGame] = {}
-        
-        # Dictionary to store active Limbo games: user_id -> LimboGame instance
-        self.limbo_sessions: Dict[int, LimboGame] = {}
+        self.pending_opponent_selection = BoundedStore(
+            "pending_opponent_selection", maxsize=self.BUTTON_STORE_MAXSIZE, ttl=self.OPPONENT_SELECTION_TTL)
+        # Last rendered grid keyboards per game, so a tap only rebuilds the tiles it changed
+        self.keyboards = KeyboardRenderer()
         
-        # Dictionary to store active Hi-Lo games: user_id -> HiLoGame instance
-        self.hilo_sessions: Dict[int, HiLoGame] = {}
+        # Sticker configuration is read from the database on first use (see the stickers property)
+        self._stickers = None
         
-        # Dictionary to store active Connect 4 games: game_id -> Connect4Game instance
-        self.connect4_sessions: Dict[str, Connect4Game] = {}
+        # Active games by plugin: self.blackjack_sessions, self.mines_sessions, self.keno_sessions,
+        # self.limbo_sessions and self.hilo_sessions are keyed by user_id, self.connect4_sessions by game_id.
+        # Sessions idle for SESSION_IDLE_TTL are orphans (every game has a 30s move timeout)
+        game_session_stores = self.games.create_sessions(
+            self, self.active_games, ttl=self.SESSION_IDLE_TTL, on_evict=self._on_session_evicted)
         
-        # Game timeout tracking: game_key -> (asyncio.Task, token)
+        # Game timeout tracking: game_key -> token of the timer currently armed on self.timers
         # game_key format: "type_user_id" (e.g., "blackjack_123456", "connect4_gameid", "pvp_gameid")
-        self.game_timeout_tasks: Dict[str, tuple] = {}
+        self.game_timeout_tokens: Dict[str, int] = {}
         
         # Timeout token counter to prevent duplicate processing
         self.timeout_token_counter = 0
         
+        self.bounded_stores = [
+            self.button_ownership, self.clicked_buttons, self.pending_opponent_selection,
+            *game_session_stores,
+            self.keyboards.store, self.edits.store,
+        ]
+        self.timers.schedule("sweep_stores", self.STORE_SWEEP_SECONDS, self._sweep_bounded_stores)
+        
+        # Game sessions, button owners and move timers are snapshotted in batches so a restart
+        # resumes them (restored by load_state()). The snapshots must outlive the process, so
+        # without a shared session store they go to the bot database.
+        snapshot_store = self.session_store if self.session_store.backend != "memory" else SQLSessionStore(self.db)
+        self.snapshots = SessionSnapshots(snapshot_store, self.timers,
+                                          f"snapshots:{self.worker_router.worker_url or 'local'}",
+                                          interval=float(os.getenv("SESSION_SNAPSHOT_SECONDS", "2")))
+        for plugin in self.games.plugins.values():
+            if plugin.sessions:
+                self.snapshots.track(plugin.name, getattr(self, f"{plugin.name}_sessions"),
+                                     encode=lambda game: game.to_dict(),
+                                     decode=lambda data, name=plugin.name: self.games.restore(name, data),
+                                     reads=True, urgent=True)
+        self.snapshots.track("buttons", self.button_ownership)
+        
         # Timeout duration in seconds
         self.GAME_TIMEOUT_SECONDS = 30
 
-    def user_has_active_game(self, user_id: int) -> bool:
-        """Check if a user already has an active game (PvP, blackjack, mines, keno, or pending opponent selection)"""
-        if user_id in self.blackjack_sessions:
-            logger.info(f"[ACTIVE_GAME] User {user_id} has active blackjack session")
-            return True
+    def load_state(self):
+        """Read admins, approvers and persisted challenges from the database.
         
-        if user_id in self.mines_sessions:
-            logger.info(f"[ACTIVE_GAME] User {user_id} has active mines session")
-            return True
+        Kept out of __init__ so constructing the bot does no I/O; call it once
+        before the bot starts taking updates.
+        """
+        self.db.connect()
         
-        if user_id in self.keno_sessions:
-            logger.info(f"[ACTIVE_GAME] User {user_id} has active keno session")
-            return True
+        # Load dynamic admins from database
+        self.dynamic_admin_ids = set(self.db.get_dynamic_admins())
+        if self.dynamic_admin_ids:
+            logger.info(f"Loaded {len(self.dynamic_admin_ids)} dynamic admin(s) from database")
         
-        if user_id in self.limbo_sessions:
-            logger.info(f"[ACTIVE_GAME] User {user_id} has active limbo session")
-            return True
+        # Load withdrawal approvers from database (can only approve/deny withdrawals)
+        approvers_str = self.db.get_config('withdrawal_approvers', '[]')
+        try:
+            self.withdrawal_approvers = set(json.loads(approvers_str))
+        except:
+            self.withdrawal_approvers = set()
+        if self.withdrawal_approvers:
+            logger.info(f"Loaded {len(self.withdrawal_approvers)} withdrawal approver(s) from database")
         
-        if user_id in self.hilo_sessions:
-            logger.info(f"[ACTIVE_GAME] User {user_id} has active hilo session")
-            return True
+        # Restore challenges persisted by a previous run; afterwards memory is authoritative
+        self.pending_pvp.load(self.db.get_pending_challenges())
         
-        for game_id, game in self.connect4_sessions.items():
-            if user_id == game.player1_id or user_id == game.player2_id:
-                logger.info(f"[ACTIVE_GAME] User {user_id} has active connect4 session: {game_id}")
-                return True
+        # Resume the games of the previous run, with fresh move timers
+        for name, kind, args in self.snapshots.restore():
+            self._resume_timer(name, kind, args)
+    
+    def _resume_timer(self, name: str, kind: str, args: List[Any]):
+        """Re-arm a timer saved by self.snapshots before the restart."""
+        if kind == "game":
+            game_key, game_type, user_id, chat_id, wager, is_pvp, opponent_id, game_id = args
+            self.start_game_timeout(game_key, game_type, user_id, chat_id, wager, is_pvp, opponent_id, game_id,
+                                    bot=self.app.bot)
+        elif kind == "keno_auto":
+            self._schedule_keno_autoplay(*args)
+        else:
+            self.snapshots.forget_timer(name)
+    
+    @property
+    def stickers(self) -> Dict[str, Any]:
+        """Sticker configuration, loaded from the database the first time a game needs it.
+        
+        The defaults are only kept in memory; they reach the database when an
+        admin saves stickers.
+        """
+        if self._stickers is None:
+            stickers_config = self.db.get_config('stickers', None)
+            self._stickers = json.loads(stickers_config) if stickers_config else copy.deepcopy(DEFAULT_STICKERS)
+        return self._stickers
+    
+    # Limits for the in-memory stores (see bounded_store.BoundedStore)
+    BUTTON_STORE_MAXSIZE = 200_000
+    BUTTON_STORE_TTL = 48 * 3600
+    OPPONENT_SELECTION_TTL = 600
+    SESSION_IDLE_TTL = 2 * 3600
+    STORE_SWEEP_SECONDS = 60
+
+    def _on_session_evicted(self, key, game, reason: str):
+        logger.warning(f"[STORE] Dropped {reason} session {key}: {type(game).__name__}")
+
+    async def _sweep_bounded_stores(self):
+        """Expire idle entries in every bounded store, then re-arm."""
+        try:
+            for store in self.bounded_stores:
+                dropped = store.expire()
+                if dropped:
+                    logger.info(f"[STORE] {store.name}: expired {dropped}, size {len(store)}")
+        finally:
+            self.timers.schedule("sweep_stores", self.STORE_SWEEP_SECONDS, self._sweep_bounded_stores)
+
+    def get_store_stats(self) -> List[Dict[str, Any]]:
+        """Size gauges and eviction counters for the bounded in-memory stores."""
+        return [store.stats() for store in self.bounded_stores]
+
+    async def debit_wager(self, update: Update, user_id: int, wager: float) -> Optional[Dict[str, Any]]:
+        """Take a wager through the wallet. If the balance no longer covers it, tell the user and return None."""
+        user_data = await self.wallet.debit(user_id, wager)
+        if user_data is None:
+            balance = self.db.get_user(user_id)['balance']
+            await self.app.bot.send_message(chat_id=update.effective_chat.id, text=f"❌ Balance: ${balance:.2f}")
+        return user_data
+
+    EMOJI_ANIMATION_SECONDS = 3
+
+    def schedule_reveal(self, delay: float, callback, *args):
+        """Run callback(*args) once a dice/slot animation has played out.
+
+        The bet is already settled when this is called; only the message that
+        shows the result waits, on the timer wheel, so the handler returns
+        right away instead of sleeping through the animation.
+        """
+        self._reveal_seq += 1
+        self.timers.schedule(f"reveal:{self._reveal_seq}", delay, callback, *args)
+
+    async def _reveal_result(self, chat_id: int, text: str, reply_markup: Optional[InlineKeyboardMarkup] = None,
+                             owner_id: Optional[int] = None, parse_mode: Optional[str] = None):
+        sent_msg = await self.app.bot.send_message(chat_id=chat_id, text=text, reply_markup=reply_markup, parse_mode=parse_mode)
+        if owner_id is not None:
+            self.button_ownership[(sent_msg.chat_id, sent_msg.message_id)] = owner_id
+
+    def user_has_active_game(self, user_id: int) -> bool:
+        """Check if a user already has an active game (PvP, blackjack, mines, keno, or pending opponent selection)"""
+        if user_id in self.active_games:
+            logger.debug(f"[ACTIVE_GAME] User {user_id} has active game: {self.active_games.get(user_id)}")
+            return True
         
         if user_id in self.pending_opponent_selection:
-            logger.info(f"[ACTIVE_GAME] User {user_id} has pending opponent selection")
+            logger.debug(f"[ACTIVE_GAME] User {user_id} has pending opponent selection")
             return True
-        
-        for game_id, challenge in self.pending_pvp.items():
-            challenger = challenge.get('challenger')
-            opponent = challenge.get('opponent')
-            player = challenge.get('player')
-            if challenger == user_id or opponent == user_id or player == user_id:
-                logger.info(f"[ACTIVE_GAME] User {user_id} has active game: {game_id}")
-                return True
         return False
 
     def clear_user_game_state(self, user_id: int) -> list:
         """Clear all game states for a user. Returns list of cleared game types."""
         cleared = []
         
-        if user_id in self.blackjack_sessions:
-            del self.blackjack_sessions[user_id]
-            cleared.append("blackjack")
-        
-        if user_id in self.mines_sessions:
-            del self.mines_sessions[user_id]
-            cleared.append("mines")
-        
-        if user_id in self.keno_sessions:
-            del self.keno_sessions[user_id]
-            cleared.append("keno")
-        
-        if user_id in self.limbo_sessions:
-            del self.limbo_sessions[user_id]
-            cleared.append("limbo")
-        
-        if user_id in self.hilo_sessions:
-            del self.hilo_sessions[user_id]
-            cleared.append("hilo")
-        
-        connect4_to_remove = []
-        for game_id, game in self.connect4_sessions.items():
-            if user_id == game.player1_id or user_id == game.player2_id:
-                connect4_to_remove.append(game_id)
-        for game_id in connect4_to_remove:
-            del self.connect4_sessions[game_id]
-            if "connect4" not in cleared:
-                cleared.append("connect4")
+        session_stores = {
+            "blackjack": self.blackjack_sessions,
+            "mines": self.mines_sessions,
+            "keno": self.keno_sessions,
+            "limbo": self.limbo_sessions,
+            "hilo": self.hilo_sessions,
+            "connect4": self.connect4_sessions,
+            "pvp": self.pending_pvp,
+        }
+        for registry_key, game_type in self.active_games.games_for(user_id).items():
+            session_key = registry_key.split(":", 1)[1]
+            store = session_stores[game_type]
+            if game_type in ("connect4", "pvp"):
+                store.pop(session_key, None)
+            else:
+                store.pop(user_id, None)
+            if game_type not in cleared:
+                cleared.append(game_type)
         
         if user_id in self.pending_opponent_selection:
             self.pending_opponent_selection.discard(user_id)
             cleared.append("pending_selection")
         
-        pvp_to_remove = []
-        for game_id, challenge in self.pending_pvp.items():
-            challenger = challenge.get('challenger')
-            opponent = challenge.get('opponent')
-            player = challenge.get('player')
-            if challenger == user_id or opponent == user_id or player == user_id:
-                pvp_to_remove.append(game_id)
-        for game_id in pvp_to_remove:
-            del self.pending_pvp[game_id]
-            if "pvp" not in cleared:
-                cleared.append("pvp")
-        
-        timeout_keys_to_cancel = [key for key in self.game_timeout_tasks if str(user_id) in key]
-        for key in timeout_keys_to_cancel:
+        for key in self.active_games.timeout_keys_for(user_id):
             self.cancel_game_timeout(key)
             cleared.append(f"timeout_{key}")
         
@@ -480,57 +513,37 @@ class GranTeseroCasinoBot:
 
     def get_active_game_type(self, user_id: int) -> str:
         """Get the type of active game for a user"""
-        if user_id in self.blackjack_sessions:
-            return "blackjack"
-        if user_id in self.mines_sessions:
-            return "mines"
-        if user_id in self.keno_sessions:
-            return "keno"
-        if user_id in self.limbo_sessions:
-            return "limbo"
-        if user_id in self.hilo_sessions:
-            return "hilo"
-        for game_id, game in self.connect4_sessions.items():
-            if user_id == game.player1_id or user_id == game.player2_id:
-                return "connect4"
+        active = self.active_games.get(user_id)
+        if active:
+            return active[0]
         if user_id in self.pending_opponent_selection:
             return "pvp"
-        for game_id, challenge in self.pending_pvp.items():
-            challenger = challenge.get('challenger')
-            opponent = challenge.get('opponent')
-            player = challenge.get('player')
-            if challenger == user_id or opponent == user_id or player == user_id:
-                return "pvp"
         return ""
 
     def start_game_timeout(self, game_key: str, game_type: str, user_id: int, chat_id: int, 
                            wager: float, is_pvp: bool = False, opponent_id: int = None,
                            game_id: str = None, bot = None):
         """Start a 30-second timeout for a game. If time expires, player forfeits."""
-        self.cancel_game_timeout(game_key)
-        
         self.timeout_token_counter += 1
         token = self.timeout_token_counter
         
-        async def timeout_handler():
-            try:
-                await asyncio.sleep(self.GAME_TIMEOUT_SECONDS)
-                await self.handle_game_timeout(game_key, game_type, user_id, chat_id, 
-                                               wager, is_pvp, opponent_id, game_id, bot, token)
-            except asyncio.CancelledError:
-                pass
-        
-        task = asyncio.create_task(timeout_handler())
-        self.game_timeout_tasks[game_key] = (task, token)
-        logger.info(f"[TIMEOUT] Started {self.GAME_TIMEOUT_SECONDS}s timeout for {game_key} (token={token})")
+        # schedule() replaces any timer already armed under this key
+        self.timers.schedule(f"game:{game_key}", self.GAME_TIMEOUT_SECONDS, self.handle_game_timeout,
+                             game_key, game_type, user_id, chat_id, wager, is_pvp, opponent_id, game_id, bot, token)
+        self.game_timeout_tokens[game_key] = token
+        self.snapshots.remember_timer(f"game:{game_key}", "game", game_key, game_type, user_id, chat_id,
+                                      wager, is_pvp, opponent_id, game_id)
+        self.active_games.track_timeout(game_key, (user_id, opponent_id))
+        logger.debug(f"[TIMEOUT] Armed {self.GAME_TIMEOUT_SECONDS}s timeout for {game_key} (token={token})")
 
     def cancel_game_timeout(self, game_key: str):
         """Cancel an existing timeout for a game."""
-        if game_key in self.game_timeout_tasks:
-            task, token = self.game_timeout_tasks[game_key]
-            task.cancel()
-            del self.game_timeout_tasks[game_key]
-            logger.info(f"[TIMEOUT] Cancelled timeout for {game_key} (token={token})")
+        token = self.game_timeout_tokens.pop(game_key, None)
+        if token is not None:
+            self.timers.cancel(f"game:{game_key}")
+            self.snapshots.forget_timer(f"game:{game_key}")
+            self.active_games.untrack_timeout(game_key)
+            logger.debug(f"[TIMEOUT] Cancelled timeout for {game_key} (token={token})")
 
     def reset_game_timeout(self, game_key: str, game_type: str, user_id: int, chat_id: int,
                            wager: float, is_pvp: bool = False, opponent_id: int = None,
@@ -546,12 +559,14 @@ class GranTeseroCasinoBot:
         """Handle game timeout - forfeit wager to house, refund opponent in PvP."""
         logger.info(f"[TIMEOUT] Game timeout triggered for {game_key} (token={token})")
         
-        if game_key in self.game_timeout_tasks:
-            stored_task, stored_token = self.game_timeout_tasks[game_key]
+        if game_key in self.game_timeout_tokens:
+            stored_token = self.game_timeout_tokens[game_key]
             if token != stored_token:
                 logger.info(f"[TIMEOUT] Ignoring stale timeout for {game_key} (token={token}, current={stored_token})")
                 return
-            del self.game_timeout_tasks[game_key]
+            del self.game_timeout_tokens[game_key]
+            self.active_games.untrack_timeout(game_key)
+            self.snapshots.forget_timer(f"game:{game_key}")
         else:
             logger.info(f"[TIMEOUT] Ignoring timeout for {game_key} - already processed or cancelled")
             return
@@ -559,212 +574,9 @@ class GranTeseroCasinoBot:
         user_data = self.db.get_user(user_id)
         username = user_data.get('username', f'User{user_id}')
         
-        if game_type == "blackjack":
-            if user_id in self.blackjack_sessions:
-                game = self.blackjack_sessions[user_id]
-                total_bet = sum(h['bet'] for h in game.player_hands)
-                self.db.update_house_balance(total_bet)
-                del self.blackjack_sessions[user_id]
-                
-                self.db.add_transaction(user_id, "blackjack_timeout", -total_bet, 
-                                        f"Blackjack timeout - Forfeited ${total_bet:.2f}")
-                self.db.record_game({
-                    "type": "blackjack",
-                    "player_id": user_id,
-                    "wager": total_bet,
-                    "result": "timeout",
-                    "outcome": "loss"
-                })
-                
-                if bot:
-                    await bot.send_message(
-                        chat_id=chat_id,
-                        text=f"⏰ @{username} was inactive for 30 seconds and forfeited ${total_bet:.2f} to the house.",
-                        parse_mode="Markdown"
-                    )
-        
-        elif game_type == "hilo":
-            if user_id in self.hilo_sessions:
-                game = self.hilo_sessions[user_id]
-                forfeit_amount = game.initial_wager
-                self.db.update_house_balance(forfeit_amount)
-                del self.hilo_sessions[user_id]
-                
-                self.db.add_transaction(user_id, "hilo_timeout", -forfeit_amount,
-                                        f"Hi-Lo timeout - Forfeited ${forfeit_amount:.2f}")
-                
-                self.db.record_game({
-                    'type': 'hilo',
-                    'player_id': user_id,
-                    'username': username,
-                    'wager': forfeit_amount,
-                    'rounds': game.round_number,
-                    'result': 'timeout',
-                    'outcome': 'loss',
-                    'payout': 0,
-                    'balance_after': user_data['balance']
-                })
-                
-                if bot:
-                    await bot.send_message(
-                        chat_id=chat_id,
-                        text=f"⏰ @{username} was inactive for 30 seconds and forfeited ${forfeit_amount:.2f} to the house.",
-                        parse_mode="Markdown"
-                    )
-        
-        elif game_type == "mines":
-            if user_id in self.mines_sessions:
-                game = self.mines_sessions[user_id]
-                revealed_count = len(game.revealed_tiles)
-                
-                if revealed_count > 0:
-                    cashout_amount = game.get_potential_payout()
-                    user_data_mines = self.db.get_user(user_id)
-                    user_data_mines['balance'] += cashout_amount
-                    profit = cashout_amount - game.wager
-                    user_data_mines['total_wagered'] += game.wager
-                    user_data_mines['games_played'] += 1
-                    if profit > 0:
-                        user_data_mines['games_won'] += 1
-                        user_data_mines['total_pnl'] += profit
-                        self.db.update_house_balance(-profit)
-                    else:
-                        user_data_mines['total_pnl'] += profit
-                        self.db.update_house_balance(-profit)
-                    self.db.update_user(user_id, user_data_mines)
-                    del self.mines_sessions[user_id]
-                    
-                    self.db.add_transaction(user_id, "mines_timeout_cashout", cashout_amount,
-                                            f"Mines timeout - Auto cashout ${cashout_amount:.2f}")
-                    
-                    self.db.record_game({
-                        'type': 'mines',
-                        'player_id': user_id,
-                        'username': username,
-                        'wager': game.wager,
-                        'num_mines': game.num_mines,
-                        'tiles_revealed': revealed_count,
-                        'multiplier': game.current_multiplier,
-                        'payout': cashout_amount,
-                        'result': 'win' if profit > 0 else 'loss',
-                        'balance_after': user_data_mines['balance']
-                    })
-                    
-                    if bot:
-                        await bot.send_message(
-                            chat_id=chat_id,
-                            text=f"@{username} timed out - won ${cashout_amount:.2f}",
-                            parse_mode="Markdown"
-                        )
-                else:
-                    forfeit_amount = game.wager
-                    self.db.update_house_balance(forfeit_amount)
-                    del self.mines_sessions[user_id]
-                    
-                    self.db.add_transaction(user_id, "mines_timeout", -forfeit_amount,
-                                            f"Mines timeout - Forfeited ${forfeit_amount:.2f}")
-                    
-                    self.db.record_game({
-                        'type': 'mines',
-                        'player_id': user_id,
-                        'username': username,
-                        'wager': forfeit_amount,
-                        'num_mines': game.num_mines,
-                        'tiles_revealed': 0,
-                        'multiplier': 1.0,
-                        'payout': 0,
-                        'result': 'timeout',
-                        'outcome': 'loss',
-                        'balance_after': user_data['balance']
-                    })
-                    
-                    if bot:
-                        await bot.send_message(
-                            chat_id=chat_id,
-                            text=f"⏰ @{username} was inactive for 30 seconds and forfeited ${forfeit_amount:.2f} to the house.",
-                            parse_mode="Markdown"
-                        )
-        
-        elif game_type == "keno":
-            if user_id in self.keno_sessions:
-                game = self.keno_sessions[user_id]
-                forfeit_amount = game.wager
-                self.db.update_house_balance(forfeit_amount)
-                del self.keno_sessions[user_id]
-                
-                self.db.add_transaction(user_id, "keno_timeout", -forfeit_amount,
-                                        f"Keno timeout - Forfeited ${forfeit_amount:.2f}")
-                
-                self.db.record_game({
-                    'type': 'keno',
-                    'player_id': user_id,
-                    'username': username,
-                    'wager': forfeit_amount,
-                    'picks': list(game.picked_numbers),
-                    'drawn': [],
-                    'hits': 0,
-                    'multiplier': 0,
-                    'payout': 0,
-                    'result': 'timeout',
-                    'outcome': 'loss',
-                    'balance_after': user_data['balance']
-                })
-                
-                if bot:
-                    await bot.send_message(
-                        chat_id=chat_id,
-                        text=f"⏰ @{username} was inactive for 30 seconds and forfeited ${forfeit_amount:.2f} to the house.",
-                        parse_mode="Markdown"
-                    )
-        
-        elif game_type == "connect4":
-            if game_id and game_id in self.connect4_sessions:
-                game = self.connect4_sessions[game_id]
-                p1_data = self.db.get_user(game.player1_id)
-                p2_data = self.db.get_user(game.player2_id)
-                p1_username = p1_data.get('username', 'Player 1')
-                p2_username = p2_data.get('username', 'Player 2')
-                
-                inactive_id = user_id
-                active_id = game.player2_id if inactive_id == game.player1_id else game.player1_id
-                active_username = p2_username if inactive_id == game.player1_id else p1_username
-                inactive_username = p1_username if inactive_id == game.player1_id else p2_username
-                
-                active_data = self.db.get_user(active_id)
-                active_data['balance'] += game.wager
-                self.db.update_user(active_id, {'balance': active_data['balance']})
-                
-                self.db.update_house_balance(game.wager)
-                
-                self.db.add_transaction(inactive_id, "connect4_timeout", -game.wager,
-                                        f"Connect 4 timeout - Forfeited ${game.wager:.2f}")
-                self.db.add_transaction(active_id, "connect4_refund", game.wager,
-                                        f"Connect 4 refund - Opponent timed out")
-                
-                inactive_data = self.db.get_user(inactive_id)
-                self.db.record_game({
-                    'type': 'connect4',
-                    'player1_id': game.player1_id,
-                    'player2_id': game.player2_id,
-                    'winner_id': active_id,
-                    'loser_id': inactive_id,
-                    'wager': game.wager,
-                    'result': 'timeout',
-                    'winner_payout': game.wager,
-                    'loser_loss': game.wager,
-                    'balance_after_winner': active_data['balance'],
-                    'balance_after_loser': inactive_data['balance']
-                })
-                
-                del self.connect4_sessions[game_id]
-                
-                if bot:
-                    await bot.send_message(
-                        chat_id=chat_id,
-                        text=f"⏰ @{inactive_username} was inactive for 30 seconds and forfeited ${game.wager:.2f} to the house. @{active_username} was refunded ${game.wager:.2f}.",
-                        parse_mode="Markdown"
-                    )
-        
+        settle = self.games.timeout_handler(self, game_type)
+        if settle is not None:
+            await settle(user_id, chat_id, game_id, bot, user_data, username)
         elif game_type == "pvp" or game_type.endswith("_pvp"):
             if game_id and game_id in self.pending_pvp:
                 challenge = self.pending_pvp[game_id]
@@ -781,8 +593,7 @@ class GranTeseroCasinoBot:
                     active_username = active_data.get('username', f'User{active_id}')
                     inactive_username = inactive_data.get('username', f'User{inactive_id}')
                     
-                    active_data['balance'] += pvp_wager
-                    self.db.update_user(active_id, {'balance': active_data['balance']})
+                    active_data = await self.wallet.credit(active_id, pvp_wager)
                     
                     self.db.update_house_balance(pvp_wager)
                     
@@ -792,8 +603,6 @@ class GranTeseroCasinoBot:
                                             f"PvP refund - Opponent timed out")
                     
                     del self.pending_pvp[game_id]
-                    self.db.data['pending_pvp'] = self.pending_pvp
-                    self.db.save_data()
                     
                     if bot:
                         await bot.send_message(
@@ -810,8 +619,6 @@ class GranTeseroCasinoBot:
                                                 f"Game timeout - Forfeited ${pvp_wager:.2f}")
                         
                         del self.pending_pvp[game_id]
-                        self.db.data['pending_pvp'] = self.pending_pvp
-                        self.db.save_data()
                         
                         player_data = self.db.get_user(player_id)
                         player_username = player_data.get('username', f'User{player_id}')
@@ -823,65 +630,272 @@ class GranTeseroCasinoBot:
                                 parse_mode="Markdown"
                             )
 
-    def setup_handlers(self):
-        """Setup all command and callback handlers - Emoji games only"""
-        self.app.add_handler(CommandHandler("start", self.start_command))
-        self.app.add_handler(CommandHandler("balance", self.balance_command))
-        self.app.add_handler(CommandHandler("bal", self.balance_command))
-        
-        # Emoji games only
-        self.app.add_handler(CommandHandler("dice", self.dice_command))
-        self.app.add_handler(CommandHandler("darts", self.darts_command))
-        self.app.add_handler(CommandHandler("basketball", self.basketball_command))
-        self.app.add_handler(CommandHandler("bball", self.basketball_command))
-        self.app.add_handler(CommandHandler("soccer", self.soccer_command))
-        self.app.add_handler(CommandHandler("football", self.soccer_command))
-        self.app.add_handler(CommandHandler("bowling", self.bowling_command))
-        self.app.add_handler(CommandHandler("predict", self.predict_command))
-        
-        # Emoji response handler for game results
-        self.app.add_handler(MessageHandler(filters.Dice.ALL, self.handle_emoji_response))
-        self.app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, self.handle_text_input))
-        self.app.add_handler(CallbackQueryHandler(self.button_callback))
-    
-    async def creditdeposit_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        """Admin command to manually credit a deposit."""
-        user_id = update.effective_user.id
-        
-        if not self.is_admin(user_id):
-            await update.message.reply_text("❌ Admin only command.")
-            return
-        
-        if len(context.args) < 3:
-            await update.message.reply_text(
-                "Usage: `/creditdeposit <user_id> <ltc_amount> <tx_id>`\n"
-                "Example: `/creditdeposit 123456789 0.05 abc123def456`",
-                parse_mode="Markdown"
-            )
-            return
-        
-        try:
-            target_user_id = int(context.args[0])
-            ltc_amount = float(context.args[1])
-            tx_id = context.args[2]
-        except ValueError:
-            await update.message.reply_text("❌ Invalid user_id or amount.")
-            return
-        
-        if 'processed_deposits' not in self.db.data:
-            self.db.data['processed_deposits'] = []
-        
-        if tx_id in self.db.data['processed_deposits']:
-            await update.message.reply_text("❌ This transaction has already been processed.")
-            return
-        
-        target_data = self.db.get_user(target_user_id)
-        deposit_fee = 0.01  # 1% deposit fee (not shown to user)
-        credited_amount = round(ltc_amount * (1 - deposit_fee), 2)
-        
-        target_data['balance'] += credited_amount
-        self.db.update_user(target_user_id, target_data)
-        
+    async def _blackjack_timeout(self, user_id: int, chat_id: int, game_id: str, bot,
+                                 user_data: Dict[str, Any], username: str):
+        """Forfeit an abandoned Blackjack hand to the house."""
+        if user_id in self.blackjack_sessions:
+            game = self.blackjack_sessions[user_id]
+            total_bet = sum(h['bet'] for h in game.player_hands)
+            self.db.update_house_balance(total_bet)
+            del self.blackjack_sessions[user_id]
+
+            self.db.add_transaction(user_id, "blackjack_timeout", -total_bet, 
+                                    f"Blackjack timeout - Forfeited ${total_bet:.2f}")
+            self.db.record_game({
+                "type": "blackjack",
+                "player_id": user_id,
+                "wager": total_bet,
+                "result": "timeout",
+                "outcome": "loss"
+            })
+
+            if bot:
+                await bot.send_message(
+                    chat_id=chat_id,
+                    text=f"⏰ @{username} was inactive for 30 seconds and forfeited ${total_bet:.2f} to the house.",
+                    parse_mode="Markdown"
+                )
+
+    async def _hilo_timeout(self, user_id: int, chat_id: int, game_id: str, bot,
+                            user_data: Dict[str, Any], username: str):
+        """Forfeit an abandoned Hi-Lo game to the house."""
+        if user_id in self.hilo_sessions:
+            game = self.hilo_sessions[user_id]
+            forfeit_amount = game.initial_wager
+            self.db.update_house_balance(forfeit_amount)
+            del self.hilo_sessions[user_id]
+
+            self.db.add_transaction(user_id, "hilo_timeout", -forfeit_amount,
+                                    f"Hi-Lo timeout - Forfeited ${forfeit_amount:.2f}")
+
+            self.db.record_game({
+                'type': 'hilo',
+                'player_id': user_id,
+                'username': username,
+                'wager': forfeit_amount,
+                'rounds': game.round_number,
+                'result': 'timeout',
+                'outcome': 'loss',
+                'payout': 0,
+                'balance_after': user_data['balance']
+            })
+
+            if bot:
+                await bot.send_message(
+                    chat_id=chat_id,
+                    text=f"⏰ @{username} was inactive for 30 seconds and forfeited ${forfeit_amount:.2f} to the house.",
+                    parse_mode="Markdown"
+                )
+
+    async def _mines_timeout(self, user_id: int, chat_id: int, game_id: str, bot,
+                             user_data: Dict[str, Any], username: str):
+        """Settle an abandoned Mines game: cash out revealed tiles, or forfeit the wager if none were revealed."""
+        if user_id in self.mines_sessions:
+            game = self.mines_sessions[user_id]
+            revealed_count = len(game.revealed_tiles)
+
+            if revealed_count > 0:
+                cashout_amount = game.get_potential_payout()
+                profit = cashout_amount - game.wager
+                user_data_mines = await self.wallet.credit(
+                    user_id, cashout_amount, total_wagered=game.wager, games_played=1,
+                    games_won=1 if profit > 0 else 0, total_pnl=profit)
+                self.db.update_house_balance(-profit)
+                del self.mines_sessions[user_id]
+
+                self.db.add_transaction(user_id, "mines_timeout_cashout", cashout_amount,
+                                        f"Mines timeout - Auto cashout ${cashout_amount:.2f}")
+
+                self.db.record_game({
+                    'type': 'mines',
+                    'player_id': user_id,
+                    'username': username,
+                    'wager': game.wager,
+                    'num_mines': game.num_mines,
+                    'tiles_revealed': revealed_count,
+                    'multiplier': game.current_multiplier,
+                    'payout': cashout_amount,
+                    'result': 'win' if profit > 0 else 'loss',
+                    'balance_after': user_data_mines['balance']
+                })
+
+                if bot:
+                    await bot.send_message(
+                        chat_id=chat_id,
+                        text=f"@{username} timed out - won ${cashout_amount:.2f}",
+                        parse_mode="Markdown"
+                    )
+            else:
+                forfeit_amount = game.wager
+                self.db.update_house_balance(forfeit_amount)
+                del self.mines_sessions[user_id]
+
+                self.db.add_transaction(user_id, "mines_timeout", -forfeit_amount,
+                                        f"Mines timeout - Forfeited ${forfeit_amount:.2f}")
+
+                self.db.record_game({
+                    'type': 'mines',
+                    'player_id': user_id,
+                    'username': username,
+                    'wager': forfeit_amount,
+                    'num_mines': game.num_mines,
+                    'tiles_revealed': 0,
+                    'multiplier': 1.0,
+                    'payout': 0,
+                    'result': 'timeout',
+                    'outcome': 'loss',
+                    'balance_after': user_data['balance']
+                })
+
+                if bot:
+                    await bot.send_message(
+                        chat_id=chat_id,
+                        text=f"⏰ @{username} was inactive for 30 seconds and forfeited ${forfeit_amount:.2f} to the house.",
+                        parse_mode="Markdown"
+                    )
+
+    async def _keno_timeout(self, user_id: int, chat_id: int, game_id: str, bot,
+                            user_data: Dict[str, Any], username: str):
+        """Forfeit an abandoned Keno game to the house."""
+        if user_id in self.keno_sessions:
+            game = self.keno_sessions[user_id]
+            forfeit_amount = game.wager
+            self.db.update_house_balance(forfeit_amount)
+            del self.keno_sessions[user_id]
+
+            self.db.add_transaction(user_id, "keno_timeout", -forfeit_amount,
+                                    f"Keno timeout - Forfeited ${forfeit_amount:.2f}")
+
+            self.db.record_game({
+                'type': 'keno',
+                'player_id': user_id,
+                'username': username,
+                'wager': forfeit_amount,
+                'picks': list(game.picked_numbers),
+                'drawn': [],
+                'hits': 0,
+                'multiplier': 0,
+                'payout': 0,
+                'result': 'timeout',
+                'outcome': 'loss',
+                'balance_after': user_data['balance']
+            })
+
+            if bot:
+                await bot.send_message(
+                    chat_id=chat_id,
+                    text=f"⏰ @{username} was inactive for 30 seconds and forfeited ${forfeit_amount:.2f} to the house.",
+                    parse_mode="Markdown"
+                )
+
+    async def _connect4_timeout(self, user_id: int, chat_id: int, game_id: str, bot,
+                                user_data: Dict[str, Any], username: str):
+        """Forfeit an abandoned Connect 4 game: the inactive player loses the wager, the opponent is refunded."""
+        if game_id and game_id in self.connect4_sessions:
+            game = self.connect4_sessions[game_id]
+            p1_data = self.db.get_user(game.player1_id)
+            p2_data = self.db.get_user(game.player2_id)
+            p1_username = p1_data.get('username', 'Player 1')
+            p2_username = p2_data.get('username', 'Player 2')
+
+            inactive_id = user_id
+            active_id = game.player2_id if inactive_id == game.player1_id else game.player1_id
+            active_username = p2_username if inactive_id == game.player1_id else p1_username
+            inactive_username = p1_username if inactive_id == game.player1_id else p2_username
+
+            active_data = await self.wallet.credit(active_id, game.wager)
+
+            self.db.update_house_balance(game.wager)
+
+            self.db.add_transaction(inactive_id, "connect4_timeout", -game.wager,
+                                    f"Connect 4 timeout - Forfeited ${game.wager:.2f}")
+            self.db.add_transaction(active_id, "connect4_refund", game.wager,
+                                    f"Connect 4 refund - Opponent timed out")
+
+            inactive_data = self.db.get_user(inactive_id)
+            self.db.record_game({
+                'type': 'connect4',
+                'player1_id': game.player1_id,
+                'player2_id': game.player2_id,
+                'winner_id': active_id,
+                'loser_id': inactive_id,
+                'wager': game.wager,
+                'result': 'timeout',
+                'winner_payout': game.wager,
+                'loser_loss': game.wager,
+                'balance_after_winner': active_data['balance'],
+                'balance_after_loser': inactive_data['balance']
+            })
+
+            del self.connect4_sessions[game_id]
+
+            if bot:
+                await bot.send_message(
+                    chat_id=chat_id,
+                    text=f"⏰ @{inactive_username} was inactive for 30 seconds and forfeited ${game.wager:.2f} to the house. @{active_username} was refunded ${game.wager:.2f}.",
+                    parse_mode="Markdown"
+                )
+
+    def setup_handlers(self):
+        """Setup all command and callback handlers"""
+        self.app.add_handler(CommandHandler("start", self.start_command))
+        self.app.add_handler(CommandHandler("balance", self.balance_command))
+        self.app.add_handler(CommandHandler("bal", self.balance_command))
+        
+        # Emoji games only
+        self.app.add_handler(CommandHandler("dice", self.dice_command))
+        self.app.add_handler(CommandHandler("darts", self.darts_command))
+        self.app.add_handler(CommandHandler("basketball", self.basketball_command))
+        self.app.add_handler(CommandHandler("bball", self.basketball_command))
+        self.app.add_handler(CommandHandler("soccer", self.soccer_command))
+        self.app.add_handler(CommandHandler("football", self.soccer_command))
+        self.app.add_handler(CommandHandler("bowling", self.bowling_command))
+        self.app.add_handler(CommandHandler("predict", self.predict_command))
+        
+        # Session games (blackjack, mines, keno, ...) only get commands when GAMES_ENABLED lists them
+        self.games.register_commands(self.app, self)
+        
+        # Emoji response handler for game results
+        self.app.add_handler(MessageHandler(filters.Dice.ALL, self.handle_emoji_response))
+        self.app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, self.handle_text_input))
+        self.app.add_handler(CallbackQueryHandler(self.button_callback))
+    
+    async def creditdeposit_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Admin command to manually credit a deposit."""
+        user_id = update.effective_user.id
+        
+        if not self.is_admin(user_id):
+            await update.message.reply_text("❌ Admin only command.")
+            return
+        
+        if len(context.args) < 3:
+            await update.message.reply_text(
+                "Usage: `/creditdeposit <user_id> <ltc_amount> <tx_id>`\n"
+                "Example: `/creditdeposit 123456789 0.05 abc123def456`",
+                parse_mode="Markdown"
+            )
+            return
+        
+        try:
+            target_user_id = int(context.args[0])
+            ltc_amount = float(context.args[1])
+            tx_id = context.args[2]
+        except ValueError:
+            await update.message.reply_text("❌ Invalid user_id or amount.")
+            return
+        
+        if 'processed_deposits' not in self.db.data:
+            self.db.data['processed_deposits'] = []
+        
+        if tx_id in self.db.data['processed_deposits']:
+            await update.message.reply_text("❌ This transaction has already been processed.")
+            return
+        
+        deposit_fee = 0.01  # 1% deposit fee (not shown to user)
+        credited_amount = round(ltc_amount * (1 - deposit_fee), 2)
+        
+        target_data = await self.wallet.credit(target_user_id, credited_amount)
+        
         self.db.add_transaction(target_user_id, "deposit", credited_amount, f"LTC Deposit (Manual) - TX: {tx_id[:16]}...")
         self.db.record_deposit(target_user_id, target_data.get('username', f'User{target_user_id}'), credited_amount, ltc_amount, tx_id)
         
@@ -903,7 +917,8 @@ class GranTeseroCasinoBot:
                 text=f"✅ **Deposit Confirmed!**\n\n"
                      f"Amount: **${ltc_amount:.2f}**\n\n"
                      f"New Balance: ${target_data['balance']:.2f}",
-                parse_mode="Markdown"
+                parse_mode="Markdown",
+                rate_limit_args=NOTICE
             )
         except Exception as e:
             logger.error(f"Failed to notify user {target_user_id} of deposit: {e}")
@@ -913,137 +928,152 @@ class GranTeseroCasinoBot:
             f"TX: {tx_id}"
         )
 
-    async def check_expired_challenges(self, context: ContextTypes.DEFAULT_TYPE):
-        """Check for challenges older than 30 seconds and handle refunds/forfeits"""
+    CHALLENGE_TIMEOUT_SECONDS = 30
+
+    @staticmethod
+    def challenge_deadline(challenge: Dict[str, Any]) -> Optional[datetime]:
+        """Return when a pending challenge expires, or None if it has no deadline."""
+        if challenge.get('type') == 'connect4':
+            # Only the invitation expires; once accepted the game has its own move timers
+            if challenge.get('dice_phase') or 'timestamp' not in challenge:
+                return None
+            return datetime.fromtimestamp(challenge['timestamp']) + timedelta(seconds=GranTeseroCasinoBot.CHALLENGE_TIMEOUT_SECONDS)
+        if 'created_at' in challenge and challenge.get('opponent') is None:
+            started = challenge['created_at']
+        elif (challenge.get('waiting_for_challenger_emoji') or challenge.get('waiting_for_emoji')) and 'emoji_wait_started' in challenge:
+            started = challenge['emoji_wait_started']
+        else:
+            return None
+        return datetime.fromisoformat(started) + timedelta(seconds=GranTeseroCasinoBot.CHALLENGE_TIMEOUT_SECONDS)
+
+    def _schedule_challenge_deadline(self, challenge_id: str, challenge: Dict[str, Any]):
+        """Arm (or re-arm) the expiry timer whenever a challenge changes state."""
+        deadline = self.challenge_deadline(challenge)
+        if deadline is None:
+            self.timers.cancel(f"challenge:{challenge_id}")
+            return
+        delay = max(0.0, (deadline - datetime.now()).total_seconds())
+        self.timers.schedule(f"challenge:{challenge_id}", delay, self.expire_challenge, challenge_id)
+
+    def _cancel_challenge_deadline(self, challenge_id: str):
+        self.timers.cancel(f"challenge:{challenge_id}")
+
+    async def expire_challenge(self, challenge_id: str):
+        """Handle refunds/forfeits for one challenge whose 30 second deadline has passed"""
         try:
-            current_time = datetime.now()
-            expired_challenges = []
+            challenge = self.pending_pvp.get(challenge_id)
+            if not challenge:
+                return
+            deadline = self.challenge_deadline(challenge)
+            if deadline is None:
+                return
+            if datetime.now() < deadline:
+                # State changed since the timer was armed; wait for the new deadline
+                self._schedule_challenge_deadline(challenge_id, challenge)
+                return
+            
+            chat_id = challenge.get('chat_id')
+            wager = challenge.get('wager', 0)
             
-            for challenge_id, challenge in list(self.pending_pvp.items()):
-                chat_id = challenge.get('chat_id')
-                wager = challenge.get('wager', 0)
+            # Remove first so a concurrent emoji can no longer resolve it
+            del self.pending_pvp[challenge_id]
+            
+            # Unaccepted Connect 4 invitation - nothing was debited, just take the invitation down
+            if challenge.get('type') == 'connect4':
+                if chat_id and challenge.get('message_id'):
+                    try:
+                        await self.app.bot.delete_message(chat_id=chat_id, message_id=challenge['message_id'])
+                    except Exception:
+                        pass
+            
+            # Case 1: Unaccepted challenges - refund challenger
+            elif 'created_at' in challenge and challenge.get('opponent') is None:
+                challenger_id = challenge['challenger']
+                challenger_data = await self.wallet.credit(challenger_id, wager)
                 
-                # Case 1: Unaccepted challenges - refund challenger
-                if 'created_at' in challenge and challenge.get('opponent') is None:
-                    created_at = datetime.fromisoformat(challenge['created_at'])
-                    time_diff = (current_time - created_at).total_seconds()
-                    
-                    if time_diff > 30:
-                        expired_challenges.append(challenge_id)
-                        
-                        # Refund the challenger
-                        challenger_id = challenge['challenger']
-                        challenger_data = self.db.get_user(challenger_id)
-                        
-                        self.db.update_user(challenger_id, {
-                            'balance': challenger_data['balance'] + wager
-                        })
-                        
-                        if chat_id:
-                            try:
-                                await self.app.bot.send_message(
-                                    chat_id=chat_id,
-                                    text=f"⏰ Challenge expired after 30 seconds. ${wager:.2f} has been refunded to @{challenger_data['username']}.",
-                                    parse_mode="Markdown"
-                                )
-                            except Exception as e:
-                                logger.error(f"Failed to send expiration message: {e}")
+                if chat_id:
+                    try:
+                        await self.app.bot.send_message(
+                            chat_id=chat_id,
+                            text=f"⏰ Challenge expired after 30 seconds. ${wager:.2f} has been refunded to @{challenger_data['username']}.",
+                            parse_mode="Markdown"
+                        )
+                    except Exception as e:
+                        logger.error(f"Failed to send expiration message: {e}")
+            
+            # Case 2: Waiting for challenger emoji - challenger forfeits, acceptor gets refund
+            elif challenge.get('waiting_for_challenger_emoji'):
+                challenger_id = challenge['challenger']
+                acceptor_id = challenge['opponent']
+                challenger_data = self.db.get_user(challenger_id)
+                acceptor_data = self.db.get_user(acceptor_id)
+                
+                # Challenger forfeits to house
+                self.db.update_house_balance(wager)
+                
+                # Acceptor gets refunded
+                await self.wallet.credit(acceptor_id, wager)
                 
-                # Case 2: Waiting for challenger emoji - challenger forfeits, acceptor gets refund
-                elif challenge.get('waiting_for_challenger_emoji') and 'emoji_wait_started' in challenge:
-                    wait_started = datetime.fromisoformat(challenge['emoji_wait_started'])
-                    time_diff = (current_time - wait_started).total_seconds()
+                if chat_id:
+                    try:
+                        await self.app.bot.send_message(
+                            chat_id=chat_id,
+                            text=f"⏰ @{challenger_data['username']} was inactive for 30 seconds and forfeited ${wager:.2f} to the house. @{acceptor_data['username']} was refunded ${wager:.2f}.",
+                            parse_mode="Markdown"
+                        )
+                    except Exception as e:
+                        logger.error(f"Failed to send forfeit message: {e}")
+            
+            # Case 3: Waiting for opponent/player emoji - opponent forfeits, challenger/bot gets paid
+            elif challenge.get('waiting_for_emoji'):
+                # Check if PvP or bot vs player
+                if challenge.get('opponent'):
+                    # PvP case: opponent forfeits, challenger gets refund
+                    challenger_id = challenge['challenger']
+                    opponent_id = challenge['opponent']
+                    challenger_data = self.db.get_user(challenger_id)
+                    opponent_data = self.db.get_user(opponent_id)
                     
-                    if time_diff > 30:
-                        expired_challenges.append(challenge_id)
-                        
-                        challenger_id = challenge['challenger']
-                        acceptor_id = challenge['opponent']
-                        challenger_data = self.db.get_user(challenger_id)
-                        acceptor_data = self.db.get_user(acceptor_id)
-                        
-                        # Challenger forfeits to house
-                        self.db.update_house_balance(wager)
-                        
-                        # Acceptor gets refunded
-                        self.db.update_user(acceptor_id, {
-                            'balance': acceptor_data['balance'] + wager
-                        })
-                        
-                        if chat_id:
-                            try:
-                                await self.app.bot.send_message(
-                                    chat_id=chat_id,
-                                    text=f"⏰ @{challenger_data['username']} was inactive for 30 seconds and forfeited ${wager:.2f} to the house. @{acceptor_data['username']} was refunded ${wager:.2f}.",
-                                    parse_mode="Markdown"
-                                )
-                            except Exception as e:
-                                logger.error(f"Failed to send forfeit message: {e}")
+                    # Opponent forfeits to house
+                    self.db.update_house_balance(wager)
+                    
+                    # Challenger gets refunded
+                    await self.wallet.credit(challenger_id, wager)
+                    
+                    if chat_id:
+                        try:
+                            await self.app.bot.send_message(
+                                chat_id=chat_id,
+                                text=f"⏰ @{opponent_data['username']} was inactive for 30 seconds and forfeited ${wager:.2f} to the house. @{challenger_data['username']} was refunded ${wager:.2f}.",
+                                parse_mode="Markdown"
+                            )
+                        except Exception as e:
+                            logger.error(f"Failed to send forfeit message: {e}")
                 
-                # Case 3: Waiting for opponent/player emoji - opponent forfeits, challenger/bot gets paid
-                elif challenge.get('waiting_for_emoji') and 'emoji_wait_started' in challenge:
-                    wait_started = datetime.fromisoformat(challenge['emoji_wait_started'])
-                    time_diff = (current_time - wait_started).total_seconds()
+                elif challenge.get('player'):
+                    # Bot vs player: player forfeits, house keeps money
+                    player_id = challenge['player']
+                    player_data = self.db.get_user(player_id)
                     
-                    if time_diff > 30:
-                        expired_challenges.append(challenge_id)
-                        
-                        # Check if PvP or bot vs player
-                        if challenge.get('opponent'):
-                            # PvP case: opponent forfeits, challenger gets refund
-                            challenger_id = challenge['challenger']
-                            opponent_id = challenge['opponent']
-                            challenger_data = self.db.get_user(challenger_id)
-                            opponent_data = self.db.get_user(opponent_id)
-                            
-                            # Opponent forfeits to house
-                            self.db.update_house_balance(wager)
-                            
-                            # Challenger gets refunded
-                            self.db.update_user(challenger_id, {
-                                'balance': challenger_data['balance'] + wager
-                            })
-                            
-                            if chat_id:
-                                try:
-                                    await self.app.bot.send_message(
-                                        chat_id=chat_id,
-                                        text=f"⏰ @{opponent_data['username']} was inactive for 30 seconds and forfeited ${wager:.2f} to the house. @{challenger_data['username']} was refunded ${wager:.2f}.",
-                                        parse_mode="Markdown"
-                                    )
-                                except Exception as e:
-                                    logger.error(f"Failed to send forfeit message: {e}")
-                        
-                        elif challenge.get('player'):
-                            # Bot vs player: player forfeits, house keeps money
-                            player_id = challenge['player']
-                            player_data = self.db.get_user(player_id)
-                            
-                            # Player forfeits to house (money already taken)
-                            self.db.update_house_balance(wager)
-                            
-                            if chat_id:
-                                try:
-                                    await self.app.bot.send_message(
-                                        chat_id=chat_id,
-                                        text=f"⏰ @{player_data['username']} was inactive for 30 seconds and forfeited ${wager:.2f} to the house.",
-                                        parse_mode="Markdown"
-                                    )
-                                except Exception as e:
-                                    logger.error(f"Failed to send forfeit message: {e}")
-            
-            # Remove expired challenges
-            for challenge_id in expired_challenges:
-                del self.pending_pvp[challenge_id]
+                    # Player forfeits to house (money already taken)
+                    self.db.update_house_balance(wager)
+                    
+                    if chat_id:
+                        try:
+                            await self.app.bot.send_message(
+                                chat_id=chat_id,
+                                text=f"⏰ @{player_data['username']} was inactive for 30 seconds and forfeited ${wager:.2f} to the house.",
+                                parse_mode="Markdown"
+                            )
+                        except Exception as e:
+                            logger.error(f"Failed to send forfeit message: {e}")
             
-            if expired_challenges:
-                self.db.data['pending_pvp'] = self.pending_pvp
-                self.db.save_data()
-                logger.info(f"Expired/forfeited {len(expired_challenges)} challenge(s)")
-                
+            logger.info(f"Expired/forfeited challenge {challenge_id}")
+        
         except Exception as e:
-            logger.error(f"Error checking expired challenges: {e}")
-    
+            logger.error(f"Error expiring challenge {challenge_id}: {e}")
+
+
     # --- COMMAND HANDLERS ---
     
     def ensure_user_registered(self, update: Update) -> Dict[str, Any]:
@@ -1355,16 +1385,7 @@ Total Won: ${total_won:,.2f}"""
             level_id = level["id"]
             is_current = level_id == current_level['id']
             
-            level_from_flat = None
-            for l in LEVELS:
-                if l['id'] == level_id:
-                    level_from_flat = l
-                    break
-            
-            if level_from_flat:
-                is_reached = total_wagered >= level_from_flat['threshold']
-            else:
-                is_reached = False
+            is_reached = is_level_reached(level_id, total_wagered)
             
             threshold = level["threshold"]
             bonus = level["bonus"]
@@ -1451,6 +1472,10 @@ Total Won: ${total_won:,.2f}"""
         if not dices:
             leaderboard_text += "No dice games yet"
         else:
+            # One query for every player's level instead of a lookup per row
+            players = self.db.get_users_bulk(
+                [uid for dice in dices[:5] for uid in (dice.get('winner_id'), dice.get('loser_id'))],
+                fields=('total_wagered',))
             for idx, dice in enumerate(dices[:5], start=1):
                 winner_id = dice.get('winner_id')
                 loser_id = dice.get('loser_id')
@@ -1460,13 +1485,13 @@ Total Won: ${total_won:,.2f}"""
                 wager = amount / 2
                 game_mode = dice.get('game_mode', 'pvp')
 
-                winner_user = self.db.get_user(winner_id) if winner_id else {}
-                winner_level = get_user_level(winner_user.get('total_wagered', 0))
+                winner_user = players.get(winner_id, {})
+                winner_level = get_user_level(winner_user.get('total_wagered') or 0)
                 winner_emoji = winner_level.get('emoji', '⚪')
 
                 if loser_id and loser_id != 0:
-                    loser_user = self.db.get_user(loser_id)
-                    loser_level = get_user_level(loser_user.get('total_wagered', 0))
+                    loser_user = players.get(loser_id, {})
+                    loser_level = get_user_level(loser_user.get('total_wagered') or 0)
                     loser_emoji = loser_level.get('emoji', '⚪')
                     leaderboard_text += f"{idx}) {winner_emoji} {winner_username} vs {loser_emoji} {loser_username} • ${wager:,.2f}\n"
                 else:
@@ -1497,36 +1522,25 @@ Total Won: ${total_won:,.2f}"""
             return None
         
         try:
-            url = f"https://api.plisio.net/api/v1/balances/{currency}?api_key={plisio_api_key}"
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url) as response:
-                    if response.status == 200:
-                        result = await response.json()
-                        if result.get('status') == 'success':
-                            data = result.get('data', {})
-                            balance_str = data.get('balance', '0')
-                            usd_balance_str = data.get('balance_usd', '0')
-                            return {
-                                'balance': float(balance_str),
-                                'usd_balance': float(usd_balance_str),
-                                'currency': currency
-                            }
-                        else:
-                            logger.error(f"Plisio balance API error for {currency}: {result}")
-                    else:
-                        logger.error(f"Plisio balance API HTTP error for {currency}: {response.status}")
+            result = await self.plisio.get(f"balances/{currency}")
+            if result.get('status') == 'success':
+                data = result.get('data', {})
+                balance_str = data.get('balance', '0')
+                usd_balance_str = data.get('balance_usd', '0')
+                return {
+                    'balance': float(balance_str),
+                    'usd_balance': float(usd_balance_str),
+                    'currency': currency
+                }
+            else:
+                logger.error(f"Plisio balance API error for {currency}: {result}")
         except Exception as e:
             logger.error(f"Failed to fetch Plisio balance for {currency}: {e}")
         return None
     
     async def get_all_wallet_balances(self) -> Dict[str, dict]:
-        """Fetch all crypto wallet balances from Plisio API."""
-        balances = {}
-        for currency in SUPPORTED_DEPOSIT_CRYPTOS.keys():
-            balance_data = await self.get_plisio_wallet_balance(currency)
-            if balance_data:
-                balances[currency] = balance_data
-        return balances
+        """All crypto wallet balances, concurrently fetched and briefly cached (may be partial)."""
+        return await self.treasury.get()
 
     async def housebal_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Show house balance"""
@@ -1556,7 +1570,11 @@ Total Won: ${total_won:,.2f}"""
                 usd_balance = data['usd_balance']
                 total_usd += usd_balance
                 if balance > 0:
-                    balance_lines.append(f"{emoji} {currency}: {balance:.8f} (${usd_balance:.2f})")
+                    stale_note = f" ⚠️ {data['age']:.0f}s old" if data['stale'] else ""
+                    balance_lines.append(f"{emoji} {currency}: {balance:.8f} (${usd_balance:.2f}){stale_note}")
+            missing = [currency for currency in SUPPORTED_DEPOSIT_CRYPTOS if currency not in balances]
+            if missing:
+                balance_lines.append(f"⏳ Still loading: {', '.join(missing)} (try again in a few seconds)")
             
             wallet_text = f"""🔐 Crypto Wallet Balances
 
@@ -1632,21 +1650,10 @@ Total Won: ${total_won:,.2f}"""
         user_data = self.db.get_user(user_id)
         current_balance = user_data.get('balance', 0.0)
         
-        user_games = [
-            game for game in self.db.data.get('games', [])
-            if game.get('player_id') == user_id or 
-               game.get('challenger') == user_id or 
-               game.get('opponent') == user_id
-        ]
-        
-        user_games.sort(key=lambda x: x.get('timestamp', ''), reverse=True)
-        
-        total_games = len(user_games)
+        # Indexed per-user lookup: cost follows the page size, not how many games exist
+        total_games = self.db.count_user_games(user_id)
         total_pages = max(1, (total_games + games_per_page - 1) // games_per_page)
-        
-        start_idx = page * games_per_page
-        end_idx = min(start_idx + games_per_page, total_games)
-        page_games = user_games[start_idx:end_idx]
+        page_games = self.db.get_user_games(user_id, games_per_page, page * games_per_page)
         
         if not page_games:
             if edit_message:
@@ -1656,6 +1663,9 @@ Total Won: ${total_won:,.2f}"""
             return
         
         history_text = f"🎮 **History** (Page {page + 1}/{total_pages})\n\n"
+        opponents = self.db.get_users_bulk(
+            [uid for game in page_games for uid in (game.get('challenger'), game.get('opponent')) if uid != user_id],
+            fields=('username',))
         
         for game in page_games:
             game_type = game.get('type', 'unknown')
@@ -1742,8 +1752,7 @@ Total Won: ${total_won:,.2f}"""
             else:
                 opponent_id = game.get('opponent') if game.get('challenger') == user_id else game.get('challenger')
                 if opponent_id:
-                    opponent_user = self.db.get_user(opponent_id)
-                    opponent_username = opponent_user.get('username', f'User{opponent_id}')
+                    opponent_username = opponents.get(opponent_id, {}).get('username') or f'User{opponent_id}'
                     result_emoji = "✅" if result == "win" else "❌" if result == "loss" else "🤝"
                     history_text += f"{result_emoji} **{game_type.replace('_', ' ').title()}** - ${wager:.2f}\n"
                     history_text += f"   vs @{opponent_username} | {time_str}{balance_str}\n\n"
@@ -1800,27 +1809,18 @@ Total Won: ${total_won:,.2f}"""
         """Display a page of match history."""
         games_per_page = 10
         
-        user_games = []
-        for game in self.db.data.get('games', []):
-            if (game.get('player_id') == target_user_id or 
-                game.get('challenger') == target_user_id or 
-                game.get('opponent') == target_user_id):
-                user_games.append(game)
-        
-        user_games.sort(key=lambda x: x.get('timestamp', ''), reverse=True)
-        
-        total_games = len(user_games)
+        total_games = self.db.count_user_games(target_user_id)
         total_pages = max(1, (total_games + games_per_page - 1) // games_per_page)
-        
-        start_idx = page * games_per_page
-        end_idx = min(start_idx + games_per_page, total_games)
-        page_games = user_games[start_idx:end_idx]
+        page_games = self.db.get_user_games(target_user_id, games_per_page, page * games_per_page)
         
         if not page_games:
             await message.reply_text(f"@{target_username} has no match history.")
             return
         
         lines = [f"Match History for @{target_username} (Page {page + 1}/{total_pages}):\n"]
+        opponents = self.db.get_users_bulk(
+            [uid for game in page_games for uid in (game.get('challenger'), game.get('opponent')) if uid != target_user_id],
+            fields=('username',))
         
         for game in page_games:
             game_type = game.get('type', 'Unknown')
@@ -1846,8 +1846,7 @@ Total Won: ${total_won:,.2f}"""
                 opponent = game.get('opponent')
                 if challenger and opponent:
                     other_id = opponent if challenger == target_user_id else challenger
-                    other_user = self.db.get_user(other_id)
-                    other_name = other_user.get('username', f'User{other_id}')
+                    other_name = opponents.get(other_id, {}).get('username') or f'User{other_id}'
                     details = f" (vs @{other_name})"
             
             result_emoji = "✅" if result == 'win' else "❌" if result == 'loss' else "🔄"
@@ -2138,7 +2137,8 @@ Total Won: ${total_won:,.2f}"""
             return
         
         # Deduct wager from user balance
-        self.db.update_user(user_id, {'balance': user_data['balance'] - wager})
+        if not await self.debit_wager(update, user_id, wager):
+            return
         
         # Show 6 buttons for prediction
         keyboard = [
@@ -2173,12 +2173,10 @@ Total Won: ${total_won:,.2f}"""
         }
         
         # Schedule timeout refund after 30 seconds
-        asyncio.create_task(self._predict_timeout(predict_key, user_id, wager, sent_msg.chat_id, sent_msg.message_id))
+        self.timers.schedule(predict_key, 30, self._predict_timeout, predict_key, user_id, wager, sent_msg.chat_id, sent_msg.message_id)
     
     async def _predict_timeout(self, predict_key: str, user_id: int, wager: float, chat_id: int, message_id: int):
         """Handle prediction timeout - refund wager after 30 seconds if no selection"""
-        await asyncio.sleep(30)
-        
         if not hasattr(self, 'pending_predictions'):
             return
         
@@ -2186,8 +2184,7 @@ Total Won: ${total_won:,.2f}"""
             # Still pending - refund the wager
             del self.pending_predictions[predict_key]
             
-            user_data = self.db.get_user(user_id)
-            self.db.update_user(user_id, {'balance': user_data['balance'] + wager})
+            await self.wallet.credit(user_id, wager)
             
             try:
                 await self.app.bot.edit_message_text(
@@ -2239,16 +2236,37 @@ Total Won: ${total_won:,.2f}"""
             await update.message.reply_text(f"Balance: ${user_data['balance']:.2f}")
             return
         
-        # Deduct wager from user balance and update local reference
-        new_bal_after_wager = user_data['balance'] - wager
-        self.db.update_user(user_id, {'balance': new_bal_after_wager})
+        # Deduct wager from user balance
+        if not await self.debit_wager(update, user_id, wager):
+            return
         
-        # Send the slot machine emoji and wait for result
+        # Send the slot machine emoji; the result is posted once it stops spinning
         slots_message = await update.message.reply_dice(emoji="🎰")
-        dice_value = slots_message.dice.value
+        await self._settle_slots(user_id, user_data.get('username', f'User{user_id}'), update.effective_chat.id, wager,
+                                 slots_message.dice.value)
+    
+    async def slots_play(self, update: Update, context: ContextTypes.DEFAULT_TYPE, wager: float):
+        """Play slots from button callback"""
+        query = update.callback_query
+        user_id = query.from_user.id
+        user_data = self.db.get_user(user_id)
+        chat_id = query.message.chat_id
+        
+        if wager > user_data['balance']:
+            await context.bot.send_message(chat_id=chat_id, text=f"Balance: ${user_data['balance']:.2f}")
+            return
         
-        await asyncio.sleep(3)
+        # Deduct wager from user balance
+        if not await self.debit_wager(update, user_id, wager):
+            return
         
+        # Send the slot machine emoji; the result is posted once it stops spinning
+        slots_message = await context.bot.send_dice(chat_id=chat_id, emoji="🎰")
+        await self._settle_slots(user_id, user_data.get('username', f'User{user_id}'), chat_id, wager,
+                                 slots_message.dice.value)
+
+    async def _settle_slots(self, user_id: int, username: str, chat_id: int, wager: float, dice_value: int):
+        """Pay out a slots spin right away and post the result once the reels stop."""
         # Determine payout based on dice value
         # All triples pay 25x (1/64 chance each = ~61% house edge)
         # Value 1 = Triple Bars, Value 22 = Triple Grapes
@@ -2259,47 +2277,20 @@ Total Won: ${total_won:,.2f}"""
         if dice_value in (1, 22, 43, 64):
             payout_multiplier = 25
         
-        username = user_data.get('username', f'User{user_id}')
-        
         if payout_multiplier > 0:
             payout = wager * payout_multiplier
             profit = payout - wager
-            new_balance = new_bal_after_wager + payout
             
-            self.db.update_user(user_id, {
-                'balance': new_balance,
-                'total_wagered': user_data['total_wagered'] + wager,
-                'wagered_since_last_withdrawal': user_data.get('wagered_since_last_withdrawal', 0) + wager,
-                'games_played': user_data['games_played'] + 1,
-                'games_won': user_data['games_won'] + 1
-            })
+            final_user_data = await self.wallet.credit(user_id, payout, total_wagered=wager,
+                                                       wagered_since_last_withdrawal=wager, games_played=1, games_won=1)
             self.db.update_house_balance(-profit)
-            
-            keyboard = [[InlineKeyboardButton("Spin Again", callback_data=f"slots_play_{wager:.2f}")]]
-            reply_markup = InlineKeyboardMarkup(keyboard)
-            sent_msg = await update.message.reply_text(
-                f"@{username} won ${profit:.2f}",
-                reply_markup=reply_markup
-            )
-            self.button_ownership[(sent_msg.chat_id, sent_msg.message_id)] = user_id
+            result_text = f"@{username} won ${profit:.2f}"
         else:
-            self.db.update_user(user_id, {
-                'total_wagered': user_data['total_wagered'] + wager,
-                'wagered_since_last_withdrawal': user_data.get('wagered_since_last_withdrawal', 0) + wager,
-                'games_played': user_data['games_played'] + 1
-            })
+            final_user_data = await self.wallet.adjust(user_id, 0, total_wagered=wager,
+                                                       wagered_since_last_withdrawal=wager, games_played=1)
             self.db.update_house_balance(wager)
-            
-            keyboard = [[InlineKeyboardButton("Spin Again", callback_data=f"slots_play_{wager:.2f}")]]
-            reply_markup = InlineKeyboardMarkup(keyboard)
-            sent_msg = await update.message.reply_text(
-                f"@{username} lost ${wager:.2f}",
-                reply_markup=reply_markup
-            )
-            self.button_ownership[(sent_msg.chat_id, sent_msg.message_id)] = user_id
+            result_text = f"@{username} lost ${wager:.2f}"
         
-        # Calculate final balance for history
-        final_user_data = self.db.get_user(user_id)
         self.db.record_game({
             'type': 'slots',
             'player_id': user_id,
@@ -2310,91 +2301,9 @@ Total Won: ${total_won:,.2f}"""
             'multiplier': payout_multiplier,
             'balance_after': final_user_data['balance']
         })
-    
-    async def slots_play(self, update: Update, context: ContextTypes.DEFAULT_TYPE, wager: float):
-        """Play slots from button callback"""
-        query = update.callback_query
-        user_id = query.from_user.id
-        user_data = self.db.get_user(user_id)
-        chat_id = query.message.chat_id
-        
-        if wager > user_data['balance']:
-            await context.bot.send_message(chat_id=chat_id, text=f"Balance: ${user_data['balance']:.2f}")
-            return
-        
-        # Deduct wager from user balance and track the new balance
-        new_bal_after_wager = user_data['balance'] - wager
-        self.db.update_user(user_id, {'balance': new_bal_after_wager})
-        
-        # Send the slot machine emoji and wait for result
-        slots_message = await context.bot.send_dice(chat_id=chat_id, emoji="🎰")
-        dice_value = slots_message.dice.value
-        
-        await asyncio.sleep(3)
-        
-        # Determine payout based on dice value
-        # All triples pay 25x (1/64 chance each = ~61% house edge)
-        # Value 1 = Triple Bars, Value 22 = Triple Grapes
-        # Value 43 = Triple Lemons, Value 64 = Triple 7s
-        
-        payout_multiplier = 0
-        
-        if dice_value in (1, 22, 43, 64):
-            payout_multiplier = 25
-        
-        username = user_data.get('username', f'User{user_id}')
-        
-        if payout_multiplier > 0:
-            payout = wager * payout_multiplier
-            profit = payout - wager
-            new_balance = new_bal_after_wager + payout
-            
-            self.db.update_user(user_id, {
-                'balance': new_balance,
-                'total_wagered': user_data['total_wagered'] + wager,
-                'wagered_since_last_withdrawal': user_data.get('wagered_since_last_withdrawal', 0) + wager,
-                'games_played': user_data['games_played'] + 1,
-                'games_won': user_data['games_won'] + 1
-            })
-            self.db.update_house_balance(-profit)
-            
-            keyboard = [[InlineKeyboardButton("Spin Again", callback_data=f"slots_play_{wager:.2f}")]]
-            reply_markup = InlineKeyboardMarkup(keyboard)
-            sent_msg = await context.bot.send_message(
-                chat_id=chat_id,
-                text=f"@{username} won ${profit:.2f}",
-                reply_markup=reply_markup
-            )
-            self.button_ownership[(sent_msg.chat_id, sent_msg.message_id)] = user_id
-        else:
-            self.db.update_user(user_id, {
-                'total_wagered': user_data['total_wagered'] + wager,
-                'wagered_since_last_withdrawal': user_data.get('wagered_since_last_withdrawal', 0) + wager,
-                'games_played': user_data['games_played'] + 1
-            })
-            self.db.update_house_balance(wager)
-            
-            keyboard = [[InlineKeyboardButton("Spin Again", callback_data=f"slots_play_{wager:.2f}")]]
-            reply_markup = InlineKeyboardMarkup(keyboard)
-            sent_msg = await context.bot.send_message(
-                chat_id=chat_id,
-                text=f"@{username} lost ${wager:.2f}",
-                reply_markup=reply_markup
-            )
-            self.button_ownership[(sent_msg.chat_id, sent_msg.message_id)] = user_id
         
-        # Calculate final balance for history
-        final_user_data = self.db.get_user(user_id)
-        self.db.record_game({
-            'type': 'slots',
-            'player_id': user_id,
-            'wager': wager,
-            'dice_value': dice_value,
-            'result': 'win' if payout_multiplier > 0 else 'loss',
-            'payout': wager * payout_multiplier if payout_multiplier > 0 else 0,
-            'multiplier': payout_multiplier,
-            'balance_after': final_user_data['balance']
-        })
+        keyboard = [[InlineKeyboardButton("Spin Again", callback_data=f"slots_play_{wager:.2f}")]]
+        self.schedule_reveal(self.EMOJI_ANIMATION_SECONDS, self._reveal_result, chat_id, result_text, InlineKeyboardMarkup(keyboard), user_id)
 
     async def coinflip_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Play coinflip game setup"""
@@ -2567,11 +2476,12 @@ Total Won: ${total_won:,.2f}"""
             return
         
         # Deduct wager from balance
-        user_data['balance'] -= wager
-        self.db.update_user(user_id, user_data)
+        user_data = await self.debit_wager(update, user_id, wager)
+        if not user_data:
+            return
         
         # Create new Blackjack game
-        game = BlackjackGame(bet_amount=wager)
+        game = self.games.new("blackjack", bet_amount=wager)
         game.start_game()
         self.blackjack_sessions[user_id] = game
         
@@ -2631,16 +2541,12 @@ Total Won: ${total_won:,.2f}"""
             total_payout = state['total_payout']
             
             # Update user balance
-            user_data = self.db.get_user(user_id)
             # Add back: total payout + all hand bets + insurance bet (if taken)
             insurance_refund = state['insurance_bet'] if state['insurance_bet'] > 0 else 0
-            user_data['balance'] += total_payout + sum(h['bet'] for h in state['player_hands']) + insurance_refund
-            user_data['total_wagered'] += sum(h['bet'] for h in state['player_hands'])
-            user_data['total_pnl'] += total_payout
-            user_data['games_played'] += 1
-            if total_payout > 0:
-                user_data['games_won'] += 1
-            self.db.update_user(user_id, user_data)
+            total_bet = sum(h['bet'] for h in state['player_hands'])
+            user_data = await self.wallet.credit(
+                user_id, total_payout + total_bet + insurance_refund, total_wagered=total_bet,
+                total_pnl=total_payout, games_played=1, games_won=1 if total_payout > 0 else 0)
             
             # Record game
             self.db.record_game({
@@ -2857,23 +2763,28 @@ Total Won: ${total_won:,.2f}"""
         )
         self.button_ownership[(sent_msg.chat_id, sent_msg.message_id)] = user_id
     
-    def _build_mines_grid_keyboard(self, game: MinesGame) -> InlineKeyboardMarkup:
+    def _build_mines_grid_keyboard(self, game: "MinesGame") -> InlineKeyboardMarkup:
         """Build the 5x5 mines grid keyboard"""
         user_id = game.user_id
-        grid = game.get_grid_display(reveal_all=game.game_over)
-        keyboard = []
-        
+        revealed = set(game.revealed_tiles)
+        states = []
         for row in range(5):
-            row_buttons = []
-            for col in range(5):
-                pos = row * 5 + col
-                tile = grid[row][col]
-                
-                if game.game_over or pos in game.revealed_tiles:
-                    row_buttons.append(InlineKeyboardButton(tile, callback_data=f"mines_noop"))
+            row_states = []
+            for pos in range(row * 5, row * 5 + 5):
+                if game.game_over:
+                    row_states.append("💣" if pos in game.mine_positions else "💎")
+                elif pos in revealed:
+                    row_states.append("💎")
                 else:
-                    row_buttons.append(InlineKeyboardButton(tile, callback_data=f"mines_reveal_{user_id}_{pos}"))
-            keyboard.append(row_buttons)
+                    row_states.append(None)
+            states.append(tuple(row_states))
+        
+        def make_button(row, col, tile):
+            if tile is None:
+                return InlineKeyboardButton("\u3164", callback_data=f"mines_reveal_{user_id}_{row * 5 + col}")
+            return InlineKeyboardButton(tile, callback_data="mines_noop")
+        
+        keyboard = self.keyboards.grid(("mines", user_id), states, make_button)
         
         # Add cash out button if game is active and at least one tile revealed
         if not game.game_over and len(game.revealed_tiles) > 0:
@@ -2909,15 +2820,12 @@ Total Won: ${total_won:,.2f}"""
                 message += f"**Bet:** ${game.wager:.2f}"
                 
                 # Update stats
-                user_data = self.db.get_user(user_id)
+                user_data = await self.wallet.adjust(user_id, 0, total_wagered=game.wager,
+                                                     total_pnl=-game.wager, games_played=1)
                 username = user_data.get('username', 'Player')
                 
                 # Separate result message
                 result_message = f"@{username} lost ${game.wager:.2f}"
-                user_data['total_wagered'] += game.wager
-                user_data['total_pnl'] -= game.wager
-                user_data['games_played'] += 1
-                self.db.update_user(user_id, user_data)
                 
                 # Record game
                 self.db.record_game({
@@ -2946,17 +2854,12 @@ Total Won: ${total_won:,.2f}"""
                 message += f"**Bet:** ${game.wager:.2f}"
                 
                 # Update user balance
-                user_data = self.db.get_user(user_id)
+                user_data = await self.wallet.credit(user_id, payout, total_wagered=game.wager,
+                                                     total_pnl=profit, games_played=1, games_won=1)
                 
                 # Separate result message
                 username = user_data.get('username', 'Unknown')
                 result_message = f"@{username} won ${payout:.2f}"
-                user_data['balance'] += payout
-                user_data['total_wagered'] += game.wager
-                user_data['total_pnl'] += profit
-                user_data['games_played'] += 1
-                user_data['games_won'] += 1
-                self.db.update_user(user_id, user_data)
                 
                 # Record game
                 self.db.record_game({
@@ -2994,7 +2897,9 @@ Total Won: ${total_won:,.2f}"""
         
         # Edit or send message
         if update.callback_query:
-            await update.callback_query.edit_message_text(message, reply_markup=reply_markup, parse_mode="Markdown")
+            grid_msg = update.callback_query.message
+            await self.edits.edit(grid_msg.chat_id, grid_msg.message_id, message, flush=game.game_over,
+                                  reply_markup=reply_markup, parse_mode="Markdown")
             if not game.game_over:
                 self.button_ownership[(update.callback_query.message.chat_id, update.callback_query.message.message_id)] = user_id
             # Send separate result message after the game ends
@@ -3060,15 +2965,12 @@ Total Won: ${total_won:,.2f}"""
         query = update.callback_query
         chat_id = query.message.chat_id
         
-        user_data = self.db.get_user(user_id)
-        if wager > user_data['balance']:
-            await query.edit_message_text(f"❌ Balance: ${user_data['balance']:.2f}")
+        user_data = await self.wallet.debit(user_id, wager)
+        if not user_data:
+            await query.edit_message_text(f"❌ Balance: ${self.db.get_user(user_id)['balance']:.2f}")
             return
         
-        user_data['balance'] -= wager
-        self.db.update_user(user_id, user_data)
-        
-        game = BaccaratGame(wager, bet_type)
+        game = self.games.new("baccarat", wager, bet_type)
         state = game.play_round()
         
         player_cards = state['player_hand']['cards']
@@ -3091,33 +2993,19 @@ Total Won: ${total_won:,.2f}"""
         is_push = (payout == wager and profit == 0)
         
         if is_push:
-            user_data = self.db.get_user(user_id)
-            user_data['balance'] += payout
-            user_data['total_wagered'] += wager
-            user_data['games_played'] += 1
-            user_data['wagered_since_last_withdrawal'] = user_data.get('wagered_since_last_withdrawal', 0) + wager
-            self.db.update_user(user_id, user_data)
+            user_data = await self.wallet.credit(user_id, payout, total_wagered=wager, games_played=1,
+                                                 wagered_since_last_withdrawal=wager)
             
             result_text = f"Push - ${wager:.2f} returned"
         elif payout > 0:
-            user_data = self.db.get_user(user_id)
-            user_data['balance'] += payout
-            user_data['total_wagered'] += wager
-            user_data['games_played'] += 1
-            user_data['games_won'] += 1
-            user_data['total_pnl'] += profit
-            user_data['wagered_since_last_withdrawal'] = user_data.get('wagered_since_last_withdrawal', 0) + wager
-            self.db.update_user(user_id, user_data)
+            user_data = await self.wallet.credit(user_id, payout, total_wagered=wager, games_played=1, games_won=1,
+                                                 total_pnl=profit, wagered_since_last_withdrawal=wager)
             self.db.update_house_balance(-profit)
             
             result_text = f"@{user_data.get('username', 'Player')} won ${profit:.2f}"
         else:
-            user_data = self.db.get_user(user_id)
-            user_data['total_wagered'] += wager
-            user_data['games_played'] += 1
-            user_data['total_pnl'] -= wager
-            user_data['wagered_since_last_withdrawal'] = user_data.get('wagered_since_last_withdrawal', 0) + wager
-            self.db.update_user(user_id, user_data)
+            user_data = await self.wallet.adjust(user_id, 0, total_wagered=wager, games_played=1,
+                                                 total_pnl=-wager, wagered_since_last_withdrawal=wager)
             self.db.update_house_balance(wager)
             
             result_text = f"@{user_data.get('username', 'Player')} lost ${wager:.2f}"
@@ -3180,10 +3068,10 @@ Total Won: ${total_won:,.2f}"""
             await update.message.reply_text(f"❌ Balance: ${user_data['balance']:.2f}")
             return
         
-        user_data['balance'] -= wager
-        self.db.update_user(user_id, user_data)
+        if not await self.debit_wager(update, user_id, wager):
+            return
         
-        game = KenoGame(user_id, wager)
+        game = self.games.new("keno", user_id, wager)
         self.keno_sessions[user_id] = game
         
         # Start 30-second timeout for the game
@@ -3194,35 +3082,27 @@ Total Won: ${total_won:,.2f}"""
         
         await self._display_keno_state(update, context, user_id, is_new=True)
 
-    def _build_keno_grid_keyboard(self, game: KenoGame) -> InlineKeyboardMarkup:
+    def _build_keno_grid_keyboard(self, game: "KenoGame") -> InlineKeyboardMarkup:
         """Build the keno number grid keyboard"""
         user_id = game.user_id
-        keyboard = []
-        
+        picked, drawn = game.picked_numbers, game.drawn_numbers
+        states = []
         for row in range(5):
-            row_buttons = []
-            for col in range(8):
-                num = row * 8 + col + 1
-                if num > 40:
-                    continue
-                
-                if game.game_over:
-                    if num in game.picked_numbers and num in game.drawn_numbers:
-                        label = f"✅{num}"
-                    elif num in game.drawn_numbers:
-                        label = f"🔵{num}"
-                    elif num in game.picked_numbers:
-                        label = f"❌{num}"
-                    else:
-                        label = f"{num}"
-                    row_buttons.append(InlineKeyboardButton(label, callback_data="keno_noop"))
-                else:
-                    if num in game.picked_numbers:
-                        label = f"⭐{num}"
-                    else:
-                        label = "\u3164"
-                    row_buttons.append(InlineKeyboardButton(label, callback_data=f"keno_pick_{user_id}_{num}"))
-            keyboard.append(row_buttons)
+            if game.game_over:
+                # (picked, drawn) decides the final label; the grid is no longer clickable
+                states.append(tuple((num in picked, num in drawn) for num in range(row * 8 + 1, row * 8 + 9)))
+            else:
+                states.append(tuple(num in picked for num in range(row * 8 + 1, row * 8 + 9)))
+        
+        def make_button(row, col, state):
+            num = row * 8 + col + 1
+            if isinstance(state, tuple):
+                label = {(True, True): f"✅{num}", (False, True): f"🔵{num}",
+                         (True, False): f"❌{num}", (False, False): f"{num}"}[state]
+                return InlineKeyboardButton(label, callback_data="keno_noop")
+            return InlineKeyboardButton(f"⭐{num}" if state else "\u3164", callback_data=f"keno_pick_{user_id}_{num}")
+        
+        keyboard = self.keyboards.grid(("keno", user_id), states, make_button)
         
         if not game.game_over:
             action_row = []
@@ -3242,7 +3122,6 @@ Total Won: ${total_won:,.2f}"""
                     ])
                     keyboard.append([InlineKeyboardButton("⬅️ Back", callback_data=f"keno_back_{user_id}")])
                 elif game.is_auto_playing and game.current_round > 0:
-                    action_row.append(InlineKeyboardButton("🔄 Next Draw", callback_data=f"keno_next_{user_id}"))
                     action_row.append(InlineKeyboardButton("🛑 Stop", callback_data=f"keno_stop_{user_id}"))
                     keyboard.append(action_row)
                 else:
@@ -3268,22 +3147,8 @@ Total Won: ${total_won:,.2f}"""
         picked_str = ", ".join(str(n) for n in sorted(game.picked_numbers)) if picks > 0 else "None"
         
         if game.game_over:
-            if game.is_auto_playing and len(game.round_results) > 1:
-                summary = game.get_auto_play_summary()
-                message = f"🎱 **Keno - Auto-Play Complete**\n\n"
-                message += f"**Your picks:** {picked_str}\n"
-                message += f"**Rounds played:** {summary['total_rounds']}\n"
-                message += f"**Wins:** {summary['wins']} | **Losses:** {summary['losses']}\n"
-                message += f"**Total wagered:** ${summary['total_wagered']:.2f}\n"
-                message += f"**Total won:** ${summary['total_payout']:.2f}\n"
-                net = summary['net_profit']
-                if net >= 0:
-                    message += f"**Net profit:** +${net:.2f}\n"
-                else:
-                    message += f"**Net loss:** -${abs(net):.2f}\n"
-                
-                user_data = self.db.get_user(user_id)
-                result_message = f"@{user_data.get('username', 'Player')} finished {summary['total_rounds']} Keno rounds: {'won' if net >= 0 else 'lost'} ${abs(net):.2f}"
+            if game.is_auto_playing and game.rounds_played > 1:
+                message, result_message = self._keno_autoplay_summary(game)
             else:
                 drawn_str = ", ".join(str(n) for n in sorted(game.drawn_numbers))
                 message = f"🎱 **Keno**\n\n"
@@ -3304,25 +3169,7 @@ Total Won: ${total_won:,.2f}"""
             
             del self.keno_sessions[user_id]
         elif game.is_auto_playing and game.current_round > 0:
-            drawn_str = ", ".join(str(n) for n in sorted(game.drawn_numbers))
-            rounds_display = "Infinite" if game.total_rounds == -1 else f"{game.current_round}/{game.total_rounds}"
-            message = f"🎱 **Keno - Round {rounds_display}**\n\n"
-            message += f"**Your picks:** {picked_str}\n"
-            message += f"**Drawn:** {drawn_str}\n"
-            message += f"**Hits:** {game.hits}/{picks}\n"
-            message += f"**Bet:** ${game.wager:.2f}\n"
-            
-            if game.payout > 0:
-                message += f"**Won:** ${game.payout:.2f} ({game.get_multiplier():.0f}x)\n"
-            else:
-                message += f"**Lost this round**\n"
-            
-            summary = game.get_auto_play_summary()
-            net = summary['net_profit']
-            if net >= 0:
-                message += f"\n**Running total:** +${net:.2f}"
-            else:
-                message += f"\n**Running total:** -${abs(net):.2f}"
+            message = self._keno_autoplay_progress(game)
         elif game.selecting_rounds:
             message = f"🎱 **Keno** - Select number of draws\n\n"
             message += f"**Picked ({picks}/10):** {picked_str}\n"
@@ -3337,7 +3184,9 @@ Total Won: ${total_won:,.2f}"""
         reply_markup = self._build_keno_grid_keyboard(game)
         
         if update.callback_query:
-            await update.callback_query.edit_message_text(message, reply_markup=reply_markup, parse_mode="Markdown")
+            grid_msg = update.callback_query.message
+            await self.edits.edit(grid_msg.chat_id, grid_msg.message_id, message, flush=game.game_over or bool(result_message),
+                                  reply_markup=reply_markup, parse_mode="Markdown")
             if not game.game_over:
                 self.button_ownership[(update.callback_query.message.chat_id, update.callback_query.message.message_id)] = user_id
             if result_message:
@@ -3348,34 +3197,22 @@ Total Won: ${total_won:,.2f}"""
                 self.button_ownership[(sent_msg.chat_id, sent_msg.message_id)] = user_id
 
     async def _run_keno_draw(self, update: Update, context: ContextTypes.DEFAULT_TYPE, user_id: int):
-        """Run a single keno draw and update user balance"""
+        """Run a single keno draw (paid when the game started) and update user balance"""
         if user_id not in self.keno_sessions:
             return
         
         game = self.keno_sessions[user_id]
-        user_data = self.db.get_user(user_id)
-        
-        if game.current_round > 0:
-            user_data['balance'] -= game.wager
-            self.db.update_user(user_id, user_data)
-        
         result = game.run_single_draw()
+        game.prepaid_rounds = 0
         
         if result['payout'] > 0:
-            user_data['balance'] += result['payout']
-            user_data['total_wagered'] += game.wager
-            user_data['games_played'] += 1
-            user_data['games_won'] += 1
-            user_data['total_pnl'] += result['payout'] - game.wager
-            user_data['wagered_since_last_withdrawal'] = user_data.get('wagered_since_last_withdrawal', 0) + game.wager
-            self.db.update_user(user_id, user_data)
+            user_data = await self.wallet.credit(user_id, result['payout'], total_wagered=game.wager, games_played=1,
+                                                 games_won=1, total_pnl=result['payout'] - game.wager,
+                                                 wagered_since_last_withdrawal=game.wager)
             self.db.update_house_balance(-(result['payout'] - game.wager))
         else:
-            user_data['total_wagered'] += game.wager
-            user_data['games_played'] += 1
-            user_data['total_pnl'] -= game.wager
-            user_data['wagered_since_last_withdrawal'] = user_data.get('wagered_since_last_withdrawal', 0) + game.wager
-            self.db.update_user(user_id, user_data)
+            user_data = await self.wallet.adjust(user_id, 0, total_wagered=game.wager, games_played=1,
+                                                 total_pnl=-game.wager, wagered_since_last_withdrawal=game.wager)
             self.db.update_house_balance(game.wager)
         
         self.db.record_game({
@@ -3400,6 +3237,134 @@ Total Won: ${total_won:,.2f}"""
         
         await self._display_keno_state(update, context, user_id)
     
+    # Auto-play draws rounds in batches: each batch is drawn in one pass, settled in one
+    # transaction, and the message is refreshed once per batch
+    KENO_AUTOPLAY_BATCH = 25
+    KENO_AUTOPLAY_INTERVAL = 3.0
+
+    def _keno_autoplay_progress(self, game: "KenoGame") -> str:
+        """Running totals shown while auto-play is in progress."""
+        summary = game.get_auto_play_summary()
+        picked_str = ", ".join(str(n) for n in sorted(game.picked_numbers))
+        drawn_str = ", ".join(str(n) for n in sorted(game.drawn_numbers))
+        rounds_display = f"{game.current_round} (Infinite)" if game.total_rounds == -1 else f"{game.current_round}/{game.total_rounds}"
+        message = f"🎱 **Keno - Auto-Play Round {rounds_display}**\n\n"
+        message += f"**Your picks:** {picked_str}\n"
+        message += f"**Last draw:** {drawn_str} ({game.hits}/{len(game.picked_numbers)} hits)\n"
+        message += f"**Bet per draw:** ${game.wager:.2f}\n\n"
+        message += f"**Wins:** {summary['wins']} | **Losses:** {summary['losses']}\n"
+        message += f"**Best hit:** {summary['best_multiplier']:.0f}x\n"
+        message += f"**Wagered:** ${summary['total_wagered']:.2f} | **Won:** ${summary['total_payout']:.2f}\n"
+        net = summary['net_profit']
+        message += f"**Running total:** {'+' if net >= 0 else '-'}${abs(net):.2f}"
+        return message
+
+    def _keno_autoplay_summary(self, game: "KenoGame", note: str = "") -> Tuple[str, str]:
+        """Final auto-play message and the result line posted under it."""
+        summary = game.get_auto_play_summary()
+        picked_str = ", ".join(str(n) for n in sorted(game.picked_numbers))
+        message = f"🎱 **Keno - Auto-Play Complete**\n\n"
+        if note:
+            message += f"{note}\n\n"
+        message += f"**Your picks:** {picked_str}\n"
+        message += f"**Rounds played:** {summary['total_rounds']}\n"
+        message += f"**Wins:** {summary['wins']} | **Losses:** {summary['losses']}\n"
+        message += f"**Best hit:** {summary['best_multiplier']:.0f}x\n"
+        message += f"**Total wagered:** ${summary['total_wagered']:.2f}\n"
+        message += f"**Total won:** ${summary['total_payout']:.2f}\n"
+        net = summary['net_profit']
+        if net >= 0:
+            message += f"**Net profit:** +${net:.2f}\n"
+        else:
+            message += f"**Net loss:** -${abs(net):.2f}\n"
+        
+        user_data = self.db.get_user(game.user_id)
+        result_message = f"@{user_data.get('username', 'Player')} finished {summary['total_rounds']} Keno rounds: {'won' if net >= 0 else 'lost'} ${abs(net):.2f}"
+        return message, result_message
+
+    async def _start_keno_autoplay(self, user_id: int, chat_id: int, message_id: int):
+        # Auto-play is never idle, so the move timeout is off until it ends
+        self.cancel_game_timeout(f"keno_{user_id}")
+        await self._keno_autoplay_step(user_id, chat_id, message_id)
+
+    async def _keno_autoplay_step(self, user_id: int, chat_id: int, message_id: int):
+        """Draw and settle the next batch of auto-play rounds, refresh the message and re-arm."""
+        self.snapshots.forget_timer(f"keno_auto:{user_id}")
+        game = self.keno_sessions.get(user_id)
+        if game is None or game.game_over:
+            return
+        wager = game.wager
+
+        def play(balance: float):
+            # Rounds not paid yet are only drawn while the balance covers them even if all lose
+            affordable = game.prepaid_rounds + (int((balance + 1e-9) // wager) if wager > 0 else self.KENO_AUTOPLAY_BATCH)
+            results = game.run_draws(min(self.KENO_AUTOPLAY_BATCH, affordable))
+            if not results:
+                return None
+            prepaid = min(game.prepaid_rounds, len(results))
+            game.prepaid_rounds -= prepaid
+            
+            picks = sorted(game.picked_numbers)
+            records = []
+            for i, result in enumerate(results):
+                balance += result['payout'] - (wager if i >= prepaid else 0)
+                records.append({
+                    'type': 'keno',
+                    'game_type': 'keno',
+                    'user_id': user_id,
+                    'player_id': user_id,
+                    'wager': wager,
+                    'picks': picks,
+                    'drawn': result['drawn'],
+                    'hits': result['hits'],
+                    'multiplier': result['multiplier'],
+                    'payout': result['payout'],
+                    'result': 'win' if result['payout'] > 0 else 'loss',
+                    'balance_after': balance,
+                    'auto_play_round': result['round'],
+                    'total_rounds': game.total_rounds
+                })
+            wagered = wager * len(results)
+            payout = sum(result['payout'] for result in results)
+            increments = {
+                'total_wagered': wagered,
+                'wagered_since_last_withdrawal': wagered,
+                'games_played': len(results),
+                'games_won': sum(1 for result in results if result['payout'] > 0),
+                'total_pnl': payout - wagered,
+            }
+            return payout - wager * (len(results) - prepaid), wagered - payout, increments, records
+
+        try:
+            user_data = await self.wallet.settle_batch(user_id, play)
+        except Exception as e:
+            # Leave the session to the normal move timeout rather than orphaning it
+            logger.error(f"[KENO] Auto-play batch for {user_id} failed: {e}")
+            self.start_game_timeout(f"keno_{user_id}", "keno", user_id, chat_id, wager, bot=self.app.bot)
+            return
+        if self.keno_sessions.get(user_id) is not game:
+            return  # stopped while the batch was being settled; the stop already showed the summary
+        
+        if user_data is None or game.game_over:
+            note = "🛑 Stopped: balance too low for another draw." if user_data is None else ""
+            game.game_over = True
+            message, result_message = self._keno_autoplay_summary(game, note)
+            del self.keno_sessions[user_id]
+            await self.edits.edit(chat_id, message_id, message, flush=True, parse_mode="Markdown",
+                                  reply_markup=InlineKeyboardMarkup([[
+                                      InlineKeyboardButton("🔄 Play Again", callback_data=f"keno_again_{user_id}_{wager}")]]))
+            await self.app.bot.send_message(chat_id=chat_id, text=result_message, parse_mode="Markdown")
+            return
+        
+        await self.edits.edit(chat_id, message_id, self._keno_autoplay_progress(game),
+                              reply_markup=self._build_keno_grid_keyboard(game), parse_mode="Markdown")
+        self._schedule_keno_autoplay(user_id, chat_id, message_id)
+    
+    def _schedule_keno_autoplay(self, user_id: int, chat_id: int, message_id: int):
+        self.timers.schedule(f"keno_auto:{user_id}", self.KENO_AUTOPLAY_INTERVAL,
+                             self._keno_autoplay_step, user_id, chat_id, message_id)
+        self.snapshots.remember_timer(f"keno_auto:{user_id}", "keno_auto", user_id, chat_id, message_id)
+    
     async def limbo_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Start a Limbo game"""
         user_data = self.ensure_user_registered(update)
@@ -3410,7 +3375,7 @@ Total Won: ${total_won:,.2f}"""
             return
         
         if len(context.args) < 2:
-            presets = get_preset_multipliers()
+            presets = self.games.load("limbo").get_preset_multipliers()
             preset_str = " | ".join([f"{m:.2f}x" for m in presets[:5]])
             await update.message.reply_text(
                 f"**Usage:** `/limbo <amount> <target_multiplier>`\n\n"
@@ -3458,10 +3423,11 @@ Total Won: ${total_won:,.2f}"""
             await update.message.reply_text("❌ Maximum target multiplier is 1,000,000x")
             return
         
-        user_data['balance'] -= wager
-        self.db.update_user(user_id, {'balance': user_data['balance']})
+        user_data = await self.debit_wager(update, user_id, wager)
+        if not user_data:
+            return
         
-        game = LimboGame(user_id, wager, target_multiplier)
+        game = self.games.new("limbo", user_id, wager, target_multiplier)
         self.limbo_sessions[user_id] = game
         
         result = game.play()
@@ -3469,23 +3435,15 @@ Total Won: ${total_won:,.2f}"""
         win_prob = result['win_probability'] * 100
         
         if result['won']:
-            user_data['balance'] += result['payout']
-            user_data['total_wagered'] += wager
-            user_data['games_played'] += 1
-            user_data['games_won'] += 1
-            user_data['total_pnl'] += result['profit']
-            user_data['wagered_since_last_withdrawal'] = user_data.get('wagered_since_last_withdrawal', 0) + wager
-            self.db.update_user(user_id, user_data)
+            user_data = await self.wallet.credit(user_id, result['payout'], total_wagered=wager, games_played=1, games_won=1,
+                                                 total_pnl=result['profit'], wagered_since_last_withdrawal=wager)
             self.db.update_house_balance(-result['profit'])
             
             result_emoji = "🟢"
             result_text = f"@{user_data.get('username', 'Player')} won ${result['payout']:.2f} ({target_multiplier:.2f}x)"
         else:
-            user_data['total_wagered'] += wager
-            user_data['games_played'] += 1
-            user_data['total_pnl'] -= wager
-            user_data['wagered_since_last_withdrawal'] = user_data.get('wagered_since_last_withdrawal', 0) + wager
-            self.db.update_user(user_id, user_data)
+            user_data = await self.wallet.adjust(user_id, 0, total_wagered=wager, games_played=1,
+                                                 total_pnl=-wager, wagered_since_last_withdrawal=wager)
             self.db.update_house_balance(wager)
             
             result_emoji = "🔴"
@@ -3560,10 +3518,11 @@ Total Won: ${total_won:,.2f}"""
             await update.message.reply_text(f"❌ Balance: ${user_data['balance']:.2f}")
             return
         
-        user_data['balance'] -= wager
-        self.db.update_user(user_id, {'balance': user_data['balance']})
+        user_data = await self.debit_wager(update, user_id, wager)
+        if not user_data:
+            return
         
-        game = HiLoGame(user_id, wager)
+        game = self.games.new("hilo", user_id, wager)
         self.hilo_sessions[user_id] = game
         
         # Start 30-second timeout for the game
@@ -3574,28 +3533,31 @@ Total Won: ${total_won:,.2f}"""
         
         await self._display_hilo_state(update, context, user_id, is_new=True)
     
-    def _build_hilo_keyboard(self, game: HiLoGame) -> InlineKeyboardMarkup:
+    def _build_hilo_keyboard(self, game: "HiLoGame") -> InlineKeyboardMarkup:
         """Build the Hi-Lo game keyboard"""
         user_id = game.user_id
-        odds = game.get_odds()
-        
         if game.game_over:
-            keyboard = [[InlineKeyboardButton("🔄 Play Again", callback_data=f"hilo_again_{user_id}_{game.initial_wager}")]]
-        else:
-            keyboard = [
-                [
-                    InlineKeyboardButton(f"⬆️ Higher ({odds['higher']['multiplier']:.2f}x)", callback_data=f"hilo_higher_{user_id}"),
-                    InlineKeyboardButton(f"⬇️ Lower ({odds['lower']['multiplier']:.2f}x)", callback_data=f"hilo_lower_{user_id}")
-                ],
-                [
-                    InlineKeyboardButton(f"🔄 Tie ({odds['tie']['multiplier']:.2f}x)", callback_data=f"hilo_tie_{user_id}"),
-                    InlineKeyboardButton("⏭️ Skip", callback_data=f"hilo_skip_{user_id}")
-                ]
-            ]
-            if game.round_number > 0:
-                payout = game.get_potential_payout()
-                keyboard.append([InlineKeyboardButton(f"💰 Cash Out ${payout:.2f}", callback_data=f"hilo_cashout_{user_id}")])
+            return self.keyboards.memo(("hilo", user_id), ("over", game.initial_wager), lambda: InlineKeyboardMarkup(
+                [[InlineKeyboardButton("🔄 Play Again", callback_data=f"hilo_again_{user_id}_{game.initial_wager}")]]))
         
+        odds = game.get_odds()
+        payout = game.get_potential_payout() if game.round_number > 0 else None
+        state = (odds['higher']['multiplier'], odds['lower']['multiplier'], odds['tie']['multiplier'], payout)
+        return self.keyboards.memo(("hilo", user_id), state, lambda: self._render_hilo_keyboard(user_id, odds, payout))
+    
+    def _render_hilo_keyboard(self, user_id: int, odds: Dict[str, Any], payout: Optional[float]) -> InlineKeyboardMarkup:
+        keyboard = [
+            [
+                InlineKeyboardButton(f"⬆️ Higher ({odds['higher']['multiplier']:.2f}x)", callback_data=f"hilo_higher_{user_id}"),
+                InlineKeyboardButton(f"⬇️ Lower ({odds['lower']['multiplier']:.2f}x)", callback_data=f"hilo_lower_{user_id}")
+            ],
+            [
+                InlineKeyboardButton(f"🔄 Tie ({odds['tie']['multiplier']:.2f}x)", callback_data=f"hilo_tie_{user_id}"),
+                InlineKeyboardButton("⏭️ Skip", callback_data=f"hilo_skip_{user_id}")
+            ]
+        ]
+        if payout is not None:
+            keyboard.append([InlineKeyboardButton(f"💰 Cash Out ${payout:.2f}", callback_data=f"hilo_cashout_{user_id}")])
         return InlineKeyboardMarkup(keyboard)
     
     async def _display_hilo_state(self, update: Update, context: ContextTypes.DEFAULT_TYPE, user_id: int, is_new: bool = False):
@@ -3615,13 +3577,8 @@ Total Won: ${total_won:,.2f}"""
                 profit = game.get_profit()
                 
                 user_data = self.db.get_user(user_id)
-                user_data['balance'] += payout
-                user_data['total_wagered'] += game.initial_wager
-                user_data['games_played'] += 1
-                user_data['games_won'] += 1
-                user_data['total_pnl'] += profit
-                user_data['wagered_since_last_withdrawal'] = user_data.get('wagered_since_last_withdrawal', 0) + game.initial_wager
-                self.db.update_user(user_id, user_data)
+                user_data = await self.wallet.credit(user_id, payout, total_wagered=game.initial_wager, games_played=1, games_won=1,
+                                                     total_pnl=profit, wagered_since_last_withdrawal=game.initial_wager)
                 self.db.update_house_balance(-profit)
                 
                 result_message = f"@{user_data.get('username', 'Player')} won ${payout:.2f} ({game.current_multiplier:.2f}x)"
@@ -3633,11 +3590,8 @@ Total Won: ${total_won:,.2f}"""
                 message += f"**Payout:** ${payout:.2f} (+${profit:.2f})"
             else:
                 user_data = self.db.get_user(user_id)
-                user_data['total_wagered'] += game.initial_wager
-                user_data['games_played'] += 1
-                user_data['total_pnl'] -= game.initial_wager
-                user_data['wagered_since_last_withdrawal'] = user_data.get('wagered_since_last_withdrawal', 0) + game.initial_wager
-                self.db.update_user(user_id, user_data)
+                user_data = await self.wallet.adjust(user_id, 0, total_wagered=game.initial_wager, games_played=1,
+                                                     total_pnl=-game.initial_wager, wagered_since_last_withdrawal=game.initial_wager)
                 self.db.update_house_balance(game.initial_wager)
                 
                 result_message = f"@{user_data.get('username', 'Player')} lost ${game.initial_wager:.2f}"
@@ -3760,16 +3714,13 @@ Total Won: ${total_won:,.2f}"""
             reply_markup=reply_markup
         )
         
-        async def delete_challenge_after_timeout():
-            await asyncio.sleep(30)
-            if game_id in self.pending_pvp:
-                del self.pending_pvp[game_id]
-                try:
-                    await sent_msg.delete()
-                except Exception:
-                    pass
-        
-        asyncio.create_task(delete_challenge_after_timeout())
+        # The invitation expires through the challenge deadline timer (re-armed by load_state after a restart);
+        # keep the message so expire_challenge can take it down
+        challenge = self.pending_pvp.get(game_id)
+        if challenge is not None:
+            challenge['chat_id'] = sent_msg.chat_id
+            challenge['message_id'] = sent_msg.message_id
+            self.pending_pvp.persist(game_id)
     
     async def _accept_connect4_challenge(self, update: Update, context: ContextTypes.DEFAULT_TYPE, game_id: str):
         """Accept a Connect 4 challenge and start the dice rolling phase."""
@@ -3786,6 +3737,13 @@ Total Won: ${total_won:,.2f}"""
             await query.answer("This challenge is not for you!", show_alert=True)
             return
         
+        if challenge.get('dice_phase'):
+            await query.answer("This challenge was already accepted.", show_alert=True)
+            return
+        
+        # Accepted: the invitation can no longer expire under the game
+        self._cancel_challenge_deadline(game_id)
+        
         challenger_id = challenge['challenger']
         wager = challenge['wager']
         
@@ -3802,14 +3760,15 @@ Total Won: ${total_won:,.2f}"""
             del self.pending_pvp[game_id]
             return
         
-        challenger_data['balance'] -= wager
-        opponent_data['balance'] -= wager
-        self.db.update_user(challenger_id, {'balance': challenger_data['balance']})
-        self.db.update_user(user_id, {'balance': opponent_data['balance']})
+        if not await self.wallet.debit_many({challenger_id: wager, user_id: wager}):
+            await query.edit_message_text("A player no longer has enough balance")
+            del self.pending_pvp[game_id]
+            return
         
         challenge['dice_phase'] = True
         challenge['p1_roll'] = None
         challenge['p2_roll'] = None
+        self.pending_pvp.persist(game_id)
         
         keyboard = [[InlineKeyboardButton("🎲 Roll Dice", callback_data=f"connect4_roll_{game_id}_1")]]
         reply_markup = InlineKeyboardMarkup(keyboard)
@@ -3843,6 +3802,7 @@ Total Won: ${total_won:,.2f}"""
             
             roll = random.randint(1, 6)
             challenge['p1_roll'] = roll
+            self.pending_pvp.persist(game_id)
             
             keyboard = [[InlineKeyboardButton("🎲 Roll Dice", callback_data=f"connect4_roll_{game_id}_2")]]
             reply_markup = InlineKeyboardMarkup(keyboard)
@@ -3869,7 +3829,7 @@ Total Won: ${total_won:,.2f}"""
             
             del self.pending_pvp[game_id]
             
-            game = Connect4Game(challenger_id, opponent_id, wager)
+            game = self.games.new("connect4", challenger_id, opponent_id, wager)
             self.connect4_sessions[game_id] = game
             game.set_dice_rolls(p1_roll, roll)
             
@@ -3891,29 +3851,26 @@ Total Won: ${total_won:,.2f}"""
             
             await self._display_connect4_state(update, context, game_id)
     
-    def _build_connect4_keyboard(self, game: Connect4Game, game_id: str) -> InlineKeyboardMarkup:
+    def _build_connect4_keyboard(self, game: "Connect4Game", game_id: str) -> InlineKeyboardMarkup:
         """Build the full grid keyboard for Connect 4 with clickable invisible buttons."""
-        valid_cols = game.get_valid_columns()
-        keyboard = []
+        valid_cols = set(game.get_valid_columns())
+        pieces = {game.PLAYER1: "🔴", game.PLAYER2: "🟡"}
+        # Cell state: the piece in it, or for an empty cell whether its column still takes a drop
+        states = [
+            tuple(pieces.get(cell) or ("drop" if col in valid_cols else "full") for col, cell in enumerate(game.board[row]))
+            for row in range(6)
+        ]
         
-        for row in range(6):
-            row_buttons = []
-            for col in range(7):
-                cell = game.board[row][col]
-                if cell == game.EMPTY:
-                    if col in valid_cols:
-                        row_buttons.append(InlineKeyboardButton("\u3164", callback_data=f"connect4_drop_{game_id}_{col}"))
-                    else:
-                        row_buttons.append(InlineKeyboardButton("\u3164", callback_data="connect4_noop"))
-                elif cell == game.PLAYER1:
-                    row_buttons.append(InlineKeyboardButton("🔴", callback_data="connect4_noop"))
-                else:
-                    row_buttons.append(InlineKeyboardButton("🟡", callback_data="connect4_noop"))
-            keyboard.append(row_buttons)
+        def make_button(row, col, state):
+            if state == "drop":
+                return InlineKeyboardButton("\u3164", callback_data=f"connect4_drop_{game_id}_{col}")
+            if state == "full":
+                return InlineKeyboardButton("\u3164", callback_data="connect4_noop")
+            return InlineKeyboardButton(state, callback_data="connect4_noop")
         
-        return InlineKeyboardMarkup(keyboard)
+        return InlineKeyboardMarkup(self.keyboards.grid(("connect4", game_id), states, make_button))
     
-    def _build_connect4_final_board(self, game: Connect4Game) -> InlineKeyboardMarkup:
+    def _build_connect4_final_board(self, game: "Connect4Game") -> InlineKeyboardMarkup:
         """Build the final board display for Connect 4 (non-clickable)."""
         keyboard = []
         
@@ -3957,10 +3914,8 @@ Total Won: ${total_won:,.2f}"""
             if game.is_draw:
                 message += "\n**Draw!** Wagers returned."
                 
-                p1_data['balance'] += game.wager
-                p2_data['balance'] += game.wager
-                self.db.update_user(game.player1_id, {'balance': p1_data['balance']})
-                self.db.update_user(game.player2_id, {'balance': p2_data['balance']})
+                await self.wallet.credit(game.player1_id, game.wager)
+                await self.wallet.credit(game.player2_id, game.wager)
                 
                 game_key = f"connect4_{game_id}"
                 self.cancel_game_timeout(game_key)
@@ -3975,21 +3930,10 @@ Total Won: ${total_won:,.2f}"""
                 
                 total_pot = game.wager * 2
                 profit = game.wager
-                winner_data = self.db.get_user(winner_id)
-                loser_data = self.db.get_user(loser_id)
-                
-                winner_data['balance'] += total_pot
-                winner_data['games_won'] = winner_data.get('games_won', 0) + 1
-                winner_data['games_played'] += 1
-                winner_data['total_wagered'] += game.wager
-                winner_data['total_pnl'] += game.wager
-                
-                loser_data['games_played'] += 1
-                loser_data['total_wagered'] += game.wager
-                loser_data['total_pnl'] -= game.wager
-                
-                self.db.update_user(winner_id, winner_data)
-                self.db.update_user(loser_id, loser_data)
+                winner_data = await self.wallet.credit(winner_id, total_pot, games_won=1, games_played=1,
+                                                       total_wagered=game.wager, total_pnl=game.wager)
+                loser_data = await self.wallet.adjust(loser_id, 0, games_played=1, total_wagered=game.wager,
+                                                      total_pnl=-game.wager)
                 
                 message += f"\n**{winner_emoji} @{winner_username} wins!**"
                 win_announcement = f"{winner_emoji} @{winner_username} won ${profit:.2f}"
@@ -4065,11 +4009,9 @@ Total Won: ${total_won:,.2f}"""
             return
 
         # Perform transaction
-        user_data['balance'] -= amount
-        recipient_data['balance'] += amount
-        
-        self.db.update_user(user_id, user_data)
-        self.db.update_user(recipient_data['user_id'], recipient_data)
+        if not await self.wallet.transfer(user_id, recipient_data['user_id'], amount):
+            await update.message.reply_text(f"❌ Balance: ${self.db.get_user(user_id)['balance']:.2f}")
+            return
         
         self.db.add_transaction(user_id, "tip_sent", -amount, f"Tip to @{recipient_username}")
         self.db.add_transaction(recipient_data['user_id'], "tip_received", amount, f"Tip from @{update.effective_user.username or update.effective_user.first_name}")
@@ -4080,32 +4022,12 @@ Total Won: ${total_won:,.2f}"""
         )
 
     async def get_ltc_price_usd(self) -> Optional[float]:
-        """Get current LTC price in USD from Plisio API, fallback to manual rate."""
-        api_key = os.getenv('PLISIO_API_KEY')
-        
-        # Try Plisio API first for exact real-time price
-        try:
-            async with aiohttp.ClientSession() as session:
-                url = "https://api.plisio.net/api/v1/currencies/USD"
-                params = {"api_key": api_key}
-                
-                async with session.get(url, params=params, timeout=10) as response:
-                    result = await response.json()
-                    logger.info(f"[PLISIO] Currencies response: {result.get('status')}")
-                    
-                    if result.get('status') == 'success':
-                        currencies = result.get('data', [])
-                        for currency in currencies:
-                            if currency.get('cid') == 'LTC':
-                                price = float(currency.get('price_usd', 0))
-                                logger.info(f"[PLISIO] LTC price: ${price}")
-                                return price
-                    
-                    logger.warning(f"[PLISIO] Could not get LTC price: {result}")
-        except Exception as e:
-            logger.warning(f"[PLISIO] Error fetching LTC price: {e}")
+        """Get current LTC price in USD from the price feed, fallback to manual rate."""
+        price = await self.prices.get('LTC')
+        if price:
+            return price
         
-        # Fallback to manual rate if Plisio fails
+        # Fallback to manual rate if the feed is stale
         manual_rate = self.db.data.get('manual_ltc_rate')
         if manual_rate:
             logger.info(f"[LTC PRICE] Using manual fallback rate: ${manual_rate}")
@@ -4116,6 +4038,24 @@ Total Won: ${total_won:,.2f}"""
 
     async def generate_coinremitter_address(self, user_id: int, currency: str = 'LTC') -> Optional[Dict[str, Any]]:
         """Generate a unique deposit address via Plisio API for specified currency."""
+        return await self.create_deposit_invoice(
+            currency,
+            order_number=f'user_{user_id}_{currency}_{int(datetime.now().timestamp())}',
+            order_name=f'Deposit_User_{user_id}_{currency}',
+        )
+
+    async def create_pool_invoice(self, currency: str) -> Optional[Dict[str, Any]]:
+        """Create an invoice for the deposit pool; its owner is recorded when it is handed out."""
+        self._pool_invoice_seq += 1
+        stamp = f'{int(datetime.now().timestamp())}_{self._pool_invoice_seq}'
+        return await self.create_deposit_invoice(
+            currency,
+            order_number=f'pool_{currency}_{stamp}',
+            order_name=f'Deposit_{currency}_{stamp}',
+        )
+
+    async def create_deposit_invoice(self, currency: str, order_number: str, order_name: str) -> Optional[Dict[str, Any]]:
+        """Create a Plisio deposit invoice for the given order."""
         api_key = os.getenv('PLISIO_API_KEY')
         
         if not api_key:
@@ -4129,62 +4069,87 @@ Total Won: ${total_won:,.2f}"""
         webhook_url = os.getenv('WEBHOOK_URL', 'https://casino.vps.webdock.cloud')
         callback_url = f"{webhook_url}/webhook/deposit?json=true"
         
-        logger.info(f"[PLISIO DEBUG] Generating {currency} deposit address for user {user_id}")
+        logger.info(f"[PLISIO DEBUG] Generating {currency} deposit address for order {order_number}")
         logger.info(f"[PLISIO DEBUG] API Key (first 10 chars): {api_key[:10] if len(api_key) > 10 else 'SHORT'}...")
         logger.info(f"[PLISIO DEBUG] Callback URL: {callback_url}")
         
-        url = "https://api.plisio.net/api/v1/invoices/new"
         params = {
             'source_currency': 'USD',
             'source_amount': '0.01',
             'currency': currency,
-            'order_number': f'user_{user_id}_{currency}_{int(datetime.now().timestamp())}',
-            'order_name': f'Deposit_User_{user_id}_{currency}',
+            'order_number': order_number,
+            'order_name': order_name,
             'callback_url': callback_url,
-            'api_key': api_key,
             'expire_min': '0',
             'allowed_psys_cids': currency
         }
         
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, params=params, timeout=15) as response:
-                    result = await response.json()
-                    logger.info(f"[PLISIO DEBUG] Invoice response: {result}")
-                    if result.get('status') == 'success':
-                        data = result.get('data', {})
-                        logger.info(f"[PLISIO DEBUG] Full data response: {data}")
-                        
-                        txn_id = data.get('txn_id')
-                        invoice_url = data.get('invoice_url')
-                        address = data.get('wallet_hash') or data.get('wallet') or data.get('address')
-                        qr_code = data.get('qr_code')
-                        
-                        # Use invoice_url if no direct wallet address available
-                        if not address and invoice_url:
-                            logger.info(f"[PLISIO DEBUG] Using invoice URL for deposit: {invoice_url}")
-                            address = invoice_url  # Store invoice URL as the "address"
-                        
-                        logger.info(f"[PLISIO DEBUG] Generated {currency} deposit info: {address}")
-                        return {
-                            'address': address,
-                            'qr_code': qr_code,
-                            'expire_on': data.get('expire_utc'),
-                            'txn_id': txn_id,
-                            'invoice_url': invoice_url,
-                            'currency': currency
-                        }
-                    else:
-                        error_msg = result.get('data', {}).get('message', result.get('message', 'Unknown error'))
-                        logger.error(f"[PLISIO DEBUG] API error: {error_msg} - Full response: {result}")
-                        return None
-        except asyncio.TimeoutError:
-            logger.error(f"[PLISIO DEBUG] Request timed out after 15 seconds")
-            return None
+            result = await self.plisio.get("invoices/new", params)
+            logger.info(f"[PLISIO DEBUG] Invoice response: {result}")
+            if result.get('status') == 'success':
+                data = result.get('data', {})
+                logger.info(f"[PLISIO DEBUG] Full data response: {data}")
+                
+                txn_id = data.get('txn_id')
+                invoice_url = data.get('invoice_url')
+                address = data.get('wallet_hash') or data.get('wallet') or data.get('address')
+                qr_code = data.get('qr_code')
+                
+                # Use invoice_url if no direct wallet address available
+                if not address and invoice_url:
+                    logger.info(f"[PLISIO DEBUG] Using invoice URL for deposit: {invoice_url}")
+                    address = invoice_url  # Store invoice URL as the "address"
+                
+                logger.info(f"[PLISIO DEBUG] Generated {currency} deposit info: {address}")
+                return {
+                    'address': address,
+                    'qr_code': qr_code,
+                    'expire_on': data.get('expire_utc'),
+                    'txn_id': txn_id,
+                    'invoice_url': invoice_url,
+                    'currency': currency,
+                    'order_number': order_number
+                }
+            else:
+                error_msg = result.get('data', {}).get('message', result.get('message', 'Unknown error'))
+                logger.error(f"[PLISIO DEBUG] API error: {error_msg} - Full response: {result}")
+                return None
         except Exception as e:
             logger.error(f"[PLISIO DEBUG] Request failed: {e}")
             return None
 
+    async def assign_deposit_address(self, user_id: int, currency: str = 'LTC') -> Optional[Dict[str, Any]]:
+        """Give the user a deposit invoice, from the pool when one is ready."""
+        address_data = self.deposit_pool.take(currency)
+        if address_data is None:
+            return await self.generate_coinremitter_address(user_id, currency)
+        self.db.set_deposit_invoice_owner(address_data['order_number'], user_id, currency)
+        logger.info(f"[DEPOSIT POOL] Assigned {address_data['order_number']} to user {user_id}")
+        return address_data
+
+    def deposit_invoice_owner(self, order_number: str) -> Optional[int]:
+        """User a pooled invoice was handed to, if any."""
+        return self.db.get_deposit_invoice_owner(order_number)
+
+    @staticmethod
+    def deposit_expiry(address_data: Dict[str, Any]) -> Optional[datetime]:
+        """When the invoice expires, from Plisio's expire_utc (epoch seconds); None if unknown."""
+        expire_on = address_data.get('expire_on')
+        try:
+            return datetime.fromtimestamp(float(expire_on)) if expire_on else None
+        except (TypeError, ValueError, OverflowError, OSError):
+            return None
+
+    @staticmethod
+    def deposit_countdown(expires: Optional[datetime]) -> str:
+        """Time left on an invoice as an "MM:SS" line for the deposit screens, or nothing if unknown."""
+        if expires is None:
+            return ""
+        remaining = max(0, int((expires - datetime.now()).total_seconds()))
+        minutes, seconds = divmod(remaining, 60)
+        return f"{minutes:02d}:{seconds:02d}\n\n"
+
     async def deposit_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Show crypto currency selection menu for deposits."""
         user_id = update.effective_user.id
@@ -4214,7 +4179,6 @@ Total Won: ${total_won:,.2f}"""
         """Show user their unique deposit address for the selected currency."""
         query = update.callback_query
         user_id = query.from_user.id
-        user_data = self.db.get_user(user_id)
         
         crypto_info = SUPPORTED_DEPOSIT_CRYPTOS.get(currency)
         if not crypto_info:
@@ -4224,19 +4188,22 @@ Total Won: ${total_won:,.2f}"""
         address_key = f'{currency.lower()}_deposit_address'
         qr_key = f'{currency.lower()}_qr_code'
         
-        # Always generate a fresh invoice for each deposit request
-        await query.edit_message_text(f"⏳ Generating your {currency} deposit address...")
+        # Always hand out a fresh invoice for each deposit request; pre-generated ones need no wait
+        if not self.deposit_pool.ready(currency):
+            await query.edit_message_text(f"⏳ Generating your {currency} deposit address...")
         
-        address_data = await self.generate_coinremitter_address(user_id, currency)
+        address_data = await self.assign_deposit_address(user_id, currency)
         
         if address_data:
             user_deposit_address = address_data.get('address')
             qr_code_url = address_data.get('qr_code')
             
-            user_data[address_key] = user_deposit_address
-            user_data[qr_key] = qr_code_url
-            user_data[f'{currency.lower()}_address_expires'] = address_data.get('expire_on')
-            self.db.update_user(user_id, user_data)
+            # Write only the address columns: user_data was read before the await above
+            self.db.update_user(user_id, {
+                address_key: user_deposit_address,
+                qr_key: qr_code_url,
+                f'{currency.lower()}_address_expires': address_data.get('expire_on'),
+            })
             self.db.save_data()
         else:
             await query.edit_message_text(f"❌ Could not generate {currency} deposit address. Contact admin.")
@@ -4251,19 +4218,19 @@ Total Won: ${total_won:,.2f}"""
         
         fee_percent = crypto_info.get('fee_percent', 0.02) * 100
         
-        # Calculate expiry time (1 hour from now)
+        # Pooled invoices may be up to DepositAddressPool.max_age old, so use the invoice's own expiry
         from datetime import datetime, timedelta
-        expiry_time = datetime.now() + timedelta(hours=1)
-        expiry_timestamp = int(expiry_time.timestamp())
+        expires = self.deposit_expiry(address_data)
+        expiry_time = expires or datetime.now() + timedelta(hours=1)
+        countdown = self.deposit_countdown(expires)
         
         # Store deposit request info for tracking
         deposit_request_key = f'{currency.lower()}_pending_deposit'
-        user_data[deposit_request_key] = {
+        self.db.update_user(user_id, {deposit_request_key: {
             'created_at': datetime.now().isoformat(),
             'expires_at': expiry_time.isoformat(),
             'tx_id': None
-        }
-        self.db.update_user(user_id, user_data)
+        }})
         self.db.save_data()
         
         # Get the actual wallet address (not invoice URL)
@@ -4279,9 +4246,7 @@ Total Won: ${total_won:,.2f}"""
 
 Click the button below to view your deposit address.
 
-59:59
-
-TX ID: _waiting for deposit..._"""
+{countdown}TX ID: _waiting for deposit..._"""
         else:
             # Show direct wallet address
             keyboard = [[InlineKeyboardButton("⬅️ Back", callback_data="deposit_back")]]
@@ -4291,9 +4256,7 @@ TX ID: _waiting for deposit..._"""
 
 `{user_deposit_address}`
 
-59:59
-
-TX ID: _waiting for deposit..._"""
+{countdown}TX ID: _waiting for deposit..._"""
         
         await query.edit_message_text(deposit_text, parse_mode="Markdown", reply_markup=reply_markup)
 
@@ -4336,24 +4299,11 @@ TX ID: _waiting for deposit..._"""
         username = user_data.get('username', f'User{user_id}')
         
         # Deduct balance immediately (hold for withdrawal)
-        user_data['balance'] -= amount
-        self.db.update_user(user_id, user_data)
+        if not await self.debit_wager(update, user_id, amount):
+            return
         
         # Store pending withdrawal
-        if 'pending_withdrawals' not in self.db.data:
-            self.db.data['pending_withdrawals'] = []
-        
-        withdrawal_request = {
-            'user_id': user_id,
-            'username': username,
-            'amount': amount,
-            'ltc_address': ltc_address,
-            'timestamp': datetime.now().isoformat(),
-            'status': 'pending'
-        }
-        
-        self.db.data['pending_withdrawals'].append(withdrawal_request)
-        self.db.save_data()
+        self.db.create_withdrawal(user_id, username, amount, 'LTC', ltc_address)
         
         query = update.callback_query
         await query.edit_message_text(
@@ -4458,24 +4408,10 @@ TX ID: _waiting for deposit..._"""
             
             username = user_data.get('username', f'User{user_id}')
             
-            user_data['balance'] -= amount
-            self.db.update_user(user_id, user_data)
-            
-            if 'pending_withdrawals' not in self.db.data:
-                self.db.data['pending_withdrawals'] = []
-            
-            withdrawal_request = {
-                'user_id': user_id,
-                'username': username,
-                'amount': amount,
-                'wallet_address': wallet_address,
-                'currency': currency,
-                'timestamp': datetime.now().isoformat(),
-                'status': 'pending'
-            }
+            if not await self.debit_wager(update, user_id, amount):
+                return
             
-            self.db.data['pending_withdrawals'].append(withdrawal_request)
-            self.db.save_data()
+            withdraw_id = self.db.create_withdrawal(user_id, username, amount, currency, wallet_address)
             
             await update.message.reply_text(
                 f"✅ **Withdrawal Request Submitted**\n\nAmount: **${amount:.2f}**\nCurrency: **{crypto_info['name']}**\nTo: `{wallet_address}`\n\nYour withdrawal is being processed.\n\nNew balance: ${user_data['balance']:.2f}",
@@ -4484,7 +4420,6 @@ TX ID: _waiting for deposit..._"""
             
             # Send to withdrawal approval group with buttons
             withdrawal_group_id = int(os.getenv('WITHDRAWAL_GROUP_ID', '-5089646716'))
-            withdraw_id = len(self.db.data['pending_withdrawals']) - 1
             
             logger.info(f"[WITHDRAWAL DEBUG] Attempting to send withdrawal notification to group {withdrawal_group_id}")
             logger.info(f"[WITHDRAWAL DEBUG] User: {username}, Amount: ${amount:.2f}, Currency: {currency}, Address: {wallet_address}")
@@ -4500,7 +4435,8 @@ TX ID: _waiting for deposit..._"""
                     chat_id=withdrawal_group_id,
                     text=f"🔔 **New Withdrawal Request**\n\nUser: @{username} (ID: `{user_id}`)\nAmount: **${amount:.2f}**\nCurrency: **{currency}**\nAddress: `{wallet_address}`",
                     parse_mode="Markdown",
-                    reply_markup=reply_markup
+                    reply_markup=reply_markup,
+                    rate_limit_args=NOTICE
                 )
                 logger.info(f"[WITHDRAWAL DEBUG] Successfully sent notification! Message ID: {result.message_id}")
             except Exception as e:
@@ -4548,11 +4484,9 @@ TX ID: _waiting for deposit..._"""
             await update.message.reply_text("❌ Invalid user ID or amount.")
             return
         
-        user_data = self.db.get_user(target_user_id)
         deposit_fee = 0.01  # 1% deposit fee (not shown to user)
         credited_amount = round(amount * (1 - deposit_fee), 2)
-        user_data['balance'] += credited_amount
-        self.db.update_user(target_user_id, user_data)
+        user_data = await self.wallet.credit(target_user_id, credited_amount)
         self.db.add_transaction(target_user_id, "deposit", credited_amount, "LTC Deposit (Approved)")
         self.db.record_deposit(target_user_id, user_data.get('username', f'User{target_user_id}'), amount)
         
@@ -4574,7 +4508,8 @@ TX ID: _waiting for deposit..._"""
             await self.app.bot.send_message(
                 chat_id=target_user_id,
                 text=f"✅ **Deposit Approved!**\n\nAmount: **${amount:.2f}** has been credited.\n\nNew Balance: ${user_data['balance']:.2f}",
-                parse_mode="Markdown"
+                parse_mode="Markdown",
+                rate_limit_args=NOTICE
             )
         except Exception as e:
             logger.error(f"Failed to notify user {target_user_id}: {e}")
@@ -4585,45 +4520,37 @@ TX ID: _waiting for deposit..._"""
             await update.message.reply_text("❌ Admin only.")
             return
         
-        pending = self.db.data.get('pending_withdrawals', [])
-        pending = [w for w in pending if w.get('status') == 'pending']
+        pending = self.db.get_withdrawals('pending')
+        sending = self.db.get_withdrawals('sending')
         
-        if not pending:
+        if not pending and not sending:
             await update.message.reply_text("✅ No pending withdrawals.")
             return
         
         text = "📤 **Pending Withdrawals**\n\n"
         for i, wit in enumerate(pending[-20:], 1):
-            text += f"{i}. @{wit['username']} (ID: {wit['user_id']})\n   Amount: ${wit['amount']:.2f}\n   LTC: `{wit['ltc_address']}`\n\n"
+            text += f"{i}. @{wit['username']} (ID: {wit['user_id']})\n   Amount: ${wit['amount']:.2f}\n   {wit['currency']}: `{wit['wallet_address']}`\n\n"
+        
+        if sending:
+            # Sent to Plisio without a clear answer; check the Plisio dashboard before refunding these
+            text += "⚠️ **Sending / status unknown**\n\n"
+            for wit in sending[-20:]:
+                text += f"• @{wit['username']} (ID: {wit['user_id']}): ${wit['amount']:.2f} {wit['currency']}\n"
+            text += "\n"
         
         text += "Use `/processwithdraw <user_id>` after sending LTC."
         await update.message.reply_text(text, parse_mode="Markdown")
 
     async def get_crypto_price_usd(self, currency: str) -> Optional[float]:
-        """Get current crypto price in USD from Plisio API."""
-        api_key = os.getenv('PLISIO_API_KEY')
-        
-        try:
-            async with aiohttp.ClientSession() as session:
-                url = "https://api.plisio.net/api/v1/currencies/USD"
-                params = {"api_key": api_key}
-                
-                async with session.get(url, params=params) as response:
-                    result = await response.json()
-                    
-                    if result.get('status') == 'success':
-                        currencies = result.get('data', [])
-                        for curr in currencies:
-                            if curr.get('cid') == currency:
-                                price = float(curr.get('price_usd', 0))
-                                logger.info(f"[PLISIO DEBUG] {currency} price: ${price}")
-                                return price
-                    
-                    logger.error(f"[PLISIO DEBUG] Could not get {currency} price: {result}")
-                    return None
-        except Exception as e:
-            logger.error(f"[PLISIO DEBUG] Error fetching {currency} price: {e}")
-            return None
+        """Get current crypto price in USD from the price feed."""
+        if currency == 'LTC':
+            return await self.get_ltc_price_usd()
+        price = await self.prices.get(currency)
+        if price:
+            logger.info(f"[PLISIO DEBUG] {currency} price: ${price}")
+            return price
+        logger.error(f"[PLISIO DEBUG] Could not get {currency} price (feed age: {self.prices.age})")
+        return None
 
     async def send_crypto_withdrawal(self, wallet_address: str, usd_amount: float, currency: str = 'LTC') -> dict:
         """Send crypto withdrawal via Plisio API. Converts USD to crypto first."""
@@ -4648,39 +4575,40 @@ TX ID: _waiting for deposit..._"""
         
         logger.info(f"[PLISIO DEBUG] Converted ${usd_amount} USD to {crypto_amount} {currency} (rate: ${crypto_price})")
         
+        params = {
+            "currency": currency,
+            "to": wallet_address,
+            "amount": str(crypto_amount),
+            "type": "cash_out"
+        }
+        logger.info(f"[PLISIO DEBUG] Withdrawal params: currency={currency}, amount={crypto_amount} (${usd_amount} USD), type=cash_out")
+        
         try:
-            async with aiohttp.ClientSession() as session:
-                url = "https://api.plisio.net/api/v1/operations/withdraw"
-                params = {
-                    "api_key": api_key,
+            # Never retried: a timed-out withdrawal may still have been sent
+            result = await self.plisio.get("operations/withdraw", params)
+            logger.info(f"[PLISIO DEBUG] Withdrawal response: {result}")
+            
+            if result.get('status') == 'success':
+                tx_id = result.get('data', {}).get('id')
+                tx_url = result.get('data', {}).get('tx_url')
+                logger.info(f"[PLISIO DEBUG] Withdrawal successful! TX ID: {tx_id}")
+                return {
+                    "success": True,
+                    "tx_id": tx_id,
+                    "tx_url": tx_url,
                     "currency": currency,
-                    "to": wallet_address,
-                    "amount": str(crypto_amount),
-                    "type": "cash_out"
+                    "crypto_amount": crypto_amount
                 }
-                logger.info(f"[PLISIO DEBUG] Withdrawal params: currency={currency}, amount={crypto_amount} (${usd_amount} USD), type=cash_out")
-                
-                async with session.get(url, params=params) as response:
-                    result = await response.json()
-                    logger.info(f"[PLISIO DEBUG] Withdrawal response: {result}")
-                    
-                    if result.get('status') == 'success':
-                        tx_id = result.get('data', {}).get('id')
-                        tx_url = result.get('data', {}).get('tx_url')
-                        logger.info(f"[PLISIO DEBUG] Withdrawal successful! TX ID: {tx_id}")
-                        return {
-                            "success": True,
-                            "tx_id": tx_id,
-                            "tx_url": tx_url,
-                            "currency": currency,
-                            "crypto_amount": crypto_amount
-                        }
-                    else:
-                        error_msg = result.get('data', {}).get('message', 'Unknown error')
-                        full_error = result.get('data', result)
-                        logger.error(f"[PLISIO DEBUG] Withdrawal failed: {error_msg}")
-                        logger.error(f"[PLISIO DEBUG] Full error response: {full_error}")
-                        return {"success": False, "error": error_msg}
+            else:
+                error_msg = result.get('data', {}).get('message', 'Unknown error')
+                full_error = result.get('data', result)
+                logger.error(f"[PLISIO DEBUG] Withdrawal failed: {error_msg}")
+                logger.error(f"[PLISIO DEBUG] Full error response: {full_error}")
+                return {"success": False, "error": error_msg}
+        except PlisioOutcomeUnknown as e:
+            # The request reached Plisio; the coins may be on their way, so this is not a failure
+            logger.error(f"[PLISIO DEBUG] Withdrawal outcome unknown: {e}")
+            return {"success": False, "unknown": True, "error": str(e)}
         except Exception as e:
             logger.error(f"[PLISIO DEBUG] Withdrawal request exception: {e}")
             return {"success": False, "error": str(e)}
@@ -4705,13 +4633,10 @@ TX ID: _waiting for deposit..._"""
             await update.message.reply_text("❌ Invalid user ID.")
             return
         
-        # Find pending withdrawal
-        pending = self.db.data.get('pending_withdrawals', [])
-        withdrawal = None
-        for wit in pending:
-            if wit['user_id'] == target_user_id and wit.get('status') == 'pending':
-                withdrawal = wit
-                break
+        # Find and claim the pending withdrawal before the first await, so it cannot be sent twice
+        withdrawal = next((w for w in self.db.get_withdrawals('pending')
+                           if w['user_id'] == target_user_id and w['currency'] == 'LTC'
+                           and self.db.transition_withdrawal(w['id'], 'pending', 'sending')), None)
         
         if not withdrawal:
             await update.message.reply_text("❌ No pending withdrawal found for this user.")
@@ -4720,15 +4645,12 @@ TX ID: _waiting for deposit..._"""
         await update.message.reply_text("⏳ Sending LTC via Plisio...")
         
         # Send via Plisio API
-        result = await self.send_ltc_withdrawal(withdrawal['ltc_address'], withdrawal['amount'])
+        result = await self.send_ltc_withdrawal(withdrawal['wallet_address'], withdrawal['amount'])
         
         if result['success']:
-            withdrawal['status'] = 'processed'
-            withdrawal['tx_id'] = result.get('tx_id')
-            withdrawal['tx_url'] = result.get('tx_url')
-            
-            self.db.add_transaction(target_user_id, "withdrawal", -withdrawal['amount'], f"LTC Withdrawal to {withdrawal['ltc_address'][:20]}...")
-            self.db.save_data()
+            self.db.transition_withdrawal(withdrawal['id'], 'sending', 'processed',
+                                          tx_id=result.get('tx_id'), tx_url=result.get('tx_url'))
+            self.db.add_transaction(target_user_id, "withdrawal", -withdrawal['amount'], f"LTC Withdrawal to {withdrawal['wallet_address'][:20]}...")
             
             tx_id = result.get('tx_id', '')
             tx_url = result.get('tx_url', '')
@@ -4744,7 +4666,7 @@ TX ID: _waiting for deposit..._"""
                 self.db.save_data()
             
             await update.message.reply_text(
-                f"✅ **Withdrawal Sent!**\n\nUser ID: {target_user_id}\nAmount: ${withdrawal['amount']:.2f}\nTo: `{withdrawal['ltc_address']}`{tx_info}{explorer_link}",
+                f"✅ **Withdrawal Sent!**\n\nUser ID: {target_user_id}\nAmount: ${withdrawal['amount']:.2f}\nTo: `{withdrawal['wallet_address']}`{tx_info}{explorer_link}",
                 parse_mode="Markdown",
                 disable_web_page_preview=True
             )
@@ -4755,11 +4677,19 @@ TX ID: _waiting for deposit..._"""
                     chat_id=target_user_id,
                     text=f"✅ **Withdrawal Sent!**\n\n**${withdrawal['amount']:.2f}** has been sent to your LTC address.{explorer_link}\n\nPlease allow a few minutes for blockchain confirmation.",
                     parse_mode="Markdown",
-                    disable_web_page_preview=True
+                    disable_web_page_preview=True,
+                    rate_limit_args=NOTICE
                 )
             except Exception as e:
                 logger.error(f"Failed to notify user {target_user_id}: {e}")
+        elif result.get('unknown'):
+            self.db.transition_withdrawal(withdrawal['id'], 'sending', 'sending', error=result.get('error'))
+            await update.message.reply_text(
+                f"⚠️ **Withdrawal Status Unknown**\n\nError: {result.get('error', 'Unknown error')}\n\nPlisio did not answer in time, so the LTC may have been sent. Check the Plisio dashboard before refunding with `/givebal {target_user_id} {withdrawal['amount']}`.",
+                parse_mode="Markdown"
+            )
         else:
+            self.db.transition_withdrawal(withdrawal['id'], 'sending', 'failed', error=result.get('error'))
             await update.message.reply_text(
                 f"❌ **Withdrawal Failed**\n\nError: {result.get('error', 'Unknown error')}\n\nThe user's balance was already deducted. Use `/givebal {target_user_id} {withdrawal['amount']}` to refund if needed.",
                 parse_mode="Markdown"
@@ -4891,7 +4821,7 @@ TX ID: _waiting for deposit..._"""
             
             house_balance = self.db.get_house_balance()
             total_users = len(self.db.data.get('users', {}))
-            pending_withdraws = len([w for w in self.db.data.get('pending_withdrawals', []) if w.get('status') == 'pending'])
+            pending_withdraws = self.db.count_withdrawals('pending')
             
             admin_text = f"""🔐 **Admin Panel**
 
@@ -4939,8 +4869,7 @@ Choose an option:"""
             return
         
         target_user_id = target_user['user_id']
-        target_user['balance'] += amount
-        self.db.update_user(target_user_id, target_user)
+        target_user = await self.wallet.credit(target_user_id, amount)
         self.db.add_transaction(target_user_id, "admin_give", amount, f"Admin grant by {update.effective_user.id}")
         
         username_display = f"@{target_user.get('username', target_user_id)}"
@@ -4976,8 +4905,7 @@ Choose an option:"""
         
         target_user_id = target_user['user_id']
         old_balance = target_user['balance']
-        target_user['balance'] = amount
-        self.db.update_user(target_user_id, target_user)
+        target_user = await self.wallet.set_balance(target_user_id, amount)
         self.db.add_transaction(target_user_id, "admin_set", amount - old_balance, f"Admin set balance by {update.effective_user.id}")
         
         username_display = f"@{target_user.get('username', target_user_id)}"
@@ -5015,8 +4943,7 @@ Choose an option:"""
         target_user_id = target_user['user_id']
         deposit_fee = 0.01  # 1% deposit fee (not shown to user)
         credited_amount = round(amount * (1 - deposit_fee), 2)
-        target_user['balance'] += credited_amount
-        self.db.update_user(target_user_id, target_user)
+        target_user = await self.wallet.credit(target_user_id, credited_amount)
         self.db.add_transaction(target_user_id, "deposit", credited_amount, f"Manual deposit by admin {update.effective_user.id}")
         self.db.record_deposit(target_user_id, target_user.get('username', f'User{target_user_id}'), credited_amount)
         
@@ -5031,7 +4958,8 @@ Choose an option:"""
             await self.app.bot.send_message(
                 chat_id=target_user_id,
                 text=f"✅ **Deposit Credited!**\n\nAmount: **${amount:.2f}**\n\nNew Balance: ${target_user['balance']:.2f}",
-                parse_mode="Markdown"
+                parse_mode="Markdown",
+                rate_limit_args=NOTICE
             )
         except Exception as e:
             logger.error(f"Failed to notify user {target_user_id}: {e}")
@@ -5263,11 +5191,12 @@ Best Win Streak: {target_user.get('best_win_streak', 0)}
             return
         
         admin_text = "👑 **Admin List**\n\n"
+        admins = self.db.get_users_bulk(self.env_admin_ids | self.dynamic_admin_ids, fields=('username',))
         
         if self.env_admin_ids:
             admin_text += "**Permanent Admins (from environment):**\n"
             for admin_id in sorted(self.env_admin_ids):
-                user_data = self.db.data['users'].get(str(admin_id))
+                user_data = admins.get(admin_id)
                 username = user_data.get('username', 'N/A') if user_data else 'N/A'
                 admin_text += f"• {admin_id} (@{username})\n"
             admin_text += "\n"
@@ -5275,7 +5204,7 @@ Best Win Streak: {target_user.get('best_win_streak', 0)}
         if self.dynamic_admin_ids:
             admin_text += "**Dynamic Admins (added via commands):**\n"
             for admin_id in sorted(self.dynamic_admin_ids):
-                user_data = self.db.data['users'].get(str(admin_id))
+                user_data = admins.get(admin_id)
                 username = user_data.get('username', 'N/A') if user_data else 'N/A'
                 admin_text += f"• {admin_id} (@{username})\n"
         else:
@@ -5373,8 +5302,9 @@ Best Win Streak: {target_user.get('best_win_streak', 0)}
         approver_text += "_These users can only approve/deny withdrawals._\n\n"
         
         if self.withdrawal_approvers:
+            approvers = self.db.get_users_bulk(self.withdrawal_approvers, fields=('username',))
             for approver_id in sorted(self.withdrawal_approvers):
-                user_data = self.db.data['users'].get(str(approver_id))
+                user_data = approvers.get(approver_id)
                 username = user_data.get('username', 'N/A') if user_data else 'N/A'
                 approver_text += f"• {approver_id} (@{username})\n"
         else:
@@ -5657,6 +5587,8 @@ Best Win Streak: {target_user.get('best_win_streak', 0)}
         if not user_data.get('first_wager_date'):
             user_data['first_wager_date'] = datetime.now().isoformat()
         
+        # Balance changes go through the wallet; only write the stat columns here
+        user_data.pop('balance', None)
         self.db.update_user(user_id, user_data)
         
 
@@ -5678,14 +5610,14 @@ Best Win Streak: {target_user.get('best_win_streak', 0)}
             return
         
         # Deduct wager from player
-        self.db.update_user(user_id, {'balance': user_data['balance'] - wager})
+        if not await self.debit_wager(update, user_id, wager):
+            return
         
         # Bot sends its emoji
         bot_dice_msg = await context.bot.send_dice(chat_id=chat_id, emoji="🎲")
-        await asyncio.sleep(3)
         bot_roll = bot_dice_msg.dice.value
         
-        # Store pending game and wait for player emoji
+        # Store pending game now; the player's 30 seconds start once the bot's animation has played
         game_id = f"dice_bot_{user_id}_{int(datetime.now().timestamp())}"
         self.pending_pvp[game_id] = {
             "type": "dice_bot",
@@ -5695,12 +5627,10 @@ Best Win Streak: {target_user.get('best_win_streak', 0)}
             "emoji": "🎲",
             "chat_id": chat_id,
             "waiting_for_emoji": True,
-            "emoji_wait_started": datetime.now().isoformat()
+            "emoji_wait_started": (datetime.now() + timedelta(seconds=self.EMOJI_ANIMATION_SECONDS)).isoformat()
         }
-        self.db.data['pending_pvp'] = self.pending_pvp
-        self.db.save_data()
         
-        await context.bot.send_message(chat_id=chat_id, text=f"@{username} your turn", parse_mode="Markdown")
+        self.schedule_reveal(self.EMOJI_ANIMATION_SECONDS, self._reveal_result, chat_id, f"@{username} your turn", None, None, "Markdown")
 
     async def darts_vs_bot(self, update: Update, context: ContextTypes.DEFAULT_TYPE, wager: float):
         """Play darts against the bot (called from button)"""
@@ -5719,14 +5649,14 @@ Best Win Streak: {target_user.get('best_win_streak', 0)}
             return
         
         # Deduct wager from player
-        self.db.update_user(user_id, {'balance': user_data['balance'] - wager})
+        if not await self.debit_wager(update, user_id, wager):
+            return
         
         # Bot sends its emoji
         bot_dice_msg = await context.bot.send_dice(chat_id=chat_id, emoji="🎯")
-        await asyncio.sleep(3)
         bot_roll = bot_dice_msg.dice.value
         
-        # Store pending game and wait for player emoji
+        # Store pending game now; the player's 30 seconds start once the bot's animation has played
         game_id = f"darts_bot_{user_id}_{int(datetime.now().timestamp())}"
         self.pending_pvp[game_id] = {
             "type": "darts_bot",
@@ -5736,12 +5666,10 @@ Best Win Streak: {target_user.get('best_win_streak', 0)}
             "emoji": "🎯",
             "chat_id": chat_id,
             "waiting_for_emoji": True,
-            "emoji_wait_started": datetime.now().isoformat()
+            "emoji_wait_started": (datetime.now() + timedelta(seconds=self.EMOJI_ANIMATION_SECONDS)).isoformat()
         }
-        self.db.data['pending_pvp'] = self.pending_pvp
-        self.db.save_data()
         
-        await context.bot.send_message(chat_id=chat_id, text=f"@{username} your turn", parse_mode="Markdown")
+        self.schedule_reveal(self.EMOJI_ANIMATION_SECONDS, self._reveal_result, chat_id, f"@{username} your turn", None, None, "Markdown")
 
     async def basketball_vs_bot(self, update: Update, context: ContextTypes.DEFAULT_TYPE, wager: float):
         """Play basketball against the bot (called from button)"""
@@ -5760,14 +5688,14 @@ Best Win Streak: {target_user.get('best_win_streak', 0)}
             return
         
         # Deduct wager from player
-        self.db.update_user(user_id, {'balance': user_data['balance'] - wager})
+        if not await self.debit_wager(update, user_id, wager):
+            return
         
         # Bot sends its emoji
         bot_dice_msg = await context.bot.send_dice(chat_id=chat_id, emoji="🏀")
-        await asyncio.sleep(4)
         bot_roll = bot_dice_msg.dice.value
         
-        # Store pending game and wait for player emoji
+        # Store pending game now; the player's 30 seconds start once the bot's animation has played
         game_id = f"basketball_bot_{user_id}_{int(datetime.now().timestamp())}"
         self.pending_pvp[game_id] = {
             "type": "basketball_bot",
@@ -5777,12 +5705,10 @@ Best Win Streak: {target_user.get('best_win_streak', 0)}
             "emoji": "🏀",
             "chat_id": chat_id,
             "waiting_for_emoji": True,
-            "emoji_wait_started": datetime.now().isoformat()
+            "emoji_wait_started": (datetime.now() + timedelta(seconds=4)).isoformat()
         }
-        self.db.data['pending_pvp'] = self.pending_pvp
-        self.db.save_data()
         
-        await context.bot.send_message(chat_id=chat_id, text=f"@{username} your turn", parse_mode="Markdown")
+        self.schedule_reveal(4, self._reveal_result, chat_id, f"@{username} your turn", None, None, "Markdown")
 
     async def soccer_vs_bot(self, update: Update, context: ContextTypes.DEFAULT_TYPE, wager: float):
         """Play soccer against the bot (called from button)"""
@@ -5801,14 +5727,14 @@ Best Win Streak: {target_user.get('best_win_streak', 0)}
             return
         
         # Deduct wager from player
-        self.db.update_user(user_id, {'balance': user_data['balance'] - wager})
+        if not await self.debit_wager(update, user_id, wager):
+            return
         
         # Bot sends its emoji
         bot_dice_msg = await context.bot.send_dice(chat_id=chat_id, emoji="⚽")
-        await asyncio.sleep(4)
         bot_roll = bot_dice_msg.dice.value
         
-        # Store pending game and wait for player emoji
+        # Store pending game now; the player's 30 seconds start once the bot's animation has played
         game_id = f"soccer_bot_{user_id}_{int(datetime.now().timestamp())}"
         self.pending_pvp[game_id] = {
             "type": "soccer_bot",
@@ -5818,12 +5744,10 @@ Best Win Streak: {target_user.get('best_win_streak', 0)}
             "emoji": "⚽",
             "chat_id": chat_id,
             "waiting_for_emoji": True,
-            "emoji_wait_started": datetime.now().isoformat()
+            "emoji_wait_started": (datetime.now() + timedelta(seconds=4)).isoformat()
         }
-        self.db.data['pending_pvp'] = self.pending_pvp
-        self.db.save_data()
         
-        await context.bot.send_message(chat_id=chat_id, text=f"@{username} your turn", parse_mode="Markdown")
+        self.schedule_reveal(4, self._reveal_result, chat_id, f"@{username} your turn", None, None, "Markdown")
 
     async def bowling_vs_bot(self, update: Update, context: ContextTypes.DEFAULT_TYPE, wager: float):
         """Play bowling against the bot (called from button)"""
@@ -5842,14 +5766,14 @@ Best Win Streak: {target_user.get('best_win_streak', 0)}
             return
         
         # Deduct wager from player
-        self.db.update_user(user_id, {'balance': user_data['balance'] - wager})
+        if not await self.debit_wager(update, user_id, wager):
+            return
         
         # Bot sends its emoji
         bot_dice_msg = await context.bot.send_dice(chat_id=chat_id, emoji="🎳")
-        await asyncio.sleep(4)
         bot_roll = bot_dice_msg.dice.value
         
-        # Store pending game and wait for player emoji
+        # Store pending game now; the player's 30 seconds start once the bot's animation has played
         game_id = f"bowling_bot_{user_id}_{int(datetime.now().timestamp())}"
         self.pending_pvp[game_id] = {
             "type": "bowling_bot",
@@ -5859,12 +5783,10 @@ Best Win Streak: {target_user.get('best_win_streak', 0)}
             "emoji": "🎳",
             "chat_id": chat_id,
             "waiting_for_emoji": True,
-            "emoji_wait_started": datetime.now().isoformat()
+            "emoji_wait_started": (datetime.now() + timedelta(seconds=4)).isoformat()
         }
-        self.db.data['pending_pvp'] = self.pending_pvp
-        self.db.save_data()
         
-        await context.bot.send_message(chat_id=chat_id, text=f"@{username} your turn", parse_mode="Markdown")
+        self.schedule_reveal(4, self._reveal_result, chat_id, f"@{username} your turn", None, None, "Markdown")
 
     async def create_open_dice_challenge(self, update: Update, context: ContextTypes.DEFAULT_TYPE, wager: float):
         """Create an open dice challenge for anyone to accept"""
@@ -5882,7 +5804,8 @@ Best Win Streak: {target_user.get('best_win_streak', 0)}
             return
         
         # Deduct wager from challenger balance immediately
-        self.db.update_user(user_id, {'balance': user_data['balance'] - wager})
+        if not await self.debit_wager(update, user_id, wager):
+            return
 
         chat_id = query.message.chat_id
         
@@ -5898,8 +5821,6 @@ Best Win Streak: {target_user.get('best_win_streak', 0)}
             "waiting_for_challenger_emoji": False,
             "created_at": datetime.now().isoformat()
         }
-        self.db.data['pending_pvp'] = self.pending_pvp
-        self.db.save_data()
         
         keyboard = [[InlineKeyboardButton("✅ Accept Challenge", callback_data=f"accept_dice_{challenge_id}")]]
         reply_markup = InlineKeyboardMarkup(keyboard)
@@ -5948,8 +5869,19 @@ Best Win Streak: {target_user.get('best_win_streak', 0)}
             await query.answer(f"❌ Insufficient balance. You need ${wager:.2f} to accept.", show_alert=True)
             return
         
+        # Claim the challenge before the first await; updates from different users run concurrently,
+        # so a second acceptor tapping at the same moment must be turned away here
+        if challenge.get('opponent') or challenge.get('accepting'):
+            await query.answer("❌ This challenge was already accepted.", show_alert=True)
+            return
+        challenge['accepting'] = acceptor_id
+        
         # Deduct wager from acceptor balance
-        self.db.update_user(acceptor_id, {'balance': acceptor_user['balance'] - wager})
+        if not await self.wallet.debit(acceptor_id, wager):
+            challenge.pop('accepting', None)
+            await query.answer(f"❌ Insufficient balance. You need ${wager:.2f} to accept.", show_alert=True)
+            return
+        challenge.pop('accepting', None)
         
         # Update challenge to mark acceptor and wait for challenger emoji
         challenge['opponent'] = acceptor_id
@@ -5957,8 +5889,6 @@ Best Win Streak: {target_user.get('best_win_streak', 0)}
         challenge['waiting_for_emoji'] = False
         challenge['emoji_wait_started'] = datetime.now().isoformat()
         self.pending_pvp[challenge_id] = challenge
-        self.db.data['pending_pvp'] = self.pending_pvp
-        self.db.save_data()
         
         # Show game info message with both players and wager
         await query.edit_message_text(
@@ -5993,7 +5923,8 @@ Best Win Streak: {target_user.get('best_win_streak', 0)}
             return
         
         # Deduct wager from challenger balance immediately
-        self.db.update_user(user_id, {'balance': user_data['balance'] - wager})
+        if not await self.debit_wager(update, user_id, wager):
+            return
         
         chat_id = query.message.chat_id
         
@@ -6009,8 +5940,6 @@ Best Win Streak: {target_user.get('best_win_streak', 0)}
             "waiting_for_challenger_emoji": False,
             "created_at": datetime.now().isoformat()
         }
-        self.db.data['pending_pvp'] = self.pending_pvp
-        self.db.save_data()
         
         keyboard = [[InlineKeyboardButton("✅ Accept Challenge", callback_data=f"accept_{game_type}_{challenge_id}")]]
         reply_markup = InlineKeyboardMarkup(keyboard)
@@ -6062,23 +5991,32 @@ Best Win Streak: {target_user.get('best_win_streak', 0)}
             await query.answer(f"❌ Insufficient balance. You need ${wager:.2f} to accept.", show_alert=True)
             return
         
-        # Deduct wager from acceptor balance
-        self.db.update_user(acceptor_id, {'balance': acceptor_user['balance'] - wager})
+        # Claim the challenge before the first await; updates from different users run concurrently,
+        # so a second acceptor tapping at the same moment must be turned away here
+        if challenge.get('opponent') or challenge.get('accepting'):
+            await query.answer("❌ This challenge was already accepted.", show_alert=True)
+            return
+        challenge['accepting'] = acceptor_id
         
-        # Tell challenger to send their emoji first
-        await query.edit_message_text(
-            f"@{challenger_user['username']} your turn",
-            parse_mode="Markdown"
-        )
+        # Deduct wager from acceptor balance
+        if not await self.wallet.debit(acceptor_id, wager):
+            challenge.pop('accepting', None)
+            await query.answer(f"❌ Insufficient balance. You need ${wager:.2f} to accept.", show_alert=True)
+            return
+        challenge.pop('accepting', None)
         
-        # Update challenge to mark acceptor and wait for challenger emoji
+        # Record the acceptor before the next await, so the debit above is never left without a game
         challenge['opponent'] = acceptor_id
         challenge['waiting_for_challenger_emoji'] = True
         challenge['waiting_for_emoji'] = False
         challenge['emoji_wait_started'] = datetime.now().isoformat()
         self.pending_pvp[challenge_id] = challenge
-        self.db.data['pending_pvp'] = self.pending_pvp
-        self.db.save_data()
+        
+        # Tell challenger to send their emoji first
+        await query.edit_message_text(
+            f"@{challenger_user['username']} your turn",
+            parse_mode="Markdown"
+        )
 
     async def handle_emoji_response(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle when a user sends a dice emoji for PvP or bot vs player"""
@@ -6090,70 +6028,38 @@ Best Win Streak: {target_user.get('best_win_streak', 0)}
         roll_value = update.message.dice.value
         chat_id = update.message.chat_id
         
-        # Reload pending_pvp from database to ensure we have the latest state
-        self.pending_pvp = self.db.data.get('pending_pvp', {})
-        
-        logger.info(f"Received emoji {emoji} from user {user_id} in chat {chat_id}, value: {roll_value}")
-        logger.info(f"Pending games: {self.pending_pvp}")
-        
-        # Find pending challenge waiting for this user's emoji
-        challenge_id_to_resolve = None
-        challenge_to_resolve = None
-        
-        for cid, challenge in self.pending_pvp.items():
-            logger.info(f"Checking challenge {cid}: emoji={challenge.get('emoji')}, waiting_for_challenger={challenge.get('waiting_for_challenger_emoji')}, waiting={challenge.get('waiting_for_emoji')}, chat={challenge.get('chat_id')}, player={challenge.get('player')}, opponent={challenge.get('opponent')}")
-            
-            # Check if waiting for challenger's emoji
-            if (challenge.get('waiting_for_challenger_emoji') and 
-                challenge.get('emoji') == emoji and
-                challenge.get('chat_id') == chat_id and
-                challenge.get('challenger') == user_id):
-                challenge_id_to_resolve = cid
-                challenge_to_resolve = challenge
-                logger.info(f"Found challenger emoji challenge: {cid}")
-                
-                # Wait for animation
-                await asyncio.sleep(3)
-                
-                # Save challenger's roll and tell acceptor to go
-                challenge['challenger_roll'] = roll_value
-                challenge['waiting_for_challenger_emoji'] = False
-                challenge['waiting_for_emoji'] = True
-                challenge['emoji_wait_started'] = datetime.now().isoformat()
-                self.pending_pvp[cid] = challenge
-                self.db.data['pending_pvp'] = self.pending_pvp
-                self.db.save_data()
-                
-                challenger_user = self.db.get_user(challenge['challenger'])
-                acceptor_user = self.db.get_user(challenge['opponent'])
-                wager = challenge['wager']
-                
-                await context.bot.send_message(
-                    chat_id=chat_id, 
-                    text=f"🎲 @{challenger_user['username']} rolled a **{roll_value}**!\n\n"
-                         f"🎲 @{acceptor_user['username']}, send your dice!",
-                    parse_mode="Markdown"
-                )
-                return
-            
-            # Check if waiting for acceptor's emoji (or bot vs player)
-            if (challenge.get('waiting_for_emoji') and 
-                challenge.get('emoji') == emoji and
-                challenge.get('chat_id') == chat_id):
-                # Check if it's PvP (opponent) or bot vs player (player)
-                if challenge.get('opponent') == user_id or challenge.get('player') == user_id:
-                    challenge_id_to_resolve = cid
-                    challenge_to_resolve = challenge
-                    logger.info(f"Found matching challenge: {cid}")
-                    break
-        
-        if not challenge_to_resolve or not challenge_id_to_resolve:
-            logger.info("No matching pending game found")
+        # O(1) lookup in the in-memory index; dice that match no challenge are dropped here
+        challenge_id_to_resolve = self.pending_pvp.find_awaiting_emoji(chat_id, emoji, user_id)
+        if challenge_id_to_resolve is None:
             return  # Not a pending emoji response
         
-        # Resolve the challenge
-        await asyncio.sleep(3)  # Wait for emoji animation
+        challenge_to_resolve = self.pending_pvp[challenge_id_to_resolve]
+        logger.info(f"Received emoji {emoji} from user {user_id} in chat {chat_id}, value: {roll_value} for challenge {challenge_id_to_resolve}")
+        
+        # Waiting for challenger's emoji: save the roll and tell the acceptor to go
+        if challenge_to_resolve.get('waiting_for_challenger_emoji'):
+            challenge = challenge_to_resolve
+            cid = challenge_id_to_resolve
+            
+            # Save challenger's roll right away; the acceptor's 30 seconds start after the animation
+            challenge['challenger_roll'] = roll_value
+            challenge['waiting_for_challenger_emoji'] = False
+            challenge['waiting_for_emoji'] = True
+            challenge['emoji_wait_started'] = (datetime.now() + timedelta(seconds=self.EMOJI_ANIMATION_SECONDS)).isoformat()
+            self.pending_pvp[cid] = challenge
+            
+            challenger_user = self.db.get_user(challenge['challenger'])
+            acceptor_user = self.db.get_user(challenge['opponent'])
+            
+            self.schedule_reveal(
+                self.EMOJI_ANIMATION_SECONDS, self._reveal_result, chat_id,
+                f"🎲 @{challenger_user['username']} rolled a **{roll_value}**!\n\n"
+                f"🎲 @{acceptor_user['username']}, send your dice!",
+                None, None, "Markdown"
+            )
+            return
         
+        # Resolve the challenge now; results are posted once the emoji animation finishes
         game_type = challenge_to_resolve['type']
         wager = challenge_to_resolve['wager']
         
@@ -6172,8 +6078,6 @@ Best Win Streak: {target_user.get('best_win_streak', 0)}
         
         # Remove challenge from pending
         del self.pending_pvp[challenge_id_to_resolve]
-        self.db.data['pending_pvp'] = self.pending_pvp
-        self.db.save_data()
         
         # Determine winner
         winner_id = None
@@ -6187,8 +6091,8 @@ Best Win Streak: {target_user.get('best_win_streak', 0)}
             loser_id = challenger_id
         else:
             # Draw: refund both wagers but still count towards wagered amounts
-            self.db.update_user(challenger_id, {'balance': challenger_user['balance'] + wager})
-            self.db.update_user(user_id, {'balance': acceptor_user['balance'] + wager})
+            await self.wallet.credit(challenger_id, wager)
+            await self.wallet.credit(user_id, wager)
             
             # Count wagered amounts for both players even on draws
             self._update_user_stats(challenger_id, wager, 0, "draw")
@@ -6219,17 +6123,16 @@ Best Win Streak: {target_user.get('best_win_streak', 0)}
             ]
             reply_markup = InlineKeyboardMarkup(keyboard)
             
-            await context.bot.send_message(chat_id=chat_id, text=result_text, reply_markup=reply_markup, parse_mode="Markdown")
+            self.schedule_reveal(self.EMOJI_ANIMATION_SECONDS, self._reveal_result, chat_id, result_text, reply_markup,
+                                 None, "Markdown")
             return
         
         # Handle Win/Loss
         winnings = wager * 2
         winner_profit = wager
         
-        winner_user = self.db.get_user(winner_id)
+        winner_user = await self.wallet.credit(winner_id, winnings)
         loser_user = self.db.get_user(loser_id)
-        winner_user['balance'] += winnings
-        self.db.update_user(winner_id, winner_user)
         
         self._update_user_stats(winner_id, wager, winner_profit, "win")
         self._update_user_stats(loser_id, wager, -wager, "loss")
@@ -6266,7 +6169,8 @@ Best Win Streak: {target_user.get('best_win_streak', 0)}
         ]
         reply_markup = InlineKeyboardMarkup(keyboard)
         
-        await context.bot.send_message(chat_id=chat_id, text=final_text, reply_markup=reply_markup, parse_mode="Markdown")
+        self.schedule_reveal(self.EMOJI_ANIMATION_SECONDS, self._reveal_result, chat_id, final_text, reply_markup,
+                             None, "Markdown")
 
     def _is_make(self, game_type: str, roll: int) -> bool:
         """Check if a roll is a 'make' (success) for basketball/soccer/darts"""
@@ -6292,8 +6196,6 @@ Best Win Streak: {target_user.get('best_win_streak', 0)}
         
         # Remove from pending
         del self.pending_pvp[challenge_id]
-        self.db.data['pending_pvp'] = self.pending_pvp
-        self.db.save_data()
         
         # Determine result
         profit = 0.0
@@ -6306,8 +6208,7 @@ Best Win Streak: {target_user.get('best_win_streak', 0)}
             
             if player_made == bot_made:
                 # Both made or both missed = draw
-                user_data['balance'] += wager
-                self.db.update_user(user_id, user_data)
+                user_data = await self.wallet.credit(user_id, wager)
                 result_text = f"@{username} - Draw, bet refunded"
                 result = "draw"
             elif player_made and not bot_made:
@@ -6315,8 +6216,7 @@ Best Win Streak: {target_user.get('best_win_streak', 0)}
                 profit = wager
                 result = "win"
                 result_text = f"@{username} won ${profit:.2f}"
-                user_data['balance'] += wager * 2
-                self.db.update_user(user_id, user_data)
+                user_data = await self.wallet.credit(user_id, wager * 2)
                 self.db.update_house_balance(-wager)
             else:
                 # Bot made, player missed = player loses
@@ -6330,8 +6230,7 @@ Best Win Streak: {target_user.get('best_win_streak', 0)}
                 profit = wager
                 result = "win"
                 result_text = f"@{username} won ${profit:.2f}"
-                user_data['balance'] += wager * 2
-                self.db.update_user(user_id, user_data)
+                user_data = await self.wallet.credit(user_id, wager * 2)
                 self.db.update_house_balance(-wager)
             elif player_roll < bot_roll:
                 profit = -wager
@@ -6340,8 +6239,7 @@ Best Win Streak: {target_user.get('best_win_streak', 0)}
                 self.db.update_house_balance(wager)
             else:
                 # Draw - refund wager
-                user_data['balance'] += wager
-                self.db.update_user(user_id, user_data)
+                user_data = await self.wallet.credit(user_id, wager)
                 result_text = f"@{username} - Draw, bet refunded"
         
         # Update stats for all results (including draws - they still count towards wagered amounts)
@@ -6369,8 +6267,8 @@ Best Win Streak: {target_user.get('best_win_streak', 0)}
         keyboard = [[InlineKeyboardButton("Play Again", callback_data=f"{game_type.replace('_bot', '_bot')}_{wager:.2f}")]]
         reply_markup = InlineKeyboardMarkup(keyboard)
         
-        sent_msg = await context.bot.send_message(chat_id=chat_id, text=result_text, reply_markup=reply_markup, parse_mode="Markdown")
-        self.button_ownership[(chat_id, sent_msg.message_id)] = user_id
+        self.schedule_reveal(self.EMOJI_ANIMATION_SECONDS, self._reveal_result, chat_id, result_text, reply_markup,
+                             user_id, "Markdown")
 
     async def coinflip_vs_bot(self, update: Update, context: ContextTypes.DEFAULT_TYPE, wager: float, choice: str):
         """Play coinflip against the bot (called from button)"""
@@ -6385,12 +6283,12 @@ Best Win Streak: {target_user.get('best_win_streak', 0)}
             return
         
         # Deduct wager first
-        user_data['balance'] -= wager
-        self.db.update_user(user_id, user_data)
+        user_data = await self.debit_wager(update, user_id, wager)
+        if not user_data:
+            return
         
-        # Send coin emoji and determine result
+        # Send coin emoji and determine result; the outcome is posted after the toss
         await context.bot.send_message(chat_id=chat_id, text="🪙")
-        await asyncio.sleep(2)
         
         # Random coin flip result
         result = random.choice(['heads', 'tails'])
@@ -6403,8 +6301,7 @@ Best Win Streak: {target_user.get('best_win_streak', 0)}
             profit = wager
             outcome = "win"
             result_text = f"@{username} won ${profit:.2f}"
-            user_data['balance'] += wager * 2  # Return wager + winnings
-            self.db.update_user(user_id, user_data)
+            user_data = await self.wallet.credit(user_id, wager * 2)  # Return wager + winnings
             self.db.update_house_balance(-wager)
         else:
             profit = -wager
@@ -6431,6 +6328,10 @@ Best Win Streak: {target_user.get('best_win_streak', 0)}
 
         reply_markup = InlineKeyboardMarkup(keyboard)
 
+        self.schedule_reveal(2, self._reveal_flip_result, chat_id, result_text, reply_markup, user_id, outcome, profit)
+
+    async def _reveal_flip_result(self, chat_id: int, result_text: str, reply_markup: InlineKeyboardMarkup,
+                                  user_id: int, outcome: str, profit: float):
         await self.send_with_buttons(chat_id, result_text, reply_markup, user_id)
         
         # Send sticker based on outcome
@@ -6448,8 +6349,9 @@ Best Win Streak: {target_user.get('best_win_streak', 0)}
             return
         
         # Deduct wager first
-        user_data['balance'] -= wager
-        self.db.update_user(user_id, user_data)
+        user_data = await self.debit_wager(update, user_id, wager)
+        if not user_data:
+            return
         
         reds = [1,3,5,7,9,12,14,16,18,19,21,23,25,27,30,32,34,36]
         blacks = [2,4,6,8,10,11,13,15,17,20,22,24,26,28,29,31,33,35]
@@ -6478,8 +6380,6 @@ Best Win Streak: {target_user.get('best_win_streak', 0)}
         else:
             await update.message.reply_text("🎰 Spinning the wheel...")
         
-        await asyncio.sleep(2.5)
-        
         if choice.startswith("num_"):
             bet_num = int(choice.split("_")[1])
             bet_display = "0" if bet_num == 0 else "00" if bet_num == 37 else str(bet_num)
@@ -6488,8 +6388,7 @@ Best Win Streak: {target_user.get('best_win_streak', 0)}
                 profit = wager * 35
                 outcome = "win"
                 result_text = f"@{username} won ${profit:.2f}"
-                user_data['balance'] += wager * 36  # Return wager + 35x winnings
-                self.db.update_user(user_id, user_data)
+                user_data = await self.wallet.credit(user_id, wager * 36)  # Return wager + 35x winnings
                 self.db.update_house_balance(-profit)
             else:
                 profit = -wager
@@ -6510,7 +6409,7 @@ Best Win Streak: {target_user.get('best_win_streak', 0)}
                 "balance_after": user_data['balance']
             })
             
-            await update.message.reply_text(result_text, parse_mode="Markdown")
+            self.schedule_reveal(2.5, self._reveal_result, chat_id, result_text, None, None, "Markdown")
 
     async def roulette_play(self, update: Update, context: ContextTypes.DEFAULT_TYPE, wager: float, choice: str):
         """Play roulette (called from button)"""
@@ -6525,8 +6424,9 @@ Best Win Streak: {target_user.get('best_win_streak', 0)}
             return
         
         # Deduct wager first
-        user_data['balance'] -= wager
-        self.db.update_user(user_id, user_data)
+        user_data = await self.debit_wager(update, user_id, wager)
+        if not user_data:
+            return
         
         reds = [1,3,5,7,9,12,14,16,18,19,21,23,25,27,30,32,34,36]
         blacks = [2,4,6,8,10,11,13,15,17,20,22,24,26,28,29,31,33,35]
@@ -6555,8 +6455,6 @@ Best Win Streak: {target_user.get('best_win_streak', 0)}
         else:
             await context.bot.send_message(chat_id=chat_id, text="🎰 Spinning the wheel...")
         
-        await asyncio.sleep(2.5)
-        
         profit = 0.0
         outcome = "loss"
         multiplier = 0
@@ -6604,8 +6502,7 @@ Best Win Streak: {target_user.get('best_win_streak', 0)}
             profit = wager * (multiplier - 1)
             outcome = "win"
             result_text = f"@{username} won ${profit:.2f}"
-            user_data['balance'] += wager * multiplier  # Return wager + winnings
-            self.db.update_user(user_id, user_data)
+            user_data = await self.wallet.credit(user_id, wager * multiplier)  # Return wager + winnings
             self.db.update_house_balance(-profit)
         else:
             profit = -wager
@@ -6638,714 +6535,551 @@ Best Win Streak: {target_user.get('best_win_streak', 0)}
         ]
         reply_markup = InlineKeyboardMarkup(keyboard)
         
-        await self.send_with_buttons(chat_id, result_text, reply_markup, user_id)
+        self.schedule_reveal(2.5, self._reveal_result, chat_id, result_text, reply_markup, user_id, "Markdown")
 
     # --- CALLBACK HANDLER ---
 
-    async def button_callback(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        """Handles all inline button presses."""
+    def setup_callback_routes(self):
+        """Register every inline-button route: callback prefix, who may press it, and how its data is parsed."""
+        r = self.callback_router
+
+        # Games vs bot: one press per button
+        for game in ("dice", "darts", "basketball", "soccer", "bowling"):
+            r.prefix(f"{game}_bot_", getattr(self, f"{game}_vs_bot"), one_shot=True, parser=fields(float))
+        r.prefix("flip_bot_", self.coinflip_vs_bot, one_shot=True, parser=fields(float, str))
+        r.prefix("roulette_", self.roulette_play, one_shot=True, parser=fields(float, str))
+        r.prefix("slots_play_", self.slots_play, one_shot=True, parser=fields(float))
+
+        # PvP challenges: created by the owner, accepted by anyone
+        r.prefix("dice_player_open_", self.create_open_dice_challenge, one_shot=True, parser=fields(float))
+        r.prefix("accept_dice_", self.accept_dice_challenge, policy=PUBLIC, one_shot=True, parser=remainder())
+        for game, emoji in (("darts", "🎯"), ("basketball", "🏀"), ("soccer", "⚽"), ("bowling", "🎳")):
+            r.prefix(f"{game}_player_open_",
+                     lambda update, context, wager, game=game, emoji=emoji: self.create_emoji_pvp_challenge(update, context, wager, game, emoji),
+                     one_shot=True, parser=fields(float))
+            r.prefix(f"accept_{game}_", self.accept_emoji_pvp_challenge, policy=PUBLIC, one_shot=True, parser=remainder())
+
+        # Leaderboards: public; the suffix is the menu the Back button returns to
+        back_to = remainder(lambda rest: rest[1:] or "back_to_menu")
+        r.prefix("lb_wagered", lambda update, context, back: self.show_leaderboard_wagered(update, back_to=back),
+                 policy=PUBLIC, parser=back_to)
+        r.prefix("lb_dices_week", lambda update, context, back: self.show_leaderboard_dices(update, "week", back_to=back),
+                 policy=PUBLIC, parser=back_to)
+        r.prefix("lb_dices_all", lambda update, context, back: self.show_leaderboard_dices(update, "all", back_to=back),
+                 policy=PUBLIC, parser=back_to)
+
+        r.prefix("deposit_crypto_", self.show_deposit_address, parser=remainder())
+
+        r.prefix("predict_select_", self._button_predict_select, one_shot=True, parser=fields(float, int))
+        r.prefix("predict_again_", self._button_predict_again, one_shot=True, parser=fields(float, int))
+        r.prefix("matches_page_", self._button_matches_page, parser=fields(int, int))
+        r.prefix("history_page_", self._button_history_page, parser=fields(int))
+        r.prefix("levels_tier_", self._button_levels_tier, parser=remainder(int))
+        r.prefix("allbal_page_", self._button_allbal_page)
+        r.exact("back_to_main_menu", self._button_back_to_main_menu)
+        r.exact("deposit_back", self._button_deposit_back)
+        r.exact("new_deposit_address", self._button_new_deposit_address)
+        r.exact("claim_daily_bonus", self._button_claim_daily_bonus, one_shot=True)
+        r.prefix("claim_level_bonus_", self._button_claim_level_bonus, one_shot=True, parser=remainder())
+        r.exact("view_rakeback", self._button_view_rakeback)
+        r.exact("view_level_bonus", self._button_view_level_bonus)
+        r.exact("back_to_bonus", self._button_back_to_bonus)
+        r.exact("no_rakeback", self._button_no_rakeback)
+        r.exact("no_level_bonus", self._button_no_level_bonus)
+        r.exact("show_levels_list", self._button_show_levels_list)
+        r.exact("back_to_menu", self._button_back_to_menu)
+        r.exact("menu_commands", self._button_menu_commands)
+        r.exact("menu_play", self._button_menu_play)
+        r.exact("menu_more_content", self._button_menu_more_content)
+        r.exact("menu_bonuses", self._button_menu_bonuses)
+        r.exact("menu_support", self._button_menu_support)
+        r.exact("back_to_admin_menu", self._button_back_to_admin_menu)
+        r.exact("admin_balance_mgmt", self._button_admin_balance_mgmt)
+        r.exact("admin_user_mgmt", self._button_admin_user_mgmt)
+        r.exact("admin_view_all_users", self._button_admin_view_all_users)
+        r.exact("admin_view_all_balances", self._button_admin_view_all_balances)
+        r.exact("admin_withdrawals", self._button_admin_withdrawals)
+        r.exact("admin_deposits", self._button_admin_deposits)
+        r.exact("admin_admin_mgmt", self._button_admin_admin_mgmt)
+        r.exact("admin_list_admins", self._button_admin_list_admins)
+        r.exact("admin_list_approvers", self._button_admin_list_approvers)
+        r.exact("admin_system", self._button_admin_system)
+        r.exact("admin_backup", self._button_admin_backup)
+        r.exact("admin_all_commands", self._button_admin_all_commands)
+        r.exact("more_stats", self._button_more_stats)
+        r.exact("more_history", self._button_more_history)
+        r.exact("more_leaderboard", self._button_more_leaderboard)
+        r.exact("more_raffle", self._button_more_raffle)
+        r.exact("raffle_rules", self._button_raffle_rules)
+        r.exact("raffle_history", self._button_raffle_history)
+        r.prefix("game_info_", self._button_game_info, parser=remainder())
+        r.exact("deposit_mock", self._button_deposit_mock)
+        r.exact("withdraw_mock", self._button_withdraw_mock)
+        r.prefix("withdraw_method_", self._button_withdraw_method, parser=remainder())
+        r.exact("withdraw_cancel", self._button_withdraw_cancel)
+        r.exact("withdraw_cancel_flow", self._button_withdraw_cancel_flow)
+        r.exact("withdraw_back_to_currency", self._button_withdraw_back_to_currency)
+        r.exact("withdraw_back_to_amount", self._button_withdraw_back_to_amount)
+        r.prefix("withdraw_approve_", self._button_withdraw_approve, policy=APPROVER, parser=optional_fields(int, int, float, str))
+        r.prefix("withdraw_deny_", self._button_withdraw_deny, policy=APPROVER, parser=fields(int, int, float))
+        r.prefix("copy_addr_", self._button_copy_addr, parser=remainder())
+        r.exact("transactions_history", self._button_transactions_history)
+        r.prefix("decline_", self._button_decline, parser=remainder())
+
+        # Session games bring their own routes (see GAME_PLUGINS)
+        self.games.register_routes(r, self, self._button_game_disabled)
+
+    # --- Inline button routes (registered in setup_callback_routes) ---
+
+    async def _button_game_disabled(self, update: Update, context: ContextTypes.DEFAULT_TYPE, title: str):
+        await update.callback_query.edit_message_text(f"🚫 {title} is currently disabled.")
+
+    async def _settle_predict(self, user_id: int, chat_id: int, wager: float, predicted_number: int, actual_roll: int):
+        """Settle a dice prediction right away and post the result once the dice lands."""
+        if actual_roll == predicted_number:
+            payout = wager * 6
+            profit = payout - wager
+
+            user_data = await self.wallet.credit(user_id, payout, total_wagered=wager, wagered_since_last_withdrawal=wager,
+                                                 games_played=1, games_won=1)
+            self.db.update_house_balance(-profit)
+            result_text = f"@{user_data['username']} won ${profit:.2f}"
+        else:
+            user_data = await self.wallet.adjust(user_id, 0, total_wagered=wager, wagered_since_last_withdrawal=wager,
+                                                 games_played=1)
+            self.db.update_house_balance(wager)
+            result_text = f"@{user_data['username']} lost ${wager:.2f}"
+
+        self.db.record_game({
+            'type': 'dice_predict',
+            'player_id': user_id,
+            'wager': wager,
+            'predicted': predicted_number,
+            'actual_roll': actual_roll,
+            'result': 'win' if actual_roll == predicted_number else 'loss',
+            'payout': (wager * 6) if actual_roll == predicted_number else 0,
+            'balance_after': user_data['balance']
+        })
+
+        keyboard = [
+            [InlineKeyboardButton("1️⃣", callback_data=f"predict_again_{wager:.2f}_1"),
+             InlineKeyboardButton("2️⃣", callback_data=f"predict_again_{wager:.2f}_2"),
+             InlineKeyboardButton("3️⃣", callback_data=f"predict_again_{wager:.2f}_3")],
+            [InlineKeyboardButton("4️⃣", callback_data=f"predict_again_{wager:.2f}_4"),
+             InlineKeyboardButton("5️⃣", callback_data=f"predict_again_{wager:.2f}_5"),
+             InlineKeyboardButton("6️⃣", callback_data=f"predict_again_{wager:.2f}_6")]
+        ]
+        self.schedule_reveal(self.EMOJI_ANIMATION_SECONDS, self._reveal_result, chat_id, result_text,
+                             InlineKeyboardMarkup(keyboard), user_id)
+
+    async def _button_predict_select(self, update: Update, context: ContextTypes.DEFAULT_TYPE, wager, predicted_number):
         query = update.callback_query
-        
-        # Ensure user is registered and username is updated
-        self.ensure_user_registered(update)
-        
-        data = query.data
         user_id = query.from_user.id
         chat_id = query.message.chat_id
         message_id = query.message.message_id
-        
-        # Check if button was already clicked (prevent spam)
-        button_key = (chat_id, message_id, data)
-        if button_key in self.clicked_buttons:
-            await query.answer("❌ This button has already been used!", show_alert=True)
+
+        # Remove from pending predictions (cancel timeout refund)
+        predict_key = f"predict_{chat_id}_{message_id}"
+        if hasattr(self, 'pending_predictions') and predict_key in self.pending_predictions:
+            del self.pending_predictions[predict_key]
+            self.timers.cancel(predict_key)
+
+        # Edit the selection message to show prediction made
+        await query.edit_message_text(f"🔮 You predicted **{predicted_number}**\n\nRolling the dice...", parse_mode="Markdown")
+
+        # Send the dice emoji; the result is posted once it lands
+        dice_message = await context.bot.send_dice(chat_id=chat_id, emoji="🎲")
+        actual_roll = dice_message.dice.value
+
+        await self._settle_predict(user_id, chat_id, wager, predicted_number, actual_roll)
+
+    async def _button_predict_again(self, update: Update, context: ContextTypes.DEFAULT_TYPE, wager, predicted_number):
+        query = update.callback_query
+        user_id = query.from_user.id
+        chat_id = query.message.chat_id
+
+        user_data = self.db.get_user(user_id)
+
+        if wager > user_data['balance']:
+            await context.bot.send_message(chat_id=chat_id, text=f"❌ Balance: ${user_data['balance']:.2f}")
             return
-        
-        # Check button ownership (except for public buttons like PVP accept challenges)
-        # PVP accept buttons that anyone can click to accept challenges
-        pvp_accept_buttons = [
-            "accept_dice_", "accept_darts_", "accept_basketball_", "accept_soccer_", "accept_bowling_", "accept_coinflip_"
-        ]
-        # Truly public buttons (leaderboard)
-        global_public_buttons = ["lb_page_", "lb_dices_week", "lb_dices_all", "lb_wagered"]
-        # Mines buttons (they verify ownership internally via user_id in callback data)
-        mines_buttons = ["mines_start_", "mines_reveal_", "mines_cashout_", "mines_again_", "mines_change_", "mines_noop"]
-        # Blackjack buttons (they verify ownership internally via user_id in callback data)
-        blackjack_buttons = ["bj_"]
-        # Baccarat buttons
-        baccarat_buttons = ["bacc_"]
-        # Keno buttons (they verify ownership internally via user_id in callback data)
-        keno_buttons = ["keno_pick_", "keno_draw_", "keno_clear_", "keno_again_", "keno_noop", "keno_select_rounds_", "keno_rounds_", "keno_back_", "keno_next_", "keno_stop_"]
-        # Limbo buttons
-        limbo_buttons = ["limbo_play_", "limbo_again_"]
-        # Hi-Lo buttons
-        hilo_buttons = ["hilo_higher_", "hilo_lower_", "hilo_tie_", "hilo_skip_", "hilo_cashout_", "hilo_again_"]
-        # Connect 4 buttons
-        connect4_buttons = ["connect4_accept_", "connect4_drop_", "connect4_roll_", "connect4_noop"]
-        # Withdrawal approval buttons (only admins/approvers can use)
-        withdrawal_buttons = ["withdraw_approve_", "withdraw_deny_"]
-        
-        is_pvp_accept = any(data.startswith(prefix) for prefix in pvp_accept_buttons)
-        is_global_public = any(data.startswith(prefix) or data == prefix for prefix in global_public_buttons)
-        is_withdrawal_button = any(data.startswith(prefix) for prefix in withdrawal_buttons)
-        is_mines_button = any(data.startswith(prefix) or data == prefix for prefix in mines_buttons)
-        is_blackjack_button = any(data.startswith(prefix) for prefix in blackjack_buttons)
-        is_baccarat_button = any(data.startswith(prefix) for prefix in baccarat_buttons)
-        is_keno_button = any(data.startswith(prefix) or data == prefix for prefix in keno_buttons)
-        is_connect4_button = any(data.startswith(prefix) or data == prefix for prefix in connect4_buttons)
-        
-        ownership_key = (chat_id, message_id)
-        # Block button if it's NOT public AND (not registered OR not owned by user)
-        if not is_pvp_accept and not is_global_public and not is_mines_button and not is_blackjack_button and not is_baccarat_button and not is_keno_button and not is_connect4_button:
-            # Withdrawal buttons bypass ownership but require approval permission
-            if is_withdrawal_button:
-                if not self.can_approve_withdrawals(user_id):
-                    await query.answer("❌ You don't have permission to approve withdrawals!", show_alert=True)
-                    return
-            elif ownership_key not in self.button_ownership or self.button_ownership[ownership_key] != user_id:
-                await query.answer("❌ This button is not for you!", show_alert=True)
-                return
-        
-        await query.answer() # Acknowledge the button press
-        
-        # Mark button as clicked for game buttons (not utility buttons)
-        game_buttons = [
-            "dice_bot_", "darts_bot_", "basketball_bot_", "soccer_bot_", "bowling_bot_", "flip_bot_", "roulette_",
-            "dice_player_open_", "darts_player_open_", "basketball_player_open_", "soccer_player_open_", "bowling_player_open_",
-            "flip_player_open_", "accept_dice_", "accept_darts_", "accept_basketball_", "accept_soccer_", "accept_bowling_",
-            "accept_coinflip_", "claim_daily_bonus", "claim_level_bonus_", "predict_select_", "predict_again_", "slots_"
-        ]
-        if any(data.startswith(prefix) for prefix in game_buttons):
-            self.clicked_buttons.add(button_key)
-            # Remove from pending opponent selection when user clicks a game button
-            self.pending_opponent_selection.discard(user_id)
-        
-        try:
-            # Game Callbacks (Dice vs Bot)
-            if data.startswith("dice_bot_"):
-                wager = float(data.split('_')[2])
-                await self.dice_vs_bot(update, context, wager)
-                
-            # Game Callbacks (Darts vs Bot)
-            elif data.startswith("darts_bot_"):
-                wager = float(data.split('_')[2])
-                await self.darts_vs_bot(update, context, wager)
-                
-            # Game Callbacks (Basketball vs Bot)
-            elif data.startswith("basketball_bot_"):
-                wager = float(data.split('_')[2])
-                await self.basketball_vs_bot(update, context, wager)
-                
-            # Game Callbacks (Soccer vs Bot)
-            elif data.startswith("soccer_bot_"):
-                wager = float(data.split('_')[2])
-                await self.soccer_vs_bot(update, context, wager)
-                
-            # Game Callbacks (Bowling vs Bot)
-            elif data.startswith("bowling_bot_"):
-                wager = float(data.split('_')[2])
-                await self.bowling_vs_bot(update, context, wager)
-                
-            # Game Callbacks (Dice PvP)
-            elif data.startswith("dice_player_open_"):
-                wager = float(data.split('_')[3])
-                await self.create_open_dice_challenge(update, context, wager)
-                
-            elif data.startswith("accept_dice_"):
-                challenge_id = data.split('_', 2)[2]
-                await self.accept_dice_challenge(update, context, challenge_id)
-            
-            # Game Callbacks (Darts PvP)
-            elif data.startswith("darts_player_open_"):
-                wager = float(data.split('_')[3])
-                await self.create_emoji_pvp_challenge(update, context, wager, "darts", "🎯")
-            
-            elif data.startswith("accept_darts_"):
-                challenge_id = data.split('_', 2)[2]
-                await self.accept_emoji_pvp_challenge(update, context, challenge_id)
-            
-            # Game Callbacks (Basketball PvP)
-            elif data.startswith("basketball_player_open_"):
-                wager = float(data.split('_')[3])
-                await self.create_emoji_pvp_challenge(update, context, wager, "basketball", "🏀")
-            
-            elif data.startswith("accept_basketball_"):
-                challenge_id = data.split('_', 2)[2]
-                await self.accept_emoji_pvp_challenge(update, context, challenge_id)
-            
-            # Game Callbacks (Soccer PvP)
-            elif data.startswith("soccer_player_open_"):
-                wager = float(data.split('_')[3])
-                await self.create_emoji_pvp_challenge(update, context, wager, "soccer", "⚽")
-            
-            elif data.startswith("accept_soccer_"):
-                challenge_id = data.split('_', 2)[2]
-                await self.accept_emoji_pvp_challenge(update, context, challenge_id)
-            
-            # Game Callbacks (Bowling PvP)
-            elif data.startswith("bowling_player_open_"):
-                wager = float(data.split('_')[3])
-                await self.create_emoji_pvp_challenge(update, context, wager, "bowling", "🎳")
-            
-            elif data.startswith("accept_bowling_"):
-                challenge_id = data.split('_', 2)[2]
-                await self.accept_emoji_pvp_challenge(update, context, challenge_id)
-            
-            # Game Callbacks (CoinFlip vs Bot)
-            elif data.startswith("flip_bot_"):
-                parts = data.split('_')
-                wager = float(parts[2])
-                choice = parts[3]
-                await self.coinflip_vs_bot(update, context, wager, choice)
-            
-            # Game Callbacks (Roulette)
-            elif data.startswith("roulette_"):
-                parts = data.split('_')
-                wager = float(parts[1])
-                choice = parts[2]
-                await self.roulette_play(update, context, wager, choice)
-            
-            # Game Callbacks (Predict initial selection - wager already deducted)
-            elif data.startswith("predict_select_"):
-                parts = data.split('_')
-                wager = float(parts[2])
-                predicted_number = int(parts[3])
-                
-                # Remove from pending predictions (cancel timeout refund)
-                predict_key = f"predict_{chat_id}_{message_id}"
-                if hasattr(self, 'pending_predictions') and predict_key in self.pending_predictions:
-                    del self.pending_predictions[predict_key]
-                
-                user_data = self.db.get_user(user_id)
-                
-                # Edit the selection message to show prediction made
-                await query.edit_message_text(f"🔮 You predicted **{predicted_number}**\n\nRolling the dice...", parse_mode="Markdown")
-                
-                # Send the dice emoji and wait for result
-                dice_message = await context.bot.send_dice(chat_id=chat_id, emoji="🎲")
-                actual_roll = dice_message.dice.value
-                
-                await asyncio.sleep(3)
-                
-                # Check if prediction matches
-                if actual_roll == predicted_number:
-                    payout = wager * 6
-                    profit = payout - wager
-                    new_balance = user_data['balance'] + payout
-                    
-                    self.db.update_user(user_id, {
-                        'balance': new_balance,
-                        'total_wagered': user_data['total_wagered'] + wager,
-                        'wagered_since_last_withdrawal': user_data.get('wagered_since_last_withdrawal', 0) + wager,
-                        'games_played': user_data['games_played'] + 1,
-                        'games_won': user_data['games_won'] + 1
-                    })
-                    self.db.update_house_balance(-profit)
-                    
-                    keyboard = [
-                        [InlineKeyboardButton("1️⃣", callback_data=f"predict_again_{wager:.2f}_1"),
-                         InlineKeyboardButton("2️⃣", callback_data=f"predict_again_{wager:.2f}_2"),
-                         InlineKeyboardButton("3️⃣", callback_data=f"predict_again_{wager:.2f}_3")],
-                        [InlineKeyboardButton("4️⃣", callback_data=f"predict_again_{wager:.2f}_4"),
-                         InlineKeyboardButton("5️⃣", callback_data=f"predict_again_{wager:.2f}_5"),
-                         InlineKeyboardButton("6️⃣", callback_data=f"predict_again_{wager:.2f}_6")]
-                    ]
-                    reply_markup = InlineKeyboardMarkup(keyboard)
-                    sent_msg = await context.bot.send_message(chat_id=chat_id, text=f"@{user_data['username']} won ${profit:.2f}", reply_markup=reply_markup)
-                    self.button_ownership[(sent_msg.chat_id, sent_msg.message_id)] = user_id
-                else:
-                    self.db.update_user(user_id, {
-                        'total_wagered': user_data['total_wagered'] + wager,
-                        'wagered_since_last_withdrawal': user_data.get('wagered_since_last_withdrawal', 0) + wager,
-                        'games_played': user_data['games_played'] + 1
-                    })
-                    self.db.update_house_balance(wager)
-                    
-                    keyboard = [
-                        [InlineKeyboardButton("1️⃣", callback_data=f"predict_again_{wager:.2f}_1"),
-                         InlineKeyboardButton("2️⃣", callback_data=f"predict_again_{wager:.2f}_2"),
-                         InlineKeyboardButton("3️⃣", callback_data=f"predict_again_{wager:.2f}_3")],
-                        [InlineKeyboardButton("4️⃣", callback_data=f"predict_again_{wager:.2f}_4"),
-                         InlineKeyboardButton("5️⃣", callback_data=f"predict_again_{wager:.2f}_5"),
-                         InlineKeyboardButton("6️⃣", callback_data=f"predict_again_{wager:.2f}_6")]
-                    ]
-                    reply_markup = InlineKeyboardMarkup(keyboard)
-                    sent_msg = await context.bot.send_message(chat_id=chat_id, text=f"@{user_data['username']} lost ${wager:.2f}", reply_markup=reply_markup)
-                    self.button_ownership[(sent_msg.chat_id, sent_msg.message_id)] = user_id
-                
-                self.db.record_game({
-                    'type': 'dice_predict',
-                    'player_id': user_id,
-                    'wager': wager,
-                    'predicted': predicted_number,
-                    'actual_roll': actual_roll,
-                    'result': 'win' if actual_roll == predicted_number else 'loss',
-                    'payout': (wager * 6) if actual_roll == predicted_number else 0,
-                    'balance_after': user_data['balance']
-                })
-            
-            # Game Callbacks (Predict play again - needs to deduct wager)
-            elif data.startswith("predict_again_"):
-                parts = data.split('_')
-                wager = float(parts[2])
-                predicted_number = int(parts[3])
-                
-                user_data = self.db.get_user(user_id)
-                
-                if wager > user_data['balance']:
-                    await context.bot.send_message(chat_id=chat_id, text=f"❌ Balance: ${user_data['balance']:.2f}")
-                    return
-                
-                # Deduct wager from user balance
-                self.db.update_user(user_id, {'balance': user_data['balance'] - wager})
-                
-                # Send the dice emoji and wait for result
-                dice_message = await context.bot.send_dice(chat_id=chat_id, emoji="🎲")
-                actual_roll = dice_message.dice.value
-                
-                await asyncio.sleep(3)
-                
-                # Check if prediction matches
-                if actual_roll == predicted_number:
-                    payout = wager * 6
-                    profit = payout - wager
-                    new_balance = user_data['balance'] + payout
-                    
-                    self.db.update_user(user_id, {
-                        'balance': new_balance,
-                        'total_wagered': user_data['total_wagered'] + wager,
-                        'wagered_since_last_withdrawal': user_data.get('wagered_since_last_withdrawal', 0) + wager,
-                        'games_played': user_data['games_played'] + 1,
-                        'games_won': user_data['games_won'] + 1
-                    })
-                    self.db.update_house_balance(-profit)
-                    
-                    keyboard = [
-                        [InlineKeyboardButton("1️⃣", callback_data=f"predict_again_{wager:.2f}_1"),
-                         InlineKeyboardButton("2️⃣", callback_data=f"predict_again_{wager:.2f}_2"),
-                         InlineKeyboardButton("3️⃣", callback_data=f"predict_again_{wager:.2f}_3")],
-                        [InlineKeyboardButton("4️⃣", callback_data=f"predict_again_{wager:.2f}_4"),
-                         InlineKeyboardButton("5️⃣", callback_data=f"predict_again_{wager:.2f}_5"),
-                         InlineKeyboardButton("6️⃣", callback_data=f"predict_again_{wager:.2f}_6")]
-                    ]
-                    reply_markup = InlineKeyboardMarkup(keyboard)
-                    sent_msg = await context.bot.send_message(chat_id=chat_id, text=f"@{user_data['username']} won ${profit:.2f}", reply_markup=reply_markup)
-                    self.button_ownership[(sent_msg.chat_id, sent_msg.message_id)] = user_id
-                else:
-                    self.db.update_user(user_id, {
-                        'total_wagered': user_data['total_wagered'] + wager,
-                        'wagered_since_last_withdrawal': user_data.get('wagered_since_last_withdrawal', 0) + wager,
-                        'games_played': user_data['games_played'] + 1
-                    })
-                    self.db.update_house_balance(wager)
-                    
-                    keyboard = [
-                        [InlineKeyboardButton("1️⃣", callback_data=f"predict_again_{wager:.2f}_1"),
-                         InlineKeyboardButton("2️⃣", callback_data=f"predict_again_{wager:.2f}_2"),
-                         InlineKeyboardButton("3️⃣", callback_data=f"predict_again_{wager:.2f}_3")],
-                        [InlineKeyboardButton("4️⃣", callback_data=f"predict_again_{wager:.2f}_4"),
-                         InlineKeyboardButton("5️⃣", callback_data=f"predict_again_{wager:.2f}_5"),
-                         InlineKeyboardButton("6️⃣", callback_data=f"predict_again_{wager:.2f}_6")]
-                    ]
-                    reply_markup = InlineKeyboardMarkup(keyboard)
-                    sent_msg = await context.bot.send_message(chat_id=chat_id, text=f"@{user_data['username']} lost ${wager:.2f}", reply_markup=reply_markup)
-                    self.button_ownership[(sent_msg.chat_id, sent_msg.message_id)] = user_id
-                
-                self.db.record_game({
-                    'type': 'dice_predict',
-                    'player_id': user_id,
-                    'wager': wager,
-                    'predicted': predicted_number,
-                    'actual_roll': actual_roll,
-                    'result': 'win' if actual_roll == predicted_number else 'loss',
-                    'payout': (wager * 6) if actual_roll == predicted_number else 0,
-                    'balance_after': user_data['balance']
-                })
-            
-            # Game Callbacks (Slots play again)
-            elif data.startswith("slots_play_"):
-                wager = float(data.split('_')[2])
-                await self.slots_play(update, context, wager)
-
-            # Leaderboard Navigation
-            elif data.startswith("lb_wagered"):
-                # Extract back_to from callback data (lb_wagered_menu_more_content or lb_wagered_back_to_menu)
-                parts = data.split("_", 2)
-                back_to = parts[2] if len(parts) > 2 else "back_to_menu"
-                await self.show_leaderboard_wagered(update, back_to=back_to)
-            elif data.startswith("lb_dices_week"):
-                parts = data.split("_", 3)
-                back_to = parts[3] if len(parts) > 3 else "back_to_menu"
-                await self.show_leaderboard_dices(update, "week", back_to=back_to)
-            elif data.startswith("lb_dices_all"):
-                parts = data.split("_", 3)
-                back_to = parts[3] if len(parts) > 3 else "back_to_menu"
-                await self.show_leaderboard_dices(update, "all", back_to=back_to)
-            
-            # Matches Pagination
-            elif data.startswith("matches_page_"):
-                parts = data.split("_")
-                target_user_id = int(parts[2])
-                page = int(parts[3])
-                target_user = self.db.get_user(target_user_id)
-                target_username = target_user.get('username', f'User{target_user_id}')
-                await self._show_matches_page(query.message, target_user_id, target_username, page, user_id)
-            
-            # History Pagination
-            elif data.startswith("history_page_"):
-                page = int(data.split("_")[2])
-                await self._show_history_page(query.message, user_id, page, edit_message=True, show_back=True)
-            
-            # Levels Tier Navigation
-            elif data.startswith("levels_tier_"):
-                tier_index = int(data.replace("levels_tier_", ""))
-                user_data = self.db.get_user(user_id)
-                total_wagered = user_data.get('total_wagered', 0)
-                levels_text, keyboard = self.build_tier_display(tier_index, total_wagered, user_id)
-                await query.edit_message_text(levels_text, reply_markup=keyboard, parse_mode="Markdown")
-            
-            # All Balances Pagination (Admin)
-            elif data.startswith("allbal_page_"):
-                if not self.is_admin(user_id):
-                    await query.answer("❌ This is for administrators only.", show_alert=True)
-                    return
-                page = int(data.split('_')[2])
-                await self.show_allbalances_page(update, page)
-                
-            # Deposit Crypto Selection
-            elif data.startswith("deposit_crypto_"):
-                currency = data.replace("deposit_crypto_", "")
-                await self.show_deposit_address(update, context, currency)
-            
-            # Back to Main Menu
-            elif data == "back_to_main_menu":
-                user_data = self.db.get_user(user_id)
-                balance_text = f"🏦 **Menu**\n\nYour balance: **${user_data['balance']:.2f}**\n\nChoose the action:"
-                keyboard = [
-                    [InlineKeyboardButton("🎮 Play", callback_data="menu_play")],
-                    [InlineKeyboardButton("💳 Deposit", callback_data="deposit_mock"),
-                     InlineKeyboardButton("💸 Withdraw", callback_data="withdraw_mock")],
-                    [InlineKeyboardButton("🎁 Bonuses", callback_data="menu_bonuses"),
-                     InlineKeyboardButton("📚 More Content", callback_data="menu_more_content")],
-                    [InlineKeyboardButton("⚙️ Commands", callback_data="menu_commands"),
-                     InlineKeyboardButton("📞 Support", callback_data="menu_support")]
-                ]
-                reply_markup = InlineKeyboardMarkup(keyboard)
-                await query.edit_message_text(balance_text, reply_markup=reply_markup, parse_mode="Markdown")
-            
-            # Deposit Back to Currency Selection
-            elif data == "deposit_back":
-                user_data = self.db.get_user(user_id)
-                keyboard = []
-                for code, info in SUPPORTED_DEPOSIT_CRYPTOS.items():
-                    btn = InlineKeyboardButton(info['name'], callback_data=f"deposit_crypto_{code}")
-                    keyboard.append([btn])
-                keyboard.append([InlineKeyboardButton("⬅️ Back", callback_data="back_to_main_menu")])
-                reply_markup = InlineKeyboardMarkup(keyboard)
-                await query.edit_message_text(
-                    f"Your balance: **${user_data['balance']:.2f}**\n\nSelect a cryptocurrency:",
-                    parse_mode="Markdown",
-                    reply_markup=reply_markup
-                )
-            
-            # Generate New Deposit Address
-            elif data == "new_deposit_address":
-                await query.answer("Generating new address...")
-                
-                address_data = await self.generate_coinremitter_address(user_id)
-                
-                if address_data:
-                    user_deposit_address = address_data.get('address')
-                    qr_code_url = address_data.get('qr_code')
-                    
-                    user_data = self.db.get_user(user_id)
-                    user_data['ltc_deposit_address'] = user_deposit_address
-                    user_data['ltc_qr_code'] = qr_code_url
-                    user_data['ltc_address_expires'] = address_data.get('expire_on')
-                    self.db.update_user(user_id, user_data)
-                    self.db.save_data()
-                    
-                    deposit_text = f"""Your NEW deposit address:
 
-`{user_deposit_address}`
+        # Deduct wager from user balance
+        if not await self.debit_wager(update, user_id, wager):
+            return
 
-Send any amount of LTC - you will be credited the exact USD value.
+        # Send the dice emoji; the result is posted once it lands
+        dice_message = await context.bot.send_dice(chat_id=chat_id, emoji="🎲")
+        actual_roll = dice_message.dice.value
 
-59:59
+        await self._settle_predict(user_id, chat_id, wager, predicted_number, actual_roll)
 
-TX ID: _waiting for deposit..._"""
-                    
-                    keyboard = [[InlineKeyboardButton("Generate New Address", callback_data="new_deposit_address")]]
-                    reply_markup = InlineKeyboardMarkup(keyboard)
-                    
-                    await query.edit_message_text(deposit_text, parse_mode="Markdown", reply_markup=reply_markup)
-                else:
-                    master_address = os.getenv("LTC_MASTER_ADDRESS", "")
-                    if master_address:
-                        await query.edit_message_text(
-                            f"⚠️ Could not generate unique address. Use master address:\n\n"
-                            f"`{master_address}`\n\n"
-                            f"**Include your User ID in memo:** `{user_id}`",
-                            parse_mode="Markdown"
-                        )
-                    else:
-                        await query.edit_message_text("❌ Could not generate new address. Contact admin.")
-            
-            # Utility Callbacks
-            elif data == "claim_daily_bonus":
-                user_data = self.db.get_user(user_id)
-                bonus_amount = user_data.get('wagered_since_last_withdrawal', 0) * 0.005
+    async def _button_matches_page(self, update: Update, context: ContextTypes.DEFAULT_TYPE, target_user_id, page):
+        query = update.callback_query
+        user_id = query.from_user.id
+        target_user = self.db.get_user(target_user_id)
+        target_username = target_user.get('username', f'User{target_user_id}')
+        await self._show_matches_page(query.message, target_user_id, target_username, page, user_id)
 
-                if bonus_amount < 0.01:
-                     await query.edit_message_text("❌ Minimum bonus to claim is $0.01.")
-                     return
+    async def _button_history_page(self, update: Update, context: ContextTypes.DEFAULT_TYPE, page):
+        query = update.callback_query
+        user_id = query.from_user.id
+        await self._show_history_page(query.message, user_id, page, edit_message=True, show_back=True)
 
-                # Process claim
-                user_data['balance'] += bonus_amount
-                user_data['wagered_since_last_withdrawal'] = 0.0 # Reset wagered amount
-                self.db.update_user(user_id, user_data)
-                
-                self.db.add_transaction(user_id, "bonus_claim", bonus_amount, "Bonus Claim")
-                
-                # Show updated rakeback view with success message
-                rakeback_text = f"✅ **Bonus Claimed!** You received **${bonus_amount:.2f}**\n\n"
-                rakeback_text += "💎 **Rakeback**\n\n"
-                rakeback_text += f"Your current rakeback: **$0.00**\n\n"
-                rakeback_text += "Play games and claim your rakeback bonus anytime!"
-                
-                keyboard = [
-                    [InlineKeyboardButton("💸 Play to earn!", callback_data="no_rakeback")],
-                    [InlineKeyboardButton("⬅️ Back", callback_data="back_to_bonus")]
-                ]
-                
-                await query.edit_message_text(rakeback_text, reply_markup=InlineKeyboardMarkup(keyboard), parse_mode="Markdown")
+    async def _button_levels_tier(self, update: Update, context: ContextTypes.DEFAULT_TYPE, tier_index):
+        query = update.callback_query
+        user_id = query.from_user.id
+        user_data = self.db.get_user(user_id)
+        total_wagered = user_data.get('total_wagered', 0)
+        levels_text, keyboard = self.build_tier_display(tier_index, total_wagered, user_id)
+        await query.edit_message_text(levels_text, reply_markup=keyboard, parse_mode="Markdown")
 
-            elif data.startswith("claim_level_bonus_"):
-                level_id = data.replace("claim_level_bonus_", "")
-                user_data = self.db.get_user(user_id)
-                total_wagered = user_data.get('total_wagered', 0)
-                current_level = get_user_level(total_wagered, user_id, self.db)
-                claimed_bonuses = user_data.get('claimed_level_bonuses', [])
-                
-                level_to_claim = None
-                for level in LEVELS:
-                    if level['id'] == level_id:
-                        level_to_claim = level
-                        break
-                
-                if not level_to_claim:
-                    await query.edit_message_text("❌ Invalid level bonus.")
-                    return
-                
-                if total_wagered < level_to_claim['threshold']:
-                    await query.edit_message_text(f"❌ You haven't reached {level_to_claim['name']} yet!")
-                    return
-                
-                if level_id in claimed_bonuses:
-                    await query.edit_message_text(f"❌ You've already claimed the {level_to_claim['name']} bonus!")
-                    return
-                
-                bonus_amount = level_to_claim['bonus']
-                user_data['balance'] += bonus_amount
-                claimed_bonuses.append(level_id)
-                user_data['claimed_level_bonuses'] = claimed_bonuses
-                self.db.update_user(user_id, user_data)
-                
-                self.db.add_transaction(user_id, "level_bonus", bonus_amount, f"Level Bonus - {level_to_claim['name']}")
-                
-                # Re-fetch user data and rebuild the same level bonus view
-                next_level = get_next_level(total_wagered)
-                
-                # Get user's rank
-                all_users = []
-                for u_data in self.db.data['users'].values():
-                    all_users.append({
-                        "user_id": u_data.get('user_id'),
-                        "total_wagered": u_data.get('total_wagered', 0)
-                    })
-                all_users.sort(key=lambda x: x['total_wagered'], reverse=True)
-                user_rank = None
-                for i, u in enumerate(all_users):
-                    if u['user_id'] == user_id:
-                        user_rank = i + 1
-                        break
-                
-                # Find ALL unclaimed level bonuses that the user has reached (after claiming this one)
-                unclaimed_levels = []
-                for level in LEVELS:
-                    if total_wagered >= level['threshold'] and level['id'] not in claimed_bonuses and level['bonus'] > 0:
-                        unclaimed_levels.append(level)
-                
-                total_unclaimed = sum(level['bonus'] for level in unclaimed_levels)
-                
-                # Build same format as view_level_bonus
-                level_text = "🌲 **Level Up Bonus**\n\n"
-                level_text += "Play games, level up and get even more bonuses!\n\n"
-                level_text += f"Your current level:\n{current_level['emoji']} **{current_level['name']}** - ${total_wagered:,.0f} wagered\n\n"
-                
-                if next_level:
-                    level_text += f"Next Level:\n{next_level['emoji']} **{next_level['name']}** - ${next_level['threshold']:,.0f} wagered\n\n"
-                    wager_needed = next_level['threshold'] - total_wagered
-                    if user_rank:
-                        level_text += f"You are ranked **#{user_rank}**.\n"
-                    level_text += f"Wager **${wager_needed:,.0f}** more to upgrade your level!"
-                else:
-                    if user_rank:
-                        level_text += f"You are ranked **#{user_rank}**.\n"
-                    level_text += "You've reached the maximum level!"
-                
-                # Show unclaimed bonuses info
-                if unclaimed_levels:
-                    level_text += f"\n\n🎁 **{len(unclaimed_levels)} unclaimed bonus(es)** worth **${total_unclaimed:,.0f}** total!"
-                
-                # Build keyboard
-                keyboard = []
-                if unclaimed_levels:
-                    next_bonus = unclaimed_levels[0]
-                    keyboard.append([InlineKeyboardButton(f"🎁 Claim {next_bonus['emoji']} {next_bonus['name']} - ${next_bonus['bonus']:.0f}", callback_data=f"claim_level_bonus_{next_bonus['id']}")])
-                keyboard.append([InlineKeyboardButton("Levels List", callback_data="show_levels_list")])
-                keyboard.append([InlineKeyboardButton("⬅️ Back", callback_data="back_to_bonus")])
-                
-                await query.edit_message_text(level_text, reply_markup=InlineKeyboardMarkup(keyboard), parse_mode="Markdown")
+    async def _button_allbal_page(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        query = update.callback_query
+        data = query.data
+        user_id = query.from_user.id
+        if not self.is_admin(user_id):
+            await query.answer("❌ This is for administrators only.", show_alert=True)
+            return
+        page = int(data.split('_')[2])
+        await self.show_allbalances_page(update, page)
 
-            elif data == "view_rakeback":
-                user_data = self.db.get_user(user_id)
-                wagered_since_withdrawal = user_data.get('wagered_since_last_withdrawal', 0)
-                rakeback_amount = wagered_since_withdrawal * 0.005
-                
-                rakeback_text = "💎 **Rakeback**\n\n"
-                rakeback_text += f"Your current rakeback: **${rakeback_amount:.2f}**\n\n"
-                rakeback_text += "Play games and claim your rakeback bonus anytime!"
-                
-                keyboard = []
-                if rakeback_amount >= 0.01:
-                    keyboard.append([InlineKeyboardButton(f"💸 Claim ${rakeback_amount:.2f}", callback_data="claim_daily_bonus")])
-                else:
-                    keyboard.append([InlineKeyboardButton("💸 Play to earn!", callback_data="no_rakeback")])
-                keyboard.append([InlineKeyboardButton("⬅️ Back", callback_data="back_to_bonus")])
-                
-                await query.edit_message_text(rakeback_text, reply_markup=InlineKeyboardMarkup(keyboard), parse_mode="Markdown")
-                return
-            
-            elif data == "view_level_bonus":
-                user_data = self.db.get_user(user_id)
-                total_wagered = user_data.get('total_wagered', 0)
-                current_level = get_user_level(total_wagered, user_id, self.db)
-                next_level = get_next_level(total_wagered)
-                claimed_bonuses = user_data.get('claimed_level_bonuses', [])
-                
-                # Get user's rank
-                leaderboard = self.db.get_leaderboard()
-                user_rank = None
-                all_users = []
-                for u_data in self.db.data['users'].values():
-                    all_users.append({
-                        "user_id": u_data.get('user_id'),
-                        "total_wagered": u_data.get('total_wagered', 0)
-                    })
-                all_users.sort(key=lambda x: x['total_wagered'], reverse=True)
-                for i, u in enumerate(all_users):
-                    if u['user_id'] == user_id:
-                        user_rank = i + 1
-                        break
-                
-                # Find ALL unclaimed level bonuses that the user has reached
-                unclaimed_levels = []
-                for level in LEVELS:
-                    if total_wagered >= level['threshold'] and level['id'] not in claimed_bonuses and level['bonus'] > 0:
-                        unclaimed_levels.append(level)
-                
-                total_unclaimed = sum(level['bonus'] for level in unclaimed_levels)
-                
-                level_text = "🌲 **Level Up Bonus**\n\n"
-                level_text += "Play games, level up and get even more bonuses!\n\n"
-                level_text += f"Your current level:\n{current_level['emoji']} **{current_level['name']}** - ${total_wagered:,.0f} wagered\n\n"
-                
-                if next_level:
-                    level_text += f"Next Level:\n{next_level['emoji']} **{next_level['name']}** - ${next_level['threshold']:,.0f} wagered\n\n"
-                    wager_needed = next_level['threshold'] - total_wagered
-                    if user_rank:
-                        level_text += f"You are ranked **#{user_rank}**.\n"
-                    level_text += f"Wager **${wager_needed:,.0f}** more to upgrade your level!"
-                else:
-                    if user_rank:
-                        level_text += f"You are ranked **#{user_rank}**.\n"
-                    level_text += "You've reached the maximum level!"
-                
-                keyboard = []
-                if unclaimed_levels:
-                    level_text += f"\n\n🎁 **{len(unclaimed_levels)} unclaimed bonus(es)** worth **${total_unclaimed:,.0f}** total!"
-                    # Single button to claim bonuses one by one
-                    next_bonus = unclaimed_levels[0]
-                    keyboard.append([InlineKeyboardButton(f"🎁 Claim {next_bonus['emoji']} {next_bonus['name']} - ${next_bonus['bonus']:.0f}", callback_data=f"claim_level_bonus_{next_bonus['id']}")])
-                else:
-                    keyboard.append([InlineKeyboardButton("No bonus available", callback_data="no_level_bonus")])
-                keyboard.append([InlineKeyboardButton("Levels List", callback_data="show_levels_list")])
-                keyboard.append([InlineKeyboardButton("⬅️ Back", callback_data="back_to_bonus")])
-                
-                await query.edit_message_text(level_text, reply_markup=InlineKeyboardMarkup(keyboard), parse_mode="Markdown")
-                return
-            
-            elif data == "back_to_bonus":
-                # Show the main bonus screen again
-                bonus_text = "🎁 **Bonus**\n\n"
-                bonus_text += "In this section you can find bonuses that you can get by playing games!\n\n"
-                bonus_text += "💎 **Rakeback**\n"
-                bonus_text += "Play games and claim your rakeback bonus anytime!\n\n"
-                bonus_text += "💎 **Level Up Bonus**\n"
-                bonus_text += "Play games, level up and earn money!"
-                
-                keyboard = [
-                    [
-                        InlineKeyboardButton("🎁 Rakeback", callback_data="view_rakeback"),
-                        InlineKeyboardButton("🎁 Level Up Bonus", callback_data="view_level_bonus")
-                    ],
-                    [InlineKeyboardButton("⬅️ Back", callback_data="back_to_menu")]
-                ]
-                
-                await query.edit_message_text(bonus_text, reply_markup=InlineKeyboardMarkup(keyboard), parse_mode="Markdown")
-                return
+    async def _button_back_to_main_menu(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        query = update.callback_query
+        user_id = query.from_user.id
+        user_data = self.db.get_user(user_id)
+        balance_text = f"🏦 **Menu**\n\nYour balance: **${user_data['balance']:.2f}**\n\nChoose the action:"
+        keyboard = [
+            [InlineKeyboardButton("🎮 Play", callback_data="menu_play")],
+            [InlineKeyboardButton("💳 Deposit", callback_data="deposit_mock"),
+             InlineKeyboardButton("💸 Withdraw", callback_data="withdraw_mock")],
+            [InlineKeyboardButton("🎁 Bonuses", callback_data="menu_bonuses"),
+             InlineKeyboardButton("📚 More Content", callback_data="menu_more_content")],
+            [InlineKeyboardButton("⚙️ Commands", callback_data="menu_commands"),
+             InlineKeyboardButton("📞 Support", callback_data="menu_support")]
+        ]
+        reply_markup = InlineKeyboardMarkup(keyboard)
+        await query.edit_message_text(balance_text, reply_markup=reply_markup, parse_mode="Markdown")
 
-            elif data == "no_rakeback":
-                await query.answer("💸 Play games to earn rakeback!", show_alert=True)
-                return
-            
-            elif data == "no_level_bonus":
-                await query.answer("⬆️ Reach a new level to unlock level bonuses!", show_alert=True)
-                return
-            
-            elif data == "show_levels_list":
-                user_data = self.db.get_user(user_id)
-                total_wagered = user_data.get('total_wagered', 0)
-                current_level = get_user_level(total_wagered, user_id, self.db)
-                
-                current_tier_name = current_level.get('tier_name', 'Bronze')
-                if current_tier_name == 'Unranked':
-                    current_tier_name = 'Bronze'
-                
-                tier_index = get_tier_index(current_tier_name)
-                levels_text, keyboard = self.build_tier_display(tier_index, total_wagered, user_id)
-                
-                await query.edit_message_text(levels_text, reply_markup=keyboard, parse_mode="Markdown")
-                return
+    async def _button_deposit_back(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        query = update.callback_query
+        user_id = query.from_user.id
+        user_data = self.db.get_user(user_id)
+        keyboard = []
+        for code, info in SUPPORTED_DEPOSIT_CRYPTOS.items():
+            btn = InlineKeyboardButton(info['name'], callback_data=f"deposit_crypto_{code}")
+            keyboard.append([btn])
+        keyboard.append([InlineKeyboardButton("⬅️ Back", callback_data="back_to_main_menu")])
+        reply_markup = InlineKeyboardMarkup(keyboard)
+        await query.edit_message_text(
+            f"Your balance: **${user_data['balance']:.2f}**\n\nSelect a cryptocurrency:",
+            parse_mode="Markdown",
+            reply_markup=reply_markup
+        )
 
-            elif data == "back_to_menu":
-                user_data = self.db.get_user(user_id)
-                balance_text = f"🏦 **Menu**\n\nYour balance: **${user_data['balance']:.2f}**\n\nChoose the action:"
-                
-                keyboard = [
-                    [InlineKeyboardButton("🎮 Play", callback_data="menu_play")],
-                    [InlineKeyboardButton("💳 Deposit", callback_data="deposit_mock"),
-                     InlineKeyboardButton("💸 Withdraw", callback_data="withdraw_mock")],
-                    [InlineKeyboardButton("🎁 Bonuses", callback_data="menu_bonuses"),
-                     InlineKeyboardButton("📚 More Content", callback_data="menu_more_content")],
-                    [InlineKeyboardButton("⚙️ Commands", callback_data="menu_commands"),
-                     InlineKeyboardButton("📞 Support", callback_data="menu_support")]
-                ]
-                reply_markup = InlineKeyboardMarkup(keyboard)
-                await query.edit_message_text(balance_text, reply_markup=reply_markup, parse_mode="Markdown")
-            
-            elif data == "menu_commands":
-                commands_text = """⚙️ **Commands**
+    async def _button_new_deposit_address(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        query = update.callback_query
+        user_id = query.from_user.id
+        await query.answer("Generating new address...")
+
+        address_data = await self.assign_deposit_address(user_id)
+
+        if address_data:
+            user_deposit_address = address_data.get('address')
+            qr_code_url = address_data.get('qr_code')
+
+            # Write only the address columns; a full user dict would carry a stale balance with it
+            self.db.update_user(user_id, {
+                'ltc_deposit_address': user_deposit_address,
+                'ltc_qr_code': qr_code_url,
+                'ltc_address_expires': address_data.get('expire_on'),
+            })
+            self.db.save_data()
+
+            deposit_text = f"""Your NEW deposit address:
+
+`{user_deposit_address}`
+
+Send any amount of LTC - you will be credited the exact USD value.
+
+{self.deposit_countdown(self.deposit_expiry(address_data))}TX ID: _waiting for deposit..._"""
+
+            keyboard = [[InlineKeyboardButton("Generate New Address", callback_data="new_deposit_address")]]
+            reply_markup = InlineKeyboardMarkup(keyboard)
+
+            await query.edit_message_text(deposit_text, parse_mode="Markdown", reply_markup=reply_markup)
+        else:
+            master_address = os.getenv("LTC_MASTER_ADDRESS", "")
+            if master_address:
+                await query.edit_message_text(
+                    f"⚠️ Could not generate unique address. Use master address:\n\n"
+                    f"`{master_address}`\n\n"
+                    f"**Include your User ID in memo:** `{user_id}`",
+                    parse_mode="Markdown"
+                )
+            else:
+                await query.edit_message_text("❌ Could not generate new address. Contact admin.")
+
+    async def _button_claim_daily_bonus(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        query = update.callback_query
+        user_id = query.from_user.id
+        user_data = self.db.get_user(user_id)
+        wagered = user_data.get('wagered_since_last_withdrawal', 0)
+        bonus_amount = wagered * 0.005
+
+        if bonus_amount < 0.01:
+             await query.edit_message_text("❌ Minimum bonus to claim is $0.01.")
+             return
+
+        # Process claim
+        # Reset the wagered amount by what this bonus paid out on, keeping anything wagered since
+        user_data = await self.wallet.credit(user_id, bonus_amount, wagered_since_last_withdrawal=-wagered)
+
+        self.db.add_transaction(user_id, "bonus_claim", bonus_amount, "Bonus Claim")
+
+        # Show updated rakeback view with success message
+        rakeback_text = f"✅ **Bonus Claimed!** You received **${bonus_amount:.2f}**\n\n"
+        rakeback_text += "💎 **Rakeback**\n\n"
+        rakeback_text += f"Your current rakeback: **$0.00**\n\n"
+        rakeback_text += "Play games and claim your rakeback bonus anytime!"
+
+        keyboard = [
+            [InlineKeyboardButton("💸 Play to earn!", callback_data="no_rakeback")],
+            [InlineKeyboardButton("⬅️ Back", callback_data="back_to_bonus")]
+        ]
+
+        await query.edit_message_text(rakeback_text, reply_markup=InlineKeyboardMarkup(keyboard), parse_mode="Markdown")
+
+    async def _button_claim_level_bonus(self, update: Update, context: ContextTypes.DEFAULT_TYPE, level_id):
+        query = update.callback_query
+        user_id = query.from_user.id
+        user_data = self.db.get_user(user_id)
+        total_wagered = user_data.get('total_wagered', 0)
+        current_level = get_user_level(total_wagered, user_id, self.db)
+        claimed_bonuses = user_data.get('claimed_level_bonuses', [])
+
+        level_to_claim = get_level_by_id(level_id)
+
+        if not level_to_claim:
+            await query.edit_message_text("❌ Invalid level bonus.")
+            return
+
+        if total_wagered < level_to_claim['threshold']:
+            await query.edit_message_text(f"❌ You haven't reached {level_to_claim['name']} yet!")
+            return
+
+        if level_id in claimed_bonuses:
+            await query.edit_message_text(f"❌ You've already claimed the {level_to_claim['name']} bonus!")
+            return
+
+        bonus_amount = level_to_claim['bonus']
+        claimed_bonuses.append(level_id)
+        # Mark the level claimed before crediting so a second tap sees it
+        self.db.update_user(user_id, {'claimed_level_bonuses': claimed_bonuses})
+        user_data = await self.wallet.credit(user_id, bonus_amount)
+
+        self.db.add_transaction(user_id, "level_bonus", bonus_amount, f"Level Bonus - {level_to_claim['name']}")
+
+        # Re-fetch user data and rebuild the same level bonus view
+        next_level = get_next_level(total_wagered)
+
+        # Get user's rank
+        all_users = []
+        for u_data in self.db.data['users'].values():
+            all_users.append({
+                "user_id": u_data.get('user_id'),
+                "total_wagered": u_data.get('total_wagered', 0)
+            })
+        all_users.sort(key=lambda x: x['total_wagered'], reverse=True)
+        user_rank = None
+        for i, u in enumerate(all_users):
+            if u['user_id'] == user_id:
+                user_rank = i + 1
+                break
+
+        # Find ALL unclaimed level bonuses that the user has reached (after claiming this one)
+        unclaimed_levels = get_claimable_levels(total_wagered, claimed_bonuses)
+
+        total_unclaimed = sum(level['bonus'] for level in unclaimed_levels)
+
+        # Build same format as view_level_bonus
+        level_text = "🌲 **Level Up Bonus**\n\n"
+        level_text += "Play games, level up and get even more bonuses!\n\n"
+        level_text += f"Your current level:\n{current_level['emoji']} **{current_level['name']}** - ${total_wagered:,.0f} wagered\n\n"
+
+        if next_level:
+            level_text += f"Next Level:\n{next_level['emoji']} **{next_level['name']}** - ${next_level['threshold']:,.0f} wagered\n\n"
+            wager_needed = next_level['threshold'] - total_wagered
+            if user_rank:
+                level_text += f"You are ranked **#{user_rank}**.\n"
+            level_text += f"Wager **${wager_needed:,.0f}** more to upgrade your level!"
+        else:
+            if user_rank:
+                level_text += f"You are ranked **#{user_rank}**.\n"
+            level_text += "You've reached the maximum level!"
+
+        # Show unclaimed bonuses info
+        if unclaimed_levels:
+            level_text += f"\n\n🎁 **{len(unclaimed_levels)} unclaimed bonus(es)** worth **${total_unclaimed:,.0f}** total!"
+
+        # Build keyboard
+        keyboard = []
+        if unclaimed_levels:
+            next_bonus = unclaimed_levels[0]
+            keyboard.append([InlineKeyboardButton(f"🎁 Claim {next_bonus['emoji']} {next_bonus['name']} - ${next_bonus['bonus']:.0f}", callback_data=f"claim_level_bonus_{next_bonus['id']}")])
+        keyboard.append([InlineKeyboardButton("Levels List", callback_data="show_levels_list")])
+        keyboard.append([InlineKeyboardButton("⬅️ Back", callback_data="back_to_bonus")])
+
+        await query.edit_message_text(level_text, reply_markup=InlineKeyboardMarkup(keyboard), parse_mode="Markdown")
+
+    async def _button_view_rakeback(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        query = update.callback_query
+        user_id = query.from_user.id
+        user_data = self.db.get_user(user_id)
+        wagered_since_withdrawal = user_data.get('wagered_since_last_withdrawal', 0)
+        rakeback_amount = wagered_since_withdrawal * 0.005
+
+        rakeback_text = "💎 **Rakeback**\n\n"
+        rakeback_text += f"Your current rakeback: **${rakeback_amount:.2f}**\n\n"
+        rakeback_text += "Play games and claim your rakeback bonus anytime!"
+
+        keyboard = []
+        if rakeback_amount >= 0.01:
+            keyboard.append([InlineKeyboardButton(f"💸 Claim ${rakeback_amount:.2f}", callback_data="claim_daily_bonus")])
+        else:
+            keyboard.append([InlineKeyboardButton("💸 Play to earn!", callback_data="no_rakeback")])
+        keyboard.append([InlineKeyboardButton("⬅️ Back", callback_data="back_to_bonus")])
+
+        await query.edit_message_text(rakeback_text, reply_markup=InlineKeyboardMarkup(keyboard), parse_mode="Markdown")
+        return
+
+    async def _button_view_level_bonus(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        query = update.callback_query
+        user_id = query.from_user.id
+        user_data = self.db.get_user(user_id)
+        total_wagered = user_data.get('total_wagered', 0)
+        current_level = get_user_level(total_wagered, user_id, self.db)
+        next_level = get_next_level(total_wagered)
+        claimed_bonuses = user_data.get('claimed_level_bonuses', [])
+
+        # Get user's rank
+        leaderboard = self.db.get_leaderboard()
+        user_rank = None
+        all_users = []
+        for u_data in self.db.data['users'].values():
+            all_users.append({
+                "user_id": u_data.get('user_id'),
+                "total_wagered": u_data.get('total_wagered', 0)
+            })
+        all_users.sort(key=lambda x: x['total_wagered'], reverse=True)
+        for i, u in enumerate(all_users):
+            if u['user_id'] == user_id:
+                user_rank = i + 1
+                break
+
+        # Find ALL unclaimed level bonuses that the user has reached
+        unclaimed_levels = get_claimable_levels(total_wagered, claimed_bonuses)
+
+        total_unclaimed = sum(level['bonus'] for level in unclaimed_levels)
+
+        level_text = "🌲 **Level Up Bonus**\n\n"
+        level_text += "Play games, level up and get even more bonuses!\n\n"
+        level_text += f"Your current level:\n{current_level['emoji']} **{current_level['name']}** - ${total_wagered:,.0f} wagered\n\n"
+
+        if next_level:
+            level_text += f"Next Level:\n{next_level['emoji']} **{next_level['name']}** - ${next_level['threshold']:,.0f} wagered\n\n"
+            wager_needed = next_level['threshold'] - total_wagered
+            if user_rank:
+                level_text += f"You are ranked **#{user_rank}**.\n"
+            level_text += f"Wager **${wager_needed:,.0f}** more to upgrade your level!"
+        else:
+            if user_rank:
+                level_text += f"You are ranked **#{user_rank}**.\n"
+            level_text += "You've reached the maximum level!"
+
+        keyboard = []
+        if unclaimed_levels:
+            level_text += f"\n\n🎁 **{len(unclaimed_levels)} unclaimed bonus(es)** worth **${total_unclaimed:,.0f}** total!"
+            # Single button to claim bonuses one by one
+            next_bonus = unclaimed_levels[0]
+            keyboard.append([InlineKeyboardButton(f"🎁 Claim {next_bonus['emoji']} {next_bonus['name']} - ${next_bonus['bonus']:.0f}", callback_data=f"claim_level_bonus_{next_bonus['id']}")])
+        else:
+            keyboard.append([InlineKeyboardButton("No bonus available", callback_data="no_level_bonus")])
+        keyboard.append([InlineKeyboardButton("Levels List", callback_data="show_levels_list")])
+        keyboard.append([InlineKeyboardButton("⬅️ Back", callback_data="back_to_bonus")])
+
+        await query.edit_message_text(level_text, reply_markup=InlineKeyboardMarkup(keyboard), parse_mode="Markdown")
+        return
+
+    async def _button_back_to_bonus(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        query = update.callback_query
+        # Show the main bonus screen again
+        bonus_text = "🎁 **Bonus**\n\n"
+        bonus_text += "In this section you can find bonuses that you can get by playing games!\n\n"
+        bonus_text += "💎 **Rakeback**\n"
+        bonus_text += "Play games and claim your rakeback bonus anytime!\n\n"
+        bonus_text += "💎 **Level Up Bonus**\n"
+        bonus_text += "Play games, level up and earn money!"
+
+        keyboard = [
+            [
+                InlineKeyboardButton("🎁 Rakeback", callback_data="view_rakeback"),
+                InlineKeyboardButton("🎁 Level Up Bonus", callback_data="view_level_bonus")
+            ],
+            [InlineKeyboardButton("⬅️ Back", callback_data="back_to_menu")]
+        ]
+
+        await query.edit_message_text(bonus_text, reply_markup=InlineKeyboardMarkup(keyboard), parse_mode="Markdown")
+        return
+
+    async def _button_no_rakeback(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        query = update.callback_query
+        await query.answer("💸 Play games to earn rakeback!", show_alert=True)
+        return
+
+    async def _button_no_level_bonus(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        query = update.callback_query
+        await query.answer("⬆️ Reach a new level to unlock level bonuses!", show_alert=True)
+        return
+
+    async def _button_show_levels_list(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        query = update.callback_query
+        user_id = query.from_user.id
+        user_data = self.db.get_user(user_id)
+        total_wagered = user_data.get('total_wagered', 0)
+        current_level = get_user_level(total_wagered, user_id, self.db)
+
+        current_tier_name = current_level.get('tier_name', 'Bronze')
+        if current_tier_name == 'Unranked':
+            current_tier_name = 'Bronze'
+
+        tier_index = get_tier_index(current_tier_name)
+        levels_text, keyboard = self.build_tier_display(tier_index, total_wagered, user_id)
+
+        await query.edit_message_text(levels_text, reply_markup=keyboard, parse_mode="Markdown")
+        return
+
+    async def _button_back_to_menu(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        query = update.callback_query
+        user_id = query.from_user.id
+        user_data = self.db.get_user(user_id)
+        balance_text = f"🏦 **Menu**\n\nYour balance: **${user_data['balance']:.2f}**\n\nChoose the action:"
+
+        keyboard = [
+            [InlineKeyboardButton("🎮 Play", callback_data="menu_play")],
+            [InlineKeyboardButton("💳 Deposit", callback_data="deposit_mock"),
+             InlineKeyboardButton("💸 Withdraw", callback_data="withdraw_mock")],
+            [InlineKeyboardButton("🎁 Bonuses", callback_data="menu_bonuses"),
+             InlineKeyboardButton("📚 More Content", callback_data="menu_more_content")],
+            [InlineKeyboardButton("⚙️ Commands", callback_data="menu_commands"),
+             InlineKeyboardButton("📞 Support", callback_data="menu_support")]
+        ]
+        reply_markup = InlineKeyboardMarkup(keyboard)
+        await query.edit_message_text(balance_text, reply_markup=reply_markup, parse_mode="Markdown")
+
+    async def _button_menu_commands(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        query = update.callback_query
+        commands_text = """⚙️ **Commands**
 
 **Games:**
 /dice - Roll dice 🎲
@@ -7379,119 +7113,127 @@ TX ID: _waiting for deposit..._"""
 /leaderboard - View top players
 /housebal - View house balance
 """
-                keyboard = [[InlineKeyboardButton("⬅️ Back", callback_data="back_to_menu")]]
-                reply_markup = InlineKeyboardMarkup(keyboard)
-                await query.edit_message_text(commands_text, reply_markup=reply_markup, parse_mode="Markdown")
-            
-            elif data == "menu_play":
-                game_menu_text = "🎮 **Game Menu**\n\nChoose the game you want to play:"
-                
-                keyboard = [
-                    [InlineKeyboardButton("🎲 Dice", callback_data="game_info_dice")],
-                    [InlineKeyboardButton("🎰 Slots", callback_data="game_info_slots")],
-                    [InlineKeyboardButton("🔮 Dice Prediction", callback_data="game_info_predict")],
-                    [InlineKeyboardButton("🎡 Roulette", callback_data="game_info_roulette")],
-                    [InlineKeyboardButton("🪙 Coinflip", callback_data="game_info_coinflip")],
-                    [InlineKeyboardButton("🎯 Darts", callback_data="game_info_darts")],
-                    [InlineKeyboardButton("🏀 Basketball", callback_data="game_info_basketball")],
-                    [InlineKeyboardButton("⚽ Soccer", callback_data="game_info_soccer")],
-                    [InlineKeyboardButton("🎳 Bowling", callback_data="game_info_bowling")],
-                    [InlineKeyboardButton("♠️ Blackjack", callback_data="game_info_blackjack")],
-                    [InlineKeyboardButton("💣 Mines", callback_data="game_info_mines")],
-                    [InlineKeyboardButton("🃏 Baccarat", callback_data="game_info_baccarat")],
-                    [InlineKeyboardButton("🎱 Keno", callback_data="game_info_keno")],
-                    [InlineKeyboardButton("🚀 Limbo", callback_data="game_info_limbo")],
-                    [InlineKeyboardButton("📈 Hi-Lo", callback_data="game_info_hilo")],
-                    [InlineKeyboardButton("🔴 Connect 4", callback_data="game_info_connect4")],
-                    [InlineKeyboardButton("⬅️ Back", callback_data="back_to_menu")]
-                ]
-                reply_markup = InlineKeyboardMarkup(keyboard)
-                await query.edit_message_text(game_menu_text, reply_markup=reply_markup, parse_mode="Markdown")
-            
-            elif data == "menu_more_content":
-                more_content_text = "📚 **More Content**"
-                
-                keyboard = [
-                    [InlineKeyboardButton("📊 Your Statistics", callback_data="more_stats"),
-                     InlineKeyboardButton("📅 Matches History", callback_data="more_history")],
-                    [InlineKeyboardButton("🏆 Leaderboard", callback_data="more_leaderboard")],
-                    [InlineKeyboardButton("🎟️ Raffle", callback_data="more_raffle")],
-                    [InlineKeyboardButton("⬅️ Back", callback_data="back_to_menu")]
-                ]
-                reply_markup = InlineKeyboardMarkup(keyboard)
-                await query.edit_message_text(more_content_text, reply_markup=reply_markup, parse_mode="Markdown")
-            
-            elif data == "menu_bonuses":
-                user_data = self.db.get_user(user_id)
-                bonus_text = "🎁 **Bonus**\n\n"
-                bonus_text += "In this section you can find bonuses that you can get by playing games!\n\n"
-                bonus_text += "💎 **Rakeback**\n"
-                bonus_text += "Play games and claim your rakeback bonus anytime!\n\n"
-                bonus_text += "💎 **Level Up Bonus**\n"
-                bonus_text += "Play games, level up and earn money!"
-                
-                keyboard = [
-                    [
-                        InlineKeyboardButton("🎁 Rakeback", callback_data="view_rakeback"),
-                        InlineKeyboardButton("🎁 Level Up Bonus", callback_data="view_level_bonus")
-                    ],
-                    [InlineKeyboardButton("⬅️ Back", callback_data="back_to_menu")]
-                ]
-                
-                reply_markup = InlineKeyboardMarkup(keyboard)
-                await query.edit_message_text(bonus_text, reply_markup=reply_markup, parse_mode="Markdown")
-            
-            elif data == "menu_support":
-                support_text = """📞 **Support**
-
-Need help? Contact our support team:
+        keyboard = [[InlineKeyboardButton("⬅️ Back", callback_data="back_to_menu")]]
+        reply_markup = InlineKeyboardMarkup(keyboard)
+        await query.edit_message_text(commands_text, reply_markup=reply_markup, parse_mode="Markdown")
 
-🔹 Telegram: @GranTeseroSupport
-🔹 Issues with deposits/withdrawals
-🔹 Questions about games
-🔹 Report bugs or problems
+    async def _button_menu_play(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        query = update.callback_query
+        game_menu_text = "🎮 **Game Menu**\n\nChoose the game you want to play:"
 
-We're here to help 24/7!"""
-                
-                keyboard = [[InlineKeyboardButton("⬅️ Back", callback_data="back_to_menu")]]
-                reply_markup = InlineKeyboardMarkup(keyboard)
-                await query.edit_message_text(support_text, reply_markup=reply_markup, parse_mode="Markdown")
-            
-            # --- ADMIN MENU CALLBACKS ---
-            elif data == "back_to_admin_menu":
-                if not self.is_admin(user_id):
-                    await query.answer("❌ Admin only.", show_alert=True)
-                    return
-                
-                is_env_admin = user_id in self.env_admin_ids
-                admin_type = "Permanent Admin" if is_env_admin else "Dynamic Admin"
-                
-                house_balance = self.db.get_house_balance()
-                total_users = len(self.db.data.get('users', {}))
-                pending_withdraws = len([w for w in self.db.data.get('pending_withdrawals', []) if w.get('status') == 'pending'])
-                
-                admin_text = f"""🔐 **Admin Panel**
+        keyboard = [
+            [InlineKeyboardButton("🎲 Dice", callback_data="game_info_dice")],
+            [InlineKeyboardButton("🎰 Slots", callback_data="game_info_slots")],
+            [InlineKeyboardButton("🔮 Dice Prediction", callback_data="game_info_predict")],
+            [InlineKeyboardButton("🎡 Roulette", callback_data="game_info_roulette")],
+            [InlineKeyboardButton("🪙 Coinflip", callback_data="game_info_coinflip")],
+            [InlineKeyboardButton("🎯 Darts", callback_data="game_info_darts")],
+            [InlineKeyboardButton("🏀 Basketball", callback_data="game_info_basketball")],
+            [InlineKeyboardButton("⚽ Soccer", callback_data="game_info_soccer")],
+            [InlineKeyboardButton("🎳 Bowling", callback_data="game_info_bowling")],
+            [InlineKeyboardButton("♠️ Blackjack", callback_data="game_info_blackjack")],
+            [InlineKeyboardButton("💣 Mines", callback_data="game_info_mines")],
+            [InlineKeyboardButton("🃏 Baccarat", callback_data="game_info_baccarat")],
+            [InlineKeyboardButton("🎱 Keno", callback_data="game_info_keno")],
+            [InlineKeyboardButton("🚀 Limbo", callback_data="game_info_limbo")],
+            [InlineKeyboardButton("📈 Hi-Lo", callback_data="game_info_hilo")],
+            [InlineKeyboardButton("🔴 Connect 4", callback_data="game_info_connect4")],
+            [InlineKeyboardButton("⬅️ Back", callback_data="back_to_menu")]
+        ]
+        reply_markup = InlineKeyboardMarkup(keyboard)
+        await query.edit_message_text(game_menu_text, reply_markup=reply_markup, parse_mode="Markdown")
 
-You are a **{admin_type}**
+    async def _button_menu_more_content(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        query = update.callback_query
+        more_content_text = "📚 **More Content**"
 
-🏦 House Balance: **${house_balance:,.2f}**
-👥 Total Users: **{total_users}**
+        keyboard = [
+            [InlineKeyboardButton("📊 Your Statistics", callback_data="more_stats"),
+             InlineKeyboardButton("📅 Matches History", callback_data="more_history")],
+            [InlineKeyboardButton("🏆 Leaderboard", callback_data="more_leaderboard")],
+            [InlineKeyboardButton("🎟️ Raffle", callback_data="more_raffle")],
+            [InlineKeyboardButton("⬅️ Back", callback_data="back_to_menu")]
+        ]
+        reply_markup = InlineKeyboardMarkup(keyboard)
+        await query.edit_message_text(more_content_text, reply_markup=reply_markup, parse_mode="Markdown")
+
+    async def _button_menu_bonuses(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        query = update.callback_query
+        user_id = query.from_user.id
+        user_data = self.db.get_user(user_id)
+        bonus_text = "🎁 **Bonus**\n\n"
+        bonus_text += "In this section you can find bonuses that you can get by playing games!\n\n"
+        bonus_text += "💎 **Rakeback**\n"
+        bonus_text += "Play games and claim your rakeback bonus anytime!\n\n"
+        bonus_text += "💎 **Level Up Bonus**\n"
+        bonus_text += "Play games, level up and earn money!"
+
+        keyboard = [
+            [
+                InlineKeyboardButton("🎁 Rakeback", callback_data="view_rakeback"),
+                InlineKeyboardButton("🎁 Level Up Bonus", callback_data="view_level_bonus")
+            ],
+            [InlineKeyboardButton("⬅️ Back", callback_data="back_to_menu")]
+        ]
+
+        reply_markup = InlineKeyboardMarkup(keyboard)
+        await query.edit_message_text(bonus_text, reply_markup=reply_markup, parse_mode="Markdown")
+
+    async def _button_menu_support(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        query = update.callback_query
+        support_text = """📞 **Support**
+
+Need help? Contact our support team:
+
+🔹 Telegram: @GranTeseroSupport
+🔹 Issues with deposits/withdrawals
+🔹 Questions about games
+🔹 Report bugs or problems
+
+We're here to help 24/7!"""
+
+        keyboard = [[InlineKeyboardButton("⬅️ Back", callback_data="back_to_menu")]]
+        reply_markup = InlineKeyboardMarkup(keyboard)
+        await query.edit_message_text(support_text, reply_markup=reply_markup, parse_mode="Markdown")
+
+    async def _button_back_to_admin_menu(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        query = update.callback_query
+        user_id = query.from_user.id
+        if not self.is_admin(user_id):
+            await query.answer("❌ Admin only.", show_alert=True)
+            return
+
+        is_env_admin = user_id in self.env_admin_ids
+        admin_type = "Permanent Admin" if is_env_admin else "Dynamic Admin"
+
+        house_balance = self.db.get_house_balance()
+        total_users = len(self.db.data.get('users', {}))
+        pending_withdraws = self.db.count_withdrawals('pending')
+
+        admin_text = f"""🔐 **Admin Panel**
+
+You are a **{admin_type}**
+
+🏦 House Balance: **${house_balance:,.2f}**
+👥 Total Users: **{total_users}**
 💸 Pending Withdrawals: **{pending_withdraws}**
 
 Choose an option:"""
-                
-                keyboard = [
-                    [InlineKeyboardButton("📋 Admin Commands", callback_data="admin_all_commands")]
-                ]
-                reply_markup = InlineKeyboardMarkup(keyboard)
-                await query.edit_message_text(admin_text, reply_markup=reply_markup, parse_mode="Markdown")
-            
-            elif data == "admin_balance_mgmt":
-                if not self.is_admin(user_id):
-                    await query.answer("❌ Admin only.", show_alert=True)
-                    return
-                
-                balance_text = """💰 **Balance Management**
+
+        keyboard = [
+            [InlineKeyboardButton("📋 Admin Commands", callback_data="admin_all_commands")]
+        ]
+        reply_markup = InlineKeyboardMarkup(keyboard)
+        await query.edit_message_text(admin_text, reply_markup=reply_markup, parse_mode="Markdown")
+
+    async def _button_admin_balance_mgmt(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        query = update.callback_query
+        user_id = query.from_user.id
+        if not self.is_admin(user_id):
+            await query.answer("❌ Admin only.", show_alert=True)
+            return
+
+        balance_text = """💰 **Balance Management**
 
 Commands to manage user balances:
 
@@ -7503,20 +7245,22 @@ Commands to manage user balances:
 Examples:
 `/givebal @john 100`
 `/setbal 123456789 500`"""
-                
-                keyboard = [[InlineKeyboardButton("⬅️ Back", callback_data="back_to_admin_menu")]]
-                reply_markup = InlineKeyboardMarkup(keyboard)
-                await query.edit_message_text(balance_text, reply_markup=reply_markup, parse_mode="Markdown")
-            
-            elif data == "admin_user_mgmt":
-                if not self.is_admin(user_id):
-                    await query.answer("❌ Admin only.", show_alert=True)
-                    return
-                
-                total_users = len(self.db.data.get('users', {}))
-                total_balance = sum(u.get('balance', 0) for u in self.db.data.get('users', {}).values())
-                
-                user_text = f"""👥 **User Management**
+
+        keyboard = [[InlineKeyboardButton("⬅️ Back", callback_data="back_to_admin_menu")]]
+        reply_markup = InlineKeyboardMarkup(keyboard)
+        await query.edit_message_text(balance_text, reply_markup=reply_markup, parse_mode="Markdown")
+
+    async def _button_admin_user_mgmt(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        query = update.callback_query
+        user_id = query.from_user.id
+        if not self.is_admin(user_id):
+            await query.answer("❌ Admin only.", show_alert=True)
+            return
+
+        total_users = len(self.db.data.get('users', {}))
+        total_balance = sum(u.get('balance', 0) for u in self.db.data.get('users', {}).values())
+
+        user_text = f"""👥 **User Management**
 
 📊 **Stats:**
 Total Users: **{total_users}**
@@ -7528,109 +7272,119 @@ Commands:
 • `/userinfo @user` - View detailed user info
 • `/userid @user` - Get user's ID
 • `/userhistory @user` - View user's game history"""
-                
-                keyboard = [
-                    [InlineKeyboardButton("📋 View All Users", callback_data="admin_view_all_users")],
-                    [InlineKeyboardButton("💰 View All Balances", callback_data="admin_view_all_balances")],
-                    [InlineKeyboardButton("⬅️ Back", callback_data="back_to_admin_menu")]
-                ]
-                reply_markup = InlineKeyboardMarkup(keyboard)
-                await query.edit_message_text(user_text, reply_markup=reply_markup, parse_mode="Markdown")
-            
-            elif data == "admin_view_all_users":
-                if not self.is_admin(user_id):
-                    await query.answer("❌ Admin only.", show_alert=True)
-                    return
-                
-                users = list(self.db.data.get('users', {}).values())[:20]
-                if not users:
-                    text = "👥 **All Users**\n\nNo users registered yet."
-                else:
-                    text = "👥 **All Users** (Top 20)\n\n"
-                    for i, u in enumerate(users, 1):
-                        username = u.get('username', f"User{u['user_id']}")
-                        text += f"{i}. @{username} (ID: `{u['user_id']}`)\n"
-                
-                keyboard = [[InlineKeyboardButton("⬅️ Back", callback_data="admin_user_mgmt")]]
-                reply_markup = InlineKeyboardMarkup(keyboard)
-                await query.edit_message_text(text, reply_markup=reply_markup, parse_mode="Markdown")
-            
-            elif data == "admin_view_all_balances":
-                if not self.is_admin(user_id):
-                    await query.answer("❌ Admin only.", show_alert=True)
-                    return
-                
-                users = sorted(self.db.data.get('users', {}).values(), key=lambda x: x.get('balance', 0), reverse=True)[:20]
-                if not users:
-                    text = "💰 **All Balances**\n\nNo users registered yet."
-                else:
-                    text = "💰 **All Balances** (Top 20)\n\n"
-                    for i, u in enumerate(users, 1):
-                        username = u.get('username', f"User{u['user_id']}")
-                        balance = u.get('balance', 0)
-                        text += f"{i}. @{username}: **${balance:,.2f}**\n"
-                
-                keyboard = [[InlineKeyboardButton("⬅️ Back", callback_data="admin_user_mgmt")]]
-                reply_markup = InlineKeyboardMarkup(keyboard)
-                await query.edit_message_text(text, reply_markup=reply_markup, parse_mode="Markdown")
-            
-            elif data == "admin_withdrawals":
-                if not self.is_admin(user_id):
-                    await query.answer("❌ Admin only.", show_alert=True)
-                    return
-                
-                pending = [w for w in self.db.data.get('pending_withdrawals', []) if w.get('status') == 'pending']
-                
-                if pending:
-                    text = f"💸 **Pending Withdrawals** ({len(pending)})\n\n"
-                    for i, w in enumerate(pending[:10], 1):
-                        username = w.get('username', f"User{w['user_id']}")
-                        amount = w.get('amount', 0)
-                        currency = w.get('currency', 'LTC')
-                        text += f"{i}. @{username}: **${amount:.2f}** ({currency})\n"
-                    if len(pending) > 10:
-                        text += f"\n... and {len(pending) - 10} more"
-                else:
-                    text = "💸 **Pending Withdrawals**\n\nNo pending withdrawals."
-                
-                text += "\n\nCommands:\n• `/pendingwithdraws` - Detailed view"
-                
-                keyboard = [[InlineKeyboardButton("⬅️ Back", callback_data="back_to_admin_menu")]]
-                reply_markup = InlineKeyboardMarkup(keyboard)
-                await query.edit_message_text(text, reply_markup=reply_markup, parse_mode="Markdown")
-            
-            elif data == "admin_deposits":
-                if not self.is_admin(user_id):
-                    await query.answer("❌ Admin only.", show_alert=True)
-                    return
-                
-                deposits = self.db.get_biggest_deposits("week")[:10]
-                
-                if deposits:
-                    text = "💳 **Recent Deposits** (This Week)\n\n"
-                    for i, d in enumerate(deposits, 1):
-                        username = d.get('username', f"User{d['user_id']}")
-                        amount = d.get('amount', 0)
-                        text += f"{i}. @{username}: **${amount:,.2f}**\n"
-                else:
-                    text = "💳 **Recent Deposits**\n\nNo deposits this week."
-                
-                text += "\n\nCommands:\n• `/pendingdeposits` - View pending deposits\n• `/biggestdeposits` - All-time biggest"
-                
-                keyboard = [[InlineKeyboardButton("⬅️ Back", callback_data="back_to_admin_menu")]]
-                reply_markup = InlineKeyboardMarkup(keyboard)
-                await query.edit_message_text(text, reply_markup=reply_markup, parse_mode="Markdown")
-            
-            elif data == "admin_admin_mgmt":
-                if not self.is_admin(user_id):
-                    await query.answer("❌ Admin only.", show_alert=True)
-                    return
-                
-                env_count = len(self.env_admin_ids)
-                dyn_count = len(self.dynamic_admin_ids)
-                approver_count = len(self.withdrawal_approvers)
-                
-                text = f"""👑 **Admin Management**
+
+        keyboard = [
+            [InlineKeyboardButton("📋 View All Users", callback_data="admin_view_all_users")],
+            [InlineKeyboardButton("💰 View All Balances", callback_data="admin_view_all_balances")],
+            [InlineKeyboardButton("⬅️ Back", callback_data="back_to_admin_menu")]
+        ]
+        reply_markup = InlineKeyboardMarkup(keyboard)
+        await query.edit_message_text(user_text, reply_markup=reply_markup, parse_mode="Markdown")
+
+    async def _button_admin_view_all_users(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        query = update.callback_query
+        user_id = query.from_user.id
+        if not self.is_admin(user_id):
+            await query.answer("❌ Admin only.", show_alert=True)
+            return
+
+        users = list(self.db.data.get('users', {}).values())[:20]
+        if not users:
+            text = "👥 **All Users**\n\nNo users registered yet."
+        else:
+            text = "👥 **All Users** (Top 20)\n\n"
+            for i, u in enumerate(users, 1):
+                username = u.get('username', f"User{u['user_id']}")
+                text += f"{i}. @{username} (ID: `{u['user_id']}`)\n"
+
+        keyboard = [[InlineKeyboardButton("⬅️ Back", callback_data="admin_user_mgmt")]]
+        reply_markup = InlineKeyboardMarkup(keyboard)
+        await query.edit_message_text(text, reply_markup=reply_markup, parse_mode="Markdown")
+
+    async def _button_admin_view_all_balances(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        query = update.callback_query
+        user_id = query.from_user.id
+        if not self.is_admin(user_id):
+            await query.answer("❌ Admin only.", show_alert=True)
+            return
+
+        users = sorted(self.db.data.get('users', {}).values(), key=lambda x: x.get('balance', 0), reverse=True)[:20]
+        if not users:
+            text = "💰 **All Balances**\n\nNo users registered yet."
+        else:
+            text = "💰 **All Balances** (Top 20)\n\n"
+            for i, u in enumerate(users, 1):
+                username = u.get('username', f"User{u['user_id']}")
+                balance = u.get('balance', 0)
+                text += f"{i}. @{username}: **${balance:,.2f}**\n"
+
+        keyboard = [[InlineKeyboardButton("⬅️ Back", callback_data="admin_user_mgmt")]]
+        reply_markup = InlineKeyboardMarkup(keyboard)
+        await query.edit_message_text(text, reply_markup=reply_markup, parse_mode="Markdown")
+
+    async def _button_admin_withdrawals(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        query = update.callback_query
+        user_id = query.from_user.id
+        if not self.is_admin(user_id):
+            await query.answer("❌ Admin only.", show_alert=True)
+            return
+
+        pending = self.db.get_withdrawals('pending')
+
+        if pending:
+            text = f"💸 **Pending Withdrawals** ({len(pending)})\n\n"
+            for i, w in enumerate(pending[:10], 1):
+                username = w['username'] or f"User{w['user_id']}"
+                amount = w['amount']
+                currency = w['currency'] or 'LTC'
+                text += f"{i}. @{username}: **${amount:.2f}** ({currency})\n"
+            if len(pending) > 10:
+                text += f"\n... and {len(pending) - 10} more"
+        else:
+            text = "💸 **Pending Withdrawals**\n\nNo pending withdrawals."
+
+        text += "\n\nCommands:\n• `/pendingwithdraws` - Detailed view"
+
+        keyboard = [[InlineKeyboardButton("⬅️ Back", callback_data="back_to_admin_menu")]]
+        reply_markup = InlineKeyboardMarkup(keyboard)
+        await query.edit_message_text(text, reply_markup=reply_markup, parse_mode="Markdown")
+
+    async def _button_admin_deposits(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        query = update.callback_query
+        user_id = query.from_user.id
+        if not self.is_admin(user_id):
+            await query.answer("❌ Admin only.", show_alert=True)
+            return
+
+        deposits = self.db.get_biggest_deposits("week")[:10]
+
+        if deposits:
+            text = "💳 **Recent Deposits** (This Week)\n\n"
+            for i, d in enumerate(deposits, 1):
+                username = d.get('username', f"User{d['user_id']}")
+                amount = d.get('amount', 0)
+                text += f"{i}. @{username}: **${amount:,.2f}**\n"
+        else:
+            text = "💳 **Recent Deposits**\n\nNo deposits this week."
+
+        text += "\n\nCommands:\n• `/pendingdeposits` - View pending deposits\n• `/biggestdeposits` - All-time biggest"
+
+        keyboard = [[InlineKeyboardButton("⬅️ Back", callback_data="back_to_admin_menu")]]
+        reply_markup = InlineKeyboardMarkup(keyboard)
+        await query.edit_message_text(text, reply_markup=reply_markup, parse_mode="Markdown")
+
+    async def _button_admin_admin_mgmt(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        query = update.callback_query
+        user_id = query.from_user.id
+        if not self.is_admin(user_id):
+            await query.answer("❌ Admin only.", show_alert=True)
+            return
+
+        env_count = len(self.env_admin_ids)
+        dyn_count = len(self.dynamic_admin_ids)
+        approver_count = len(self.withdrawal_approvers)
+
+        text = f"""👑 **Admin Management**
 
 📊 **Current Admins:**
 Permanent Admins: **{env_count}**
@@ -7644,67 +7398,122 @@ Commands:
 • `/addapprover user_id` - Add withdrawal approver
 • `/removeapprover user_id` - Remove approver
 • `/listapprovers` - List all approvers"""
-                
-                keyboard = [
-                    [InlineKeyboardButton("📋 List Admins", callback_data="admin_list_admins")],
-                    [InlineKeyboardButton("📋 List Approvers", callback_data="admin_list_approvers")],
-                    [InlineKeyboardButton("⬅️ Back", callback_data="back_to_admin_menu")]
-                ]
-                reply_markup = InlineKeyboardMarkup(keyboard)
-                await query.edit_message_text(text, reply_markup=reply_markup, parse_mode="Markdown")
-            
-            elif data == "admin_list_admins":
-                if not self.is_admin(user_id):
-                    await query.answer("❌ Admin only.", show_alert=True)
-                    return
-                
-                text = "👑 **All Admins**\n\n"
-                
-                if self.env_admin_ids:
-                    text += "**Permanent Admins:**\n"
-                    for aid in sorted(self.env_admin_ids):
-                        text += f"• `{aid}`\n"
-                
-                if self.dynamic_admin_ids:
-                    text += "\n**Dynamic Admins:**\n"
-                    for aid in sorted(self.dynamic_admin_ids):
-                        text += f"• `{aid}`\n"
-                
-                if not self.env_admin_ids and not self.dynamic_admin_ids:
-                    text += "No admins configured."
-                
-                keyboard = [[InlineKeyboardButton("⬅️ Back", callback_data="admin_admin_mgmt")]]
-                reply_markup = InlineKeyboardMarkup(keyboard)
-                await query.edit_message_text(text, reply_markup=reply_markup, parse_mode="Markdown")
-            
-            elif data == "admin_list_approvers":
-                if not self.is_admin(user_id):
-                    await query.answer("❌ Admin only.", show_alert=True)
-                    return
-                
-                text = "💼 **Withdrawal Approvers**\n\n"
-                
-                if self.withdrawal_approvers:
-                    for aid in sorted(self.withdrawal_approvers):
-                        text += f"• `{aid}`\n"
-                else:
-                    text += "No approvers configured."
-                
-                keyboard = [[InlineKeyboardButton("⬅️ Back", callback_data="admin_admin_mgmt")]]
-                reply_markup = InlineKeyboardMarkup(keyboard)
-                await query.edit_message_text(text, reply_markup=reply_markup, parse_mode="Markdown")
-            
-            elif data == "admin_system":
-                if not self.is_admin(user_id):
-                    await query.answer("❌ Admin only.", show_alert=True)
-                    return
-                
-                house_balance = self.db.get_house_balance()
-                
-                text = f"""🛠️ **System**
+
+        keyboard = [
+            [InlineKeyboardButton("📋 List Admins", callback_data="admin_list_admins")],
+            [InlineKeyboardButton("📋 List Approvers", callback_data="admin_list_approvers")],
+            [InlineKeyboardButton("⬅️ Back", callback_data="back_to_admin_menu")]
+        ]
+        reply_markup = InlineKeyboardMarkup(keyboard)
+        await query.edit_message_text(text, reply_markup=reply_markup, parse_mode="Markdown")
+
+    async def _button_admin_list_admins(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        query = update.callback_query
+        user_id = query.from_user.id
+        if not self.is_admin(user_id):
+            await query.answer("❌ Admin only.", show_alert=True)
+            return
+
+        text = "👑 **All Admins**\n\n"
+
+        if self.env_admin_ids:
+            text += "**Permanent Admins:**\n"
+            for aid in sorted(self.env_admin_ids):
+                text += f"• `{aid}`\n"
+
+        if self.dynamic_admin_ids:
+            text += "\n**Dynamic Admins:**\n"
+            for aid in sorted(self.dynamic_admin_ids):
+                text += f"• `{aid}`\n"
+
+        if not self.env_admin_ids and not self.dynamic_admin_ids:
+            text += "No admins configured."
+
+        keyboard = [[InlineKeyboardButton("⬅️ Back", callback_data="admin_admin_mgmt")]]
+        reply_markup = InlineKeyboardMarkup(keyboard)
+        await query.edit_message_text(text, reply_markup=reply_markup, parse_mode="Markdown")
+
+    async def _button_admin_list_approvers(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        query = update.callback_query
+        user_id = query.from_user.id
+        if not self.is_admin(user_id):
+            await query.answer("❌ Admin only.", show_alert=True)
+            return
+
+        text = "💼 **Withdrawal Approvers**\n\n"
+
+        if self.withdrawal_approvers:
+            for aid in sorted(self.withdrawal_approvers):
+                text += f"• `{aid}`\n"
+        else:
+            text += "No approvers configured."
+
+        keyboard = [[InlineKeyboardButton("⬅️ Back", callback_data="admin_admin_mgmt")]]
+        reply_markup = InlineKeyboardMarkup(keyboard)
+        await query.edit_message_text(text, reply_markup=reply_markup, parse_mode="Markdown")
+
+    async def _button_admin_system(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        query = update.callback_query
+        user_id = query.from_user.id
+        if not self.is_admin(user_id):
+            await query.answer("❌ Admin only.", show_alert=True)
+            return
+
+        house_balance = self.db.get_house_balance()
+        updates = self.update_processor.stats()
+        outbound = self.outbound.stats()
+        edits = self.edits.stats()
+        plisio = self.plisio.stats()
+        prices = self.prices.stats()
+        pool = self.deposit_pool.stats()
+        workers = self.worker_router.stats()
+        snapshots = self.snapshots.stats()
+        pool_sizes = ", ".join(f"{c} {n}" for c, n in pool['available'].items())
+        price_age = f"{prices['age']:.0f}s old" if prices['age'] is not None else "not loaded"
+        plisio_lines = "\n".join(
+            f"• `{name}`: circuit {s['breaker']}, {s['calls']:,} calls, {s['errors']:,} errors, avg {s['avg_ms']:.0f}ms / max {s['max_ms']:.0f}ms"
+            for name, s in plisio['endpoints'].items()
+        ) or "• no calls yet"
+        store_lines = "\n".join(
+            f"• `{s['name']}`: {s['size']:,} (evicted {s['evictions']:,}, expired {s['expirations']:,})"
+            for s in self.get_store_stats()
+        )
+        game_lines = "\n".join(
+            f"• `{name}`: " + ("disabled" if not g['enabled'] else "not loaded" if not g['loaded'] else
+                               f"{g['games']:,} games, {g['calls']:,} actions, {g['errors']:,} errors, "
+                               f"avg {g['avg_ms']:.0f}ms / max {g['max_ms']:.0f}ms")
+            for name, g in self.games.stats().items()
+        )
+
+        text = f"""🛠️ **System**
 
 🏦 House Balance: **${house_balance:,.2f}**
 
+Updates: {updates['running']}/{updates['worker_limit']} running, {updates['waiting']} waiting (peak {updates['peak_waiting']})
+• processed {updates['processed']:,}, failed {updates['failed']:,}
+• wait avg {updates['avg_wait_ms']:.0f}ms / max {updates['max_wait_ms']:.0f}ms, run avg {updates['avg_run_ms']:.0f}ms
+
+Outbound: {outbound['waiting_results']} results + {outbound['waiting_notices']} notices queued, {outbound['chats']} chats
+• sent {outbound['sent']:,}, 429 retries {outbound['retried']:,}, coalesced edits {outbound['coalesced']:,}, failed {outbound['failed']:,}
+• queue latency avg {outbound['avg_latency_ms']:.0f}ms / max {outbound['max_latency_ms']:.0f}ms
+• game edits: {edits['sent']:,} sent, {edits['deferred']:,} debounced, {edits['superseded']:,} superseded, {edits['unchanged']:,} unchanged skipped
+
+Plisio: {len(plisio['open'])} circuits open (tripped {plisio['trips']}x)
+{plisio_lines}
+• prices: {prices['currencies']} currencies, {price_age}{'' if prices['fresh'] else ' (STALE)'}, {prices['refreshes']:,} refreshes, {prices['failures']:,} failed
+• deposit pool: {pool_sizes} ready, {pool['assigned']:,} handed out, {pool['misses']:,} misses, {pool['recycled']:,} recycled
+
+Workers: {workers['worker'] if workers['enabled'] else 'single worker'}, {workers['store']['backend']} session store
+• {workers['local']:,} handled here, {workers['forwarded']:,} forwarded, {workers['received']:,} received, {workers['forward_failures']:,} forward failures
+• store: {workers['store']['conflicts']:,} CAS conflicts, {workers['store']['leases_denied']:,} leases held elsewhere, {workers['store_errors']:,} errors
+• snapshots: {snapshots['stored']:,} saved, {snapshots['dirty']:,} pending, {snapshots['flushes']:,} batches ({snapshots['written']:,} written, {snapshots['deleted']:,} deleted, last {snapshots['last_flush_ms']:.0f}ms), {snapshots['failures']:,} failed, {snapshots['restored']:,} restored at startup
+
+Games:
+{game_lines}
+
+Memory:
+{store_lines}
+
 Commands:
 • `/backup` - Download database backup
 • `/sethousebal amount` - Set house balance
@@ -7712,27 +7521,31 @@ Commands:
 • `/saveroulette` - Save roulette stickers
 • `/ltcrate` - View LTC rate
 • `/setltcrate price` - Set manual LTC rate"""
-                
-                keyboard = [
-                    [InlineKeyboardButton("💾 Create Backup", callback_data="admin_backup")],
-                    [InlineKeyboardButton("⬅️ Back", callback_data="back_to_admin_menu")]
-                ]
-                reply_markup = InlineKeyboardMarkup(keyboard)
-                await query.edit_message_text(text, reply_markup=reply_markup, parse_mode="Markdown")
-            
-            elif data == "admin_backup":
-                if not self.is_admin(user_id):
-                    await query.answer("❌ Admin only.", show_alert=True)
-                    return
-                
-                await query.answer("Creating backup... Use /backup command for file download.", show_alert=True)
-            
-            elif data == "admin_all_commands":
-                if not self.is_admin(user_id):
-                    await query.answer("❌ Admin only.", show_alert=True)
-                    return
-                
-                text = """📋 **All Admin Commands**
+
+        keyboard = [
+            [InlineKeyboardButton("💾 Create Backup", callback_data="admin_backup")],
+            [InlineKeyboardButton("⬅️ Back", callback_data="back_to_admin_menu")]
+        ]
+        reply_markup = InlineKeyboardMarkup(keyboard)
+        await query.edit_message_text(text, reply_markup=reply_markup, parse_mode="Markdown")
+
+    async def _button_admin_backup(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        query = update.callback_query
+        user_id = query.from_user.id
+        if not self.is_admin(user_id):
+            await query.answer("❌ Admin only.", show_alert=True)
+            return
+
+        await query.answer("Creating backup... Use /backup command for file download.", show_alert=True)
+
+    async def _button_admin_all_commands(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        query = update.callback_query
+        user_id = query.from_user.id
+        if not self.is_admin(user_id):
+            await query.answer("❌ Admin only.", show_alert=True)
+            return
+
+        text = """📋 **All Admin Commands**
 
 **Balance:**
 • `/givebal @user amount`
@@ -7763,25 +7576,27 @@ Commands:
 • `/backup` • `/housebal`
 • `/ltcrate` • `/setltcrate price`
 • `/saveroulette`"""
-                
-                keyboard = [[InlineKeyboardButton("⬅️ Back", callback_data="back_to_admin_menu")]]
-                reply_markup = InlineKeyboardMarkup(keyboard)
-                await query.edit_message_text(text, reply_markup=reply_markup, parse_mode="Markdown")
-            
-            elif data == "more_stats":
-                user_data = self.db.get_user(user_id)
-                username = user_data.get('username', f"User{user_id}")
-                balance = user_data.get('balance', 0)
-                games_played = user_data.get('games_played', 0)
-                games_won = user_data.get('games_won', 0)
-                win_rate = (games_won / games_played * 100) if games_played > 0 else 0
-                total_wagered = user_data.get('total_wagered', 0)
-                total_pnl = user_data.get('total_pnl', 0)
-                total_won = total_wagered + total_pnl if total_pnl > 0 else total_wagered
-                
-                current_level = get_user_level(total_wagered, user_id, self.db)
-                
-                stats_text = f"""ℹ️ Stats of {username}
+
+        keyboard = [[InlineKeyboardButton("⬅️ Back", callback_data="back_to_admin_menu")]]
+        reply_markup = InlineKeyboardMarkup(keyboard)
+        await query.edit_message_text(text, reply_markup=reply_markup, parse_mode="Markdown")
+
+    async def _button_more_stats(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        query = update.callback_query
+        user_id = query.from_user.id
+        user_data = self.db.get_user(user_id)
+        username = user_data.get('username', f"User{user_id}")
+        balance = user_data.get('balance', 0)
+        games_played = user_data.get('games_played', 0)
+        games_won = user_data.get('games_won', 0)
+        win_rate = (games_won / games_played * 100) if games_played > 0 else 0
+        total_wagered = user_data.get('total_wagered', 0)
+        total_pnl = user_data.get('total_pnl', 0)
+        total_won = total_wagered + total_pnl if total_pnl > 0 else total_wagered
+
+        current_level = get_user_level(total_wagered, user_id, self.db)
+
+        stats_text = f"""ℹ️ Stats of {username}
 
 💰 Balance: ${balance:.2f}
 
@@ -7790,1035 +7605,1068 @@ Games Played: {games_played}
 Wins: {games_won} ({win_rate:.2f}%)
 Total Wagered: ${total_wagered:,.2f}
 Total Won: ${total_won:,.2f}"""
-                
-                keyboard = [[InlineKeyboardButton("⬅️ Back", callback_data="menu_more_content")]]
-                reply_markup = InlineKeyboardMarkup(keyboard)
-                await query.edit_message_text(stats_text, reply_markup=reply_markup, parse_mode="Markdown")
-            
-            elif data == "more_history":
-                await self._show_history_page(query.message, user_id, 0, edit_message=True, show_back=True)
-            
-            elif data == "more_leaderboard":
-                await self.show_leaderboard_wagered(update, back_to="menu_more_content")
-            
-            elif data == "more_raffle":
-                raffle_text = "🎟️ **Raffle**\n\nThere are no active raffles right now. Come back later!"
-                keyboard = [
-                    [InlineKeyboardButton("ℹ️ Rules", callback_data="raffle_rules"),
-                     InlineKeyboardButton("ℹ️ Event History", callback_data="raffle_history")],
-                    [InlineKeyboardButton("⬅️ Back", callback_data="menu_more_content")]
-                ]
-                reply_markup = InlineKeyboardMarkup(keyboard)
-                await query.edit_message_text(raffle_text, reply_markup=reply_markup, parse_mode="Markdown")
-            
-            elif data == "raffle_rules":
-                rules_text = """🎟️ **Raffle Rules**
+
+        keyboard = [[InlineKeyboardButton("⬅️ Back", callback_data="menu_more_content")]]
+        reply_markup = InlineKeyboardMarkup(keyboard)
+        await query.edit_message_text(stats_text, reply_markup=reply_markup, parse_mode="Markdown")
+
+    async def _button_more_history(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        query = update.callback_query
+        user_id = query.from_user.id
+        await self._show_history_page(query.message, user_id, 0, edit_message=True, show_back=True)
+
+    async def _button_more_leaderboard(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        await self.show_leaderboard_wagered(update, back_to="menu_more_content")
+
+    async def _button_more_raffle(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        query = update.callback_query
+        raffle_text = "🎟️ **Raffle**\n\nThere are no active raffles right now. Come back later!"
+        keyboard = [
+            [InlineKeyboardButton("ℹ️ Rules", callback_data="raffle_rules"),
+             InlineKeyboardButton("ℹ️ Event History", callback_data="raffle_history")],
+            [InlineKeyboardButton("⬅️ Back", callback_data="menu_more_content")]
+        ]
+        reply_markup = InlineKeyboardMarkup(keyboard)
+        await query.edit_message_text(raffle_text, reply_markup=reply_markup, parse_mode="Markdown")
+
+    async def _button_raffle_rules(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        query = update.callback_query
+        rules_text = """🎟️ **Raffle Rules**
 
 1. Raffles are held periodically with exciting prizes
 2. Each ticket costs a set amount to enter
 3. Winners are selected randomly
 4. Prizes are credited directly to your balance
 5. Stay tuned for announcements!"""
-                keyboard = [[InlineKeyboardButton("⬅️ Back", callback_data="more_raffle")]]
-                reply_markup = InlineKeyboardMarkup(keyboard)
-                await query.edit_message_text(rules_text, reply_markup=reply_markup, parse_mode="Markdown")
-            
-            elif data == "raffle_history":
-                history_text = "🎟️ **Event History**\n\nNo past raffles yet. Check back after the first raffle ends!"
-                keyboard = [[InlineKeyboardButton("⬅️ Back", callback_data="more_raffle")]]
-                reply_markup = InlineKeyboardMarkup(keyboard)
-                await query.edit_message_text(history_text, reply_markup=reply_markup, parse_mode="Markdown")
-            
-            elif data.startswith("game_info_"):
-                game_name = data.replace("game_info_", "")
-                game_usage = {
-                    "dice": "Usage: `/dice <amount|all>`",
-                    "slots": "Usage: `/slots <amount|all>`",
-                    "predict": "🔮 **Dice Prediction**\n\nPredict the dice roll and win **6x** your wager!\n\n**Usage:** `/predict <amount|all>`",
-                    "roulette": "Usage: `/roulette <amount|all>`",
-                    "coinflip": "Usage: `/flip <amount|all>`",
-                    "darts": "Usage: `/darts <amount|all>`",
-                    "basketball": "Usage: `/basketball <amount|all>`",
-                    "soccer": "Usage: `/soccer <amount|all>`",
-                    "bowling": "Usage: `/bowling <amount|all>`",
-                    "blackjack": "Usage: `/blackjack <amount|all>`",
-                    "mines": "Usage: `/mines <amount|all>`",
-                    "baccarat": "🃏 **Baccarat**\n\nBet on Player, Banker, or Tie!\n\n**Usage:** `/baccarat <amount|all>`",
-                    "keno": "🎱 **Keno**\n\nPick up to 10 numbers and match the draw!\n\n**Usage:** `/keno <amount|all>`",
-                    "limbo": "🚀 **Limbo**\n\nSet a target multiplier and hope the roll beats it!\n\n**Usage:** `/limbo <amount|all>`",
-                    "hilo": "📈 **Hi-Lo**\n\nPredict if the next card is higher or lower!\n\n**Usage:** `/hilo <amount|all>`",
-                    "connect4": "🔴 **Connect 4**\n\nChallenge another player to Connect 4!\n\n**Usage:** `/connect @user <amount>`"
-                }
-                
-                usage_text = game_usage.get(game_name, "Game not found.")
-                
-                keyboard = [[InlineKeyboardButton("⬅️ Back", callback_data="menu_play")]]
-                reply_markup = InlineKeyboardMarkup(keyboard)
-                await query.edit_message_text(usage_text, reply_markup=reply_markup, parse_mode="Markdown")
-
-            # Deposit/Withdrawal buttons
-            elif data == "deposit_mock":
-                if query.message.chat.type != "private" and not self.is_admin(user_id):
-                    await query.answer("❌ Use deposit in DMs only.", show_alert=True)
-                    return
-                # Show currency selection menu
-                await query.answer()
-                user_data = self.db.get_user(user_id)
-                
-                keyboard = []
-                for code, info in SUPPORTED_DEPOSIT_CRYPTOS.items():
-                    btn = InlineKeyboardButton(info['name'], callback_data=f"deposit_crypto_{code}")
-                    keyboard.append([btn])
-                keyboard.append([InlineKeyboardButton("⬅️ Back", callback_data="back_to_menu")])
-                
-                reply_markup = InlineKeyboardMarkup(keyboard)
-                
+        keyboard = [[InlineKeyboardButton("⬅️ Back", callback_data="more_raffle")]]
+        reply_markup = InlineKeyboardMarkup(keyboard)
+        await query.edit_message_text(rules_text, reply_markup=reply_markup, parse_mode="Markdown")
+
+    async def _button_raffle_history(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        query = update.callback_query
+        history_text = "🎟️ **Event History**\n\nNo past raffles yet. Check back after the first raffle ends!"
+        keyboard = [[InlineKeyboardButton("⬅️ Back", callback_data="more_raffle")]]
+        reply_markup = InlineKeyboardMarkup(keyboard)
+        await query.edit_message_text(history_text, reply_markup=reply_markup, parse_mode="Markdown")
+
+    async def _button_game_info(self, update: Update, context: ContextTypes.DEFAULT_TYPE, game_name):
+        query = update.callback_query
+        game_usage = {
+            "dice": "Usage: `/dice <amount|all>`",
+            "slots": "Usage: `/slots <amount|all>`",
+            "predict": "🔮 **Dice Prediction**\n\nPredict the dice roll and win **6x** your wager!\n\n**Usage:** `/predict <amount|all>`",
+            "roulette": "Usage: `/roulette <amount|all>`",
+            "coinflip": "Usage: `/flip <amount|all>`",
+            "darts": "Usage: `/darts <amount|all>`",
+            "basketball": "Usage: `/basketball <amount|all>`",
+            "soccer": "Usage: `/soccer <amount|all>`",
+            "bowling": "Usage: `/bowling <amount|all>`",
+            "blackjack": "Usage: `/blackjack <amount|all>`",
+            "mines": "Usage: `/mines <amount|all>`",
+            "baccarat": "🃏 **Baccarat**\n\nBet on Player, Banker, or Tie!\n\n**Usage:** `/baccarat <amount|all>`",
+            "keno": "🎱 **Keno**\n\nPick up to 10 numbers and match the draw!\n\n**Usage:** `/keno <amount|all>`",
+            "limbo": "🚀 **Limbo**\n\nSet a target multiplier and hope the roll beats it!\n\n**Usage:** `/limbo <amount|all>`",
+            "hilo": "📈 **Hi-Lo**\n\nPredict if the next card is higher or lower!\n\n**Usage:** `/hilo <amount|all>`",
+            "connect4": "🔴 **Connect 4**\n\nChallenge another player to Connect 4!\n\n**Usage:** `/connect @user <amount>`"
+        }
+
+        usage_text = game_usage.get(game_name, "Game not found.")
+
+        keyboard = [[InlineKeyboardButton("⬅️ Back", callback_data="menu_play")]]
+        reply_markup = InlineKeyboardMarkup(keyboard)
+        await query.edit_message_text(usage_text, reply_markup=reply_markup, parse_mode="Markdown")
+
+    async def _button_deposit_mock(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        query = update.callback_query
+        user_id = query.from_user.id
+        if query.message.chat.type != "private" and not self.is_admin(user_id):
+            await query.answer("❌ Use deposit in DMs only.", show_alert=True)
+            return
+        # Show currency selection menu
+        await query.answer()
+        user_data = self.db.get_user(user_id)
+
+        keyboard = []
+        for code, info in SUPPORTED_DEPOSIT_CRYPTOS.items():
+            btn = InlineKeyboardButton(info['name'], callback_data=f"deposit_crypto_{code}")
+            keyboard.append([btn])
+        keyboard.append([InlineKeyboardButton("⬅️ Back", callback_data="back_to_menu")])
+
+        reply_markup = InlineKeyboardMarkup(keyboard)
+
+        await query.edit_message_text(
+            f"Your balance: **${user_data['balance']:.2f}**\n\nSelect a cryptocurrency:",
+            parse_mode="Markdown",
+            reply_markup=reply_markup
+        )
+
+    async def _button_withdraw_mock(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        query = update.callback_query
+        user_id = query.from_user.id
+        if query.message.chat.type != "private" and not self.is_admin(user_id):
+            await query.answer("❌ Use withdraw in DMs only.", show_alert=True)
+            return
+        user_data = self.db.get_user(user_id)
+        min_possible = min(info.get('min_withdraw', 1.00) for info in SUPPORTED_WITHDRAWAL_CRYPTOS.values())
+        if user_data['balance'] < min_possible:
+            await query.edit_message_text(f"❌ Minimum withdrawal is ${min_possible:.2f}\n\nYour balance: **${user_data['balance']:.2f}**", parse_mode="Markdown")
+        else:
+            keyboard = []
+            for code, info in SUPPORTED_WITHDRAWAL_CRYPTOS.items():
+                btn = InlineKeyboardButton(info['name'], callback_data=f"withdraw_method_{code.lower()}")
+                keyboard.append([btn])
+            keyboard.append([InlineKeyboardButton("⬅️ Back", callback_data="back_to_menu")])
+            reply_markup = InlineKeyboardMarkup(keyboard)
+            await query.edit_message_text(
+                f"Your balance: **${user_data['balance']:.2f}**\n\nSelect a cryptocurrency:",
+                parse_mode="Markdown",
+                reply_markup=reply_markup
+            )
+
+    async def _button_withdraw_method(self, update: Update, context: ContextTypes.DEFAULT_TYPE, currency):
+        query = update.callback_query
+        user_id = query.from_user.id
+        currency = currency.upper()
+        crypto_info = SUPPORTED_WITHDRAWAL_CRYPTOS.get(currency)
+        if not crypto_info:
+            await query.answer("❌ Invalid currency.", show_alert=True)
+            return
+
+        user_data = self.db.get_user(user_id)
+        balance = user_data['balance']
+        fee_percent = crypto_info.get('fee_percent', 0.02) * 100
+        min_withdraw = crypto_info.get('min_withdraw', 1.00)
+
+        context.user_data['pending_withdraw_method'] = currency.lower()
+
+        keyboard = [
+            [InlineKeyboardButton("⬅️ Back", callback_data="withdraw_back_to_currency")]
+        ]
+        reply_markup = InlineKeyboardMarkup(keyboard)
+
+        await query.edit_message_text(
+            f"Your balance: **${balance:.2f}**\nFee: **{fee_percent:.1f}%**\nMinimum: **${min_withdraw:.2f}**\n\nEnter the amount you want to withdraw:",
+            parse_mode="Markdown",
+            reply_markup=reply_markup
+        )
+
+    async def _button_withdraw_cancel(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        query = update.callback_query
+        await query.edit_message_text("❌ Withdrawal cancelled.")
+
+    async def _button_withdraw_cancel_flow(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        query = update.callback_query
+        # Clear any pending withdrawal state
+        context.user_data.pop('pending_withdraw_method', None)
+        context.user_data.pop('pending_withdraw_amount', None)
+        await query.edit_message_text("Withdraw cancelled.")
+
+    async def _button_withdraw_back_to_currency(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        query = update.callback_query
+        user_id = query.from_user.id
+        # Clear pending state and go back to currency selection
+        context.user_data.pop('pending_withdraw_method', None)
+        context.user_data.pop('pending_withdraw_amount', None)
+
+        user_data = self.db.get_user(user_id)
+        keyboard = []
+        for code, info in SUPPORTED_WITHDRAWAL_CRYPTOS.items():
+            btn = InlineKeyboardButton(info['name'], callback_data=f"withdraw_method_{code.lower()}")
+            keyboard.append([btn])
+        keyboard.append([InlineKeyboardButton("⬅️ Back", callback_data="back_to_menu")])
+        reply_markup = InlineKeyboardMarkup(keyboard)
+        await query.edit_message_text(
+            f"Your balance: **${user_data['balance']:.2f}**\n\nSelect a cryptocurrency:",
+            parse_mode="Markdown",
+            reply_markup=reply_markup
+        )
+
+    async def _button_withdraw_back_to_amount(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        query = update.callback_query
+        user_id = query.from_user.id
+        # Clear amount and go back to entering amount
+        context.user_data.pop('pending_withdraw_amount', None)
+        currency = context.user_data.get('pending_withdraw_method', 'ltc').upper()
+        crypto_info = SUPPORTED_WITHDRAWAL_CRYPTOS.get(currency, {'name': currency})
+        fee_percent = crypto_info.get('fee_percent', 0.02) * 100
+        min_withdraw = crypto_info.get('min_withdraw', 1.00)
+
+        user_data = self.db.get_user(user_id)
+        balance = user_data['balance']
+
+        keyboard = [
+            [InlineKeyboardButton("⬅️ Back", callback_data="withdraw_back_to_currency")]
+        ]
+        reply_markup = InlineKeyboardMarkup(keyboard)
+
+        await query.edit_message_text(
+            f"Your balance: **${balance:.2f}**\nFee: **{fee_percent:.1f}%**\nMinimum: **${min_withdraw:.2f}**\n\nEnter the amount you want to withdraw:",
+            parse_mode="Markdown",
+            reply_markup=reply_markup
+        )
+
+    async def _button_withdraw_approve(self, update: Update, context: ContextTypes.DEFAULT_TYPE, withdraw_id, target_user_id, amount, currency):
+        query = update.callback_query
+        currency = currency or 'LTC'
+
+        # Claim the withdrawal before the first await; a second approver tapping at the same moment gets nothing
+        withdrawal = self.db.get_withdrawal(withdraw_id)
+        if (withdrawal and withdrawal['user_id'] == target_user_id
+                and self.db.transition_withdrawal(withdraw_id, 'pending', 'sending')):
+            username = withdrawal['username'] or f'User{target_user_id}'
+            wallet_address = withdrawal['wallet_address']
+            amount = withdrawal['amount']
+            currency = withdrawal['currency'] or currency
+            crypto_info = SUPPORTED_WITHDRAWAL_CRYPTOS.get(currency, {'name': currency})
+
+            await query.edit_message_text(
+                f"⏳ **Sending {currency} via Plisio...**\n\nUser: @{username} (ID: `{target_user_id}`)\nAmount: **${amount:.2f}**",
+                parse_mode="Markdown"
+            )
+
+            # Send crypto via Plisio API
+            result = await self.send_crypto_withdrawal(wallet_address, amount, currency)
+
+            if result['success']:
+                self.db.transition_withdrawal(withdraw_id, 'sending', 'processed',
+                                              tx_id=result.get('tx_id'), tx_url=result.get('tx_url'))
+                self.db.add_transaction(target_user_id, "withdrawal", -amount, f"{currency} Withdrawal to {wallet_address[:20]}...")
+
+                tx_id = result.get('tx_id', '')
+                tx_url = result.get('tx_url', '')
+                if tx_id:
+                    if 'processed_withdrawal_txids' not in self.db.data:
+                        self.db.data['processed_withdrawal_txids'] = []
+                    self.db.data['processed_withdrawal_txids'].append(tx_id)
+                    if len(self.db.data['processed_withdrawal_txids']) > 1000:
+                        self.db.data['processed_withdrawal_txids'] = self.db.data['processed_withdrawal_txids'][-1000:]
+                self.db.save_data()
+
+                tx_info = f"\nTX: `{tx_id}`" if tx_id else ""
+                explorer_link = f"\n[View on Blockchain]({tx_url})" if tx_url else ""
                 await query.edit_message_text(
-                    f"Your balance: **${user_data['balance']:.2f}**\n\nSelect a cryptocurrency:",
+                    f"✅ **Withdrawal Sent!**\n\nUser: @{username} (ID: `{target_user_id}`)\nAmount: **${amount:.2f}**\nCurrency: **{currency}**\nTo: `{wallet_address}`{tx_info}{explorer_link}\n\nApproved by @{update.effective_user.username or update.effective_user.first_name}",
                     parse_mode="Markdown",
-                    reply_markup=reply_markup
+                    disable_web_page_preview=True
                 )
-            
-            elif data == "withdraw_mock":
-                if query.message.chat.type != "private" and not self.is_admin(user_id):
-                    await query.answer("❌ Use withdraw in DMs only.", show_alert=True)
-                    return
-                user_data = self.db.get_user(user_id)
-                min_possible = min(info.get('min_withdraw', 1.00) for info in SUPPORTED_WITHDRAWAL_CRYPTOS.values())
-                if user_data['balance'] < min_possible:
-                    await query.edit_message_text(f"❌ Minimum withdrawal is ${min_possible:.2f}\n\nYour balance: **${user_data['balance']:.2f}**", parse_mode="Markdown")
-                else:
-                    keyboard = []
-                    for code, info in SUPPORTED_WITHDRAWAL_CRYPTOS.items():
-                        btn = InlineKeyboardButton(info['name'], callback_data=f"withdraw_method_{code.lower()}")
-                        keyboard.append([btn])
-                    keyboard.append([InlineKeyboardButton("⬅️ Back", callback_data="back_to_menu")])
-                    reply_markup = InlineKeyboardMarkup(keyboard)
-                    await query.edit_message_text(
-                        f"Your balance: **${user_data['balance']:.2f}**\n\nSelect a cryptocurrency:",
+
+                # Notify the user
+                try:
+                    await self.app.bot.send_message(
+                        chat_id=target_user_id,
+                        text=f"✅ **Withdrawal Sent!**\n\n**${amount:.2f}** in {crypto_info['name']} has been sent to your address.{explorer_link}\n\nPlease allow a few minutes for blockchain confirmation.",
                         parse_mode="Markdown",
-                        reply_markup=reply_markup
+                        disable_web_page_preview=True,
+                        rate_limit_args=NOTICE
                     )
-            
-            elif data.startswith("withdraw_method_"):
-                currency = data.replace("withdraw_method_", "").upper()
-                crypto_info = SUPPORTED_WITHDRAWAL_CRYPTOS.get(currency)
-                if not crypto_info:
-                    await query.answer("❌ Invalid currency.", show_alert=True)
-                    return
-                
-                user_data = self.db.get_user(user_id)
-                balance = user_data['balance']
-                fee_percent = crypto_info.get('fee_percent', 0.02) * 100
-                min_withdraw = crypto_info.get('min_withdraw', 1.00)
-                
-                context.user_data['pending_withdraw_method'] = currency.lower()
-                
-                keyboard = [
-                    [InlineKeyboardButton("⬅️ Back", callback_data="withdraw_back_to_currency")]
-                ]
-                reply_markup = InlineKeyboardMarkup(keyboard)
-                
-                await query.edit_message_text(
-                    f"Your balance: **${balance:.2f}**\nFee: **{fee_percent:.1f}%**\nMinimum: **${min_withdraw:.2f}**\n\nEnter the amount you want to withdraw:",
-                    parse_mode="Markdown",
-                    reply_markup=reply_markup
-                )
-            
-            elif data == "withdraw_cancel":
-                await query.edit_message_text("❌ Withdrawal cancelled.")
-            
-            elif data == "withdraw_cancel_flow":
-                # Clear any pending withdrawal state
-                context.user_data.pop('pending_withdraw_method', None)
-                context.user_data.pop('pending_withdraw_amount', None)
-                await query.edit_message_text("Withdraw cancelled.")
-            
-            elif data == "withdraw_back_to_currency":
-                # Clear pending state and go back to currency selection
-                context.user_data.pop('pending_withdraw_method', None)
-                context.user_data.pop('pending_withdraw_amount', None)
-                
-                user_data = self.db.get_user(user_id)
-                keyboard = []
-                for code, info in SUPPORTED_WITHDRAWAL_CRYPTOS.items():
-                    btn = InlineKeyboardButton(info['name'], callback_data=f"withdraw_method_{code.lower()}")
-                    keyboard.append([btn])
-                keyboard.append([InlineKeyboardButton("⬅️ Back", callback_data="back_to_menu")])
-                reply_markup = InlineKeyboardMarkup(keyboard)
+                except Exception as e:
+                    logger.error(f"Failed to notify user {target_user_id}: {e}")
+            elif result.get('unknown'):
+                # Left in 'sending': it may have gone out, and it must not be approved or denied again blindly
+                self.db.transition_withdrawal(withdraw_id, 'sending', 'sending', error=result.get('error'))
                 await query.edit_message_text(
-                    f"Your balance: **${user_data['balance']:.2f}**\n\nSelect a cryptocurrency:",
-                    parse_mode="Markdown",
-                    reply_markup=reply_markup
+                    f"⚠️ **Withdrawal Status Unknown**\n\nUser: @{username} (ID: `{target_user_id}`)\nAmount: **${amount:.2f}**\nCurrency: **{currency}**\nTo: `{wallet_address}`\nError: {result.get('error', 'Unknown')}\n\nPlisio did not answer in time, so the payout may have been sent. Check the Plisio dashboard before refunding with /givebal.",
+                    parse_mode="Markdown"
                 )
-            
-            elif data == "withdraw_back_to_amount":
-                # Clear amount and go back to entering amount
-                context.user_data.pop('pending_withdraw_amount', None)
-                currency = context.user_data.get('pending_withdraw_method', 'ltc').upper()
-                crypto_info = SUPPORTED_WITHDRAWAL_CRYPTOS.get(currency, {'name': currency})
-                fee_percent = crypto_info.get('fee_percent', 0.02) * 100
-                min_withdraw = crypto_info.get('min_withdraw', 1.00)
-                
-                user_data = self.db.get_user(user_id)
-                balance = user_data['balance']
-                
-                keyboard = [
-                    [InlineKeyboardButton("⬅️ Back", callback_data="withdraw_back_to_currency")]
-                ]
-                reply_markup = InlineKeyboardMarkup(keyboard)
-                
+            else:
+                self.db.transition_withdrawal(withdraw_id, 'sending', 'failed', error=result.get('error'))
                 await query.edit_message_text(
-                    f"Your balance: **${balance:.2f}**\nFee: **{fee_percent:.1f}%**\nMinimum: **${min_withdraw:.2f}**\n\nEnter the amount you want to withdraw:",
-                    parse_mode="Markdown",
-                    reply_markup=reply_markup
-                )
-            
-            elif data.startswith("withdraw_approve_"):
-                parts = data.split('_')
-                withdraw_id = int(parts[2])
-                target_user_id = int(parts[3])
-                amount = float(parts[4])
-                currency = parts[5] if len(parts) > 5 else 'LTC'
-                
-                pending = self.db.data.get('pending_withdrawals', [])
-                if withdraw_id < len(pending) and pending[withdraw_id]['status'] == 'pending':
-                    withdrawal = pending[withdraw_id]
-                    username = withdrawal.get('username', f'User{target_user_id}')
-                    wallet_address = withdrawal.get('wallet_address') or withdrawal.get('ltc_address', '')
-                    currency = withdrawal.get('currency', currency)
-                    crypto_info = SUPPORTED_WITHDRAWAL_CRYPTOS.get(currency, {'name': currency})
-                    
-                    await query.edit_message_text(
-                        f"⏳ **Sending {currency} via Plisio...**\n\nUser: @{username} (ID: `{target_user_id}`)\nAmount: **${amount:.2f}**",
-                        parse_mode="Markdown"
-                    )
-                    
-                    # Send crypto via Plisio API
-                    result = await self.send_crypto_withdrawal(wallet_address, amount, currency)
-                    
-                    if result['success']:
-                        withdrawal['status'] = 'processed'
-                        withdrawal['tx_id'] = result.get('tx_id')
-                        withdrawal['tx_url'] = result.get('tx_url')
-                        self.db.add_transaction(target_user_id, "withdrawal", -amount, f"{currency} Withdrawal to {wallet_address[:20]}...")
-                        
-                        tx_id = result.get('tx_id', '')
-                        tx_url = result.get('tx_url', '')
-                        if tx_id:
-                            if 'processed_withdrawal_txids' not in self.db.data:
-                                self.db.data['processed_withdrawal_txids'] = []
-                            self.db.data['processed_withdrawal_txids'].append(tx_id)
-                            if len(self.db.data['processed_withdrawal_txids']) > 1000:
-                                self.db.data['processed_withdrawal_txids'] = self.db.data['processed_withdrawal_txids'][-1000:]
-                        self.db.save_data()
-                        
-                        tx_info = f"\nTX: `{tx_id}`" if tx_id else ""
-                        explorer_link = f"\n[View on Blockchain]({tx_url})" if tx_url else ""
-                        await query.edit_message_text(
-                            f"✅ **Withdrawal Sent!**\n\nUser: @{username} (ID: `{target_user_id}`)\nAmount: **${amount:.2f}**\nCurrency: **{currency}**\nTo: `{wallet_address}`{tx_info}{explorer_link}\n\nApproved by @{update.effective_user.username or update.effective_user.first_name}",
-                            parse_mode="Markdown",
-                            disable_web_page_preview=True
-                        )
-                        
-                        # Notify the user
-                        try:
-                            await self.app.bot.send_message(
-                                chat_id=target_user_id,
-                                text=f"✅ **Withdrawal Sent!**\n\n**${amount:.2f}** in {crypto_info['name']} has been sent to your address.{explorer_link}\n\nPlease allow a few minutes for blockchain confirmation.",
-                                parse_mode="Markdown",
-                                disable_web_page_preview=True
-                            )
-                        except Exception as e:
-                            logger.error(f"Failed to notify user {target_user_id}: {e}")
-                    else:
-                        await query.edit_message_text(
-                            f"❌ **Withdrawal Failed**\n\nUser: @{username} (ID: `{target_user_id}`)\nAmount: **${amount:.2f}**\nError: {result.get('error', 'Unknown')}\n\nUser balance was already deducted. Use /givebal to refund if needed.",
-                            parse_mode="Markdown"
-                        )
-                else:
-                    await query.answer("❌ This withdrawal was already processed.", show_alert=True)
-            
-            elif data.startswith("withdraw_deny_"):
-                parts = data.split('_')
-                withdraw_id = int(parts[2])
-                target_user_id = int(parts[3])
-                amount = float(parts[4])
-                
-                pending = self.db.data.get('pending_withdrawals', [])
-                if withdraw_id < len(pending) and pending[withdraw_id]['status'] == 'pending':
-                    # Refund the user silently
-                    target_user_data = self.db.get_user(target_user_id)
-                    target_user_data['balance'] += amount
-                    self.db.update_user(target_user_id, target_user_data)
-                    self.db.save_data()
-                    
-                    # Just show a toast, keep buttons visible for re-approval if needed
-                    await query.answer(f"Refunded ${amount:.2f} to user. Player not notified.", show_alert=True)
-                else:
-                    await query.answer("❌ This withdrawal was already processed.", show_alert=True)
-            
-            elif data.startswith("copy_addr_"):
-                address = data.replace("copy_addr_", "")
-                await query.answer("Address copied! Tap the message to copy.", show_alert=True)
-                await self.app.bot.send_message(
-                    chat_id=user_id,
-                    text=f"📋 **Your Deposit Address:**\n\n`{address}`\n\n_(Tap above to copy)_",
+                    f"❌ **Withdrawal Failed**\n\nUser: @{username} (ID: `{target_user_id}`)\nAmount: **${amount:.2f}**\nError: {result.get('error', 'Unknown')}\n\nUser balance was already deducted. Use /givebal to refund if needed.",
                     parse_mode="Markdown"
                 )
+        else:
+            await query.answer("❌ This withdrawal was already processed.", show_alert=True)
+
+    async def _button_withdraw_deny(self, update: Update, context: ContextTypes.DEFAULT_TYPE, withdraw_id, target_user_id, amount):
+        query = update.callback_query
+
+        # Close the request before refunding, so a double tap (or a racing Approve) cannot pay out twice
+        withdrawal = self.db.get_withdrawal(withdraw_id)
+        if (withdrawal and withdrawal['user_id'] == target_user_id
+                and self.db.transition_withdrawal(withdraw_id, 'pending', 'denied')):
+            # Refund the user silently
+            amount = withdrawal['amount']
+            await self.wallet.credit(target_user_id, amount)
+
+            # Just show a toast; the buttons stay but the request is closed
+            await query.answer(f"Refunded ${amount:.2f} to user. Player not notified.", show_alert=True)
+        else:
+            await query.answer("❌ This withdrawal was already processed.", show_alert=True)
+
+    async def _button_copy_addr(self, update: Update, context: ContextTypes.DEFAULT_TYPE, address):
+        query = update.callback_query
+        user_id = query.from_user.id
+        await query.answer("Address copied! Tap the message to copy.", show_alert=True)
+        await self.app.bot.send_message(
+            chat_id=user_id,
+            text=f"📋 **Your Deposit Address:**\n\n`{address}`\n\n_(Tap above to copy)_",
+            parse_mode="Markdown"
+        )
+
+    async def _button_transactions_history(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        query = update.callback_query
+        user_id = query.from_user.id
+        user_transactions = self.db.data['transactions'].get(str(user_id), [])[-10:] # Last 10
+
+        if not user_transactions:
+            await query.edit_message_text("📜 No transaction history found.")
+            return
+
+        history_text = "📜 **Last 10 Transactions**\n\n"
+        for tx in reversed(user_transactions):
+            time_str = datetime.fromisoformat(tx['timestamp']).strftime("%m/%d %H:%M")
+            sign = "+" if tx['amount'] >= 0 else ""
+            history_text += f"*{time_str}* | `{sign}{tx['amount']:.2f}`: {tx['description']}\n"
+
+        await query.edit_message_text(history_text, parse_mode="Markdown")
+
+    async def _button_decline(self, update: Update, context: ContextTypes.DEFAULT_TYPE, challenge_id):
+        query = update.callback_query
+        user_id = query.from_user.id
+        if challenge_id in self.pending_pvp and self.pending_pvp[challenge_id]['challenger'] == user_id:
+             await query.edit_message_text("✅ Challenge canceled.")
+             del self.pending_pvp[challenge_id]
+        else:
+            await query.answer("❌ Only the challenger can cancel this game.", show_alert=True)
+
+    async def _button_bj(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        query = update.callback_query
+        data = query.data
+        user_id = query.from_user.id
+        parts = data.split('_')
+        game_user_id = int(parts[1])
+        action = parts[2]
+
+        # Verify this is the correct user's game
+        if user_id != game_user_id:
+            await query.answer("❌ This is not your game!", show_alert=True)
+            return
+
+        # Handle Play Again separately (session already deleted)
+        if action == "playagain":
+            wager = float(parts[3])
+            user_data = self.db.get_user(user_id)
+
+            # Check if user has another active game
+            if self.user_has_active_game(user_id):
+                await query.answer("❌ You already have an active game!", show_alert=True)
+                return
+
+            if user_data['balance'] < wager:
+                await query.answer(f"❌ Insufficient balance! You have ${user_data['balance']:.2f}", show_alert=True)
+                return
+
+            # Remove the Play Again button from the old message
+            try:
+                old_text = query.message.text
+                await query.edit_message_text(old_text, parse_mode="Markdown")
+            except:
+                pass
+
+            # Deduct wager
+            user_data = await self.debit_wager(update, user_id, wager)
+            if not user_data:
+                return
+
+            # Create new game
+            new_game = self.games.new("blackjack", bet_amount=wager)
+            new_game.start_game()
+            self.blackjack_sessions[user_id] = new_game
+
+            # Start 30-second timeout for the game
+            chat_id = query.message.chat_id
+            game_key = f"blackjack_{user_id}"
+            self.start_game_timeout(game_key, "blackjack", user_id, chat_id, wager, 
+                                    bot=context.bot)
+
+            # Send a NEW message for the new game (not editing)
+            await self._display_blackjack_state_new_message(update, context, user_id)
+            return
+
+        if game_user_id not in self.blackjack_sessions:
+            await query.edit_message_text("❌ Game session expired. Start a new game with /blackjack")
+            return
+
+        game = self.blackjack_sessions[game_user_id]
+
+        # Execute the action
+        if action == "hit":
+            game.hit()
+        elif action == "stand":
+            game.stand()
+        elif action == "double":
+            # Check if user has enough balance for double down
+            user_data = self.db.get_user(user_id)
+            current_hand = game.player_hands[game.current_hand_index]
+            additional_bet = current_hand['bet']
+
+            if user_data['balance'] < additional_bet:
+                await query.answer("❌ Insufficient balance to double down!", show_alert=True)
+                return
+
+            # Deduct additional bet
+            if not await self.wallet.debit(user_id, additional_bet):
+                await query.answer("❌ Insufficient balance to double down!", show_alert=True)
+                return
+
+            game.double_down()
+        elif action == "split":
+            # Check if user has enough balance for split
+            user_data = self.db.get_user(user_id)
+            current_hand = game.player_hands[game.current_hand_index]
+            additional_bet = current_hand['bet']
+
+            if user_data['balance'] < additional_bet:
+                await query.answer("❌ Insufficient balance to split!", show_alert=True)
+                return
+
+            # Deduct additional bet
+            if not await self.wallet.debit(user_id, additional_bet):
+                await query.answer("❌ Insufficient balance to split!", show_alert=True)
+                return
+
+            game.split()
+            # After split, cancel timeout if game ended (e.g., split aces both get 21)
+            game_state_after_split = game.get_game_state()
+            if game_state_after_split['game_over']:
+                game_key = f"blackjack_{user_id}"
+                self.cancel_game_timeout(game_key)
+        elif action == "insurance":
+            # Check if user has enough balance for insurance
+            user_data = self.db.get_user(user_id)
+            insurance_cost = game.initial_bet / 2
+
+            if user_data['balance'] < insurance_cost:
+                await query.answer("❌ Insufficient balance for insurance!", show_alert=True)
+                return
+
+            # Deduct insurance cost
+            if not await self.wallet.debit(user_id, insurance_cost):
+                await query.answer("❌ Insufficient balance for insurance!", show_alert=True)
+                return
+
+            game.take_insurance()
+
+        # Reset or cancel timeout after each action
+        if game_user_id in self.blackjack_sessions:
+            game_state = game.get_game_state()
+            game_key = f"blackjack_{user_id}"
+            if not game_state['game_over']:
+                # Game still active - reset the timeout
+                chat_id = query.message.chat_id
+                wager = sum(h['bet'] for h in game.player_hands)
+                self.reset_game_timeout(game_key, "blackjack", user_id, chat_id, wager,
+                                        bot=context.bot)
+            else:
+                # Game ended - cancel the timeout immediately
+                self.cancel_game_timeout(game_key)
+
+        # Update the display with new game state
+        await self._display_blackjack_state(update, context, user_id)
+
+    async def _button_mines_start(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        query = update.callback_query
+        data = query.data
+        user_id = query.from_user.id
+        try:
+            # mines_start_<wager>_<num_mines>
+            parts = data.split('_')
+            wager = float(parts[2])
+            num_mines = int(parts[3])
+
+            # Remove from pending selection
+            if user_id in self.pending_opponent_selection:
+                self.pending_opponent_selection.discard(user_id)
+
+            # Check balance again
+            user_data = self.db.get_user(user_id)
+            if wager > user_data['balance']:
+                await query.edit_message_text(f"❌ Insufficient balance. You have ${user_data['balance']:.2f}")
+                return
+
+            # Deduct wager
+            user_data = await self.debit_wager(update, user_id, wager)
+            if not user_data:
+                return
+
+            # Create new game
+            game = self.games.new("mines", user_id=user_id, wager=wager, num_mines=num_mines)
+            self.mines_sessions[user_id] = game
+
+            # Start 30-second timeout for the game
+            chat_id = query.message.chat_id
+            game_key = f"mines_{user_id}"
+            self.start_game_timeout(game_key, "mines", user_id, chat_id, wager, 
+                                    bot=context.bot)
+
+            # Display game grid
+            await self._display_mines_state(update, context, user_id, is_new=True)
+        except Exception as mines_error:
+            logger.error(f"Mines start error: {mines_error}")
+            await query.edit_message_text(f"❌ Error starting mines: {str(mines_error)[:100]}")
+
+    async def _button_mines_reveal(self, update: Update, context: ContextTypes.DEFAULT_TYPE, game_user_id, position):
+        query = update.callback_query
+        user_id = query.from_user.id
+        # mines_reveal_<user_id>_<position>
+
+        # Verify this is the correct user
+        if user_id != game_user_id:
+            await query.answer("❌ This is not your game!", show_alert=True)
+            return
+
+        if game_user_id not in self.mines_sessions:
+            await query.edit_message_text("❌ Game session expired. Start a new game with /mines")
+            return
+
+        game = self.mines_sessions[game_user_id]
+
+        # Reveal the tile
+        is_safe, game_over, multiplier, already_revealed = game.reveal_tile(position)
+
+        # If already revealed, just acknowledge and do nothing
+        if already_revealed:
+            await query.answer()
+            return
+
+        # Reset timeout if game is still active
+        if not game_over and user_id in self.mines_sessions:
+            chat_id = query.message.chat_id
+            game_key = f"mines_{user_id}"
+            self.reset_game_timeout(game_key, "mines", user_id, chat_id, game.wager,
+                                    bot=context.bot)
+
+        # Update display
+        await self._display_mines_state(update, context, user_id)
+
+    async def _button_mines_cashout(self, update: Update, context: ContextTypes.DEFAULT_TYPE, game_user_id):
+        query = update.callback_query
+        user_id = query.from_user.id
+        # mines_cashout_<user_id>
+
+        # Verify this is the correct user
+        if user_id != game_user_id:
+            await query.answer("❌ This is not your game!", show_alert=True)
+            return
+
+        if game_user_id not in self.mines_sessions:
+            await query.edit_message_text("❌ Game session expired. Start a new game with /mines")
+            return
+
+        game = self.mines_sessions[game_user_id]
+
+        # Cash out
+        game.cash_out()
+
+        # Update display
+        await self._display_mines_state(update, context, user_id)
+
+    async def _button_mines_again(self, update: Update, context: ContextTypes.DEFAULT_TYPE, game_user_id, wager, num_mines):
+        query = update.callback_query
+        user_id = query.from_user.id
+        # mines_again_<user_id>_<wager>_<num_mines> - Play again with same settings
+
+        if user_id != game_user_id:
+            await query.answer("❌ This is not your game!", show_alert=True)
+            return
+
+        # Check if user has enough balance
+        user_data = self.db.get_user(user_id)
+        if user_data['balance'] < wager:
+            await query.answer(f"❌ Insufficient balance! Need ${wager:.2f}", show_alert=True)
+            return
+
+        # Deduct wager
+        user_data = await self.debit_wager(update, user_id, wager)
+        if not user_data:
+            return
+
+        # Start new game with same settings
+        self.mines_sessions[user_id] = self.games.new("mines", user_id=user_id, wager=wager, num_mines=num_mines)
+
+        await query.answer("🎮 New game started!")
+        await self._display_mines_state(update, context, user_id, is_new=True)
+
+    async def _button_mines_change(self, update: Update, context: ContextTypes.DEFAULT_TYPE, game_user_id, wager):
+        query = update.callback_query
+        user_id = query.from_user.id
+        # mines_change_<user_id>_<wager> - Pick new mines count
+
+        if user_id != game_user_id:
+            await query.answer("❌ This is not your game!", show_alert=True)
+            return
+
+        # Check if user has enough balance
+        user_data = self.db.get_user(user_id)
+        if user_data['balance'] < wager:
+            await query.answer(f"❌ Insufficient balance! Need ${wager:.2f}", show_alert=True)
+            return
+
+        # Show mines selection keyboard (same format as /mines command)
+        keyboard = [
+            [InlineKeyboardButton("3 Mines (Low Risk)", callback_data=f"mines_start_{wager:.2f}_3")],
+            [InlineKeyboardButton("5 Mines (Medium)", callback_data=f"mines_start_{wager:.2f}_5")],
+            [InlineKeyboardButton("10 Mines (High Risk)", callback_data=f"mines_start_{wager:.2f}_10")],
+            [InlineKeyboardButton("15 Mines (Very High)", callback_data=f"mines_start_{wager:.2f}_15")],
+            [InlineKeyboardButton("20 Mines (Extreme)", callback_data=f"mines_start_{wager:.2f}_20")],
+            [InlineKeyboardButton("24 Mines (Max Risk)", callback_data=f"mines_start_{wager:.2f}_24")]
+        ]
+
+        reply_markup = InlineKeyboardMarkup(keyboard)
+        await query.edit_message_text(
+            f"💣 **Mines** - Wager: ${wager:.2f}\n\n"
+            f"**Select difficulty (number of mines):**\n\n"
+            f"More mines = Higher risk = Bigger multipliers!\n"
+            f"• 3 mines: Up to 2.23x\n"
+            f"• 5 mines: Up to 7.42x\n"
+            f"• 10 mines: Up to 113.85x\n"
+            f"• 15 mines: Up to 9,176x\n"
+            f"• 24 mines: Up to 24,750x",
+            reply_markup=reply_markup,
+            parse_mode="Markdown"
+        )
+
+    async def _button_mines_noop(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        query = update.callback_query
+        # Just acknowledge the click but do nothing (for revealed/disabled tiles)
+        await query.answer()
+
+    async def _button_bacc(self, update: Update, context: ContextTypes.DEFAULT_TYPE, game_user_id, wager, bet_type):
+        query = update.callback_query
+        user_id = query.from_user.id
+
+        if user_id != game_user_id:
+            await query.answer("❌ This is not your game!", show_alert=True)
+            return
+
+        await self._play_baccarat(update, context, user_id, wager, bet_type)
+
+    async def _button_keno_pick(self, update: Update, context: ContextTypes.DEFAULT_TYPE, game_user_id, number):
+        query = update.callback_query
+        user_id = query.from_user.id
+
+        if user_id != game_user_id:
+            await query.answer("❌ This is not your game!", show_alert=True)
+            return
+
+        if user_id not in self.keno_sessions:
+            await query.answer("❌ No active game!", show_alert=True)
+            return
+
+        game = self.keno_sessions[user_id]
+        success, msg = game.pick_number(number)
+
+        # Reset timeout since player is still active
+        if not game.game_over and user_id in self.keno_sessions:
+            chat_id = query.message.chat_id
+            game_key = f"keno_{user_id}"
+            self.reset_game_timeout(game_key, "keno", user_id, chat_id, game.wager,
+                                    bot=context.bot)
+
+        await self._display_keno_state(update, context, user_id)
+
+    async def _button_keno_draw(self, update: Update, context: ContextTypes.DEFAULT_TYPE, game_user_id):
+        query = update.callback_query
+        user_id = query.from_user.id
+
+        if user_id != game_user_id:
+            await query.answer("❌ This is not your game!", show_alert=True)
+            return
+
+        if user_id not in self.keno_sessions:
+            await query.answer("❌ No active game!", show_alert=True)
+            return
+
+        game = self.keno_sessions[user_id]
+        game.start_draw()
+        await self._display_keno_state(update, context, user_id)
+
+    async def _button_keno_clear(self, update: Update, context: ContextTypes.DEFAULT_TYPE, game_user_id):
+        query = update.callback_query
+        user_id = query.from_user.id
+
+        if user_id != game_user_id:
+            await query.answer("❌ This is not your game!", show_alert=True)
+            return
+
+        if user_id not in self.keno_sessions:
+            await query.answer("❌ No active game!", show_alert=True)
+            return
+
+        game = self.keno_sessions[user_id]
+        game.picked_numbers.clear()
+        await self._display_keno_state(update, context, user_id)
+
+    async def _button_keno_again(self, update: Update, context: ContextTypes.DEFAULT_TYPE, game_user_id, wager):
+        query = update.callback_query
+        user_id = query.from_user.id
+
+        if user_id != game_user_id:
+            await query.answer("❌ This is not your game!", show_alert=True)
+            return
+
+        user_data = self.db.get_user(user_id)
+        if user_data['balance'] < wager:
+            await query.answer(f"❌ Insufficient balance! Need ${wager:.2f}", show_alert=True)
+            return
+
+        user_data = await self.debit_wager(update, user_id, wager)
+        if not user_data:
+            return
+
+        self.keno_sessions[user_id] = self.games.new("keno", user_id, wager)
+        await query.answer("🎮 New game started!")
+        await self._display_keno_state(update, context, user_id)
+
+    async def _button_keno_select_rounds(self, update: Update, context: ContextTypes.DEFAULT_TYPE, game_user_id):
+        query = update.callback_query
+        user_id = query.from_user.id
+
+        if user_id != game_user_id:
+            await query.answer("❌ This is not your game!", show_alert=True)
+            return
+
+        if user_id not in self.keno_sessions:
+            await query.answer("❌ No active game!", show_alert=True)
+            return
+
+        game = self.keno_sessions[user_id]
+        game.selecting_rounds = True
+        await self._display_keno_state(update, context, user_id)
+
+    async def _button_keno_back(self, update: Update, context: ContextTypes.DEFAULT_TYPE, game_user_id):
+        query = update.callback_query
+        user_id = query.from_user.id
+
+        if user_id != game_user_id:
+            await query.answer("❌ This is not your game!", show_alert=True)
+            return
+
+        if user_id not in self.keno_sessions:
+            await query.answer("❌ No active game!", show_alert=True)
+            return
+
+        game = self.keno_sessions[user_id]
+        game.selecting_rounds = False
+        await self._display_keno_state(update, context, user_id)
+
+    async def _button_keno_rounds(self, update: Update, context: ContextTypes.DEFAULT_TYPE, game_user_id, rounds):
+        query = update.callback_query
+        user_id = query.from_user.id
+
+        if user_id != game_user_id:
+            await query.answer("❌ This is not your game!", show_alert=True)
+            return
+
+        if user_id not in self.keno_sessions:
+            await query.answer("❌ No active game!", show_alert=True)
+            return
+
+        game = self.keno_sessions[user_id]
+        user_data = self.db.get_user(user_id)
+
+        if rounds == -1:
+            await query.answer("Starting infinite auto-play!")
+        else:
+            total_cost = game.wager * (rounds - 1)
+            if user_data['balance'] < total_cost:
+                await query.answer(f"❌ Need ${total_cost + game.wager:.2f} for {rounds} draws", show_alert=True)
+                return
+            await query.answer(f"Starting {rounds} draws!")
+
+        game.set_rounds(rounds)
+        if rounds == 1:
+            await self._run_keno_draw(update, context, user_id)
+        else:
+            await self._start_keno_autoplay(user_id, query.message.chat_id, query.message.message_id)
+
+    async def _button_keno_stop(self, update: Update, context: ContextTypes.DEFAULT_TYPE, game_user_id):
+        query = update.callback_query
+        user_id = query.from_user.id
+
+        if user_id != game_user_id:
+            await query.answer("❌ This is not your game!", show_alert=True)
+            return
+
+        if user_id not in self.keno_sessions:
+            await query.answer("❌ No active game!", show_alert=True)
+            return
+
+        game = self.keno_sessions[user_id]
+        game.game_over = True
+        self.timers.cancel(f"keno_auto:{user_id}")
+        self.snapshots.forget_timer(f"keno_auto:{user_id}")
+        await query.answer("Stopping auto-play!")
+        await self._display_keno_state(update, context, user_id)
+
+    async def _button_keno_noop(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        query = update.callback_query
+        await query.answer()
+
+    async def _button_limbo_again(self, update: Update, context: ContextTypes.DEFAULT_TYPE, game_user_id, wager, target_multiplier):
+        query = update.callback_query
+        user_id = query.from_user.id
+
+        if user_id != game_user_id:
+            await query.answer("❌ This is not your game!", show_alert=True)
+            return
+
+        user_data = self.db.get_user(user_id)
+        if user_data['balance'] < wager:
+            await query.answer(f"❌ Insufficient balance! Need ${wager:.2f}", show_alert=True)
+            return
+
+        user_data = await self.debit_wager(update, user_id, wager)
+        if not user_data:
+            return
+
+        game = self.games.new("limbo", user_id, wager, target_multiplier)
+        self.limbo_sessions[user_id] = game
+        result = game.play()
+
+        win_prob = result['win_probability'] * 100
+
+        if result['won']:
+            user_data = await self.wallet.credit(user_id, result['payout'], total_wagered=wager, games_played=1, games_won=1,
+                                                 total_pnl=result['profit'], wagered_since_last_withdrawal=wager)
+            self.db.update_house_balance(-result['profit'])
+            result_emoji = "🟢"
+            result_text = f"@{user_data.get('username', 'Player')} won ${result['payout']:.2f} ({target_multiplier:.2f}x)"
+        else:
+            user_data = await self.wallet.adjust(user_id, 0, total_wagered=wager, games_played=1,
+                                                 total_pnl=-wager, wagered_since_last_withdrawal=wager)
+            self.db.update_house_balance(wager)
+            result_emoji = "🔴"
+            result_text = f"@{user_data.get('username', 'Player')} lost ${wager:.2f}"
+
+        self.db.record_game({
+            'type': 'limbo',
+            'player_id': user_id,
+            'username': user_data.get('username', 'Unknown'),
+            'wager': wager,
+            'target_multiplier': target_multiplier,
+            'result_multiplier': result['result_multiplier'],
+            'won': result['won'],
+            'payout': result['payout'],
+            'result': 'win' if result['won'] else 'loss',
+            'balance_after': user_data['balance']
+        })
+
+        del self.limbo_sessions[user_id]
+
+        keyboard = [[InlineKeyboardButton("🔄 Play Again", callback_data=f"limbo_again_{user_id}_{wager}_{target_multiplier}")]]
+        reply_markup = InlineKeyboardMarkup(keyboard)
+
+        message = f"🚀 **Limbo**\n\n"
+        message += f"**Target:** {target_multiplier:.2f}x ({win_prob:.1f}% chance)\n"
+        message += f"**Result:** {result['result_multiplier']:.2f}x {result_emoji}\n"
+        message += f"**Bet:** ${wager:.2f}\n\n"
+        message += result_text
+
+        await query.edit_message_text(message, reply_markup=reply_markup, parse_mode="Markdown")
+
+    async def _button_hilo_guess(self, update: Update, context: ContextTypes.DEFAULT_TYPE, action, game_user_id):
+        query = update.callback_query
+        user_id = query.from_user.id
+
+        if user_id != game_user_id:
+            await query.answer("❌ This is not your game!", show_alert=True)
+            return
+
+        if user_id not in self.hilo_sessions:
+            await query.answer("❌ No active game!", show_alert=True)
+            return
+
+        game = self.hilo_sessions[user_id]
+        game.make_prediction(action)
+
+        # Reset timeout if game is still active
+        if not game.game_over and user_id in self.hilo_sessions:
+            chat_id = query.message.chat_id
+            game_key = f"hilo_{user_id}"
+            self.reset_game_timeout(game_key, "hilo", user_id, chat_id, game.initial_wager,
+                                    bot=context.bot)
+
+        await self._display_hilo_state(update, context, user_id)
+
+    async def _button_hilo_skip(self, update: Update, context: ContextTypes.DEFAULT_TYPE, game_user_id):
+        query = update.callback_query
+        user_id = query.from_user.id
+
+        if user_id != game_user_id:
+            await query.answer("❌ This is not your game!", show_alert=True)
+            return
+
+        if user_id not in self.hilo_sessions:
+            await query.answer("❌ No active game!", show_alert=True)
+            return
+
+        game = self.hilo_sessions[user_id]
+        game.skip_card()
+
+        # Reset timeout since player is still active
+        if not game.game_over and user_id in self.hilo_sessions:
+            chat_id = query.message.chat_id
+            game_key = f"hilo_{user_id}"
+            self.reset_game_timeout(game_key, "hilo", user_id, chat_id, game.initial_wager,
+                                    bot=context.bot)
+        await query.answer("⏭️ Card skipped!")
+        await self._display_hilo_state(update, context, user_id)
+
+    async def _button_hilo_cashout(self, update: Update, context: ContextTypes.DEFAULT_TYPE, game_user_id):
+        query = update.callback_query
+        user_id = query.from_user.id
+
+        if user_id != game_user_id:
+            await query.answer("❌ This is not your game!", show_alert=True)
+            return
+
+        if user_id not in self.hilo_sessions:
+            await query.answer("❌ No active game!", show_alert=True)
+            return
+
+        game = self.hilo_sessions[user_id]
+        result = game.cash_out()
+        if 'error' in result:
+            await query.answer(f"❌ {result['error']}", show_alert=True)
+            return
+
+        await query.answer("💰 Cashing out!")
+        await self._display_hilo_state(update, context, user_id)
+
+    async def _button_hilo_again(self, update: Update, context: ContextTypes.DEFAULT_TYPE, game_user_id, wager):
+        query = update.callback_query
+        user_id = query.from_user.id
+
+        if user_id != game_user_id:
+            await query.answer("❌ This is not your game!", show_alert=True)
+            return
+
+        user_data = self.db.get_user(user_id)
+        if user_data['balance'] < wager:
+            await query.answer(f"❌ Insufficient balance! Need ${wager:.2f}", show_alert=True)
+            return
+
+        user_data = await self.debit_wager(update, user_id, wager)
+        if not user_data:
+            return
+
+        game = self.games.new("hilo", user_id, wager)
+        self.hilo_sessions[user_id] = game
+
+        # Start 30-second timeout for the game
+        chat_id = query.message.chat_id
+        game_key = f"hilo_{user_id}"
+        self.start_game_timeout(game_key, "hilo", user_id, chat_id, wager, 
+                                bot=context.bot)
+
+        await query.answer("🎮 New game started!")
+        await self._display_hilo_state(update, context, user_id)
+
+    async def _button_connect4_roll(self, update: Update, context: ContextTypes.DEFAULT_TYPE, game_id, player_num):
+        await self._handle_connect4_dice_roll(update, context, game_id, player_num)
+
+    async def _button_connect4_drop(self, update: Update, context: ContextTypes.DEFAULT_TYPE, game_id, col):
+        query = update.callback_query
+        user_id = query.from_user.id
+
+        if game_id not in self.connect4_sessions:
+            await query.answer("Game not found!", show_alert=True)
+            return
 
-            elif data == "transactions_history":
-                user_transactions = self.db.data['transactions'].get(str(user_id), [])[-10:] # Last 10
-                
-                if not user_transactions:
-                    await query.edit_message_text("📜 No transaction history found.")
-                    return
-                
-                history_text = "📜 **Last 10 Transactions**\n\n"
-                for tx in reversed(user_transactions):
-                    time_str = datetime.fromisoformat(tx['timestamp']).strftime("%m/%d %H:%M")
-                    sign = "+" if tx['amount'] >= 0 else ""
-                    history_text += f"*{time_str}* | `{sign}{tx['amount']:.2f}`: {tx['description']}\n"
-                
-                await query.edit_message_text(history_text, parse_mode="Markdown")
-
-            # Handle decline of PvP (general)
-            elif data.startswith("decline_"):
-                challenge_id = data.split('_', 1)[1]
-                if challenge_id in self.pending_pvp and self.pending_pvp[challenge_id]['challenger'] == user_id:
-                     await query.edit_message_text("✅ Challenge canceled.")
-                     del self.pending_pvp[challenge_id]
-                     self.db.data['pending_pvp'] = self.pending_pvp
-                     self.db.save_data()
-                else:
-                    await query.answer("❌ Only the challenger can cancel this game.", show_alert=True)
-            
-            # Blackjack button handlers
-            elif data.startswith("bj_"):
-                parts = data.split('_')
-                game_user_id = int(parts[1])
-                action = parts[2]
-                
-                # Verify this is the correct user's game
-                if user_id != game_user_id:
-                    await query.answer("❌ This is not your game!", show_alert=True)
-                    return
-                
-                # Handle Play Again separately (session already deleted)
-                if action == "playagain":
-                    wager = float(parts[3])
-                    user_data = self.db.get_user(user_id)
-                    
-                    # Check if user has another active game
-                    if self.user_has_active_game(user_id):
-                        await query.answer("❌ You already have an active game!", show_alert=True)
-                        return
-                    
-                    if user_data['balance'] < wager:
-                        await query.answer(f"❌ Insufficient balance! You have ${user_data['balance']:.2f}", show_alert=True)
-                        return
-                    
-                    # Remove the Play Again button from the old message
-                    try:
-                        old_text = query.message.text
-                        await query.edit_message_text(old_text, parse_mode="Markdown")
-                    except:
-                        pass
-                    
-                    # Deduct wager
-                    user_data['balance'] -= wager
-                    self.db.update_user(user_id, user_data)
-                    
-                    # Create new game
-                    new_game = BlackjackGame(bet_amount=wager)
-                    new_game.start_game()
-                    self.blackjack_sessions[user_id] = new_game
-                    
-                    # Start 30-second timeout for the game
-                    chat_id = query.message.chat_id
-                    game_key = f"blackjack_{user_id}"
-                    self.start_game_timeout(game_key, "blackjack", user_id, chat_id, wager, 
-                                            bot=context.bot)
-                    
-                    # Send a NEW message for the new game (not editing)
-                    await self._display_blackjack_state_new_message(update, context, user_id)
-                    return
-                
-                if game_user_id not in self.blackjack_sessions:
-                    await query.edit_message_text("❌ Game session expired. Start a new game with /blackjack")
-                    return
-                
-                game = self.blackjack_sessions[game_user_id]
-                
-                # Execute the action
-                if action == "hit":
-                    game.hit()
-                elif action == "stand":
-                    game.stand()
-                elif action == "double":
-                    # Check if user has enough balance for double down
-                    user_data = self.db.get_user(user_id)
-                    current_hand = game.player_hands[game.current_hand_index]
-                    additional_bet = current_hand['bet']
-                    
-                    if user_data['balance'] < additional_bet:
-                        await query.answer("❌ Insufficient balance to double down!", show_alert=True)
-                        return
-                    
-                    # Deduct additional bet
-                    user_data['balance'] -= additional_bet
-                    self.db.update_user(user_id, user_data)
-                    
-                    game.double_down()
-                elif action == "split":
-                    # Check if user has enough balance for split
-                    user_data = self.db.get_user(user_id)
-                    current_hand = game.player_hands[game.current_hand_index]
-                    additional_bet = current_hand['bet']
-                    
-                    if user_data['balance'] < additional_bet:
-                        await query.answer("❌ Insufficient balance to split!", show_alert=True)
-                        return
-                    
-                    # Deduct additional bet
-                    user_data['balance'] -= additional_bet
-                    self.db.update_user(user_id, user_data)
-                    
-                    game.split()
-                    # After split, cancel timeout if game ended (e.g., split aces both get 21)
-                    game_state_after_split = game.get_game_state()
-                    if game_state_after_split['game_over']:
-                        game_key = f"blackjack_{user_id}"
-                        self.cancel_game_timeout(game_key)
-                elif action == "insurance":
-                    # Check if user has enough balance for insurance
-                    user_data = self.db.get_user(user_id)
-                    insurance_cost = game.initial_bet / 2
-                    
-                    if user_data['balance'] < insurance_cost:
-                        await query.answer("❌ Insufficient balance for insurance!", show_alert=True)
-                        return
-                    
-                    # Deduct insurance cost
-                    user_data['balance'] -= insurance_cost
-                    self.db.update_user(user_id, user_data)
-                    
-                    game.take_insurance()
-                
-                # Reset or cancel timeout after each action
-                if game_user_id in self.blackjack_sessions:
-                    game_state = game.get_game_state()
-                    game_key = f"blackjack_{user_id}"
-                    if not game_state['game_over']:
-                        # Game still active - reset the timeout
-                        chat_id = query.message.chat_id
-                        wager = sum(h['bet'] for h in game.player_hands)
-                        self.reset_game_timeout(game_key, "blackjack", user_id, chat_id, wager,
-                                                bot=context.bot)
-                    else:
-                        # Game ended - cancel the timeout immediately
-                        self.cancel_game_timeout(game_key)
-                
-                # Update the display with new game state
-                await self._display_blackjack_state(update, context, user_id)
-            
-            # Mines Game Callbacks
-            elif data.startswith("mines_start_"):
-                try:
-                    # mines_start_<wager>_<num_mines>
-                    parts = data.split('_')
-                    wager = float(parts[2])
-                    num_mines = int(parts[3])
-                    
-                    # Remove from pending selection
-                    if user_id in self.pending_opponent_selection:
-                        self.pending_opponent_selection.discard(user_id)
-                    
-                    # Check balance again
-                    user_data = self.db.get_user(user_id)
-                    if wager > user_data['balance']:
-                        await query.edit_message_text(f"❌ Insufficient balance. You have ${user_data['balance']:.2f}")
-                        return
-                    
-                    # Deduct wager
-                    user_data['balance'] -= wager
-                    self.db.update_user(user_id, user_data)
-                    
-                    # Create new game
-                    game = MinesGame(user_id=user_id, wager=wager, num_mines=num_mines)
-                    self.mines_sessions[user_id] = game
-                    
-                    # Start 30-second timeout for the game
-                    chat_id = query.message.chat_id
-                    game_key = f"mines_{user_id}"
-                    self.start_game_timeout(game_key, "mines", user_id, chat_id, wager, 
-                                            bot=context.bot)
-                    
-                    # Display game grid
-                    await self._display_mines_state(update, context, user_id, is_new=True)
-                except Exception as mines_error:
-                    logger.error(f"Mines start error: {mines_error}")
-                    await query.edit_message_text(f"❌ Error starting mines: {str(mines_error)[:100]}")
-            
-            elif data.startswith("mines_reveal_"):
-                # mines_reveal_<user_id>_<position>
-                parts = data.split('_')
-                game_user_id = int(parts[2])
-                position = int(parts[3])
-                
-                # Verify this is the correct user
-                if user_id != game_user_id:
-                    await query.answer("❌ This is not your game!", show_alert=True)
-                    return
-                
-                if game_user_id not in self.mines_sessions:
-                    await query.edit_message_text("❌ Game session expired. Start a new game with /mines")
-                    return
-                
-                game = self.mines_sessions[game_user_id]
-                
-                # Reveal the tile
-                is_safe, game_over, multiplier, already_revealed = game.reveal_tile(position)
-                
-                # If already revealed, just acknowledge and do nothing
-                if already_revealed:
-                    await query.answer()
-                    return
-                
-                # Reset timeout if game is still active
-                if not game_over and user_id in self.mines_sessions:
-                    chat_id = query.message.chat_id
-                    game_key = f"mines_{user_id}"
-                    self.reset_game_timeout(game_key, "mines", user_id, chat_id, game.wager,
-                                            bot=context.bot)
-                
-                # Update display
-                await self._display_mines_state(update, context, user_id)
-            
-            elif data.startswith("mines_cashout_"):
-                # mines_cashout_<user_id>
-                parts = data.split('_')
-                game_user_id = int(parts[2])
-                
-                # Verify this is the correct user
-                if user_id != game_user_id:
-                    await query.answer("❌ This is not your game!", show_alert=True)
-                    return
-                
-                if game_user_id not in self.mines_sessions:
-                    await query.edit_message_text("❌ Game session expired. Start a new game with /mines")
-                    return
-                
-                game = self.mines_sessions[game_user_id]
-                
-                # Cash out
-                game.cash_out()
-                
-                # Update display
-                await self._display_mines_state(update, context, user_id)
-            
-            elif data.startswith("mines_again_"):
-                # mines_again_<user_id>_<wager>_<num_mines> - Play again with same settings
-                parts = data.split('_')
-                game_user_id = int(parts[2])
-                wager = float(parts[3])
-                num_mines = int(parts[4])
-                
-                if user_id != game_user_id:
-                    await query.answer("❌ This is not your game!", show_alert=True)
-                    return
-                
-                # Check if user has enough balance
-                user_data = self.db.get_user(user_id)
-                if user_data['balance'] < wager:
-                    await query.answer(f"❌ Insufficient balance! Need ${wager:.2f}", show_alert=True)
-                    return
-                
-                # Deduct wager
-                user_data['balance'] -= wager
-                self.db.update_user(user_id, user_data)
-                
-                # Start new game with same settings
-                self.mines_sessions[user_id] = MinesGame(user_id=user_id, wager=wager, num_mines=num_mines)
-                
-                await query.answer("🎮 New game started!")
-                await self._display_mines_state(update, context, user_id, is_new=True)
-            
-            elif data.startswith("mines_change_"):
-                # mines_change_<user_id>_<wager> - Pick new mines count
-                parts = data.split('_')
-                game_user_id = int(parts[2])
-                wager = float(parts[3])
-                
-                if user_id != game_user_id:
-                    await query.answer("❌ This is not your game!", show_alert=True)
-                    return
-                
-                # Check if user has enough balance
-                user_data = self.db.get_user(user_id)
-                if user_data['balance'] < wager:
-                    await query.answer(f"❌ Insufficient balance! Need ${wager:.2f}", show_alert=True)
-                    return
-                
-                # Show mines selection keyboard (same format as /mines command)
-                keyboard = [
-                    [InlineKeyboardButton("3 Mines (Low Risk)", callback_data=f"mines_start_{wager:.2f}_3")],
-                    [InlineKeyboardButton("5 Mines (Medium)", callback_data=f"mines_start_{wager:.2f}_5")],
-                    [InlineKeyboardButton("10 Mines (High Risk)", callback_data=f"mines_start_{wager:.2f}_10")],
-                    [InlineKeyboardButton("15 Mines (Very High)", callback_data=f"mines_start_{wager:.2f}_15")],
-                    [InlineKeyboardButton("20 Mines (Extreme)", callback_data=f"mines_start_{wager:.2f}_20")],
-                    [InlineKeyboardButton("24 Mines (Max Risk)", callback_data=f"mines_start_{wager:.2f}_24")]
-                ]
-                
-                reply_markup = InlineKeyboardMarkup(keyboard)
-                await query.edit_message_text(
-                    f"💣 **Mines** - Wager: ${wager:.2f}\n\n"
-                    f"**Select difficulty (number of mines):**\n\n"
-                    f"More mines = Higher risk = Bigger multipliers!\n"
-                    f"• 3 mines: Up to 2.23x\n"
-                    f"• 5 mines: Up to 7.42x\n"
-                    f"• 10 mines: Up to 113.85x\n"
-                    f"• 15 mines: Up to 9,176x\n"
-                    f"• 24 mines: Up to 24,750x",
-                    reply_markup=reply_markup,
-                    parse_mode="Markdown"
-                )
-            
-            elif data == "mines_noop":
-                # Just acknowledge the click but do nothing (for revealed/disabled tiles)
-                await query.answer()
-            
-            # Baccarat callbacks
-            elif data.startswith("bacc_"):
-                parts = data.split('_')
-                game_user_id = int(parts[1])
-                wager = float(parts[2])
-                bet_type = parts[3]
-                
-                if user_id != game_user_id:
-                    await query.answer("❌ This is not your game!", show_alert=True)
-                    return
-                
-                await self._play_baccarat(update, context, user_id, wager, bet_type)
-            
-            # Keno callbacks
-            elif data.startswith("keno_pick_"):
-                parts = data.split('_')
-                game_user_id = int(parts[2])
-                number = int(parts[3])
-                
-                if user_id != game_user_id:
-                    await query.answer("❌ This is not your game!", show_alert=True)
-                    return
-                
-                if user_id not in self.keno_sessions:
-                    await query.answer("❌ No active game!", show_alert=True)
-                    return
-                
-                game = self.keno_sessions[user_id]
-                success, msg = game.pick_number(number)
-                
-                # Reset timeout since player is still active
-                if not game.game_over and user_id in self.keno_sessions:
-                    chat_id = query.message.chat_id
-                    game_key = f"keno_{user_id}"
-                    self.reset_game_timeout(game_key, "keno", user_id, chat_id, game.wager,
-                                            bot=context.bot)
-                
-                await self._display_keno_state(update, context, user_id)
-            
-            elif data.startswith("keno_draw_"):
-                parts = data.split('_')
-                game_user_id = int(parts[2])
-                
-                if user_id != game_user_id:
-                    await query.answer("❌ This is not your game!", show_alert=True)
-                    return
-                
-                if user_id not in self.keno_sessions:
-                    await query.answer("❌ No active game!", show_alert=True)
-                    return
-                
-                game = self.keno_sessions[user_id]
-                game.start_draw()
-                await self._display_keno_state(update, context, user_id)
-            
-            elif data.startswith("keno_clear_"):
-                parts = data.split('_')
-                game_user_id = int(parts[2])
-                
-                if user_id != game_user_id:
-                    await query.answer("❌ This is not your game!", show_alert=True)
-                    return
-                
-                if user_id not in self.keno_sessions:
-                    await query.answer("❌ No active game!", show_alert=True)
-                    return
-                
-                game = self.keno_sessions[user_id]
-                game.picked_numbers.clear()
-                await self._display_keno_state(update, context, user_id)
-            
-            elif data.startswith("keno_again_"):
-                parts = data.split('_')
-                game_user_id = int(parts[2])
-                wager = float(parts[3])
-                
-                if user_id != game_user_id:
-                    await query.answer("❌ This is not your game!", show_alert=True)
-                    return
-                
-                user_data = self.db.get_user(user_id)
-                if user_data['balance'] < wager:
-                    await query.answer(f"❌ Insufficient balance! Need ${wager:.2f}", show_alert=True)
-                    return
-                
-                user_data['balance'] -= wager
-                self.db.update_user(user_id, user_data)
-                
-                self.keno_sessions[user_id] = KenoGame(user_id, wager)
-                await query.answer("🎮 New game started!")
-                await self._display_keno_state(update, context, user_id)
-            
-            elif data.startswith("keno_select_rounds_"):
-                parts = data.split('_')
-                game_user_id = int(parts[3])
-                
-                if user_id != game_user_id:
-                    await query.answer("❌ This is not your game!", show_alert=True)
-                    return
-                
-                if user_id not in self.keno_sessions:
-                    await query.answer("❌ No active game!", show_alert=True)
-                    return
-                
-                game = self.keno_sessions[user_id]
-                game.selecting_rounds = True
-                await self._display_keno_state(update, context, user_id)
-            
-            elif data.startswith("keno_back_"):
-                parts = data.split('_')
-                game_user_id = int(parts[2])
-                
-                if user_id != game_user_id:
-                    await query.answer("❌ This is not your game!", show_alert=True)
-                    return
-                
-                if user_id not in self.keno_sessions:
-                    await query.answer("❌ No active game!", show_alert=True)
-                    return
-                
-                game = self.keno_sessions[user_id]
-                game.selecting_rounds = False
-                await self._display_keno_state(update, context, user_id)
-            
-            elif data.startswith("keno_rounds_"):
-                parts = data.split('_')
-                game_user_id = int(parts[2])
-                rounds = int(parts[3])
-                
-                if user_id != game_user_id:
-                    await query.answer("❌ This is not your game!", show_alert=True)
-                    return
-                
-                if user_id not in self.keno_sessions:
-                    await query.answer("❌ No active game!", show_alert=True)
-                    return
-                
-                game = self.keno_sessions[user_id]
-                user_data = self.db.get_user(user_id)
-                
-                if rounds == -1:
-                    await query.answer("Starting infinite auto-play!")
-                else:
-                    total_cost = game.wager * (rounds - 1)
-                    if user_data['balance'] < total_cost:
-                        await query.answer(f"❌ Need ${total_cost + game.wager:.2f} for {rounds} draws", show_alert=True)
-                        return
-                    await query.answer(f"Starting {rounds} draws!")
-                
-                game.set_rounds(rounds)
-                await self._run_keno_draw(update, context, user_id)
-            
-            elif data.startswith("keno_next_"):
-                parts = data.split('_')
-                game_user_id = int(parts[2])
-                
-                if user_id != game_user_id:
-                    await query.answer("❌ This is not your game!", show_alert=True)
-                    return
-                
-                if user_id not in self.keno_sessions:
-                    await query.answer("❌ No active game!", show_alert=True)
-                    return
-                
-                game = self.keno_sessions[user_id]
-                user_data = self.db.get_user(user_id)
-                
-                if user_data['balance'] < game.wager:
-                    game.game_over = True
-                    await query.answer("❌ Insufficient balance! Stopping auto-play.", show_alert=True)
-                    await self._display_keno_state(update, context, user_id)
-                    return
-                
-                await self._run_keno_draw(update, context, user_id)
-            
-            elif data.startswith("keno_stop_"):
-                parts = data.split('_')
-                game_user_id = int(parts[2])
-                
-                if user_id != game_user_id:
-                    await query.answer("❌ This is not your game!", show_alert=True)
-                    return
-                
-                if user_id not in self.keno_sessions:
-                    await query.answer("❌ No active game!", show_alert=True)
-                    return
-                
-                game = self.keno_sessions[user_id]
-                game.game_over = True
-                await query.answer("Stopping auto-play!")
-                await self._display_keno_state(update, context, user_id)
-            
-            elif data == "keno_noop":
-                await query.answer()
-            
-            # Limbo callbacks
-            elif data.startswith("limbo_again_"):
-                parts = data.split('_')
-                game_user_id = int(parts[2])
-                wager = float(parts[3])
-                target_multiplier = float(parts[4])
-                
-                if user_id != game_user_id:
-                    await query.answer("❌ This is not your game!", show_alert=True)
-                    return
-                
-                user_data = self.db.get_user(user_id)
-                if user_data['balance'] < wager:
-                    await query.answer(f"❌ Insufficient balance! Need ${wager:.2f}", show_alert=True)
-                    return
-                
-                user_data['balance'] -= wager
-                self.db.update_user(user_id, {'balance': user_data['balance']})
-                
-                game = LimboGame(user_id, wager, target_multiplier)
-                self.limbo_sessions[user_id] = game
-                result = game.play()
-                
-                win_prob = result['win_probability'] * 100
-                
-                if result['won']:
-                    user_data['balance'] += result['payout']
-                    user_data['total_wagered'] += wager
-                    user_data['games_played'] += 1
-                    user_data['games_won'] += 1
-                    user_data['total_pnl'] += result['profit']
-                    user_data['wagered_since_last_withdrawal'] = user_data.get('wagered_since_last_withdrawal', 0) + wager
-                    self.db.update_user(user_id, user_data)
-                    self.db.update_house_balance(-result['profit'])
-                    result_emoji = "🟢"
-                    result_text = f"@{user_data.get('username', 'Player')} won ${result['payout']:.2f} ({target_multiplier:.2f}x)"
-                else:
-                    user_data['total_wagered'] += wager
-                    user_data['games_played'] += 1
-                    user_data['total_pnl'] -= wager
-                    user_data['wagered_since_last_withdrawal'] = user_data.get('wagered_since_last_withdrawal', 0) + wager
-                    self.db.update_user(user_id, user_data)
-                    self.db.update_house_balance(wager)
-                    result_emoji = "🔴"
-                    result_text = f"@{user_data.get('username', 'Player')} lost ${wager:.2f}"
-                
-                self.db.record_game({
-                    'type': 'limbo',
-                    'player_id': user_id,
-                    'username': user_data.get('username', 'Unknown'),
-                    'wager': wager,
-                    'target_multiplier': target_multiplier,
-                    'result_multiplier': result['result_multiplier'],
-                    'won': result['won'],
-                    'payout': result['payout'],
-                    'result': 'win' if result['won'] else 'loss',
-                    'balance_after': user_data['balance']
-                })
-                
-                del self.limbo_sessions[user_id]
-                
-                keyboard = [[InlineKeyboardButton("🔄 Play Again", callback_data=f"limbo_again_{user_id}_{wager}_{target_multiplier}")]]
-                reply_markup = InlineKeyboardMarkup(keyboard)
-                
-                message = f"🚀 **Limbo**\n\n"
-                message += f"**Target:** {target_multiplier:.2f}x ({win_prob:.1f}% chance)\n"
-                message += f"**Result:** {result['result_multiplier']:.2f}x {result_emoji}\n"
-                message += f"**Bet:** ${wager:.2f}\n\n"
-                message += result_text
-                
-                await query.edit_message_text(message, reply_markup=reply_markup, parse_mode="Markdown")
-            
-            # Hi-Lo callbacks
-            elif data.startswith("hilo_higher_") or data.startswith("hilo_lower_") or data.startswith("hilo_tie_"):
-                parts = data.split('_')
-                action = parts[1]
-                game_user_id = int(parts[2])
-                
-                if user_id != game_user_id:
-                    await query.answer("❌ This is not your game!", show_alert=True)
-                    return
-                
-                if user_id not in self.hilo_sessions:
-                    await query.answer("❌ No active game!", show_alert=True)
-                    return
-                
-                game = self.hilo_sessions[user_id]
-                game.make_prediction(action)
-                
-                # Reset timeout if game is still active
-                if not game.game_over and user_id in self.hilo_sessions:
-                    chat_id = query.message.chat_id
-                    game_key = f"hilo_{user_id}"
-                    self.reset_game_timeout(game_key, "hilo", user_id, chat_id, game.initial_wager,
-                                            bot=context.bot)
-                
-                await self._display_hilo_state(update, context, user_id)
-            
-            elif data.startswith("hilo_skip_"):
-                parts = data.split('_')
-                game_user_id = int(parts[2])
-                
-                if user_id != game_user_id:
-                    await query.answer("❌ This is not your game!", show_alert=True)
-                    return
-                
-                if user_id not in self.hilo_sessions:
-                    await query.answer("❌ No active game!", show_alert=True)
-                    return
-                
-                game = self.hilo_sessions[user_id]
-                game.skip_card()
-                
-                # Reset timeout since player is still active
-                if not game.game_over and user_id in self.hilo_sessions:
-                    chat_id = query.message.chat_id
-                    game_key = f"hilo_{user_id}"
-                    self.reset_game_timeout(game_key, "hilo", user_id, chat_id, game.initial_wager,
-                                            bot=context.bot)
-                await query.answer("⏭️ Card skipped!")
-                await self._display_hilo_state(update, context, user_id)
-            
-            elif data.startswith("hilo_cashout_"):
-                parts = data.split('_')
-                game_user_id = int(parts[2])
-                
-                if user_id != game_user_id:
-                    await query.answer("❌ This is not your game!", show_alert=True)
-                    return
-                
-                if user_id not in self.hilo_sessions:
-                    await query.answer("❌ No active game!", show_alert=True)
-                    return
-                
-                game = self.hilo_sessions[user_id]
-                result = game.cash_out()
-                if 'error' in result:
-                    await query.answer(f"❌ {result['error']}", show_alert=True)
-                    return
-                
-                await query.answer("💰 Cashing out!")
-                await self._display_hilo_state(update, context, user_id)
-            
-            elif data.startswith("hilo_again_"):
-                parts = data.split('_')
-                game_user_id = int(parts[2])
-                wager = float(parts[3])
-                
-                if user_id != game_user_id:
-                    await query.answer("❌ This is not your game!", show_alert=True)
-                    return
-                
-                user_data = self.db.get_user(user_id)
-                if user_data['balance'] < wager:
-                    await query.answer(f"❌ Insufficient balance! Need ${wager:.2f}", show_alert=True)
-                    return
-                
-                user_data['balance'] -= wager
-                self.db.update_user(user_id, {'balance': user_data['balance']})
-                
-                game = HiLoGame(user_id, wager)
-                self.hilo_sessions[user_id] = game
-                
-                # Start 30-second timeout for the game
-                chat_id = query.message.chat_id
-                game_key = f"hilo_{user_id}"
-                self.start_game_timeout(game_key, "hilo", user_id, chat_id, wager, 
-                                        bot=context.bot)
-                
-                await query.answer("🎮 New game started!")
-                await self._display_hilo_state(update, context, user_id)
-            
-            # Connect 4 callbacks
-            elif data.startswith("connect4_accept_"):
-                game_id = data.replace("connect4_accept_", "")
-                await self._accept_connect4_challenge(update, context, game_id)
-            
-            elif data.startswith("connect4_roll_"):
-                parts = data.split('_')
-                player_num = int(parts[-1])
-                game_id = '_'.join(parts[2:-1])
-                await self._handle_connect4_dice_roll(update, context, game_id, player_num)
-            
-            elif data.startswith("connect4_drop_"):
-                prefix_len = len("connect4_drop_")
-                rest = data[prefix_len:]
-                last_underscore = rest.rfind('_')
-                game_id = rest[:last_underscore]
-                col = int(rest[last_underscore + 1:])
-                
-                if game_id not in self.connect4_sessions:
-                    await query.answer("Game not found!", show_alert=True)
-                    return
-                
-                game = self.connect4_sessions[game_id]
-                
-                if user_id != game.get_current_player_id():
-                    await query.answer("Not your turn!", show_alert=True)
-                    return
-                
-                result = game.make_move(user_id, col)
-                
-                if 'error' in result:
-                    await query.answer(result['error'], show_alert=True)
-                    return
-                
-                # Reset timeout for the next player if game is still active
-                if not game.game_over and game_id in self.connect4_sessions:
-                    chat_id = query.message.chat_id
-                    game_key = f"connect4_{game_id}"
-                    next_player_id = game.get_current_player_id()
-                    opponent_player_id = game.player1_id if next_player_id == game.player2_id else game.player2_id
-                    self.reset_game_timeout(game_key, "connect4", next_player_id, chat_id, game.wager,
-                                            bot=context.bot, game_id=game_id, opponent_id=opponent_player_id,
-                                            is_pvp=True)
-                
-                await query.answer()
-                await self._display_connect4_state(update, context, game_id, is_new=False)
-            
-            elif data == "connect4_noop":
-                await query.answer("Column is full!", show_alert=True)
-            
-            else:
+        game = self.connect4_sessions[game_id]
+
+        if user_id != game.get_current_player_id():
+            await query.answer("Not your turn!", show_alert=True)
+            return
+
+        result = game.make_move(user_id, col)
+
+        if 'error' in result:
+            await query.answer(result['error'], show_alert=True)
+            return
+
+        # Reset timeout for the next player if game is still active
+        if not game.game_over and game_id in self.connect4_sessions:
+            chat_id = query.message.chat_id
+            game_key = f"connect4_{game_id}"
+            next_player_id = game.get_current_player_id()
+            opponent_player_id = game.player1_id if next_player_id == game.player2_id else game.player2_id
+            self.reset_game_timeout(game_key, "connect4", next_player_id, chat_id, game.wager,
+                                    bot=context.bot, game_id=game_id, opponent_id=opponent_player_id,
+                                    is_pvp=True)
+
+        await query.answer()
+        await self._display_connect4_state(update, context, game_id, is_new=False)
+
+    async def _button_connect4_noop(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        query = update.callback_query
+        await query.answer("Column is full!", show_alert=True)
+
+    async def button_callback(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Handles all inline button presses."""
+        query = update.callback_query
+        
+        # Ensure user is registered and username is updated
+        self.ensure_user_registered(update)
+        
+        data = query.data
+        user_id = query.from_user.id
+        chat_id = query.message.chat_id
+        message_id = query.message.message_id
+        
+        # Check if button was already clicked (prevent spam)
+        button_key = (chat_id, message_id, data)
+        if button_key in self.clicked_buttons:
+            await query.answer("❌ This button has already been used!", show_alert=True)
+            return
+        
+        route = self.callback_router.resolve(data)
+        
+        # Unrouted buttons get the same ownership check as every non-public route
+        policy = route.policy if route else OWNER
+        if policy == APPROVER:
+            if not self.can_approve_withdrawals(user_id):
+                await query.answer("❌ You don't have permission to approve withdrawals!", show_alert=True)
+                return
+        elif policy == OWNER:
+            if self.button_ownership.get((chat_id, message_id)) != user_id:
+                await query.answer("❌ This button is not for you!", show_alert=True)
+                return
+        
+        await query.answer() # Acknowledge the button press
+        
+        # One-shot buttons (bets, bonus claims) can only be pressed once
+        if route and route.one_shot:
+            self.clicked_buttons.add(button_key)
+            # Remove from pending opponent selection when user clicks a game button
+            self.pending_opponent_selection.discard(user_id)
+        
+        try:
+            if route is None:
                 await query.edit_message_text("Something went wrong or this button is for a different command!")
-            
+                return
+            await route.handler(update, context, *route.parse(data))
         except Exception as e:
-            logger.error(f"Error in button_callback: {e}")
+            logger.error(f"Error in button_callback ({route}): {e}")
             await context.bot.send_message(chat_id=query.message.chat_id, text="An unexpected error occurred. Please try the command again.")
 
 
     def run(self):
         """Start the bot."""
-        # Schedule task to check for expired challenges every 5 seconds
-        job_queue = self.app.job_queue
-        job_queue.run_repeating(self.check_expired_challenges, interval=5, first=5)
-        
+        async def start_timers(application):
+            self.load_state()
+            self.timers.start()
+            self.prices.start()
+            self.deposit_pool.start()
+        
+        async def save_snapshots(application):
+            # Runs after the updater and application have stopped, so only the timers can still change sessions
+            await self.timers.stop()
+            self.snapshots.flush()
+        
+        self.app.post_init = start_timers
+        self.app.post_shutdown = save_snapshots
         self.app.run_polling(poll_interval=1.0)
 
 
@@ -8836,10 +8684,24 @@ async def main():
     logger.info("Starting Gran Tesero Casino Bot...")
     logger.info(f"USE_POLLING={USE_POLLING}, WEBHOOK_URL={WEBHOOK_URL}")
     
-    bot = GranTeseroCasinoBot(token=BOT_TOKEN)
+    startup = StartupTimer()
+    with startup.phase("construct"):
+        bot = GranTeseroCasinoBot(token=BOT_TOKEN)
+    
+    with startup.phase("database"):
+        bot.db.connect()
+    with startup.phase("load state"):
+        bot.load_state()
+    
+    with startup.phase("telegram init"):
+        await bot.app.initialize()
+        await bot.app.start()
     
-    await bot.app.initialize()
-    await bot.app.start()
+    # Game timeouts and challenge deadlines all fire from this one scheduler task
+    bot.timers.start()
+    # Crypto prices are refreshed in the background from here on
+    bot.prices.start()
+    bot.deposit_pool.start()
     
     # Set up the bot menu commands (hamburger menu / 3 bars panel)
     commands = [
@@ -8866,47 +8728,78 @@ async def main():
         BotCommand("referral", "View referral program"),
         BotCommand("admin", "Admin panel (admins only)"),
     ]
-    await bot.app.bot.set_my_commands(commands)
+    # Disabled games stay out of the menu
+    commands = [c for c in commands if bot.games.command_enabled(c.command)]
+    with startup.phase("menu commands"):
+        await bot.app.bot.set_my_commands(commands)
     logger.info("Bot menu commands set successfully")
     
+    # systemd stops the bot with SIGTERM; cancel main() so the shutdown below still runs
+    try:
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+    except NotImplementedError:
+        pass
+    
     if USE_POLLING:
         logger.info("Polling mode active - using long-polling for updates (webhook server disabled)")
-        job_queue = bot.app.job_queue
-        job_queue.run_repeating(bot.check_expired_challenges, interval=5, first=5)
-        
-        await bot.app.updater.start_polling(poll_interval=1.0)
+        with startup.phase("start polling"):
+            await bot.app.updater.start_polling(poll_interval=1.0)
+        startup.report()
         
         try:
             while True:
                 await asyncio.sleep(1)
-        except KeyboardInterrupt:
+        except (KeyboardInterrupt, asyncio.CancelledError):
             pass
         finally:
+            # Stop taking updates, then stop the timers; after that nothing changes the sessions
             await bot.app.updater.stop()
             await bot.app.stop()
+            await bot.timers.stop()
+            bot.snapshots.flush()
+            await bot.prices.stop()
+            await bot.treasury.stop()
+            await bot.deposit_pool.stop()
+            await bot.plisio.close()
             await bot.app.shutdown()
     else:
         from webhook_server import WebhookServer
         webhook_server = WebhookServer(bot, port=5000)
-        await webhook_server.start()
-        logger.info("Webhook server started on port 5000")
-        
-        webhook_full_url = f"{WEBHOOK_URL.rstrip('/')}/webhook/telegram"
-        logger.info(f"Setting up Telegram webhook at: {webhook_full_url}")
-        await bot.app.bot.set_webhook(url=webhook_full_url)
-        logger.info("Webhook mode active - bot will receive updates via HTTP")
-        
         try:
+            with startup.phase("webhook server"):
+                await webhook_server.start()
+            logger.info("Webhook server started on port 5000")
+            
+            webhook_full_url = f"{WEBHOOK_URL.rstrip('/')}/webhook/telegram"
+            logger.info(f"Setting up Telegram webhook at: {webhook_full_url}")
+            with startup.phase("set webhook"):
+                await bot.app.bot.set_webhook(url=webhook_full_url)
+            logger.info("Webhook mode active - bot will receive updates via HTTP")
+            startup.report()
+            
             while True:
                 await asyncio.sleep(1)
-        except KeyboardInterrupt:
+        except (KeyboardInterrupt, asyncio.CancelledError):
             pass
         finally:
+            # Stop taking updates, then stop the timers; after that nothing changes the sessions
+            await webhook_server.stop()
             await bot.app.bot.delete_webhook()
             await bot.app.stop()
+            await bot.timers.stop()
+            bot.snapshots.flush()
+            await bot.prices.stop()
+            await bot.treasury.stop()
+            await bot.deposit_pool.stop()
+            await bot.plisio.close()
+            await bot.worker_router.close()
             await bot.app.shutdown()
 
 if __name__ == '__main__':
+    if sys.argv[1:2] == ["migrate"]:
+        # One-off import of a legacy casino_data.json (skipped if the database already has users)
+        migrate_json_to_sql(*sys.argv[2:3])
+        sys.exit(0)
     print("DEBUG: Script starting...")
     try:
         asyncio.run(main())
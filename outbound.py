@@ -0,0 +1,276 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from typing import Any, Callable, Coroutine, Dict, List, Optional, Tuple, Union
+
+from telegram.error import RetryAfter
+from telegram.ext import BaseRateLimiter
+
+logger = logging.getLogger(__name__)
+
+# Lanes: lower value goes first when the global bucket is contended
+PRIORITY_RESULT = 0     # replies, game results, button edits (the default)
+PRIORITY_NOTICE = 1     # notifications that may wait (approver group, DMs about deposits)
+
+# Pass as rate_limit_args=NOTICE to send something on the low-priority lane
+NOTICE = {"priority": PRIORITY_NOTICE}
+
+# Requests that go to a chat and count against Telegram's flood limits
+THROTTLED_ENDPOINTS = frozenset({
+    "sendMessage", "sendDice", "sendSticker", "sendPhoto", "sendDocument", "sendAnimation",
+    "editMessageText", "editMessageReplyMarkup", "editMessageCaption", "forwardMessage", "copyMessage",
+})
+# Edits to the same message that are still waiting can be merged into the newest one
+COALESCED_ENDPOINTS = frozenset({"editMessageText", "editMessageReplyMarkup", "editMessageCaption"})
+
+
+class TokenBucket:
+    """Classic token bucket: `rate` tokens per second, holding at most `burst`."""
+
+    __slots__ = ("rate", "burst", "tokens", "updated", "blocked_until")
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def _refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self) -> float:
+        """Seconds until a token is available (0 if one is available now)."""
+        now = time.monotonic()
+        self._refill(now)
+        wait = 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+        return max(wait, self.blocked_until - now)
+
+    def take(self):
+        self._refill(time.monotonic())
+        self.tokens -= 1
+
+    def block(self, seconds: float):
+        """Stop handing out tokens for a while (Telegram answered 429)."""
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+        self.tokens = min(self.tokens, 0)
+
+    def idle(self) -> bool:
+        now = time.monotonic()
+        self._refill(now)
+        return self.tokens >= self.burst and self.blocked_until <= now
+
+
+class _ChatLane:
+    __slots__ = ("bucket", "lock", "users")
+
+    def __init__(self, bucket: TokenBucket):
+        self.bucket = bucket
+        self.lock = asyncio.Lock()
+        self.users = 0
+
+
+class _PendingEdit:
+    __slots__ = ("args", "kwargs", "future", "merged")
+
+    def __init__(self, args, kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.merged = 0
+
+
+class OutboundDispatcher(BaseRateLimiter[Dict[str, Any]]):
+    """Paces every Bot API call the bot makes (plugged in as the PTB rate limiter).
+
+    Each chat gets its own token bucket (private chats ~1 msg/s, groups
+    ~20 msgs/min with a small burst) and its messages leave in the order
+    they were sent. On top of that one global bucket caps the whole bot;
+    when it is contended, waiting requests are served by priority lane, so
+    game results go out before notices. A 429 blocks the chat's bucket for
+    retry_after seconds and the request is retried. An edit of a message
+    that already has an edit waiting replaces it, and both callers get the
+    result of the newest one.
+    """
+
+    PRUNE_AT = 1024  # chat lanes kept before idle ones are swept
+
+    def __init__(self, global_rate: float = 25.0, global_burst: float = 30.0,
+                 private_rate: float = 1.0, private_burst: float = 3.0,
+                 group_rate: float = 20 / 60, group_burst: float = 8.0,
+                 max_retries: int = 3):
+        self.global_bucket = TokenBucket(global_rate, global_burst)
+        self.private_rate, self.private_burst = private_rate, private_burst
+        self.group_rate, self.group_burst = group_rate, group_burst
+        self.max_retries = max_retries
+        self._chats: Dict[Union[int, str], _ChatLane] = {}
+        self._prune_at = self.PRUNE_AT
+        self._pending_edits: Dict[Tuple, _PendingEdit] = {}
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._pump: Optional[asyncio.Task] = None
+        self.waiting = {PRIORITY_RESULT: 0, PRIORITY_NOTICE: 0}
+        self.sent = 0
+        self.retried = 0
+        self.coalesced = 0
+        self.failed = 0
+        self._latency_total = 0.0
+        self.max_latency = 0.0
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        if self._pump is not None:
+            self._pump.cancel()
+            self._pump = None
+
+    # --- global bucket, served by priority ---
+
+    async def _acquire_global(self, priority: int):
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), future))
+        if self._pump is None or self._pump.done():
+            self._pump = asyncio.create_task(self._run_pump())
+        await future
+
+    async def _run_pump(self):
+        while self._waiters:
+            wait = self.global_bucket.delay()
+            if wait > 0:
+                await asyncio.sleep(wait)
+                continue
+            _, _, future = heapq.heappop(self._waiters)
+            if future.done():
+                continue  # caller was cancelled
+            self.global_bucket.take()
+            future.set_result(None)
+
+    # --- per-chat lanes ---
+
+    def _lane(self, chat_id) -> _ChatLane:
+        lane = self._chats.get(chat_id)
+        if lane is None:
+            if len(self._chats) >= self._prune_at:
+                self._prune()
+            is_group = isinstance(chat_id, str) or chat_id < 0
+            bucket = (TokenBucket(self.group_rate, self.group_burst) if is_group
+                      else TokenBucket(self.private_rate, self.private_burst))
+            lane = self._chats[chat_id] = _ChatLane(bucket)
+        return lane
+
+    def _prune(self):
+        """Forget chats that have nothing queued and a full bucket again."""
+        for chat_id in [cid for cid, lane in self._chats.items() if lane.users == 0 and lane.bucket.idle()]:
+            del self._chats[chat_id]
+        self._prune_at = max(self.PRUNE_AT, len(self._chats) * 2)
+
+    def _release_lane(self, chat_id, lane: _ChatLane):
+        lane.users -= 1
+        if lane.users == 0 and lane.bucket.idle():
+            self._chats.pop(chat_id, None)
+
+    async def process_request(
+        self,
+        callback: Callable[..., Coroutine[Any, Any, Union[bool, Dict[str, Any], None]]],
+        args: Any,
+        kwargs: Dict[str, Any],
+        endpoint: str,
+        data: Dict[str, Any],
+        rate_limit_args: Optional[Dict[str, Any]],
+    ) -> Union[bool, Dict[str, Any], None]:
+        chat_id = data.get("chat_id")
+        if endpoint not in THROTTLED_ENDPOINTS or chat_id is None:
+            return await self._call(callback, args, kwargs, None)
+
+        priority = (rate_limit_args or {}).get("priority", PRIORITY_RESULT)
+        edit_key = None
+        if endpoint in COALESCED_ENDPOINTS and data.get("message_id") is not None:
+            edit_key = (endpoint, chat_id, data["message_id"])
+            pending = self._pending_edits.get(edit_key)
+            if pending is not None:
+                # An older edit of this message has not gone out yet: send ours in its place
+                pending.args, pending.kwargs = args, kwargs
+                pending.merged += 1
+                self.coalesced += 1
+                return await asyncio.shield(pending.future)
+            pending = self._pending_edits[edit_key] = _PendingEdit(args, kwargs)
+
+        queued_at = time.monotonic()
+        self.waiting[priority] = self.waiting.get(priority, 0) + 1
+        lane = self._lane(chat_id)
+        lane.users += 1
+        try:
+            async with lane.lock:
+                while True:
+                    wait = lane.bucket.delay()
+                    if wait <= 0:
+                        break
+                    await asyncio.sleep(wait)
+                await self._acquire_global(priority)
+                lane.bucket.take()
+                self.waiting[priority] -= 1
+                latency = time.monotonic() - queued_at
+                queued_at = None
+                self._latency_total += latency
+                self.max_latency = max(self.max_latency, latency)
+                if edit_key is not None:
+                    self._pending_edits.pop(edit_key, None)
+                    args, kwargs = pending.args, pending.kwargs
+                try:
+                    result = await self._call(callback, args, kwargs, lane.bucket)
+                except BaseException as e:
+                    if edit_key is not None and pending.merged and not pending.future.done():
+                        pending.future.set_exception(e)
+                        pending.future.exception()  # mark retrieved
+                    raise
+                if edit_key is not None and not pending.future.done():
+                    pending.future.set_result(result)
+                return result
+        finally:
+            if queued_at is not None:
+                self.waiting[priority] -= 1
+                if edit_key is not None and self._pending_edits.get(edit_key) is pending:
+                    self._pending_edits.pop(edit_key, None)
+                    if not pending.future.done():
+                        pending.future.cancel()
+            self._release_lane(chat_id, lane)
+
+    async def _call(self, callback, args, kwargs, bucket: Optional[TokenBucket]):
+        attempt = 0
+        while True:
+            try:
+                result = await callback(*args, **kwargs)
+                self.sent += 1
+                return result
+            except RetryAfter as e:
+                attempt += 1
+                self.retried += 1
+                retry_after = e.retry_after.total_seconds() if hasattr(e.retry_after, "total_seconds") else float(e.retry_after)
+                if attempt > self.max_retries:
+                    self.failed += 1
+                    logger.error(f"[OUTBOUND] Giving up after {attempt} flood waits ({retry_after}s)")
+                    raise
+                logger.warning(f"[OUTBOUND] Flood limit hit, retrying in {retry_after}s")
+                (bucket or self.global_bucket).block(retry_after)
+                await asyncio.sleep(retry_after)
+            except Exception:
+                self.failed += 1
+                raise
+
+    def stats(self) -> Dict[str, Any]:
+        done = self.sent or 1
+        return {
+            "waiting_results": self.waiting.get(PRIORITY_RESULT, 0),
+            "waiting_notices": self.waiting.get(PRIORITY_NOTICE, 0),
+            "chats": len(self._chats),
+            "sent": self.sent,
+            "retried": self.retried,
+            "coalesced": self.coalesced,
+            "failed": self.failed,
+            "avg_latency_ms": self._latency_total / done * 1000,
+            "max_latency_ms": self.max_latency * 1000,
+        }
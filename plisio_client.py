@@ -0,0 +1,213 @@
+import asyncio
+import logging
+import os
+import random
+import time
+from typing import Any, Callable, Dict, Optional
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+
+class PlisioError(Exception):
+    """Plisio could not be reached or answered with a server error."""
+
+
+class PlisioOutcomeUnknown(PlisioError):
+    """The request reached Plisio but no usable answer came back (timeout, dropped connection, 5xx); it may have been carried out."""
+
+
+class CircuitOpenError(PlisioError):
+    """Plisio has been failing; calls are refused until the breaker half-opens."""
+
+
+class CircuitBreaker:
+    """Opens after `threshold` consecutive failures and lets one probe through after `reset_after` seconds."""
+
+    def __init__(self, threshold: int = 5, reset_after: float = 30.0, name: str = "plisio"):
+        self.name = name
+        self.threshold = threshold
+        self.reset_after = reset_after
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._probe_started: Optional[float] = None
+        self.trips = 0
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_after:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        now = time.monotonic()
+        # One probe at a time; a probe that never reported back (cancelled) is replaced after reset_after
+        if state == "half-open" and (self._probe_started is None or now - self._probe_started >= self.reset_after):
+            self._probe_started = now
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._probe_started = None
+
+    def record_failure(self):
+        self.failures += 1
+        probing = self._probe_started is not None
+        if probing or self.failures >= self.threshold:
+            if self.opened_at is None or probing:
+                self.trips += 1
+                logger.warning(f"[PLISIO] {self.name} circuit open after {self.failures} failures")
+            self.opened_at = time.monotonic()
+        self._probe_started = None
+
+
+class _EndpointStats:
+    __slots__ = ("calls", "errors", "latency_total", "latency_max")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+
+
+class PlisioClient:
+    """One long-lived HTTP client for every Plisio call.
+
+    Keeps a keep-alive connection pool instead of a new session (TCP + TLS
+    handshake) per request. Each endpoint has its own timeout, read-only
+    endpoints are retried with jittered backoff, and each endpoint has its
+    own circuit breaker, so a slow withdrawal endpoint does not stop price
+    lookups or deposits. Money-moving calls (invoices, withdrawals) are
+    never retried automatically; when one cannot tell whether Plisio acted
+    it raises PlisioOutcomeUnknown.
+
+    PLISIO_API_URL overrides the base URL, e.g. to point at a local stub.
+    """
+
+    BASE_URL = "https://api.plisio.net/api/v1"
+
+    # endpoint (first path segment) -> (total timeout seconds, retries)
+    ENDPOINTS = {
+        "currencies": (5.0, 2),
+        "balances": (5.0, 2),
+        "invoices": (10.0, 0),
+        "operations": (20.0, 0),
+    }
+    DEFAULT_ENDPOINT = (10.0, 0)
+
+    def __init__(self, api_key: Optional[str] = None, base_url: Optional[str] = None,
+                 pool_size: int = 20, breaker_factory: Optional[Callable[[str], CircuitBreaker]] = None):
+        self._api_key = api_key
+        self.base_url = (base_url or os.getenv("PLISIO_API_URL") or self.BASE_URL).rstrip("/")
+        self.pool_size = pool_size
+        self._breaker_factory = breaker_factory or (lambda endpoint: CircuitBreaker(name=endpoint))
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._stats: Dict[str, _EndpointStats] = {}
+
+    @property
+    def api_key(self) -> Optional[str]:
+        return self._api_key or os.getenv("PLISIO_API_KEY")
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.pool_size, keepalive_timeout=60, ttl_dns_cache=300)
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+
+    def breaker(self, endpoint: str) -> CircuitBreaker:
+        breaker = self._breakers.get(endpoint)
+        if breaker is None:
+            breaker = self._breakers[endpoint] = self._breaker_factory(endpoint)
+        return breaker
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def get(self, path: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """GET {base_url}/{path} with the API key added; returns the decoded JSON body.
+
+        Plisio application errors (status != "success") are returned as-is for
+        the caller to read. Once retries are exhausted, connection errors
+        raise PlisioError, and timeouts, dropped connections and 5xx responses
+        (where Plisio may have acted) raise PlisioOutcomeUnknown.
+        CircuitOpenError is raised without a request while the endpoint's
+        breaker is open.
+        """
+        endpoint = path.strip("/").split("/", 1)[0]
+        timeout, retries = self.ENDPOINTS.get(endpoint, self.DEFAULT_ENDPOINT)
+        stats = self._stats.get(endpoint)
+        if stats is None:
+            stats = self._stats[endpoint] = _EndpointStats()
+        query = dict(params or {})
+        query.setdefault("api_key", self.api_key)
+        breaker = self.breaker(endpoint)
+
+        attempt = 0
+        while True:
+            if not breaker.allow():
+                stats.errors += 1
+                raise CircuitOpenError(f"Plisio circuit open, refusing {endpoint}")
+            started = time.monotonic()
+            stats.calls += 1
+            try:
+                async with self._get_session().get(f"{self.base_url}/{path.strip('/')}", params=query,
+                                                   timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+                    if response.status >= 500:
+                        raise PlisioOutcomeUnknown(f"HTTP {response.status}")
+                    result = await response.json(content_type=None)
+                failure = None
+            except (aiohttp.ClientError, asyncio.TimeoutError, PlisioError, ValueError) as e:
+                failure = e
+            finally:
+                elapsed = time.monotonic() - started
+                stats.latency_total += elapsed
+                stats.latency_max = max(stats.latency_max, elapsed)
+
+            if failure is None:
+                breaker.record_success()
+                return result if isinstance(result, dict) else {"status": "error", "data": result}
+
+            stats.errors += 1
+            breaker.record_failure()
+            if isinstance(failure, PlisioError):
+                error = failure
+            elif isinstance(failure, (asyncio.TimeoutError, aiohttp.ServerDisconnectedError)):
+                error = PlisioOutcomeUnknown(f"{type(failure).__name__}: {failure}")
+            else:
+                error = PlisioError(f"{type(failure).__name__}: {failure}")
+            if attempt >= retries:
+                if error is failure:
+                    raise error
+                raise error from failure
+            attempt += 1
+            delay = 0.25 * (2 ** attempt) * random.uniform(0.5, 1.5)
+            logger.warning(f"[PLISIO] {endpoint} failed ({error}), retry {attempt}/{retries} in {delay:.2f}s")
+            await asyncio.sleep(delay)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "open": [name for name, b in self._breakers.items() if b.state != "closed"],
+            "trips": sum(b.trips for b in self._breakers.values()),
+            "endpoints": {
+                name: {
+                    "breaker": self.breaker(name).state,
+                    "calls": s.calls,
+                    "errors": s.errors,
+                    "avg_ms": s.latency_total / (s.calls or 1) * 1000,
+                    "max_ms": s.latency_max * 1000,
+                }
+                for name, s in self._stats.items()
+            },
+        }
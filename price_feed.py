@@ -0,0 +1,121 @@
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class PriceFeed:
+    """USD prices for every Plisio currency, refreshed in the background.
+
+    One task pulls the full currencies list every refresh_seconds and keeps it
+    in a dict keyed by currency id, so handlers read a price in O(1) without a
+    network round trip. Prices older than stale_after are not served. When a
+    caller does have to wait (cold start, feed stale), concurrent callers share
+    one in-flight request instead of each hitting the API.
+    """
+
+    def __init__(self, client, refresh_seconds: float = 60.0, stale_after: float = 300.0):
+        self.client = client
+        self.refresh_seconds = refresh_seconds
+        self.stale_after = stale_after
+        self._prices: Dict[str, float] = {}
+        self.updated_at: Optional[float] = None
+        self._inflight: Optional[asyncio.Task] = None
+        self._task: Optional[asyncio.Task] = None
+        self.refreshes = 0
+        self.failures = 0
+
+    @property
+    def age(self) -> Optional[float]:
+        """Seconds since the last successful refresh (None if there never was one)."""
+        if self.updated_at is None:
+            return None
+        return time.monotonic() - self.updated_at
+
+    @property
+    def fresh(self) -> bool:
+        age = self.age
+        return age is not None and age <= self.stale_after
+
+    def price(self, currency: str) -> Optional[float]:
+        """Cached price, or None if unknown or the feed is stale. Never waits."""
+        if not self.fresh:
+            return None
+        return self._prices.get(currency)
+
+    async def get(self, currency: str) -> Optional[float]:
+        """Cached price; if the feed is stale, join (or start) one refresh first."""
+        price = self.price(currency)
+        if price is None and not self.fresh:
+            await self.refresh()
+            price = self.price(currency)
+        return price
+
+    async def refresh(self) -> bool:
+        """Fetch all prices now. Concurrent calls share the same request."""
+        if self._inflight is None or self._inflight.done():
+            self._inflight = asyncio.get_running_loop().create_task(self._fetch())
+        return await asyncio.shield(self._inflight)
+
+    async def _fetch(self) -> bool:
+        try:
+            result = await self.client.get("currencies/USD")
+        except Exception as e:
+            self.failures += 1
+            logger.warning(f"[PRICES] Refresh failed: {e}")
+            return False
+        if result.get('status') != 'success':
+            self.failures += 1
+            logger.warning(f"[PRICES] Refresh rejected: {result}")
+            return False
+
+        prices = {}
+        for curr in result.get('data', []):
+            try:
+                price = float(curr.get('price_usd') or 0)
+            except (TypeError, ValueError):
+                continue
+            if curr.get('cid') and price > 0:
+                prices[curr['cid']] = price
+        if not prices:
+            self.failures += 1
+            logger.warning("[PRICES] Refresh returned no prices")
+            return False
+
+        self._prices = prices
+        self.updated_at = time.monotonic()
+        self.refreshes += 1
+        logger.debug(f"[PRICES] Refreshed {len(prices)} currencies")
+        return True
+
+    async def _run(self):
+        while True:
+            await self.refresh()
+            await asyncio.sleep(self.refresh_seconds)
+
+    def start(self):
+        """Start the refresh task on the running loop (idempotent)."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        for task in (self._task, self._inflight):
+            if task is not None and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._task = None
+        self._inflight = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "currencies": len(self._prices),
+            "age": self.age,
+            "fresh": self.fresh,
+            "refreshes": self.refreshes,
+            "failures": self.failures,
+        }
@@ -0,0 +1,213 @@
+import json
+import logging
+import time
+from typing import Any, Callable, Dict, Hashable, List, Optional, Set, Tuple
+
+from bounded_store import BoundedStore
+from session_store import SessionStore
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class _Section:
+    __slots__ = ("store", "encode", "decode", "reads", "urgent")
+
+    def __init__(self, store: BoundedStore, encode: Callable[[Any], Any], decode: Callable[[Any], Any],
+                 reads: bool, urgent: bool):
+        self.store = store
+        self.encode = encode
+        self.decode = decode
+        self.reads = reads
+        self.urgent = urgent
+
+
+def _encode_key(key: Hashable) -> str:
+    return json.dumps(key, separators=(",", ":"))
+
+
+def _decode_key(text: str) -> Hashable:
+    key = json.loads(text)
+    # Tuple keys such as (chat_id, message_id) come back from JSON as lists
+    return tuple(key) if isinstance(key, list) else key
+
+
+class SessionSnapshots:
+    """Keeps a copy of live sessions in a SessionStore so a restart does not lose them.
+
+    Each tracked BoundedStore is a section; its on_change hook marks keys
+    dirty. Game objects are changed in place after being fetched, so for game
+    sessions a read counts as a change too. Dirty keys are written together
+    every `interval` seconds: one put_many for the keys still present and one
+    delete_many for those that went, all in one namespace, however many taps
+    happened in between. A game starting or ending (where the wager or payout
+    moves) is written before the change returns, together with whatever else
+    is pending, so a game that has settled is not resumed after a crash
+    unless that write itself failed (it is then retried every interval).
+
+    Armed timers that must survive a restart (move timeouts, auto-play) are
+    kept as a "timer" section via remember_timer()/forget_timer() and handed
+    back by restore() for the bot to re-arm.
+
+    flush() writes everything pending; call it on graceful shutdown.
+    """
+
+    TIMERS = "timer"
+
+    def __init__(self, store: SessionStore, timers, namespace: str, interval: float = 2.0):
+        self.store = store
+        self.timers = timers
+        self.namespace = namespace
+        self.interval = interval
+        self._sections: Dict[str, _Section] = {}
+        self._armed_timers: Dict[str, Dict[str, Any]] = {}
+        self._dirty: Set[Tuple[str, Hashable]] = set()
+        self._stored: Set[Tuple[str, Hashable]] = set()
+        self._flush_due: Optional[float] = None
+        self._restoring = False
+        self.flushes = 0
+        self.written = 0
+        self.deleted = 0
+        self.failures = 0
+        self.restored = 0
+        self.last_flush_ms = 0.0
+
+    def track(self, name: str, store: BoundedStore, encode: Callable[[Any], Any] = lambda v: v,
+              decode: Callable[[Any], Any] = lambda v: v, reads: bool = False, urgent: bool = False):
+        """Snapshot store as section name; reads=True treats a read as a change, urgent=True writes starts and ends synchronously."""
+        self._sections[name] = _Section(store, encode, decode, reads, urgent)
+        store.on_change = lambda key, event: self._changed(name, key, event)
+
+    def _changed(self, name: str, key: Hashable, event: str):
+        if self._restoring:
+            return
+        section = self._sections[name]
+        if event == "get" and not section.reads:
+            return
+        entry = (name, key)
+        self._dirty.add(entry)
+        if section.urgent and (event == "del" or (event == "set" and entry not in self._stored)):
+            self.flush()
+        else:
+            self._schedule(self.interval)
+
+    def remember_timer(self, name: str, kind: str, *args):
+        """Record an armed timer (args must be JSON-serialisable) so restore() can hand it back."""
+        self._armed_timers[name] = {"kind": kind, "args": list(args)}
+        self._dirty.add((self.TIMERS, name))
+        self._schedule(self.interval)
+
+    def forget_timer(self, name: str):
+        if self._armed_timers.pop(name, None) is not None:
+            self._dirty.add((self.TIMERS, name))
+            self._schedule(self.interval)
+
+    def _schedule(self, delay: float):
+        due = time.monotonic() + delay
+        if self._flush_due is not None and self._flush_due <= due:
+            return
+        self._flush_due = due
+        self.timers.schedule("session_snapshots", delay, self._flush_timer)
+
+    async def _flush_timer(self):
+        self._flush_due = None
+        self.flush()
+
+    def _current(self, name: str, key: Hashable) -> Any:
+        if name == self.TIMERS:
+            return self._armed_timers.get(key, _MISSING)
+        # Read past the store's hooks and expiry; this must not count as a use
+        return dict.get(self._sections[name].store, key, _MISSING)
+
+    def flush(self) -> int:
+        """Write every dirty key in one batch; returns how many keys were written or deleted."""
+        if not self._dirty:
+            return 0
+        dirty, self._dirty = self._dirty, set()
+        start = time.perf_counter()
+        puts: Dict[str, Any] = {}
+        deletes: Dict[str, Tuple[str, Hashable]] = {}
+        written = []
+        for entry in dirty:
+            name, key = entry
+            value = self._current(name, key)
+            store_key = f"{name}|{key if name == self.TIMERS else _encode_key(key)}"
+            if value is _MISSING:
+                if entry in self._stored:
+                    deletes[store_key] = entry
+                continue
+            try:
+                puts[store_key] = value if name == self.TIMERS else self._sections[name].encode(value)
+                written.append(entry)
+            except Exception as e:
+                logger.error(f"[SNAPSHOT] Could not serialize {name} {key}: {e}")
+        try:
+            if puts:
+                self.store.put_many(self.namespace, puts)
+            if deletes:
+                self.store.delete_many(self.namespace, list(deletes))
+        except Exception as e:
+            # Keep the keys dirty and try again on the next interval
+            self.failures += 1
+            self._dirty |= dirty
+            self._schedule(self.interval)
+            logger.error(f"[SNAPSHOT] Writing {len(puts)} sessions and deleting {len(deletes)} failed: {e}")
+            return 0
+        self._stored.update(written)
+        self._stored.difference_update(deletes.values())
+        self.flushes += 1
+        self.written += len(puts)
+        self.deleted += len(deletes)
+        self.last_flush_ms = (time.perf_counter() - start) * 1000
+        return len(puts) + len(deletes)
+
+    def restore(self) -> List[Tuple[str, str, List[Any]]]:
+        """Load every snapshot back into its store; returns the saved timers as (name, kind, args) to re-arm."""
+        start = time.perf_counter()
+        timers = []
+        counts: Dict[str, int] = {}
+        self._restoring = True
+        try:
+            for store_key, (value, _version) in self.store.get_many(self.namespace).items():
+                name, _, raw_key = store_key.partition("|")
+                if name == self.TIMERS:
+                    self._armed_timers[raw_key] = value
+                    self._stored.add((name, raw_key))
+                    timers.append((raw_key, value["kind"], value["args"]))
+                    continue
+                section = self._sections.get(name)
+                if section is None:
+                    continue
+                key = _decode_key(raw_key)
+                try:
+                    section.store[key] = section.decode(value)
+                except Exception as e:
+                    logger.error(f"[SNAPSHOT] Could not restore {name} {key}: {e}")
+                    self._dirty.add((name, key))
+                    self._stored.add((name, key))
+                    continue
+                self._stored.add((name, key))
+                counts[name] = counts.get(name, 0) + 1
+        finally:
+            self._restoring = False
+        if self._dirty:
+            # Snapshots that no longer load are deleted by the next flush
+            self._schedule(self.interval)
+        self.restored = sum(counts.values())
+        summary = ", ".join(f"{name} {n}" for name, n in counts.items()) or "nothing"
+        logger.info(f"[SNAPSHOT] Restored {summary} and {len(timers)} timers in "
+                    f"{(time.perf_counter() - start) * 1000:.0f}ms")
+        return timers
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "dirty": len(self._dirty),
+            "stored": len(self._stored),
+            "flushes": self.flushes,
+            "written": self.written,
+            "deleted": self.deleted,
+            "failures": self.failures,
+            "restored": self.restored,
+            "last_flush_ms": self.last_flush_ms,
+        }
@@ -0,0 +1,353 @@
+import json
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, NamedTuple, Optional
+
+try:
+    import redis
+except ImportError:  # optional; only needed for SESSION_STORE=redis://...
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+
+class Versioned(NamedTuple):
+    value: Any
+    version: int
+
+
+class SessionStore:
+    """Session state and worker leases shared by every bot worker.
+
+    Values are JSON-serialisable and live under (namespace, key). Every write
+    bumps the key's version; compare_and_set() only writes if the version is
+    still the one the caller read (0 meaning "must not exist yet"), so two
+    workers racing on one key cannot both win.
+
+    Leases give one worker ownership of a name (e.g. "user:42") for ttl
+    seconds. The owner renews by acquiring again; anyone else gets False
+    until the owner releases the lease or lets it expire.
+
+    Backends: MemorySessionStore (single process, and the stand-in for
+    tests), SQLSessionStore (the bot database) and RedisSessionStore (any
+    server speaking the Redis protocol). Use create_session_store() to pick
+    one from a URL.
+    """
+
+    backend = "abstract"
+
+    def __init__(self):
+        self.conflicts = 0
+        self.leases_denied = 0
+
+    def get(self, namespace: str, key: str) -> Optional[Versioned]:
+        raise NotImplementedError
+
+    def get_many(self, namespace: str) -> Dict[str, Versioned]:
+        """Every key in namespace."""
+        raise NotImplementedError
+
+    def put(self, namespace: str, key: str, value: Any) -> int:
+        """Write value unconditionally; returns the new version."""
+        return self.put_many(namespace, {key: value})[key]
+
+    def put_many(self, namespace: str, items: Dict[str, Any]) -> Dict[str, int]:
+        """Write several values unconditionally, in one round trip where the backend allows."""
+        raise NotImplementedError
+
+    def compare_and_set(self, namespace: str, key: str, value: Any, expected_version: int) -> Optional[int]:
+        """Write value if key is at expected_version; the new version, or None if another write got there first."""
+        version = self._compare_and_set(namespace, key, value, expected_version)
+        if version is None:
+            self.conflicts += 1
+        return version
+
+    def _compare_and_set(self, namespace: str, key: str, value: Any, expected_version: int) -> Optional[int]:
+        raise NotImplementedError
+
+    def delete(self, namespace: str, key: str, expected_version: Optional[int] = None) -> bool:
+        """Delete key (only if still at expected_version, when given); True if it was deleted."""
+        return self.delete_many(namespace, [key], expected_version) > 0
+
+    def delete_many(self, namespace: str, keys: Iterable[str], expected_version: Optional[int] = None) -> int:
+        raise NotImplementedError
+
+    def acquire_lease(self, name: str, owner: str, ttl: float) -> bool:
+        """Take the lease, or renew it if owner already holds it."""
+        acquired = self._acquire_lease(name, owner, ttl)
+        if not acquired:
+            self.leases_denied += 1
+        return acquired
+
+    def _acquire_lease(self, name: str, owner: str, ttl: float) -> bool:
+        raise NotImplementedError
+
+    def release_lease(self, name: str, owner: str) -> bool:
+        """Give the lease up; a no-op (False) unless owner holds it."""
+        raise NotImplementedError
+
+    def lease_owner(self, name: str) -> Optional[str]:
+        """The current holder of an unexpired lease, or None."""
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": self.backend, "conflicts": self.conflicts, "leases_denied": self.leases_denied}
+
+
+class MemorySessionStore(SessionStore):
+    """A store inside this process: the default for a single worker, and the stand-in for tests.
+
+    Values are kept JSON-encoded, so they behave like the shared backends:
+    nothing unserialisable gets in and readers never share objects with
+    writers. `clock` can be replaced to expire leases without waiting.
+    """
+
+    backend = "memory"
+
+    def __init__(self, clock: Callable[[], float] = time.time):
+        super().__init__()
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._data: Dict[str, Dict[str, Versioned]] = {}
+        self._leases: Dict[str, Versioned] = {}  # name -> (owner, expires_at)
+
+    def get(self, namespace: str, key: str) -> Optional[Versioned]:
+        with self._lock:
+            entry = self._data.get(namespace, {}).get(key)
+        return Versioned(json.loads(entry.value), entry.version) if entry else None
+
+    def get_many(self, namespace: str) -> Dict[str, Versioned]:
+        with self._lock:
+            entries = dict(self._data.get(namespace, {}))
+        return {key: Versioned(json.loads(e.value), e.version) for key, e in entries.items()}
+
+    def put_many(self, namespace: str, items: Dict[str, Any]) -> Dict[str, int]:
+        encoded = {key: json.dumps(value) for key, value in items.items()}
+        versions = {}
+        with self._lock:
+            space = self._data.setdefault(namespace, {})
+            for key, value in encoded.items():
+                old = space.get(key)
+                versions[key] = (old.version if old else 0) + 1
+                space[key] = Versioned(value, versions[key])
+        return versions
+
+    def _compare_and_set(self, namespace: str, key: str, value: Any, expected_version: int) -> Optional[int]:
+        encoded = json.dumps(value)
+        with self._lock:
+            space = self._data.setdefault(namespace, {})
+            old = space.get(key)
+            if (old.version if old else 0) != expected_version:
+                return None
+            space[key] = Versioned(encoded, expected_version + 1)
+            return expected_version + 1
+
+    def delete_many(self, namespace: str, keys: Iterable[str], expected_version: Optional[int] = None) -> int:
+        deleted = 0
+        with self._lock:
+            space = self._data.get(namespace, {})
+            for key in keys:
+                old = space.get(key)
+                if old and (expected_version is None or old.version == expected_version):
+                    del space[key]
+                    deleted += 1
+        return deleted
+
+    def _acquire_lease(self, name: str, owner: str, ttl: float) -> bool:
+        now = self.clock()
+        with self._lock:
+            held = self._leases.get(name)
+            if held and held.value != owner and held.version > now:
+                return False
+            self._leases[name] = Versioned(owner, now + ttl)
+            return True
+
+    def release_lease(self, name: str, owner: str) -> bool:
+        with self._lock:
+            held = self._leases.get(name)
+            if held and held.value == owner:
+                del self._leases[name]
+                return True
+            return False
+
+    def lease_owner(self, name: str) -> Optional[str]:
+        with self._lock:
+            held = self._leases.get(name)
+        return held.value if held and held.version > self.clock() else None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            keys = sum(len(space) for space in self._data.values())
+            leases = len(self._leases)
+        return {**super().stats(), "keys": keys, "leases": leases}
+
+
+class SQLSessionStore(SessionStore):
+    """A store in the bot's database (tables session_state and session_leases).
+
+    Needs nothing beyond the database the bot already has; each call is a
+    short transaction, and put_many/delete_many write a batch in one.
+    Lease expiry uses wall-clock time, so workers' clocks should be in sync
+    to well within the lease ttl.
+    """
+
+    backend = "sql"
+
+    def __init__(self, db, clock: Callable[[], float] = time.time):
+        super().__init__()
+        self.db = db
+        self.clock = clock
+
+    def get(self, namespace: str, key: str) -> Optional[Versioned]:
+        row = self.db.get_session_state(namespace, key)
+        return Versioned(*row) if row else None
+
+    def get_many(self, namespace: str) -> Dict[str, Versioned]:
+        return {key: Versioned(*row) for key, row in self.db.get_session_states(namespace).items()}
+
+    def put_many(self, namespace: str, items: Dict[str, Any]) -> Dict[str, int]:
+        return self.db.put_session_states(namespace, items) if items else {}
+
+    def _compare_and_set(self, namespace: str, key: str, value: Any, expected_version: int) -> Optional[int]:
+        return self.db.cas_session_state(namespace, key, value, expected_version)
+
+    def delete_many(self, namespace: str, keys: Iterable[str], expected_version: Optional[int] = None) -> int:
+        keys = list(keys)
+        return self.db.delete_session_states(namespace, keys, expected_version) if keys else 0
+
+    def _acquire_lease(self, name: str, owner: str, ttl: float) -> bool:
+        return self.db.acquire_lease(name, owner, ttl, self.clock())
+
+    def release_lease(self, name: str, owner: str) -> bool:
+        return self.db.release_lease(name, owner)
+
+    def lease_owner(self, name: str) -> Optional[str]:
+        return self.db.get_lease_owner(name, self.clock())
+
+
+# Each value is a hash {v: version, d: JSON}; a set per namespace lists its keys.
+# The scripts run atomically on the server, which is what makes CAS and leases safe.
+_REDIS_PUT = """
+local v = redis.call('HINCRBY', KEYS[1], 'v', 1)
+redis.call('HSET', KEYS[1], 'd', ARGV[1])
+redis.call('SADD', KEYS[2], ARGV[2])
+return v
+"""
+_REDIS_CAS = """
+local v = tonumber(redis.call('HGET', KEYS[1], 'v') or '0')
+if v ~= tonumber(ARGV[1]) then return -1 end
+redis.call('HSET', KEYS[1], 'v', v + 1, 'd', ARGV[2])
+redis.call('SADD', KEYS[2], ARGV[3])
+return v + 1
+"""
+_REDIS_DELETE = """
+if ARGV[1] ~= '' and redis.call('HGET', KEYS[1], 'v') ~= ARGV[1] then return 0 end
+redis.call('SREM', KEYS[2], ARGV[2])
+return redis.call('DEL', KEYS[1])
+"""
+_REDIS_ACQUIRE = """
+local cur = redis.call('GET', KEYS[1])
+if cur and cur ~= ARGV[1] then return 0 end
+redis.call('SET', KEYS[1], ARGV[1], 'PX', ARGV[2])
+return 1
+"""
+_REDIS_RELEASE = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then return redis.call('DEL', KEYS[1]) end
+return 0
+"""
+
+
+class RedisSessionStore(SessionStore):
+    """A store on a Redis-protocol server (Redis, Valkey, KeyDB, ...).
+
+    Lease expiry is the server's own key TTL, so worker clocks do not matter.
+    Needs the `redis` package.
+    """
+
+    backend = "redis"
+
+    def __init__(self, client, prefix: str = "casino:"):
+        super().__init__()
+        self.client = client
+        self.prefix = prefix
+        self._put = client.register_script(_REDIS_PUT)
+        self._cas = client.register_script(_REDIS_CAS)
+        self._delete = client.register_script(_REDIS_DELETE)
+        self._acquire = client.register_script(_REDIS_ACQUIRE)
+        self._release = client.register_script(_REDIS_RELEASE)
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs) -> "RedisSessionStore":
+        if redis is None:
+            raise RuntimeError("SESSION_STORE is a redis:// URL but the redis package is not installed")
+        return cls(redis.Redis.from_url(url, decode_responses=True), **kwargs)
+
+    def _key(self, namespace: str, key: str) -> str:
+        return f"{self.prefix}s:{namespace}:{key}"
+
+    def _index(self, namespace: str) -> str:
+        return f"{self.prefix}n:{namespace}"
+
+    def _lease(self, name: str) -> str:
+        return f"{self.prefix}l:{name}"
+
+    def get(self, namespace: str, key: str) -> Optional[Versioned]:
+        version, data = self.client.hmget(self._key(namespace, key), "v", "d")
+        return Versioned(json.loads(data), int(version)) if data is not None else None
+
+    def get_many(self, namespace: str) -> Dict[str, Versioned]:
+        keys = sorted(self.client.smembers(self._index(namespace)))
+        pipe = self.client.pipeline(transaction=False)
+        for key in keys:
+            pipe.hmget(self._key(namespace, key), "v", "d")
+        result = {}
+        for key, (version, data) in zip(keys, pipe.execute()):
+            if data is not None:
+                result[key] = Versioned(json.loads(data), int(version))
+        return result
+
+    def put_many(self, namespace: str, items: Dict[str, Any]) -> Dict[str, int]:
+        pipe = self.client.pipeline(transaction=False)
+        for key, value in items.items():
+            self._put(keys=[self._key(namespace, key), self._index(namespace)],
+                      args=[json.dumps(value), key], client=pipe)
+        return dict(zip(items, (int(v) for v in pipe.execute())))
+
+    def _compare_and_set(self, namespace: str, key: str, value: Any, expected_version: int) -> Optional[int]:
+        version = int(self._cas(keys=[self._key(namespace, key), self._index(namespace)],
+                                args=[expected_version, json.dumps(value), key]))
+        return version if version > 0 else None
+
+    def delete_many(self, namespace: str, keys: Iterable[str], expected_version: Optional[int] = None) -> int:
+        keys = list(keys)
+        if not keys:
+            return 0
+        expected = "" if expected_version is None else str(expected_version)
+        pipe = self.client.pipeline(transaction=False)
+        for key in keys:
+            self._delete(keys=[self._key(namespace, key), self._index(namespace)], args=[expected, key], client=pipe)
+        return sum(int(n) for n in pipe.execute())
+
+    def _acquire_lease(self, name: str, owner: str, ttl: float) -> bool:
+        return bool(self._acquire(keys=[self._lease(name)], args=[owner, max(1, int(ttl * 1000))]))
+
+    def release_lease(self, name: str, owner: str) -> bool:
+        return bool(self._release(keys=[self._lease(name)], args=[owner]))
+
+    def lease_owner(self, name: str) -> Optional[str]:
+        return self.client.get(self._lease(name))
+
+
+def create_session_store(url: Optional[str], db=None) -> SessionStore:
+    """The store named by url: "memory" (the default), "sql" (the bot database) or a redis:// / rediss:// URL."""
+    url = (url or "memory").strip()
+    if url == "memory":
+        return MemorySessionStore()
+    if url == "sql":
+        if db is None:
+            raise ValueError("SESSION_STORE=sql needs the bot database")
+        return SQLSessionStore(db)
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisSessionStore.from_url(url)
+    raise ValueError(f"Unknown SESSION_STORE: {url}")
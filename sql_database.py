@@ -1,22 +1,42 @@
 import os
 import json
+import threading
 from datetime import datetime
-from typing import Dict, Any, Optional, List
-from sqlalchemy import create_engine, Column, Integer, BigInteger, String, Float, DateTime, Text, Boolean, JSON
+from typing import Dict, Any, Optional, List, Tuple
+from sqlalchemy import create_engine, Column, Integer, BigInteger, String, Float, DateTime, Text, Boolean, JSON, Index
+from sqlalchemy import select, insert, update, delete, bindparam, event, func, and_, or_, cast
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.engine import default as engine_default
 from sqlalchemy.orm import sessionmaker, declarative_base
 from sqlalchemy.pool import QueuePool
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 
-engine = create_engine(
-    DATABASE_URL,
-    poolclass=QueuePool,
-    pool_size=5,
-    max_overflow=10,
-    pool_pre_ping=True
-)
+# The engine is created on first use, so importing this module never touches the database
+_engine = None
+_engine_lock = threading.Lock()
+_session_factory = sessionmaker(autocommit=False, autoflush=False)
+
+def get_engine():
+    """Return the shared engine, creating it (and its pool) on the first call."""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                engine = create_engine(
+                    DATABASE_URL,
+                    poolclass=QueuePool,
+                    pool_size=5,
+                    max_overflow=10,
+                    pool_pre_ping=True
+                )
+                event.listen(engine, "after_cursor_execute", _track_statement_cache)
+                _engine = engine
+    return _engine
+
+def SessionLocal():
+    return _session_factory(bind=get_engine())
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
 class User(Base):
@@ -61,6 +81,15 @@ class Game(Base):
     game_snapshot = Column(JSON, nullable=True)
     timestamp = Column(DateTime, default=datetime.now)
 
+class GameParticipant(Base):
+    """One row per user taking part in a game, so history is an indexed lookup instead of a JSON scan."""
+    __tablename__ = "game_participants"
+    __table_args__ = (Index("ix_game_participants_user_game", "user_id", "game_id"),)
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    game_id = Column(Integer, nullable=False)
+    user_id = Column(BigInteger, nullable=False)
+
 class Transaction(Base):
     __tablename__ = "transactions"
     
@@ -109,8 +138,316 @@ class DepositRecord(Base):
     tx_id = Column(String(255), nullable=True)
     timestamp = Column(DateTime, default=datetime.now)
 
+class PendingChallenge(Base):
+    __tablename__ = "pending_challenges"
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    challenge_id = Column(String(255), unique=True, nullable=False, index=True)
+    data = Column(JSON, nullable=False)
+    updated_at = Column(DateTime, default=datetime.now)
+
+class DepositInvoiceOwner(Base):
+    """Which user a pooled deposit invoice was handed to (see DepositAddressPool)."""
+    __tablename__ = "deposit_invoice_owners"
+    
+    order_number = Column(String(255), primary_key=True)
+    user_id = Column(BigInteger, nullable=False, index=True)
+    currency = Column(String(16), nullable=True)
+    assigned_at = Column(DateTime, default=datetime.now)
+
+class WithdrawalRequest(Base):
+    """One withdrawal from request to payout: pending -> sending -> processed/failed, or pending -> denied."""
+    __tablename__ = "withdrawal_requests"
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    user_id = Column(BigInteger, nullable=False, index=True)
+    username = Column(String(255), nullable=True)
+    amount = Column(Float, nullable=False)
+    currency = Column(String(16), default="LTC")
+    wallet_address = Column(String(255), nullable=False)
+    status = Column(String(16), default="pending", index=True)
+    tx_id = Column(String(255), nullable=True)
+    tx_url = Column(String(512), nullable=True)
+    error = Column(Text, nullable=True)
+    timestamp = Column(DateTime, default=datetime.now)
+    updated_at = Column(DateTime, default=datetime.now)
+
+class SessionState(Base):
+    """A versioned value in the shared session store (see session_store.SQLSessionStore)."""
+    __tablename__ = "session_state"
+    __table_args__ = (Index("ix_session_state_namespace_key", "namespace", "key", unique=True),)
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    namespace = Column(String(64), nullable=False)
+    key = Column(String(255), nullable=False)
+    version = Column(Integer, nullable=False, default=1)
+    value = Column(JSON, nullable=False)
+    updated_at = Column(DateTime, default=datetime.now)
+
+class SessionLease(Base):
+    """Which worker owns a lease, until when (epoch seconds, so every worker reads the same clock)."""
+    __tablename__ = "session_leases"
+    
+    name = Column(String(255), primary_key=True)
+    owner = Column(String(255), nullable=False)
+    expires_at = Column(Float, nullable=False)
+
+# --- Pre-built Core statements for the hot query paths ---
+# Built once at import so each call skips ORM query construction; SQLAlchemy's
+# compiled cache then reuses the compiled SQL keyed on these statement objects.
+users_table = User.__table__
+games_table = Game.__table__
+house_config_table = HouseConfig.__table__
+game_participants_table = GameParticipant.__table__
+pending_challenges_table = PendingChallenge.__table__
+invoice_owners_table = DepositInvoiceOwner.__table__
+withdrawals_table = WithdrawalRequest.__table__
+session_state_table = SessionState.__table__
+session_leases_table = SessionLease.__table__
+
+USER_BY_ID_STMT = select(users_table).where(users_table.c.user_id == bindparam("user_id"))
+USERNAME_BY_ID_STMT = select(users_table.c.username).where(users_table.c.user_id == bindparam("user_id"))
+USER_INSERT_STMT = insert(users_table)
+USER_UPDATE_STMT = update(users_table).where(users_table.c.user_id == bindparam("_user_id"))
+
+CONFIG_BY_KEY_STMT = select(house_config_table.c.value).where(house_config_table.c.key == bindparam("key"))
+CONFIG_INSERT_STMT = insert(house_config_table)
+CONFIG_UPDATE_STMT = update(house_config_table).where(house_config_table.c.key == bindparam("_key"))
+
+GAME_BY_ID_STMT = select(games_table).where(games_table.c.id == bindparam("game_id"))
+LATEST_GAMES_STMT = select(games_table).order_by(games_table.c.id.desc()).limit(bindparam("limit"))
+LATEST_GAMES_AFTER_STMT = (
+    select(games_table)
+    .where(games_table.c.id > bindparam("after_id"))
+    .order_by(games_table.c.id.desc())
+    .limit(bindparam("limit"))
+)
+RECENT_GAMES_STMT = select(games_table).order_by(games_table.c.timestamp.desc()).limit(bindparam("limit"))
+
+PARTICIPANT_INSERT_STMT = insert(game_participants_table)
+GAMES_BULK_INSERT_STMT = insert(games_table).returning(games_table.c.id, sort_by_parameter_order=True)
+USER_GAMES_PAGE_STMT = (
+    select(games_table)
+    .join(game_participants_table, game_participants_table.c.game_id == games_table.c.id)
+    .where(game_participants_table.c.user_id == bindparam("user_id"))
+    .order_by(game_participants_table.c.game_id.desc())
+    .limit(bindparam("limit"))
+    .offset(bindparam("offset"))
+)
+USER_GAMES_COUNT_STMT = (
+    select(func.count())
+    .select_from(game_participants_table)
+    .where(game_participants_table.c.user_id == bindparam("user_id"))
+)
+
+# Keys in a game's details that name a player (PvP games have two)
+GAME_PARTICIPANT_KEYS = ("user_id", "player_id", "challenger", "opponent", "player1_id", "player2_id")
+
+CHALLENGE_EXISTS_STMT = select(pending_challenges_table.c.id).where(pending_challenges_table.c.challenge_id == bindparam("challenge_id"))
+CHALLENGE_INSERT_STMT = insert(pending_challenges_table)
+CHALLENGE_UPDATE_STMT = update(pending_challenges_table).where(pending_challenges_table.c.challenge_id == bindparam("_challenge_id"))
+CHALLENGE_DELETE_STMT = pending_challenges_table.delete().where(pending_challenges_table.c.challenge_id == bindparam("challenge_id"))
+ALL_CHALLENGES_STMT = select(pending_challenges_table.c.challenge_id, pending_challenges_table.c.data)
+
+INVOICE_OWNER_STMT = select(invoice_owners_table.c.user_id).where(invoice_owners_table.c.order_number == bindparam("order_number"))
+INVOICE_OWNER_INSERT_STMT = insert(invoice_owners_table)
+
+_withdrawal = withdrawals_table.c
+WITHDRAWAL_INSERT_STMT = insert(withdrawals_table).returning(_withdrawal.id)
+WITHDRAWAL_BY_ID_STMT = select(withdrawals_table).where(_withdrawal.id == bindparam("withdrawal_id"))
+WITHDRAWALS_BY_STATUS_STMT = select(withdrawals_table).where(_withdrawal.status == bindparam("status")).order_by(_withdrawal.id)
+WITHDRAWAL_COUNT_STMT = select(func.count()).select_from(withdrawals_table).where(_withdrawal.status == bindparam("status"))
+# Only moves a withdrawal on from the status the caller saw, so two approvers cannot both claim it
+WITHDRAWAL_TRANSITION_STMT = update(withdrawals_table).where(
+    _withdrawal.id == bindparam("_withdrawal_id"), _withdrawal.status == bindparam("_status"))
+
+_state = session_state_table.c
+_state_key = and_(_state.namespace == bindparam("_namespace"), _state.key == bindparam("_key"))
+STATE_GET_STMT = select(_state.value, _state.version).where(
+    _state.namespace == bindparam("namespace"), _state.key == bindparam("key"))
+STATE_NAMESPACE_STMT = select(_state.key, _state.value, _state.version).where(_state.namespace == bindparam("namespace"))
+STATE_INSERT_STMT = insert(session_state_table)
+STATE_PUT_STMT = update(session_state_table).where(_state_key).values(version=_state.version + 1).returning(_state.version)
+STATE_CAS_STMT = update(session_state_table).where(_state_key, _state.version == bindparam("_version")).values(version=_state.version + 1)
+STATE_DELETE_STMT = delete(session_state_table).where(
+    _state.namespace == bindparam("namespace"), _state.key == bindparam("key"))
+STATE_CAS_DELETE_STMT = delete(session_state_table).where(
+    _state.namespace == bindparam("namespace"), _state.key == bindparam("key"), _state.version == bindparam("version"))
+
+_lease = session_leases_table.c
+LEASE_OWNER_STMT = select(_lease.owner).where(_lease.name == bindparam("name"), _lease.expires_at > bindparam("now"))
+LEASE_INSERT_STMT = insert(session_leases_table)
+# Renew our own lease, or take over one whose owner let it lapse
+LEASE_TAKE_STMT = update(session_leases_table).where(
+    _lease.name == bindparam("_name"),
+    or_(_lease.owner == bindparam("_owner"), _lease.expires_at <= bindparam("now")),
+)
+LEASE_RELEASE_STMT = delete(session_leases_table).where(_lease.name == bindparam("name"), _lease.owner == bindparam("owner"))
+
+USERS_BY_IDS_STMT = select(users_table).where(users_table.c.user_id.in_(bindparam("user_ids", expanding=True)))
+# Narrow variants of USERS_BY_IDS_STMT, one per requested field set, built on first use
+_users_by_ids_field_stmts: Dict[tuple, Any] = {}
+# Relative balance updates (balance = balance + :delta), one per counter set and guard, built on first use
+_balance_update_stmts: Dict[tuple, Any] = {}
+
+def _balance_update_stmt(fields: tuple, guarded: bool):
+    """UPDATE adding :delta to the balance and :inc_<field> to each counter, optionally only while balance >= :_min_balance.
+
+    The arithmetic happens in the database, so two workers changing the same
+    balance can never overwrite each other's result.
+    """
+    stmt = _balance_update_stmts.get((fields, guarded))
+    if stmt is None:
+        c = users_table.c
+        values = {"balance": c.balance + bindparam("delta")}
+        for field in fields:
+            values[field] = func.coalesce(c[field], 0) + bindparam(f"inc_{field}")
+        stmt = update(users_table).where(c.user_id == bindparam("_user_id")).values(**values)
+        if guarded:
+            stmt = stmt.where(c.balance >= bindparam("_min_balance"))
+        _balance_update_stmts[(fields, guarded)] = stmt
+    return stmt
+
+def _increment_fields(increments: Dict[str, float]) -> tuple:
+    fields = tuple(sorted(increments))
+    unknown = [field for field in fields if field not in USER_UPDATABLE_COLUMNS or field == "balance"]
+    if unknown:
+        raise ValueError(f"Cannot increment {unknown}")
+    return fields
+
+def _balance_update_params(user_id: int, delta: float, increments: Dict[str, float]) -> Dict[str, Any]:
+    params = {"_user_id": user_id, "delta": delta}
+    for field, amount in increments.items():
+        params[f"inc_{field}"] = amount
+    return params
+
+# house_config values are text, so the sum is cast back; the read-free update cannot lose a concurrent change
+HOUSE_BALANCE_ADD_STMT = update(house_config_table).where(house_config_table.c.key == "house_balance").values(
+    value=cast(cast(house_config_table.c.value, Float) + bindparam("change"), String))
+
+USER_DATETIME_FIELDS = ('first_wager_date', 'last_bonus_claim', 'last_game_date', 'join_date')
+USER_UPDATABLE_COLUMNS = frozenset(c.name for c in users_table.columns if c.name != 'id')
+
+# Compiled-cache statistics, fed by the engine event registered in get_engine()
+statement_cache_stats = {"hits": 0, "misses": 0, "uncached": 0}
+
+def _track_statement_cache(conn, cursor, statement, parameters, context, executemany):
+    cache_hit = getattr(context, "cache_hit", None)
+    if cache_hit is engine_default.CACHE_HIT:
+        statement_cache_stats["hits"] += 1
+    elif cache_hit is engine_default.CACHE_MISS:
+        statement_cache_stats["misses"] += 1
+    else:
+        statement_cache_stats["uncached"] += 1
+
+def get_statement_cache_stats() -> Dict[str, Any]:
+    """Return hit/miss counters and current size of the engine's compiled cache."""
+    compiled_cache = getattr(_engine, "_compiled_cache", None)
+    total = statement_cache_stats["hits"] + statement_cache_stats["misses"]
+    return {
+        **statement_cache_stats,
+        "hit_ratio": (statement_cache_stats["hits"] / total) if total else 0.0,
+        "size": len(compiled_cache) if compiled_cache is not None else 0,
+        "capacity": getattr(compiled_cache, "capacity", 0),
+    }
+
+def _user_row_to_dict(row) -> Dict[str, Any]:
+    return {
+        "user_id": row["user_id"],
+        "username": row["username"],
+        "balance": row["balance"],
+        "playthrough_required": row["playthrough_required"],
+        "total_wagered": row["total_wagered"],
+        "total_pnl": row["total_pnl"],
+        "games_played": row["games_played"],
+        "games_won": row["games_won"],
+        "win_streak": row["win_streak"],
+        "best_win_streak": row["best_win_streak"],
+        "wagered_since_last_withdrawal": row["wagered_since_last_withdrawal"],
+        "first_wager_date": row["first_wager_date"].isoformat() if row["first_wager_date"] else None,
+        "last_bonus_claim": row["last_bonus_claim"].isoformat() if row["last_bonus_claim"] else None,
+        "last_game_date": row["last_game_date"].isoformat() if row["last_game_date"] else None,
+        "join_date": row["join_date"].isoformat() if row["join_date"] else None,
+        "referral_code": row["referral_code"],
+        "referred_by": row["referred_by"],
+        "referral_count": row["referral_count"],
+        "referral_earnings": row["referral_earnings"],
+        "unclaimed_referral_earnings": row["unclaimed_referral_earnings"],
+        "achievements": row["achievements"] or [],
+        "claimed_level_bonuses": row["claimed_level_bonuses"] or []
+    }
+
+def _game_row_to_summary(g) -> Dict[str, Any]:
+    return {
+        "id": g["id"],
+        "user_id": g["user_id"],
+        "username": g["username"] or f"User{str(g['user_id'])[-4:]}",
+        "game_type": g["game_type"],
+        "wager": g["wager"],
+        "payout": g["payout"],
+        "result": g["result"],
+        "multiplier": g["multiplier"] or 0.0,
+        "timestamp": g["timestamp"].isoformat() if g["timestamp"] else None,
+    }
+
+def _game_row_to_dict(g) -> Dict[str, Any]:
+    """Flat game dict in the shape the old JSON store used (details merged in)."""
+    return {
+        "id": g["id"],
+        "user_id": g["user_id"],
+        "username": g["username"],
+        "game_type": g["game_type"],
+        "game": g["game_type"],
+        "wager": g["wager"],
+        "bet": g["wager"],
+        "payout": g["payout"],
+        "result": g["result"],
+        "multiplier": g["multiplier"] or 0.0,
+        "timestamp": g["timestamp"].isoformat() if g["timestamp"] else None,
+        **(g["details"] or {})
+    }
+
+def _game_participants(user_id, details) -> List[int]:
+    ids = {user_id} if user_id else set()
+    for key in GAME_PARTICIPANT_KEYS:
+        value = (details or {}).get(key)
+        if isinstance(value, int) and not isinstance(value, bool):
+            ids.add(value)
+        elif isinstance(value, str) and value.isdigit():
+            ids.add(int(value))
+    return sorted(ids)
+
+def backfill_game_participants(batch_size: int = 1000) -> int:
+    """Index the participants of games recorded before game_participants existed. Returns rows added."""
+    session = SessionLocal()
+    added = 0
+    try:
+        last_id = session.execute(select(func.max(game_participants_table.c.game_id))).scalar() or 0
+        while True:
+            rows = session.execute(
+                select(games_table.c.id, games_table.c.user_id, games_table.c.details)
+                .where(games_table.c.id > last_id)
+                .order_by(games_table.c.id)
+                .limit(batch_size)
+            ).mappings().all()
+            if not rows:
+                break
+            values = [
+                {"game_id": row["id"], "user_id": uid}
+                for row in rows
+                for uid in _game_participants(row["user_id"], row["details"])
+            ]
+            if values:
+                session.execute(PARTICIPANT_INSERT_STMT, values)
+            session.commit()
+            added += len(values)
+            last_id = rows[-1]["id"]
+        return added
+    finally:
+        session.close()
+
 def init_db():
-    Base.metadata.create_all(bind=engine, checkfirst=True)
+    Base.metadata.create_all(bind=get_engine(), checkfirst=True)
     session = SessionLocal()
     try:
         house_balance = session.query(HouseConfig).filter_by(key="house_balance").first()
@@ -119,6 +456,9 @@ def init_db():
             session.commit()
     finally:
         session.close()
+    added = backfill_game_participants()
+    if added:
+        print(f"Indexed {added} game participants for /history")
 
 class CompatibilityDataProxy:
     def __init__(self, db_manager):
@@ -137,6 +477,8 @@ class CompatibilityDataProxy:
             return self._db.get_house_balance()
         elif key == 'dynamic_admins':
             return self._db.get_dynamic_admins()
+        elif key == 'pending_pvp':
+            return self._db.get_pending_challenges()
         else:
             val = self._db.get_config(key, None)
             if val is None:
@@ -192,30 +534,28 @@ class CompatibilityDataProxy:
     def _get_all_games(self):
         session = self._db.get_session()
         try:
-            games = session.query(Game).order_by(Game.timestamp.desc()).limit(500).all()
-            return [{
-                "id": g.id,
-                "user_id": g.user_id,
-                "username": g.username,
-                "game_type": g.game_type,
-                "game": g.game_type,
-                "wager": g.wager,
-                "bet": g.wager,
-                "payout": g.payout,
-                "result": g.result,
-                "multiplier": g.multiplier or 0.0,
-                "timestamp": g.timestamp.isoformat() if g.timestamp else None,
-                **(g.details or {})
-            } for g in games]
+            games = session.execute(RECENT_GAMES_STMT, {"limit": 500}).mappings().all()
+            return [_game_row_to_dict(g) for g in games]
         finally:
             session.close()
 
 
 class SQLDatabaseManager:
     def __init__(self):
-        init_db()
+        # Schema setup is deferred to the first session (or an explicit connect())
+        self._ready = False
+        self._ready_lock = threading.Lock()
         self._data_proxy = None
     
+    def connect(self):
+        """Create the engine and make sure the schema exists. Runs once; later calls return at once."""
+        if self._ready:
+            return
+        with self._ready_lock:
+            if not self._ready:
+                init_db()
+                self._ready = True
+    
     @property
     def data(self):
         if self._data_proxy is None:
@@ -223,63 +563,135 @@ class SQLDatabaseManager:
         return self._data_proxy
     
     def get_session(self):
+        if not self._ready:
+            self.connect()
         return SessionLocal()
     
+    def get_statement_cache_stats(self) -> Dict[str, Any]:
+        return get_statement_cache_stats()
+    
     def get_user(self, user_id: int) -> Dict[str, Any]:
         session = self.get_session()
         try:
-            user = session.query(User).filter_by(user_id=user_id).first()
-            if not user:
-                user = User(
-                    user_id=user_id,
-                    username=f"User{user_id}",
-                    balance=0.0,
-                    join_date=datetime.now(),
-                    achievements=[],
-                    claimed_level_bonuses=[]
-                )
-                session.add(user)
+            row = session.execute(USER_BY_ID_STMT, {"user_id": user_id}).mappings().first()
+            if not row:
+                session.execute(USER_INSERT_STMT, {
+                    "user_id": user_id,
+                    "username": f"User{user_id}",
+                    "balance": 0.0,
+                    "join_date": datetime.now(),
+                    "achievements": [],
+                    "claimed_level_bonuses": []
+                })
                 session.commit()
-                session.refresh(user)
+                row = session.execute(USER_BY_ID_STMT, {"user_id": user_id}).mappings().first()
             
-            return {
-                "user_id": user.user_id,
-                "username": user.username,
-                "balance": user.balance,
-                "playthrough_required": user.playthrough_required,
-                "total_wagered": user.total_wagered,
-                "total_pnl": user.total_pnl,
-                "games_played": user.games_played,
-                "games_won": user.games_won,
-                "win_streak": user.win_streak,
-                "best_win_streak": user.best_win_streak,
-                "wagered_since_last_withdrawal": user.wagered_since_last_withdrawal,
-                "first_wager_date": user.first_wager_date.isoformat() if user.first_wager_date else None,
-                "last_bonus_claim": user.last_bonus_claim.isoformat() if user.last_bonus_claim else None,
-                "last_game_date": user.last_game_date.isoformat() if user.last_game_date else None,
-                "join_date": user.join_date.isoformat() if user.join_date else None,
-                "referral_code": user.referral_code,
-                "referred_by": user.referred_by,
-                "referral_count": user.referral_count,
-                "referral_earnings": user.referral_earnings,
-                "unclaimed_referral_earnings": user.unclaimed_referral_earnings,
-                "achievements": user.achievements or [],
-                "claimed_level_bonuses": user.claimed_level_bonuses or []
-            }
+            return _user_row_to_dict(row)
         finally:
             session.close()
     
+    def get_users_bulk(self, user_ids, fields=None) -> Dict[int, Dict[str, Any]]:
+        """Look up many users with one IN (...) query; returns {user_id: user dict}.
+        
+        Unlike get_user, missing users are simply absent (nothing is created).
+        With fields, only those columns (plus user_id) are read.
+        """
+        ids = sorted({int(uid) for uid in user_ids if uid})
+        if not ids:
+            return {}
+        if fields:
+            fields = tuple(sorted(set(fields) - {"user_id"}))
+            stmt = _users_by_ids_field_stmts.get(fields)
+            if stmt is None:
+                stmt = _users_by_ids_field_stmts[fields] = (
+                    select(users_table.c.user_id, *(users_table.c[f] for f in fields))
+                    .where(users_table.c.user_id.in_(bindparam("user_ids", expanding=True)))
+                )
+        else:
+            stmt = USERS_BY_IDS_STMT
+        session = self.get_session()
+        try:
+            rows = session.execute(stmt, {"user_ids": ids}).mappings().all()
+        finally:
+            session.close()
+        if not fields:
+            return {row["user_id"]: _user_row_to_dict(row) for row in rows}
+        users = {}
+        for row in rows:
+            user = dict(row)
+            for key in USER_DATETIME_FIELDS:
+                if user.get(key) is not None:
+                    user[key] = user[key].isoformat()
+            users[row["user_id"]] = user
+        return users
+    
     def update_user(self, user_id: int, updates: Dict[str, Any]):
+        values = {}
+        for key, value in updates.items():
+            if key in USER_UPDATABLE_COLUMNS:
+                if key in USER_DATETIME_FIELDS and isinstance(value, str):
+                    value = datetime.fromisoformat(value)
+                values[key] = value
+        if not values:
+            return
+        
         session = self.get_session()
         try:
-            user = session.query(User).filter_by(user_id=user_id).first()
-            if user:
-                for key, value in updates.items():
-                    if hasattr(user, key):
-                        if key in ['first_wager_date', 'last_bonus_claim', 'last_game_date'] and isinstance(value, str):
-                            value = datetime.fromisoformat(value)
-                        setattr(user, key, value)
-                session.commit()
+            session.execute(USER_UPDATE_STMT, {"_user_id": user_id, **values})
+            session.commit()
+        finally:
+            session.close()
+    
+    def adjust_user(self, user_id: int, delta: float, increments: Optional[Dict[str, float]] = None,
+                    min_balance: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Add delta to the balance and increments to counters in one UPDATE; returns the fresh user.
+        
+        With min_balance the update only lands while the balance is at least
+        that much, and None is returned (nothing changed) otherwise.
+        """
+        increments = increments or {}
+        stmt = _balance_update_stmt(_increment_fields(increments), min_balance is not None)
+        params = _balance_update_params(user_id, delta, increments)
+        if min_balance is not None:
+            params["_min_balance"] = min_balance
+        session = self.get_session()
+        try:
+            result = session.execute(stmt, params)
+            if not result.rowcount:
+                exists = session.execute(USER_BY_ID_STMT, {"user_id": user_id}).first()
+                session.rollback()
+                if exists:
+                    return None
+                # First contact with this user: create the row, then apply the change
+                session.close()
+                self.get_user(user_id)
+                session = self.get_session()
+                if not session.execute(stmt, params).rowcount:
+                    return None
+            user = _user_row_to_dict(session.execute(USER_BY_ID_STMT, {"user_id": user_id}).mappings().first())
+            session.commit()
+            return user
+        finally:
+            session.close()
+    
+    def adjust_balances(self, deltas: Dict[int, float]) -> bool:
+        """Apply several balance deltas in one transaction, all or nothing.
+        
+        A negative delta only lands while the balance covers it; if any user
+        cannot cover theirs, nothing changes and False is returned.
+        """
+        session = self.get_session()
+        try:
+            for user_id, delta in deltas.items():
+                guarded = delta < 0
+                params = _balance_update_params(user_id, delta, {})
+                if guarded:
+                    params["_min_balance"] = -delta
+                if not session.execute(_balance_update_stmt((), guarded), params).rowcount:
+                    session.rollback()
+                    return False
+            session.commit()
+            return True
         finally:
             session.close()
     
@@ -328,9 +740,7 @@ class SQLDatabaseManager:
             multiplier = (payout / wager) if wager > 0 else 0.0
             
             if not username and user_id:
-                user = session.query(User).filter_by(user_id=user_id).first()
-                if user:
-                    username = user.username
+                username = session.execute(USERNAME_BY_ID_STMT, {"user_id": user_id}).scalar()
             
             game = Game(
                 user_id=user_id,
@@ -345,53 +755,100 @@ class SQLDatabaseManager:
                 timestamp=datetime.now()
             )
             session.add(game)
+            session.flush()
+            participants = _game_participants(user_id, details)
+            if participants:
+                session.execute(PARTICIPANT_INSERT_STMT, [{"game_id": game.id, "user_id": uid} for uid in participants])
             session.commit()
             return game.id
         finally:
             session.close()
     
+    def settle_game_batch(self, user_id: int, balance_delta: float, increments: Dict[str, float],
+                          house_delta: float, games: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Settle many finished rounds of one user in a single transaction.
+        
+        Adds balance_delta to the balance and increments to the user's counters,
+        house_delta to the house balance, and records every game dict (same
+        shape as record_game, with user_id set) with one bulk insert. Returns
+        the updated user.
+        """
+        session = self.get_session()
+        try:
+            # The rounds are already drawn, so the delta is applied without a floor
+            session.execute(_balance_update_stmt(_increment_fields(increments), False),
+                            _balance_update_params(user_id, balance_delta, increments))
+            self._add_house_balance(session, house_delta)
+            user = _user_row_to_dict(session.execute(USER_BY_ID_STMT, {"user_id": user_id}).mappings().first())
+            
+            if games:
+                now = datetime.now()
+                rows = []
+                for game_data in games:
+                    wager = game_data.get("wager", 0) or 0
+                    payout = game_data.get("payout", 0)
+                    rows.append({
+                        "user_id": game_data.get("user_id", user_id),
+                        "username": game_data.get("username", user['username']),
+                        "game_type": game_data.get("game_type", "unknown"),
+                        "wager": wager,
+                        "payout": payout,
+                        "result": game_data.get("result", ""),
+                        "multiplier": (payout / wager) if wager > 0 else 0.0,
+                        "details": game_data,
+                        "game_snapshot": None,
+                        "timestamp": now,
+                    })
+                game_ids = session.execute(GAMES_BULK_INSERT_STMT, rows).scalars().all()
+                participants = [
+                    {"game_id": game_id, "user_id": uid}
+                    for game_id, game_data in zip(game_ids, games)
+                    for uid in _game_participants(game_data.get("user_id", user_id), game_data)
+                ]
+                if participants:
+                    session.execute(PARTICIPANT_INSERT_STMT, participants)
+            session.commit()
+            return user
+        finally:
+            session.close()
+    
     def get_live_bets(self, limit: int = 20, after_id: int = None) -> List[Dict[str, Any]]:
         session = self.get_session()
         try:
-            query = session.query(Game).order_by(Game.id.desc())
             if after_id:
-                query = query.filter(Game.id > after_id)
-            games = query.limit(limit).all()
-            return [
-                {
-                    "id": g.id,
-                    "user_id": g.user_id,
-                    "username": g.username or f"User{str(g.user_id)[-4:]}",
-                    "game_type": g.game_type,
-                    "wager": g.wager,
-                    "payout": g.payout,
-                    "result": g.result,
-                    "multiplier": g.multiplier or 0.0,
-                    "timestamp": g.timestamp.isoformat() if g.timestamp else None,
-                }
-                for g in games
-            ]
+                result = session.execute(LATEST_GAMES_AFTER_STMT, {"after_id": after_id, "limit": limit})
+            else:
+                result = session.execute(LATEST_GAMES_STMT, {"limit": limit})
+            return [_game_row_to_summary(g) for g in result.mappings()]
+        finally:
+            session.close()
+    
+    def get_user_games(self, user_id: int, limit: int, offset: int = 0) -> List[Dict[str, Any]]:
+        """A page of the games a user took part in, newest first."""
+        session = self.get_session()
+        try:
+            rows = session.execute(USER_GAMES_PAGE_STMT, {"user_id": user_id, "limit": limit, "offset": offset})
+            return [_game_row_to_dict(g) for g in rows.mappings()]
+        finally:
+            session.close()
+    
+    def count_user_games(self, user_id: int) -> int:
+        session = self.get_session()
+        try:
+            return session.execute(USER_GAMES_COUNT_STMT, {"user_id": user_id}).scalar() or 0
         finally:
             session.close()
     
     def get_bet_details(self, bet_id: int) -> Optional[Dict[str, Any]]:
         session = self.get_session()
         try:
-            game = session.query(Game).filter_by(id=bet_id).first()
+            game = session.execute(GAME_BY_ID_STMT, {"game_id": bet_id}).mappings().first()
             if not game:
                 return None
             return {
-                "id": game.id,
-                "user_id": game.user_id,
-                "username": game.username or f"User{str(game.user_id)[-4:]}",
-                "game_type": game.game_type,
-                "wager": game.wager,
-                "payout": game.payout,
-                "result": game.result,
-                "multiplier": game.multiplier or 0.0,
-                "details": game.details or {},
-                "game_snapshot": game.game_snapshot,
-                "timestamp": game.timestamp.isoformat() if game.timestamp else None,
+                **_game_row_to_summary(game),
+                "details": game["details"] or {},
+                "game_snapshot": game["game_snapshot"],
             }
         finally:
             session.close()
@@ -399,9 +856,9 @@ class SQLDatabaseManager:
     def get_house_balance(self) -> float:
         session = self.get_session()
         try:
-            config = session.query(HouseConfig).filter_by(key="house_balance").first()
-            if config:
-                return float(config.value)
+            value = session.execute(CONFIG_BY_KEY_STMT, {"key": "house_balance"}).scalar()
+            if value is not None:
+                return float(value)
             return 10000.0
         finally:
             session.close()
@@ -409,16 +866,16 @@ class SQLDatabaseManager:
     def update_house_balance(self, change: float):
         session = self.get_session()
         try:
-            config = session.query(HouseConfig).filter_by(key="house_balance").first()
-            if config:
-                current = float(config.value)
-                config.value = str(current + change)
-            else:
-                session.add(HouseConfig(key="house_balance", value=str(10000.0 + change)))
+            self._add_house_balance(session, change)
             session.commit()
         finally:
             session.close()
     
+    @staticmethod
+    def _add_house_balance(session, change: float):
+        if not session.execute(HOUSE_BALANCE_ADD_STMT, {"change": change}).rowcount:
+            session.execute(CONFIG_INSERT_STMT, {"key": "house_balance", "value": str(10000.0 + change)})
+    
     def get_leaderboard(self, sort_by: str = "total_wagered", limit: int = 50) -> List[Dict[str, Any]]:
         session = self.get_session()
         try:
@@ -569,23 +1026,261 @@ class SQLDatabaseManager:
     def get_config(self, key: str, default: str = "") -> str:
         session = self.get_session()
         try:
-            config = session.query(HouseConfig).filter_by(key=key).first()
-            return config.value if config else default
+            row = session.execute(CONFIG_BY_KEY_STMT, {"key": key}).first()
+            return row[0] if row else default
         finally:
             session.close()
     
     def set_config(self, key: str, value: str):
         session = self.get_session()
         try:
-            config = session.query(HouseConfig).filter_by(key=key).first()
-            if config:
-                config.value = value
+            exists = session.execute(CONFIG_BY_KEY_STMT, {"key": key}).first()
+            if exists:
+                session.execute(CONFIG_UPDATE_STMT, {"_key": key, "value": value})
             else:
-                session.add(HouseConfig(key=key, value=value))
+                session.execute(CONFIG_INSERT_STMT, {"key": key, "value": value})
+            session.commit()
+        finally:
+            session.close()
+    
+    def get_pending_challenges(self) -> Dict[str, Dict[str, Any]]:
+        """Load every open PvP/bot challenge, migrating the legacy house_config blob once."""
+        session = self.get_session()
+        try:
+            rows = session.execute(ALL_CHALLENGES_STMT).all()
+            if rows:
+                return {challenge_id: data for challenge_id, data in rows}
+            
+            legacy = session.execute(CONFIG_BY_KEY_STMT, {"key": "pending_pvp"}).scalar()
+            if not legacy:
+                return {}
+            try:
+                challenges = json.loads(legacy)
+            except (TypeError, ValueError):
+                return {}
+            now = datetime.now()
+            for challenge_id, data in challenges.items():
+                session.execute(CHALLENGE_INSERT_STMT, {"challenge_id": challenge_id, "data": data, "updated_at": now})
+            session.execute(CONFIG_UPDATE_STMT, {"_key": "pending_pvp", "value": "{}"})
+            session.commit()
+            return challenges
+        finally:
+            session.close()
+    
+    def save_pending_challenge(self, challenge_id: str, data: Dict[str, Any]):
+        """Upsert a single challenge record."""
+        session = self.get_session()
+        try:
+            now = datetime.now()
+            exists = session.execute(CHALLENGE_EXISTS_STMT, {"challenge_id": challenge_id}).first()
+            if exists:
+                session.execute(CHALLENGE_UPDATE_STMT, {"_challenge_id": challenge_id, "data": data, "updated_at": now})
+            else:
+                session.execute(CHALLENGE_INSERT_STMT, {"challenge_id": challenge_id, "data": data, "updated_at": now})
+            session.commit()
+        finally:
+            session.close()
+    
+    def delete_pending_challenge(self, challenge_id: str):
+        session = self.get_session()
+        try:
+            session.execute(CHALLENGE_DELETE_STMT, {"challenge_id": challenge_id})
+            session.commit()
+        finally:
+            session.close()
+    
+    def set_deposit_invoice_owner(self, order_number: str, user_id: int, currency: str):
+        """Record who a pooled invoice was handed to; one row per invoice, so concurrent hand-outs never clash."""
+        session = self.get_session()
+        try:
+            session.execute(INVOICE_OWNER_INSERT_STMT, {"order_number": order_number, "user_id": user_id,
+                                                        "currency": currency, "assigned_at": datetime.now()})
             session.commit()
         finally:
             session.close()
     
+    def get_deposit_invoice_owner(self, order_number: str) -> Optional[int]:
+        session = self.get_session()
+        try:
+            owner = session.execute(INVOICE_OWNER_STMT, {"order_number": order_number}).scalar()
+            if owner is not None:
+                return owner
+            # Invoices handed out before the table existed are still in the legacy house_config blob
+            legacy = session.execute(CONFIG_BY_KEY_STMT, {"key": "deposit_invoice_owners"}).scalar()
+            try:
+                owner = json.loads(legacy).get(order_number) if legacy else None
+            except (TypeError, ValueError, AttributeError):
+                owner = None
+            return int(owner) if owner is not None else None
+        finally:
+            session.close()
+    
+    def create_withdrawal(self, user_id: int, username: str, amount: float, currency: str, wallet_address: str) -> int:
+        """Record a pending withdrawal (the balance is already held) and return its id."""
+        session = self.get_session()
+        try:
+            now = datetime.now()
+            withdrawal_id = session.execute(WITHDRAWAL_INSERT_STMT, {
+                "user_id": user_id, "username": username, "amount": amount, "currency": currency,
+                "wallet_address": wallet_address, "status": "pending", "timestamp": now, "updated_at": now,
+            }).scalar_one()
+            session.commit()
+            return withdrawal_id
+        finally:
+            session.close()
+    
+    def get_withdrawal(self, withdrawal_id: int) -> Optional[Dict[str, Any]]:
+        session = self.get_session()
+        try:
+            row = session.execute(WITHDRAWAL_BY_ID_STMT, {"withdrawal_id": withdrawal_id}).mappings().first()
+            return dict(row) if row else None
+        finally:
+            session.close()
+    
+    def get_withdrawals(self, status: str = "pending") -> List[Dict[str, Any]]:
+        session = self.get_session()
+        try:
+            return [dict(row) for row in session.execute(WITHDRAWALS_BY_STATUS_STMT, {"status": status}).mappings()]
+        finally:
+            session.close()
+    
+    def count_withdrawals(self, status: str = "pending") -> int:
+        session = self.get_session()
+        try:
+            return session.execute(WITHDRAWAL_COUNT_STMT, {"status": status}).scalar() or 0
+        finally:
+            session.close()
+    
+    def transition_withdrawal(self, withdrawal_id: int, from_status: str, to_status: str, **fields) -> bool:
+        """Move a withdrawal from from_status to to_status in one UPDATE; False if it was no longer in from_status."""
+        session = self.get_session()
+        try:
+            params = {"_withdrawal_id": withdrawal_id, "_status": from_status, "status": to_status,
+                      "updated_at": datetime.now(), **fields}
+            result = session.execute(WITHDRAWAL_TRANSITION_STMT, params)
+            session.commit()
+            return result.rowcount == 1
+        finally:
+            session.close()
+    
+    # --- Shared session store (session_store.SQLSessionStore) ---
+    # Every write bumps the key's version; compare-and-set writes only land if the
+    # version is still the one the caller read, so two workers cannot both win.
+    
+    def get_session_state(self, namespace: str, key: str) -> Optional[Tuple[Any, int]]:
+        session = self.get_session()
+        try:
+            row = session.execute(STATE_GET_STMT, {"namespace": namespace, "key": key}).first()
+            return (row.value, row.version) if row else None
+        finally:
+            session.close()
+    
+    def get_session_states(self, namespace: str) -> Dict[str, Tuple[Any, int]]:
+        session = self.get_session()
+        try:
+            rows = session.execute(STATE_NAMESPACE_STMT, {"namespace": namespace})
+            return {row.key: (row.value, row.version) for row in rows}
+        finally:
+            session.close()
+    
+    def put_session_states(self, namespace: str, items: Dict[str, Any]) -> Dict[str, int]:
+        """Write several values unconditionally in one transaction; returns the new version of each key."""
+        session = self.get_session()
+        try:
+            now = datetime.now()
+            versions = {}
+            for key, value in items.items():
+                params = {"_namespace": namespace, "_key": key, "value": value, "updated_at": now}
+                version = session.execute(STATE_PUT_STMT, params).scalar()
+                if version is None:
+                    try:
+                        with session.begin_nested():
+                            session.execute(STATE_INSERT_STMT, {
+                                "namespace": namespace, "key": key, "version": 1, "value": value, "updated_at": now})
+                        version = 1
+                    except IntegrityError:
+                        # Another worker created it between our update and insert
+                        version = session.execute(STATE_PUT_STMT, params).scalar()
+                versions[key] = version
+            session.commit()
+            return versions
+        finally:
+            session.close()
+    
+    def cas_session_state(self, namespace: str, key: str, value: Any, expected_version: int) -> Optional[int]:
+        """Write value only if key is at expected_version (0: key must not exist); the new version, or None on conflict."""
+        session = self.get_session()
+        try:
+            now = datetime.now()
+            if expected_version == 0:
+                try:
+                    session.execute(STATE_INSERT_STMT, {
+                        "namespace": namespace, "key": key, "version": 1, "value": value, "updated_at": now})
+                    session.commit()
+                    return 1
+                except IntegrityError:
+                    session.rollback()
+                    return None
+            result = session.execute(STATE_CAS_STMT, {
+                "_namespace": namespace, "_key": key, "_version": expected_version, "value": value, "updated_at": now})
+            session.commit()
+            return expected_version + 1 if result.rowcount else None
+        finally:
+            session.close()
+    
+    def delete_session_states(self, namespace: str, keys: List[str], expected_version: Optional[int] = None) -> int:
+        """Delete keys (only at expected_version, if given); returns how many rows went."""
+        session = self.get_session()
+        try:
+            deleted = 0
+            for key in keys:
+                if expected_version is None:
+                    result = session.execute(STATE_DELETE_STMT, {"namespace": namespace, "key": key})
+                else:
+                    result = session.execute(STATE_CAS_DELETE_STMT, {
+                        "namespace": namespace, "key": key, "version": expected_version})
+                deleted += result.rowcount
+            session.commit()
+            return deleted
+        finally:
+            session.close()
+    
+    def acquire_lease(self, name: str, owner: str, ttl: float, now: float) -> bool:
+        """Take or renew a lease until now + ttl; False if another owner holds it unexpired."""
+        session = self.get_session()
+        try:
+            expires_at = now + ttl
+            result = session.execute(LEASE_TAKE_STMT, {"_name": name, "_owner": owner, "now": now,
+                                                       "owner": owner, "expires_at": expires_at})
+            if result.rowcount:
+                session.commit()
+                return True
+            try:
+                session.execute(LEASE_INSERT_STMT, {"name": name, "owner": owner, "expires_at": expires_at})
+                session.commit()
+                return True
+            except IntegrityError:
+                session.rollback()
+                return False
+        finally:
+            session.close()
+    
+    def release_lease(self, name: str, owner: str) -> bool:
+        session = self.get_session()
+        try:
+            result = session.execute(LEASE_RELEASE_STMT, {"name": name, "owner": owner})
+            session.commit()
+            return bool(result.rowcount)
+        finally:
+            session.close()
+    
+    def get_lease_owner(self, name: str, now: float) -> Optional[str]:
+        session = self.get_session()
+        try:
+            return session.execute(LEASE_OWNER_STMT, {"name": name, "now": now}).scalar()
+        finally:
+            session.close()
+    
     def update_balance(self, user_id: int, amount: float):
         session = self.get_session()
         try:
@@ -0,0 +1,35 @@
+import logging
+import time
+from contextlib import contextmanager
+from typing import List, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class StartupTimer:
+    """Times the phases of bot startup and logs one report when it is done.
+
+    Each phase is logged as it finishes, so a restart that hangs shows the
+    last phase that completed; report() then logs every phase with its share
+    of the total.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases: List[Tuple[str, float]] = []
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.phases.append((name, elapsed))
+            logger.info(f"[STARTUP] {name}: {elapsed * 1000:.0f}ms")
+
+    def report(self):
+        total = time.perf_counter() - self.started
+        lines = [f"{name:<16} {elapsed * 1000:8.0f}ms {elapsed / total:6.1%}" if total else name
+                 for name, elapsed in self.phases]
+        logger.info(f"[STARTUP] Ready in {total * 1000:.0f}ms\n" + "\n".join(lines))
@@ -0,0 +1,158 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class _Timer:
+    __slots__ = ("key", "deadline_tick", "callback", "args", "level", "slot")
+
+    def __init__(self, key: str, deadline_tick: int, callback: Callable[..., Awaitable[Any]], args: Tuple):
+        self.key = key
+        self.deadline_tick = deadline_tick
+        self.callback = callback
+        self.args = args
+        self.level = -1
+        self.slot = -1
+
+
+class TimerWheel:
+    """Hierarchical timing wheel driven by a single background task.
+
+    Timers are addressed by key. schedule/cancel/reschedule are O(1): each
+    wheel slot is a dict keyed by timer key, and a timer only moves when its
+    outer-level slot cascades into the level below. Expired callbacks are
+    coroutine functions, launched as tasks so a slow handler never stalls
+    the wheel.
+    """
+
+    def __init__(self, tick: float = 0.25, slots_per_level: int = 256, levels: int = 3):
+        self.tick = tick
+        self.slots_per_level = slots_per_level
+        self.levels = levels
+        self._wheels: List[List[Dict[str, _Timer]]] = [
+            [{} for _ in range(slots_per_level)] for _ in range(levels)
+        ]
+        self._overflow: Dict[str, _Timer] = {}
+        self._timers: Dict[str, _Timer] = {}
+        self._origin = time.monotonic()
+        self._current_tick = 0
+        self._task: Optional[asyncio.Task] = None
+        self.fired = 0
+
+    def _now_tick(self) -> int:
+        return int((time.monotonic() - self._origin) / self.tick)
+
+    def _place(self, timer: _Timer):
+        remaining = timer.deadline_tick - self._current_tick
+        span = 1
+        for level in range(self.levels):
+            span_next = span * self.slots_per_level
+            if remaining < span_next:
+                slot = (timer.deadline_tick // span) % self.slots_per_level
+                timer.level, timer.slot = level, slot
+                self._wheels[level][slot][timer.key] = timer
+                return
+            span = span_next
+        timer.level, timer.slot = self.levels, -1
+        self._overflow[timer.key] = timer
+
+    def _unplace(self, timer: _Timer):
+        if timer.level == self.levels:
+            self._overflow.pop(timer.key, None)
+        elif timer.level >= 0:
+            self._wheels[timer.level][timer.slot].pop(timer.key, None)
+
+    def schedule(self, key: str, delay: float, callback: Callable[..., Awaitable[Any]], *args):
+        """Schedule callback(*args) after delay seconds, replacing any timer with the same key."""
+        self.cancel(key)
+        deadline_tick = max(self._current_tick + 1, self._now_tick() + max(1, int(round(delay / self.tick))))
+        timer = _Timer(key, deadline_tick, callback, args)
+        self._timers[key] = timer
+        self._place(timer)
+
+    def reschedule(self, key: str, delay: float) -> bool:
+        """Move an existing timer to a new deadline, keeping its callback."""
+        timer = self._timers.get(key)
+        if timer is None:
+            return False
+        self.schedule(key, delay, timer.callback, *timer.args)
+        return True
+
+    def cancel(self, key: str) -> bool:
+        timer = self._timers.pop(key, None)
+        if timer is None:
+            return False
+        self._unplace(timer)
+        return True
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._timers
+
+    def __len__(self) -> int:
+        return len(self._timers)
+
+    def _cascade(self):
+        """Move timers from outer levels down when the inner wheel wraps."""
+        span = 1
+        for level in range(1, self.levels + 1):
+            span *= self.slots_per_level
+            if self._current_tick % span:
+                return
+            if level == self.levels:
+                bucket, self._overflow = self._overflow, {}
+            else:
+                slot = (self._current_tick // span) % self.slots_per_level
+                bucket = self._wheels[level][slot]
+                self._wheels[level][slot] = {}
+            for timer in bucket.values():
+                self._place(timer)
+
+    def _advance(self) -> List[_Timer]:
+        """Advance to the current time and return the timers that expired."""
+        expired = []
+        target = self._now_tick()
+        while self._current_tick < target:
+            self._current_tick += 1
+            self._cascade()
+            slot = self._current_tick % self.slots_per_level
+            bucket = self._wheels[0][slot]
+            if not bucket:
+                continue
+            self._wheels[0][slot] = {}
+            for timer in bucket.values():
+                if timer.deadline_tick <= self._current_tick:
+                    self._timers.pop(timer.key, None)
+                    expired.append(timer)
+                else:
+                    self._place(timer)
+        return expired
+
+    async def _fire(self, timer: _Timer):
+        try:
+            await timer.callback(*timer.args)
+        except Exception as e:
+            logger.error(f"[TIMER] Callback for {timer.key} failed: {e}", exc_info=True)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.tick)
+            for timer in self._advance():
+                self.fired += 1
+                asyncio.create_task(self._fire(timer))
+
+    def start(self):
+        """Start the driver task on the running loop (idempotent)."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
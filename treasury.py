@@ -0,0 +1,80 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class TreasuryCache:
+    """Per-currency wallet balances, fetched concurrently and cached.
+
+    A refresh fetches every currency at once and stores each result as it
+    arrives, so one slow currency never holds up the others. Readers wait at
+    most `budget` seconds for a refresh; whatever has arrived by then is
+    returned (older values are kept and flagged stale) and the refresh keeps
+    running in the background to fill the cache for the next read. Balances
+    younger than `ttl` are served without touching the API.
+    """
+
+    def __init__(self, fetch: Callable[[str], Awaitable[Optional[dict]]], currencies: Iterable[str],
+                 ttl: float = 30.0, budget: float = 4.0):
+        self.fetch = fetch
+        self.currencies = list(currencies)
+        self.ttl = ttl
+        self.budget = budget
+        self._balances: Dict[str, dict] = {}
+        self._fetched_at: Dict[str, float] = {}
+        self._refresh: Optional[asyncio.Task] = None
+
+    def _is_fresh(self, currency: str, now: float) -> bool:
+        fetched_at = self._fetched_at.get(currency)
+        return fetched_at is not None and now - fetched_at <= self.ttl
+
+    async def _fetch_one(self, currency: str):
+        try:
+            data = await self.fetch(currency)
+        except Exception as e:
+            logger.error(f"[TREASURY] {currency} balance fetch failed: {e}")
+            return
+        if data:
+            self._balances[currency] = data
+            self._fetched_at[currency] = time.monotonic()
+
+    async def _refresh_all(self, currencies):
+        await asyncio.gather(*(self._fetch_one(c) for c in currencies))
+
+    def refresh(self) -> asyncio.Task:
+        """Start a refresh of every stale currency, or return the one already running."""
+        if self._refresh is None or self._refresh.done():
+            now = time.monotonic()
+            stale = [c for c in self.currencies if not self._is_fresh(c, now)]
+            self._refresh = asyncio.get_running_loop().create_task(self._refresh_all(stale))
+        return self._refresh
+
+    async def get(self) -> Dict[str, Dict[str, Any]]:
+        """Balances by currency, each with 'age' (seconds) and 'stale' added.
+
+        Currencies that have never been fetched are missing from the result.
+        """
+        now = time.monotonic()
+        if not all(self._is_fresh(c, now) for c in self.currencies):
+            try:
+                await asyncio.wait_for(asyncio.shield(self.refresh()), self.budget)
+            except asyncio.TimeoutError:
+                logger.warning(f"[TREASURY] Balance refresh exceeded {self.budget}s, returning partial results")
+            now = time.monotonic()
+        return {
+            currency: dict(self._balances[currency], age=now - self._fetched_at[currency],
+                           stale=not self._is_fresh(currency, now))
+            for currency in self.currencies if currency in self._balances
+        }
+
+    async def stop(self):
+        if self._refresh is not None and not self._refresh.done():
+            self._refresh.cancel()
+            try:
+                await self._refresh
+            except asyncio.CancelledError:
+                pass
+        self._refresh = None
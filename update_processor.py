@@ -0,0 +1,134 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Dict, Hashable, Optional
+
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+logger = logging.getLogger(__name__)
+
+
+class _Lane:
+    __slots__ = ("lock", "waiting")
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.waiting = 0
+
+
+class OrderedUpdateProcessor(BaseUpdateProcessor):
+    """Runs updates concurrently while keeping each user's updates in a chat in order.
+
+    Updates are keyed by the sending user and the chat they were sent in (by
+    user alone for inline queries, by chat alone when there is no user, e.g.
+    channel posts). Updates with the same key run one after another in
+    arrival order; updates with different keys run in parallel, at most
+    max_concurrent_updates at a time. An update only takes a worker slot once
+    it is first in its lane, so a user tapping the same button twenty times
+    queues behind themselves instead of blocking everybody else. One user's
+    updates in two chats may run side by side; balance changes are still
+    serialized per user by the wallet locks.
+
+    PTB's own semaphore (max_pending) only bounds how many updates may be
+    waiting at all; the worker cap is enforced here after lane ordering.
+    """
+
+    def __init__(self, max_concurrent_updates: int = 64, max_pending: int = 4096,
+                 slow_update_seconds: float = 5.0):
+        if max_concurrent_updates < 1:
+            raise ValueError("max_concurrent_updates must be a positive integer")
+        super().__init__(max(max_pending, max_concurrent_updates))
+        self.worker_limit = max_concurrent_updates
+        self.slow_update_seconds = slow_update_seconds
+        self._workers = asyncio.Semaphore(max_concurrent_updates)
+        self._lanes: Dict[Hashable, _Lane] = {}
+        self.running = 0
+        self.waiting = 0
+        self.peak_waiting = 0
+        self.processed = 0
+        self.failed = 0
+        self._wait_total = 0.0
+        self.max_wait = 0.0
+        self._run_total = 0.0
+
+    @staticmethod
+    def ordering_key(update: object) -> Optional[Hashable]:
+        if not isinstance(update, Update):
+            return None
+        chat_id = update.effective_chat.id if update.effective_chat else None
+        if update.effective_user:
+            return ("user", update.effective_user.id, chat_id)
+        if chat_id is not None:
+            return ("chat", chat_id)
+        return None
+
+    async def do_process_update(self, update: object, coroutine: "Awaitable[Any]") -> None:
+        key = self.ordering_key(update)
+        queued_at = time.monotonic()
+        self.waiting += 1
+        self.peak_waiting = max(self.peak_waiting, self.waiting)
+        lane = None
+        if key is not None:
+            lane = self._lanes.get(key)
+            if lane is None:
+                lane = self._lanes[key] = _Lane()
+            lane.waiting += 1
+        try:
+            if lane is not None:
+                await lane.lock.acquire()
+            try:
+                async with self._workers:
+                    started = time.monotonic()
+                    waited = started - queued_at
+                    self.waiting -= 1
+                    queued_at = None
+                    self._wait_total += waited
+                    self.max_wait = max(self.max_wait, waited)
+                    self.running += 1
+                    try:
+                        await coroutine
+                    except Exception:
+                        self.failed += 1
+                        raise
+                    finally:
+                        self.running -= 1
+                        self.processed += 1
+                        elapsed = time.monotonic() - started
+                        self._run_total += elapsed
+                        if elapsed > self.slow_update_seconds:
+                            logger.warning(f"[UPDATES] Slow update for {key}: {elapsed:.1f}s")
+            finally:
+                if lane is not None:
+                    lane.lock.release()
+        finally:
+            if queued_at is not None:
+                # Cancelled before getting a worker; the coroutine never ran
+                self.waiting -= 1
+                if asyncio.iscoroutine(coroutine):
+                    coroutine.close()
+            if lane is not None:
+                lane.waiting -= 1
+                if lane.waiting == 0:
+                    del self._lanes[key]
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        pass
+
+    def stats(self) -> Dict[str, Any]:
+        done = self.processed or 1
+        return {
+            "running": self.running,
+            "waiting": self.waiting,
+            "peak_waiting": self.peak_waiting,
+            "lanes": len(self._lanes),
+            "worker_limit": self.worker_limit,
+            "processed": self.processed,
+            "failed": self.failed,
+            "avg_wait_ms": self._wait_total / done * 1000,
+            "max_wait_ms": self.max_wait * 1000,
+            "avg_run_ms": self._run_total / done * 1000,
+        }
@@ -0,0 +1,143 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class _UserLock:
+    __slots__ = ("lock", "owner", "depth", "refs")
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.owner: Optional[asyncio.Task] = None
+        self.depth = 0
+        self.refs = 0
+
+
+class WalletLocks:
+    """Per-user asyncio locks, created on first use and dropped when idle.
+
+    Locks are re-entrant within one task, so a handler that already holds a
+    user's lock can call wallet helpers for the same user. Several users are
+    always acquired in ascending id order, so two transfers between the same
+    pair of users cannot deadlock. asyncio.Lock wakes waiters FIFO, which
+    gives per-user ordering while other users run in parallel.
+    """
+
+    def __init__(self):
+        self._locks: Dict[int, _UserLock] = {}
+
+    async def _acquire(self, user_id: int):
+        entry = self._locks.get(user_id)
+        if entry is None:
+            entry = self._locks[user_id] = _UserLock()
+        task = asyncio.current_task()
+        entry.refs += 1
+        if entry.owner is task:
+            entry.depth += 1
+            return
+        try:
+            await entry.lock.acquire()
+        except BaseException:
+            self._unref(user_id, entry)
+            raise
+        entry.owner = task
+        entry.depth = 1
+
+    def _release(self, user_id: int):
+        entry = self._locks[user_id]
+        entry.depth -= 1
+        if entry.depth == 0:
+            entry.owner = None
+            entry.lock.release()
+        self._unref(user_id, entry)
+
+    def _unref(self, user_id: int, entry: _UserLock):
+        entry.refs -= 1
+        if entry.refs == 0:
+            del self._locks[user_id]
+
+    @asynccontextmanager
+    async def hold(self, *user_ids: int):
+        """Hold the wallet lock of every given user (ids may repeat or be None)."""
+        ordered = sorted({uid for uid in user_ids if uid})
+        acquired = []
+        try:
+            for uid in ordered:
+                await self._acquire(uid)
+                acquired.append(uid)
+            yield
+        finally:
+            for uid in reversed(acquired):
+                self._release(uid)
+
+    def __len__(self) -> int:
+        """Number of users with a held or awaited lock."""
+        return len(self._locks)
+
+
+class Wallet:
+    """Every balance change goes through here.
+
+    Each operation takes the user's lock and changes the row with a relative
+    UPDATE (balance = balance + delta), with the balance check in the same
+    statement for debits. A handler that read user_data before an await can
+    therefore never write back a stale balance over a deposit, a refund, a
+    concurrent tap or another worker's change. Operations return the fresh
+    user dict.
+    """
+
+    def __init__(self, db, locks: Optional[WalletLocks] = None):
+        self.db = db
+        self.locks = locks or WalletLocks()
+
+    def hold(self, *user_ids: int):
+        return self.locks.hold(*user_ids)
+
+    async def adjust(self, user_id: int, delta: float, **increments: float) -> Dict[str, Any]:
+        """Add delta to the balance (and increments to counters like games_played)."""
+        async with self.locks.hold(user_id):
+            return self.db.adjust_user(user_id, delta, increments)
+
+    async def credit(self, user_id: int, amount: float, **increments: float) -> Dict[str, Any]:
+        return await self.adjust(user_id, amount, **increments)
+
+    async def debit(self, user_id: int, amount: float, **increments: float) -> Optional[Dict[str, Any]]:
+        """Take amount if the balance covers it; returns None (and changes nothing) otherwise."""
+        async with self.locks.hold(user_id):
+            return self.db.adjust_user(user_id, -amount, increments, min_balance=amount)
+
+    async def debit_many(self, amounts: Dict[int, float]) -> bool:
+        """Debit several users at once (e.g. both sides of a PvP stake), all or nothing."""
+        async with self.locks.hold(*amounts):
+            return self.db.adjust_balances({user_id: -amount for user_id, amount in amounts.items()})
+
+    async def transfer(self, from_id: int, to_id: int, amount: float) -> bool:
+        """Move amount between two users; False if the sender cannot cover it."""
+        async with self.locks.hold(from_id, to_id):
+            if from_id == to_id:
+                return self.db.get_user(from_id)['balance'] >= amount
+            return self.db.adjust_balances({from_id: -amount, to_id: amount})
+
+    async def settle_batch(self, user_id: int, play: Callable[[float], Optional[Tuple[float, float, Dict[str, float], List[Dict[str, Any]]]]]
+                           ) -> Optional[Dict[str, Any]]:
+        """Play and settle a batch of rounds for one user under the user's lock.
+
+        play(balance) runs the rounds the balance allows and returns
+        (balance_delta, house_delta, increments, games), or None if it played
+        nothing. The whole batch is then written in one transaction. Returns
+        the updated user, or None if nothing was played.
+        """
+        async with self.locks.hold(user_id):
+            outcome = play(self.db.get_user(user_id)['balance'])
+            if outcome is None:
+                return None
+            balance_delta, house_delta, increments, games = outcome
+            return self.db.settle_game_batch(user_id, balance_delta, increments, house_delta, games)
+
+    async def set_balance(self, user_id: int, amount: float) -> Dict[str, Any]:
+        async with self.locks.hold(user_id):
+            self.db.update_user(user_id, {'balance': amount})
+            return self.db.get_user(user_id)
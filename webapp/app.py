@@ -16,6 +16,7 @@ except ImportError:
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from sql_database import SQLDatabaseManager
+from levels import get_user_level as get_current_level, get_next_level
 
 app = Flask(__name__, static_folder='static', template_folder='templates')
 
@@ -101,48 +102,9 @@ def validate_init_data(init_data):
         pass
     return None
 
-LEVEL_TIERS = [
-    {"name": "Bronze", "emoji": "🥉", "thresholds": [100, 500, 1000, 2500, 5000]},
-    {"name": "Silver", "emoji": "🥈", "thresholds": [10000, 15200, 20500, 26000, 32000]},
-    {"name": "Gold", "emoji": "🏆", "thresholds": [39000, 48000, 58000, 69000, 81000]},
-    {"name": "Platinum", "emoji": "💎", "thresholds": [94000, 107500, 122000, 138000, 155000]},
-    {"name": "Diamond", "emoji": "💠", "thresholds": [173000, 192000, 211500, 232000, 253000]},
-    {"name": "Emerald", "emoji": "💚", "thresholds": [275000, 298000, 322000, 347000, 373000]},
-    {"name": "Ruby", "emoji": "❤️", "thresholds": [400000, 428000, 457000, 487000, 518000]},
-    {"name": "Sapphire", "emoji": "💙", "thresholds": [550000, 583000, 617000, 652000, 688000]},
-    {"name": "Amethyst", "emoji": "💜", "thresholds": [725000, 763000, 802000, 842000, 883000]},
-    {"name": "Obsidian", "emoji": "🖤", "thresholds": [925000, 968000, 1012000, 1058000, 1107000]},
-    {"name": "Mythic", "emoji": "🔮", "thresholds": [1159000, 1213000, 1270000, 1330000, 1393000]},
-    {"name": "Legendary", "emoji": "👑", "thresholds": [1458000, 1525000, 1595000, 1668000, 1743000]},
-    {"name": "Ethereal", "emoji": "✨", "thresholds": [1850000, 2000000, 2175000, 2400000, 2650000]},
-]
-
 def get_user_level(total_wagered):
-    current_level = {"name": "Unranked", "emoji": "⚪", "threshold": 0}
-    next_level = None
-    
-    all_levels = []
-    for tier in LEVEL_TIERS:
-        for i, threshold in enumerate(tier["thresholds"]):
-            all_levels.append({
-                "name": f"{tier['name']} {['I', 'II', 'III', 'IV', 'V'][i]}",
-                "emoji": tier["emoji"],
-                "threshold": threshold
-            })
-    
-    for i, level in enumerate(all_levels):
-        if total_wagered >= level["threshold"]:
-            current_level = level
-            if i + 1 < len(all_levels):
-                next_level = all_levels[i + 1]
-            else:
-                next_level = None
-        else:
-            if current_level["name"] == "Unranked":
-                next_level = level
-            break
-    
-    return current_level, next_level
+    # Same level table as the bot (levels.py)
+    return get_current_level(total_wagered), get_next_level(total_wagered)
 
 def get_user_from_db(user_id):
     try:
@@ -8,6 +8,8 @@ from datetime import datetime
 from aiohttp import web
 from telegram import Update
 
+from worker_router import FORWARD_PATH, SECRET_HEADER
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -18,42 +20,49 @@ class WebhookServer:
         self.bot = bot
         self.port = port or int(os.getenv("PORT", "5000"))
         self.app = web.Application()
-        self.last_challenge_check = datetime.now()
+        self._runner = None
         self.setup_routes()
         
     def setup_routes(self):
         self.app.router.add_post('/webhook/deposit', self.handle_deposit_webhook)
         self.app.router.add_get('/webhook/deposit', self.webhook_validation)
         self.app.router.add_post('/webhook/telegram', self.handle_telegram_webhook)
+        self.app.router.add_post(FORWARD_PATH, self.handle_forwarded_update)
         self.app.router.add_get('/health', self.health_check)
         self.app.router.add_get('/', self.home)
         
     async def home(self, request):
-        await self.periodic_challenge_check()
         return web.Response(text="Casino Bot Webhook Server", status=200)
     
-    async def periodic_challenge_check(self):
-        now = datetime.now()
-        if (now - self.last_challenge_check).total_seconds() >= 5:
-            self.last_challenge_check = now
-            try:
-                await self.bot.check_expired_challenges(None)
-            except Exception as e:
-                logger.error(f"Error checking expired challenges: {e}")
-    
     async def handle_telegram_webhook(self, request):
         try:
-            await self.periodic_challenge_check()
             data = await request.json()
             logger.info(f"Received Telegram update: {json.dumps(data)[:500]}")
             update = Update.de_json(data, self.bot.app.bot)
             logger.info(f"Processing update - chat_type: {update.effective_chat.type if update.effective_chat else 'unknown'}, message: {update.effective_message.text if update.effective_message else 'no message'}")
-            await self.bot.app.process_update(update)
+            # With several workers, the worker holding this chat's live state handles it
+            if await self.bot.worker_router.route(update, data):
+                return web.Response(text="OK", status=200)
+            # Queue it so the bot's update processor applies per-user ordering and the concurrency cap
+            await self.bot.app.update_queue.put(update)
             return web.Response(text="OK", status=200)
         except Exception as e:
             logger.error(f"Telegram webhook error: {e}", exc_info=True)
             return web.Response(text="Error", status=500)
         
+    async def handle_forwarded_update(self, request):
+        """An update another worker received for a chat whose state lives on this worker."""
+        try:
+            data = await request.json()
+            update = Update.de_json(data, self.bot.app.bot)
+            if not await self.bot.worker_router.accept(update, request.headers.get(SECRET_HEADER)):
+                return web.Response(text="Forbidden", status=403)
+            await self.bot.app.update_queue.put(update)
+            return web.Response(text="OK", status=200)
+        except Exception as e:
+            logger.error(f"Forwarded update error: {e}", exc_info=True)
+            return web.Response(text="Error", status=500)
+        
     async def webhook_validation(self, request):
         return web.json_response({"status": "ok", "message": "Webhook endpoint ready"})
         
@@ -98,6 +107,12 @@ class WebhookServer:
                         detected_currency = parts[2]
                 except (IndexError, ValueError):
                     pass
+            elif order_number and order_number.startswith('pool_'):
+                # Pre-generated invoice: the owner was recorded when it was handed out
+                user_id = self.bot.deposit_invoice_owner(order_number)
+                parts = order_number.split('_')
+                if len(parts) >= 2 and parts[1] in SUPPORTED_CURRENCIES:
+                    detected_currency = parts[1]
             
             if not user_id:
                 user_id, detected_currency = self.find_user_by_deposit_address(address)
@@ -131,9 +146,7 @@ class WebhookServer:
             # Credit full deposit amount (no fee)
             credited_amount = round(raw_amount, 2)
             
-            user_data = self.bot.db.get_user(user_id)
-            user_data['balance'] += credited_amount
-            self.bot.db.update_user(user_id, user_data)
+            user_data = await self.bot.wallet.credit(user_id, credited_amount)
             
             tx_display = tx_id[:16] if tx_id and len(tx_id) > 16 else tx_id
             self.bot.db.add_transaction(user_id, "deposit", credited_amount, f"{detected_currency} Deposit (Auto) - TX: {tx_display}...")
@@ -206,38 +219,47 @@ class WebhookServer:
     async def generate_new_address_for_user(self, user_id, currency='LTC'):
         """Generate a new deposit address for the user after their deposit was processed."""
         try:
-            address_data = await self.bot.generate_coinremitter_address(user_id, currency)
+            address_data = await self.bot.assign_deposit_address(user_id, currency)
             
             if address_data:
-                user_data = self.bot.db.get_user(user_id)
                 address_key = f'{currency.lower()}_deposit_address'
-                qr_key = f'{currency.lower()}_qr_code'
-                expires_key = f'{currency.lower()}_address_expires'
-                
-                user_data[address_key] = address_data.get('address')
-                user_data[qr_key] = address_data.get('qr_code')
-                user_data[expires_key] = address_data.get('expire_on')
-                self.bot.db.update_user(user_id, user_data)
+                self.bot.db.update_user(user_id, {
+                    address_key: address_data.get('address'),
+                    f'{currency.lower()}_qr_code': address_data.get('qr_code'),
+                    f'{currency.lower()}_address_expires': address_data.get('expire_on'),
+                })
                 self.bot.db.save_data()
                 
-                logger.info(f"Generated new {currency} deposit address for user {user_id}: {user_data[address_key]}")
+                logger.info(f"Generated new {currency} deposit address for user {user_id}: {address_data.get('address')}")
             else:
                 logger.warning(f"Could not generate new {currency} address for user {user_id}")
         except Exception as e:
             logger.error(f"Error generating new {currency} address for user {user_id}: {e}")
     
     async def start(self):
-        runner = web.AppRunner(self.app)
-        await runner.setup()
-        site = web.TCPSite(runner, '0.0.0.0', self.port)
+        """Start listening and return; the server runs in the background until stop()."""
+        self._runner = web.AppRunner(self.app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, '0.0.0.0', self.port)
         await site.start()
         logger.info(f"Webhook server started on port {self.port}")
-        await asyncio.Event().wait()
+
+    async def serve_forever(self):
+        await self.start()
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await self.stop()
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
 
 async def main():
     """Run webhook server in demo mode without bot"""
     server = WebhookServer(bot=None, port=5000)
-    await server.start()
+    await server.serve_forever()
 
 if __name__ == '__main__':
     asyncio.run(main())
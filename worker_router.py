@@ -0,0 +1,160 @@
+import asyncio
+import hmac
+import logging
+import os
+import time
+from typing import Any, Dict, Optional
+
+import aiohttp
+from telegram import Update
+
+from session_store import SessionStore
+
+logger = logging.getLogger(__name__)
+
+FORWARD_PATH = "/internal/update"
+SECRET_HEADER = "X-Worker-Secret"
+
+
+class WorkerRouter:
+    """Spreads webhook updates over several bot workers that share one session store.
+
+    Live game state stays in the memory of the worker that created it, so
+    every update for a chat must reach that worker. The first worker to see
+    an update for a chat takes the lease "chat:<id>" in the shared store
+    (private chats share their id with the user; updates without a chat,
+    such as inline queries, use "user:<id>") and renews it with every update
+    it handles. A worker that receives an update for a chat leased to another
+    worker forwards the raw update to that worker's FORWARD_PATH. Leases
+    outlive the longest game and challenge timers, so a chat only moves to
+    another worker once it has gone quiet.
+
+    Leases are per chat, but much of the bot's in-memory state is per user
+    (the *_sessions stores, ActiveGameRegistry, pending_opponent_selection,
+    WalletLocks). A user who plays in a private chat served by one worker
+    and in a group served by another has that state split between the two:
+    each worker enforces "one active game" only for the games it holds.
+    Balances stay correct regardless, because every balance change is a
+    relative UPDATE in the database (see Wallet). Leasing per user instead
+    would split group challenges, which live with the chat they were posted
+    in, so per-chat is the lesser limitation.
+
+    If the owner cannot be reached the update is handled locally and the owner
+    is skipped for `retry_after` seconds; its leases lapse on their own.
+
+    Sharing is off (every update is handled locally, as with a single worker)
+    unless WORKER_URL (this worker's address as the others reach it) and
+    WORKER_SECRET (shared by all workers) are both set.
+    """
+
+    def __init__(self, store: SessionStore, worker_url: Optional[str] = None, secret: Optional[str] = None,
+                 lease_ttl: float = 600.0, forward_timeout: float = 3.0, retry_after: float = 30.0):
+        self.store = store
+        self.worker_url = (worker_url or "").rstrip("/")
+        self.secret = secret or ""
+        self.lease_ttl = lease_ttl
+        self.forward_timeout = forward_timeout
+        self.retry_after = retry_after
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._unreachable: Dict[str, float] = {}
+        self.local = 0
+        self.forwarded = 0
+        self.received = 0
+        self.forward_failures = 0
+        self.store_errors = 0
+        if self.worker_url and not self.secret:
+            logger.warning("[WORKERS] WORKER_URL is set without WORKER_SECRET; updates will not be shared")
+
+    @classmethod
+    def from_env(cls, store: SessionStore) -> "WorkerRouter":
+        return cls(store, os.getenv("WORKER_URL"), os.getenv("WORKER_SECRET"),
+                   lease_ttl=float(os.getenv("WORKER_LEASE_TTL", "600")))
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.worker_url and self.secret)
+
+    @staticmethod
+    def lease_name(update: Update) -> Optional[str]:
+        if update.effective_chat:
+            return f"chat:{update.effective_chat.id}"
+        if update.effective_user:
+            return f"user:{update.effective_user.id}"
+        return None
+
+    def claim(self, update: Update) -> Optional[str]:
+        """Take or renew the update's lease; None if this worker should handle it, else the owner's URL.
+
+        Blocks on the store; call it through asyncio.to_thread from the event loop.
+        """
+        name = self.lease_name(update)
+        if name is None:
+            return None
+        try:
+            if self.store.acquire_lease(name, self.worker_url, self.lease_ttl):
+                return None
+            owner = self.store.lease_owner(name)
+        except Exception as e:
+            # The store being down must not stop the bot; handle the update here
+            self.store_errors += 1
+            logger.error(f"[WORKERS] Lease check for {name} failed: {e}")
+            return None
+        return owner if owner and owner != self.worker_url else None
+
+    async def route(self, update: Update, data: Dict[str, Any]) -> bool:
+        """Forward the update if another worker owns its chat; True if it was forwarded (do not handle it here)."""
+        if not self.enabled:
+            self.local += 1
+            return False
+        owner = await asyncio.to_thread(self.claim, update)
+        if owner is None or self._unreachable.get(owner, 0) > time.monotonic():
+            self.local += 1
+            return False
+        if await self._forward(owner, data):
+            self.forwarded += 1
+            return True
+        self.forward_failures += 1
+        self._unreachable[owner] = time.monotonic() + self.retry_after
+        self.local += 1
+        return False
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=self.forward_timeout))
+        return self._session
+
+    async def _forward(self, owner: str, data: Dict[str, Any]) -> bool:
+        try:
+            async with self._get_session().post(f"{owner}{FORWARD_PATH}", json=data,
+                                                headers={SECRET_HEADER: self.secret}) as resp:
+                if resp.status == 200:
+                    return True
+                logger.warning(f"[WORKERS] {owner} refused a forwarded update: HTTP {resp.status}")
+        except Exception as e:
+            logger.warning(f"[WORKERS] Forwarding to {owner} failed: {e}")
+        return False
+
+    async def accept(self, update: Update, secret: Optional[str]) -> bool:
+        """Check a forwarded update's secret and renew its lease here; it is always handled locally (no second hop)."""
+        if not self.enabled or not hmac.compare_digest(secret or "", self.secret):
+            return False
+        self.received += 1
+        await asyncio.to_thread(self.claim, update)
+        return True
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "worker": self.worker_url or "local",
+            "local": self.local,
+            "forwarded": self.forwarded,
+            "received": self.received,
+            "forward_failures": self.forward_failures,
+            "store_errors": self.store_errors,
+            "store": self.store.stats(),
+        }